@@ -4,6 +4,7 @@ import { useNavigate } from 'react-router-dom';
 import { toast } from 'react-hot-toast'; // Import toast for feedback
 import { useAuth } from '../context/AuthContext';
 import TradeOfferDialog from './TradeOfferDialog';
+import API_BASE_URL from '../config';
 
 // MUI Components
 import IconButton from '@mui/material/IconButton';
@@ -47,6 +48,7 @@ function ArtworkCard({
     const { isAuthenticated } = useAuth();
     const [tradeDialogOpen, setTradeDialogOpen] = useState(false);
     const [imageError, setImageError] = useState(false);
+    const [decalRenderFailed, setDecalRenderFailed] = useState(false);
 
     // Basic check if artwork data exists
     if (!artwork) {
@@ -58,6 +60,23 @@ function ArtworkCard({
 
     // Determine the best image URL to use (prefer thumbnail for cards)
     const displayImageUrl = artwork.thumbnail_url || artwork.image_url || PLACEHOLDER_IMAGE_URL;
+    // Resized renditions from the upload pipeline: card size at 1x, detail size on high-DPI screens
+    const cardVariant = artwork.image_variants?.card;
+    const hiDpiVariant = artwork.image_variants?.detail;
+    const webpSrcSet = cardVariant?.webp
+        ? [`${cardVariant.webp} 1x`, hiDpiVariant?.webp && `${hiDpiVariant.webp} 2x`].filter(Boolean).join(', ')
+        : null;
+    // Tiny inline preview painted (blurred) behind the image until it loads - no extra request
+    const placeholderStyle = artwork.placeholder
+        ? { backgroundImage: `url("${artwork.placeholder}")`, backgroundSize: 'cover', backgroundPosition: 'center' }
+        : undefined;
+
+    // Image and border decal composited by the server (one cached WebP), falling back to
+    // layering the decal SVG here if the render can't be loaded. The URL redirects to the
+    // render for the decal's current version, so edited decals are never served stale.
+    const decalRenderUrl = (size) =>
+        `${API_BASE_URL}/artworks/${artwork.artwork_id}/decal/${encodeURIComponent(artwork.border_decal_id)}/${size}`;
+    const showDecalRender = Boolean(artwork.border_decal_id && artwork.artwork_id && !decalRenderFailed);
 
     // Handle potential image loading errors
     const handleImageError = (event) => {
@@ -137,15 +156,32 @@ function ArtworkCard({
             <div className="artwork-card-inner">
                 {/* --- Front Face --- */}
                 <div className="artwork-card-front">
-                    <div className="artwork-card-front__image-container">
-                        {displayImageUrl ? (
+                    <div className="artwork-card-front__image-container" style={placeholderStyle}>
+                        {showDecalRender ? (
+                            <img
+                                src={decalRenderUrl('card')}
+                                srcSet={`${decalRenderUrl('card')} 1x, ${decalRenderUrl('detail')} 2x`}
+                                alt={artwork.title || 'Artwork'}
+                                loading="lazy"
+                                decoding="async"
+                                className="artwork-card-front__image"
+                                onError={() => setDecalRenderFailed(true)}
+                            />
+                        ) : displayImageUrl ? (
                             <>
-                                <img
-                                    src={displayImageUrl}
-                                    alt={artwork.title || 'Artwork'}
-                                    className="artwork-card-front__image"
-                                    onError={handleImageError}
-                                />
+                                <picture>
+                                    {webpSrcSet && <source type="image/webp" srcSet={webpSrcSet} />}
+                                    <img
+                                        src={cardVariant?.jpeg || displayImageUrl}
+                                        alt={artwork.title || 'Artwork'}
+                                        width={cardVariant?.width || artwork.width || undefined}
+                                        height={cardVariant?.height || artwork.height || undefined}
+                                        loading="lazy"
+                                        decoding="async"
+                                        className="artwork-card-front__image"
+                                        onError={handleImageError}
+                                    />
+                                </picture>
                                 {/* Show SVG border if one is selected */}
                                 {artwork.border_decal_id && (
                                     <object
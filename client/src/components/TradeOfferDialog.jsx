@@ -46,6 +46,11 @@ const TradeOfferDialog = ({
   const [theirArtworks, setTheirArtworks] = useState([]);
   const [isLoadingMyArtworks, setIsLoadingMyArtworks] = useState(false);
   const [isLoadingTheirArtworks, setIsLoadingTheirArtworks] = useState(false);
+  // Tradeable artworks are cursor paginated; null once the last page is loaded
+  const [myArtworksCursor, setMyArtworksCursor] = useState(null);
+  const [theirArtworksCursor, setTheirArtworksCursor] = useState(null);
+  const [isLoadingMoreMyArtworks, setIsLoadingMoreMyArtworks] = useState(false);
+  const [isLoadingMoreTheirArtworks, setIsLoadingMoreTheirArtworks] = useState(false);
   
   // Trade message
   const [message, setMessage] = useState('');
@@ -53,31 +58,38 @@ const TradeOfferDialog = ({
   // Submission state
   const [isSubmitting, setIsSubmitting] = useState(false);
   
-  // Fetch my collected artworks
-  const fetchMyArtworks = async () => {
-    setIsLoadingMyArtworks(true);
+  // Fetch my collected artworks; with a cursor, appends the next page
+  const fetchMyArtworks = async (cursor = null) => {
+    const setLoading = cursor ? setIsLoadingMoreMyArtworks : setIsLoadingMyArtworks;
+    setLoading(true);
     try {
-      const response = await apiService.get('/users/me/collected-artworks'); // Removed extra '/api'
-      setMyArtworks(response.data.collectedArtworks?.map(item => item.artwork) || []);
+      // Only artworks not already committed to a pending trade
+      const response = await apiService.get('/users/me/tradeable-artworks', { params: { limit: 100, cursor: cursor || undefined } });
+      const artworks = response.data.artworks || [];
+      setMyArtworks(prev => cursor ? [...prev, ...artworks] : artworks);
+      setMyArtworksCursor(response.data.pagination?.next_cursor || null);
     } catch (err) {
       console.error("Failed to fetch my artworks:", err);
       toast.error("Could not load your collection");
     } finally {
-      setIsLoadingMyArtworks(false);
+      setLoading(false);
     }
   };
   
-  // Fetch their collected artworks
-  const fetchTheirArtworks = async () => {
-    setIsLoadingTheirArtworks(true);
+  // Fetch their collected artworks; with a cursor, appends the next page
+  const fetchTheirArtworks = async (cursor = null) => {
+    const setLoading = cursor ? setIsLoadingMoreTheirArtworks : setIsLoadingTheirArtworks;
+    setLoading(true);
     try {
-      const response = await apiService.get(`/users/${recipientId}/collected-artworks`); // Removed extra '/api'
-      setTheirArtworks(response.data.collectedArtworks?.map(item => item.artwork) || []);
+      const response = await apiService.get(`/users/${recipientId}/tradeable-artworks`, { params: { limit: 100, cursor: cursor || undefined } });
+      const artworks = response.data.artworks || [];
+      setTheirArtworks(prev => cursor ? [...prev, ...artworks] : artworks);
+      setTheirArtworksCursor(response.data.pagination?.next_cursor || null);
     } catch (err) {
       console.error(`Failed to fetch ${recipientUsername}'s artworks:`, err);
       toast.error(`Could not load ${recipientUsername}'s collection`);
     } finally {
-      setIsLoadingTheirArtworks(false);
+      setLoading(false);
     }
   };
   
@@ -210,6 +222,18 @@ const TradeOfferDialog = ({
                 </Grid>
               ))}
             </Grid>
+            
+            {myArtworksCursor && (
+              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                <Button
+                  variant="outlined"
+                  onClick={() => fetchMyArtworks(myArtworksCursor)}
+                  disabled={isLoadingMoreMyArtworks}
+                >
+                  {isLoadingMoreMyArtworks ? <CircularProgress size={20} /> : 'Load more'}
+                </Button>
+              </Box>
+            )}
           </Box>
         )}
         
@@ -264,6 +288,18 @@ const TradeOfferDialog = ({
                 </Grid>
               ))}
             </Grid>
+            
+            {theirArtworksCursor && (
+              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                <Button
+                  variant="outlined"
+                  onClick={() => fetchTheirArtworks(theirArtworksCursor)}
+                  disabled={isLoadingMoreTheirArtworks}
+                >
+                  {isLoadingMoreTheirArtworks ? <CircularProgress size={20} /> : 'Load more'}
+                </Button>
+              </Box>
+            )}
           </Box>
         )}
         
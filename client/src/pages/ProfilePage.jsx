@@ -131,6 +131,12 @@ function ProfilePage() {
     const [receivedTrades, setReceivedTrades] = useState([]);
     const [isLoadingSentTrades, setIsLoadingSentTrades] = useState(false);
     const [isLoadingReceivedTrades, setIsLoadingReceivedTrades] = useState(false);
+    // Trade lists are cursor paginated; null once the last page is loaded
+    const [sentTradesCursor, setSentTradesCursor] = useState(null);
+    const [receivedTradesCursor, setReceivedTradesCursor] = useState(null);
+    const [isLoadingMoreSentTrades, setIsLoadingMoreSentTrades] = useState(false);
+    const [isLoadingMoreReceivedTrades, setIsLoadingMoreReceivedTrades] = useState(false);
+    const [tradeSummary, setTradeSummary] = useState(null); // Pending counts across all pages
     const [activeTradeSubTab, setActiveTradeSubTab] = useState(0); // 0 for received, 1 for sent
     const [sentTradesFilter, setSentTradesFilter] = useState('all');
     const [receivedTradesFilter, setReceivedTradesFilter] = useState('all');
@@ -171,33 +177,53 @@ function ProfilePage() {
         setActiveTradeSubTab(newValue);
     };
     
-    const fetchReceivedTrades = useCallback(async () => {
+    // Without a cursor, reloads the first page; with one, appends the next page
+    const fetchReceivedTrades = useCallback(async (cursor = null) => {
         if (!isOwnProfile) return;
         
-        setIsLoadingReceivedTrades(true);
+        const setLoading = cursor ? setIsLoadingMoreReceivedTrades : setIsLoadingReceivedTrades;
+        setLoading(true);
         try {
-            const response = await apiService.get('/trades/received');
-            setReceivedTrades(response.data.trades || []);
+            const response = await apiService.get('/trades/received', { params: cursor ? { cursor } : {} });
+            const trades = response.data.trades || [];
+            setReceivedTrades(prev => cursor ? [...prev, ...trades] : trades);
+            setReceivedTradesCursor(response.data.pagination?.next_cursor || null);
         } catch (err) {
             console.error("Failed to fetch received trades:", err);
             toast.error("Could not load received trades");
         } finally {
-            setIsLoadingReceivedTrades(false);
+            setLoading(false);
         }
     }, [isOwnProfile]);
     
-    const fetchSentTrades = useCallback(async () => {
+    // Without a cursor, reloads the first page; with one, appends the next page
+    const fetchSentTrades = useCallback(async (cursor = null) => {
         if (!isOwnProfile) return;
         
-        setIsLoadingSentTrades(true);
+        const setLoading = cursor ? setIsLoadingMoreSentTrades : setIsLoadingSentTrades;
+        setLoading(true);
         try {
-            const response = await apiService.get('/trades/sent');
-            setSentTrades(response.data.trades || []);
+            const response = await apiService.get('/trades/sent', { params: cursor ? { cursor } : {} });
+            const trades = response.data.trades || [];
+            setSentTrades(prev => cursor ? [...prev, ...trades] : trades);
+            setSentTradesCursor(response.data.pagination?.next_cursor || null);
         } catch (err) {
             console.error("Failed to fetch sent trades:", err);
             toast.error("Could not load sent trades");
         } finally {
-            setIsLoadingSentTrades(false);
+            setLoading(false);
+        }
+    }, [isOwnProfile]);
+    
+    const fetchTradeSummary = useCallback(async () => {
+        if (!isOwnProfile) return;
+
+        try {
+            const response = await apiService.get('/trades/summary');
+            setTradeSummary(response.data);
+        } catch (err) {
+            console.error("Failed to fetch trade summary:", err);
+            setTradeSummary(null); // Fall back to counting the loaded trades
         }
     }, [isOwnProfile]);
     
@@ -206,8 +232,9 @@ function ProfilePage() {
         if (activeTab === (isArtist ? 2 : 1) && isOwnProfile) {
             fetchReceivedTrades();
             fetchSentTrades();
+            fetchTradeSummary();
         }
-    }, [activeTab, isOwnProfile, isArtist, fetchReceivedTrades, fetchSentTrades]);
+    }, [activeTab, isOwnProfile, isArtist, fetchReceivedTrades, fetchSentTrades, fetchTradeSummary]);
     
     const handleAcceptTrade = async (tradeId) => {
         try {
@@ -216,6 +243,7 @@ function ProfilePage() {
             // Refresh both trades and collections
             fetchReceivedTrades();
             fetchSentTrades();
+            fetchTradeSummary();
             // Also refresh collected artworks since ownership changed
             if (collectedArtworksPage === 1) {
                 // If on first page, just refresh
@@ -236,6 +264,7 @@ function ProfilePage() {
             await apiService.post(`/trades/${tradeId}/reject`);
             toast.success("Trade rejected");
             fetchReceivedTrades();
+            fetchTradeSummary();
         } catch (err) {
             console.error("Failed to reject trade:", err);
             toast.error(err.response?.data?.error || "Failed to reject trade");
@@ -247,6 +276,7 @@ function ProfilePage() {
             await apiService.post(`/trades/${tradeId}/cancel`);
             toast.success("Trade canceled");
             fetchSentTrades();
+            fetchTradeSummary();
         } catch (err) {
             console.error("Failed to cancel trade:", err);
             toast.error(err.response?.data?.error || "Failed to cancel trade");
@@ -865,9 +895,9 @@ function ProfilePage() {
                             indicatorColor="primary"
                             sx={{ minHeight: '48px' }}
                         >
-                            {/* Use case-insensitive filter for counts */}
-                            <Tab label={`Incoming (${receivedTrades.filter(t => t.status && t.status.toLowerCase() === 'pending').length})`} />
-                            <Tab label={`Outgoing (${sentTrades.filter(t => t.status && t.status.toLowerCase() === 'pending').length})`} />
+                            {/* Counts cover every page; until the summary loads, count the loaded trades (case-insensitive) */}
+                            <Tab label={`Incoming (${tradeSummary?.pending_received ?? receivedTrades.filter(t => t.status && t.status.toLowerCase() === 'pending').length})`} />
+                            <Tab label={`Outgoing (${tradeSummary?.pending_sent ?? sentTrades.filter(t => t.status && t.status.toLowerCase() === 'pending').length})`} />
                         </Tabs>
                     </Box>
 
@@ -1028,6 +1058,17 @@ function ProfilePage() {
                                                 </Box>
                                             );
                                         })}
+                                    {receivedTradesCursor && (
+                                        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                                            <Button
+                                                variant="outlined"
+                                                onClick={() => fetchReceivedTrades(receivedTradesCursor)}
+                                                disabled={isLoadingMoreReceivedTrades}
+                                            >
+                                                {isLoadingMoreReceivedTrades ? <CircularProgress size={20} /> : 'Load more'}
+                                            </Button>
+                                        </Box>
+                                    )}
                                 </>
                             )}
                         </div>
@@ -1178,6 +1219,17 @@ function ProfilePage() {
                                             </Box>
                                             );
                                         })}
+                                    {sentTradesCursor && (
+                                        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                                            <Button
+                                                variant="outlined"
+                                                onClick={() => fetchSentTrades(sentTradesCursor)}
+                                                disabled={isLoadingMoreSentTrades}
+                                            >
+                                                {isLoadingMoreSentTrades ? <CircularProgress size={20} /> : 'Load more'}
+                                            </Button>
+                                        </Box>
+                                    )}
                                 </>
                             )}
                         </div>
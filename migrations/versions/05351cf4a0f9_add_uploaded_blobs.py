@@ -0,0 +1,40 @@
+"""add uploaded blobs
+
+Revision ID: 05351cf4a0f9
+Revises: ab75f3c5d055
+Create Date: 2026-10-19 18:36:12.417863
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '05351cf4a0f9'
+down_revision = 'ab75f3c5d055'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uploaded_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('image_url', sa.String(length=500), nullable=False),
+    sa.Column('thumbnail_url', sa.String(length=500), nullable=True),
+    sa.Column('variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('job_id', sa.String(length=36), nullable=True),
+    sa.Column('first_uploaded_by', sa.Integer(), nullable=True),
+    sa.Column('upload_count', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['first_uploaded_by'], ['users.user_id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['job_id'], ['thumbnail_jobs.job_id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+
+
+def downgrade():
+    op.drop_table('uploaded_blobs')
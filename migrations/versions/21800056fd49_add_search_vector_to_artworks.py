@@ -0,0 +1,29 @@
+"""add search_vector to artworks
+
+Revision ID: 21800056fd49
+Revises: 8d50a410ce72
+Create Date: 2026-10-19 10:40:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '21800056fd49'
+down_revision = '8d50a410ce72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows are filled in afterwards with `flask backfill-search-vectors`
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        batch_op.create_index('idx_artworks_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.drop_index('idx_artworks_search_vector', postgresql_using='gin')
+        batch_op.drop_column('search_vector')
@@ -0,0 +1,58 @@
+"""add trade cycles
+
+Revision ID: 27e7f29b9d27
+Revises: 8bf47b32118b
+Create Date: 2026-10-19 16:02:13.508194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '27e7f29b9d27'
+down_revision = '8bf47b32118b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trade_cycles',
+    sa.Column('cycle_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='PROPOSED', nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('cycle_id')
+    )
+    with op.batch_alter_table('trade_cycles', schema=None) as batch_op:
+        batch_op.create_index('idx_trade_cycles_status_created_at', ['status', 'created_at'], unique=False)
+
+    op.create_table('trade_cycle_legs',
+    sa.Column('cycle_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('giver_id', sa.Integer(), nullable=False),
+    sa.Column('receiver_id', sa.Integer(), nullable=False),
+    sa.Column('artwork_id', sa.Integer(), nullable=False),
+    sa.Column('accepted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artwork_id'], ['artworks.artwork_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['cycle_id'], ['trade_cycles.cycle_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['giver_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['receiver_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('cycle_id', 'position')
+    )
+    with op.batch_alter_table('trade_cycle_legs', schema=None) as batch_op:
+        batch_op.create_index('idx_trade_cycle_legs_giver_id', ['giver_id'], unique=False)
+        batch_op.create_index('idx_trade_cycle_legs_receiver_id', ['receiver_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('trade_cycle_legs', schema=None) as batch_op:
+        batch_op.drop_index('idx_trade_cycle_legs_receiver_id')
+        batch_op.drop_index('idx_trade_cycle_legs_giver_id')
+
+    op.drop_table('trade_cycle_legs')
+    with op.batch_alter_table('trade_cycles', schema=None) as batch_op:
+        batch_op.drop_index('idx_trade_cycles_status_created_at')
+
+    op.drop_table('trade_cycles')
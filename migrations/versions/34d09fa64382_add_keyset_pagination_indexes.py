@@ -0,0 +1,46 @@
+"""add keyset pagination indexes
+
+Revision ID: 34d09fa64382
+Revises: 453c264216f4
+Create Date: 2026-10-19 12:14:05.318262
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '34d09fa64382'
+down_revision = '453c264216f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.drop_index('idx_artworks_created_at')
+        batch_op.drop_index('idx_artworks_artist_created_at')
+        batch_op.create_index('idx_artworks_created_at_id', ['created_at', 'artwork_id'], unique=False)
+        batch_op.create_index('idx_artworks_artist_created_at_id', ['artist_id', 'created_at', 'artwork_id'], unique=False)
+
+    with op.batch_alter_table('collections', schema=None) as batch_op:
+        batch_op.create_index('idx_collections_patron_acquired_at', ['patron_id', 'acquired_at', 'artwork_id'], unique=False)
+
+    with op.batch_alter_table('user_follows', schema=None) as batch_op:
+        batch_op.create_index('idx_userfollows_patron_created_at', ['patron_id', 'created_at', 'artist_id'], unique=False)
+        batch_op.create_index('idx_userfollows_artist_created_at', ['artist_id', 'created_at', 'patron_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_follows', schema=None) as batch_op:
+        batch_op.drop_index('idx_userfollows_artist_created_at')
+        batch_op.drop_index('idx_userfollows_patron_created_at')
+
+    with op.batch_alter_table('collections', schema=None) as batch_op:
+        batch_op.drop_index('idx_collections_patron_acquired_at')
+
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.drop_index('idx_artworks_artist_created_at_id')
+        batch_op.drop_index('idx_artworks_created_at_id')
+        batch_op.create_index('idx_artworks_artist_created_at', ['artist_id', 'created_at'], unique=False)
+        batch_op.create_index('idx_artworks_created_at', ['created_at'], unique=False)
@@ -0,0 +1,53 @@
+"""link thumbnail jobs to many artworks
+
+Revision ID: 3c9d2e4b7a61
+Revises: e60afcb395ab
+Create Date: 2026-10-19 23:41:17.204388
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d2e4b7a61'
+down_revision = 'e60afcb395ab'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('thumbnail_job_artworks',
+    sa.Column('job_id', sa.String(length=36), nullable=False),
+    sa.Column('artwork_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['artwork_id'], ['artworks.artwork_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['job_id'], ['thumbnail_jobs.job_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'artwork_id')
+    )
+    with op.batch_alter_table('thumbnail_job_artworks', schema=None) as batch_op:
+        batch_op.create_index('idx_thumbnail_job_artworks_artwork_id', ['artwork_id'], unique=False)
+
+    op.execute(
+        "INSERT INTO thumbnail_job_artworks (job_id, artwork_id) "
+        "SELECT job_id, artwork_id FROM thumbnail_jobs WHERE artwork_id IS NOT NULL"
+    )
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.drop_column('artwork_id')
+
+
+def downgrade():
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('artwork_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('thumbnail_jobs_artwork_id_fkey', 'artworks', ['artwork_id'], ['artwork_id'],
+                                    ondelete='SET NULL')
+
+    # Keeps one linked artwork per job
+    op.execute(
+        "UPDATE thumbnail_jobs SET artwork_id = links.artwork_id "
+        "FROM (SELECT job_id, max(artwork_id) AS artwork_id FROM thumbnail_job_artworks GROUP BY job_id) AS links "
+        "WHERE thumbnail_jobs.job_id = links.job_id"
+    )
+    with op.batch_alter_table('thumbnail_job_artworks', schema=None) as batch_op:
+        batch_op.drop_index('idx_thumbnail_job_artworks_artwork_id')
+
+    op.drop_table('thumbnail_job_artworks')
@@ -0,0 +1,34 @@
+"""add artwork facet indexes
+
+Revision ID: 453c264216f4
+Revises: 21800056fd49
+Create Date: 2026-10-19 11:02:47.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '453c264216f4'
+down_revision = '21800056fd49'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.create_index('idx_artworks_rarity_created_at', ['rarity', 'created_at'], unique=False)
+        batch_op.create_index('idx_artworks_medium_created_at', ['medium', 'created_at'], unique=False)
+        batch_op.create_index('idx_artworks_series_created_at', ['series', 'created_at'], unique=False)
+        batch_op.create_index('idx_artworks_artist_created_at', ['artist_id', 'created_at'], unique=False)
+        batch_op.create_index('idx_artworks_year', ['year'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.drop_index('idx_artworks_year')
+        batch_op.drop_index('idx_artworks_artist_created_at')
+        batch_op.drop_index('idx_artworks_series_created_at')
+        batch_op.drop_index('idx_artworks_medium_created_at')
+        batch_op.drop_index('idx_artworks_rarity_created_at')
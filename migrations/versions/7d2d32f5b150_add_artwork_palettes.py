@@ -0,0 +1,33 @@
+"""add artwork palettes
+
+Revision ID: 7d2d32f5b150
+Revises: c1e734e704a9
+Create Date: 2026-10-19 20:31:07.664192
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2d32f5b150'
+down_revision = 'c1e734e704a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('palette', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('palette', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.drop_column('palette')
+
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.drop_column('palette')
@@ -0,0 +1,38 @@
+"""add wishlist items
+
+Revision ID: 8bf47b32118b
+Revises: 8fa3e4803d3b
+Create Date: 2026-10-19 15:24:41.372950
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8bf47b32118b'
+down_revision = '8fa3e4803d3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('wishlist_items',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('artwork_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['artwork_id'], ['artworks.artwork_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'artwork_id')
+    )
+    with op.batch_alter_table('wishlist_items', schema=None) as batch_op:
+        batch_op.create_index('idx_wishlist_items_artwork_id', ['artwork_id'], unique=False)
+        batch_op.create_index('idx_wishlist_items_user_created_at', ['user_id', 'created_at', 'artwork_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('wishlist_items', schema=None) as batch_op:
+        batch_op.drop_index('idx_wishlist_items_user_created_at')
+        batch_op.drop_index('idx_wishlist_items_artwork_id')
+
+    op.drop_table('wishlist_items')
@@ -0,0 +1,54 @@
+"""add trade expiry indexes and trades archive
+
+Revision ID: 8fa3e4803d3b
+Revises: fb7edd32b46c
+Create Date: 2026-10-19 14:52:08.614227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '8fa3e4803d3b'
+down_revision = 'fb7edd32b46c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('trades', schema=None) as batch_op:
+        batch_op.create_index('idx_trades_pending_created_at', ['created_at'], unique=False,
+                              postgresql_where=sa.text("status = 'PENDING'"))
+        batch_op.create_index('idx_trades_finished_updated_at', ['updated_at'], unique=False,
+                              postgresql_where=sa.text("status <> 'PENDING'"))
+
+    op.create_table('trades_archive',
+    sa.Column('trade_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('initiator_id', sa.Integer(), nullable=False),
+    sa.Column('recipient_id', sa.Integer(), nullable=False),
+    sa.Column('offered_artwork_id', sa.Integer(), nullable=False),
+    sa.Column('requested_artwork_id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('status', postgresql.ENUM('PENDING', 'ACCEPTED', 'REJECTED', 'CANCELED', name='tradestatus', create_type=False), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('trade_id')
+    )
+    with op.batch_alter_table('trades_archive', schema=None) as batch_op:
+        batch_op.create_index('idx_trades_archive_initiator_id', ['initiator_id'], unique=False)
+        batch_op.create_index('idx_trades_archive_recipient_id', ['recipient_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('trades_archive', schema=None) as batch_op:
+        batch_op.drop_index('idx_trades_archive_recipient_id')
+        batch_op.drop_index('idx_trades_archive_initiator_id')
+
+    op.drop_table('trades_archive')
+
+    with op.batch_alter_table('trades', schema=None) as batch_op:
+        batch_op.drop_index('idx_trades_finished_updated_at')
+        batch_op.drop_index('idx_trades_pending_created_at')
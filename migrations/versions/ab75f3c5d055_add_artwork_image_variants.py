@@ -0,0 +1,33 @@
+"""add artwork image variants
+
+Revision ID: ab75f3c5d055
+Revises: e1995b4a1cbd
+Create Date: 2026-10-19 17:48:31.904127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'ab75f3c5d055'
+down_revision = 'e1995b4a1cbd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.drop_column('variants')
+
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.drop_column('image_variants')
@@ -0,0 +1,32 @@
+"""add perceptual hashes
+
+Revision ID: c1e734e704a9
+Revises: 05351cf4a0f9
+Create Date: 2026-10-19 19:52:41.208316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1e734e704a9'
+down_revision = '05351cf4a0f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('perceptual_hash', sa.BigInteger(), nullable=True))
+
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('perceptual_hash', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.drop_column('perceptual_hash')
+
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.drop_column('perceptual_hash')
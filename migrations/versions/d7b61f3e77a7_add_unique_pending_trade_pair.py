@@ -0,0 +1,60 @@
+"""add unique pending trade pair index
+
+Revision ID: d7b61f3e77a7
+Revises: 27e7f29b9d27
+Create Date: 2026-10-19 16:41:55.209317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b61f3e77a7'
+down_revision = '27e7f29b9d27'
+branch_labels = None
+depends_on = None
+
+PAIR_KEY = """
+    least(initiator_id, recipient_id),
+    greatest(initiator_id, recipient_id),
+    (CASE WHEN initiator_id < recipient_id THEN offered_artwork_id ELSE requested_artwork_id END),
+    (CASE WHEN initiator_id < recipient_id THEN requested_artwork_id ELSE offered_artwork_id END)
+"""
+
+
+def upgrade():
+    # Cancel duplicates that slipped past the old check-then-insert (keeping the oldest)
+    # and take them off the pending counters, so the unique index can be built
+    op.execute(f"""
+        WITH canceled AS (
+            UPDATE trades SET status = 'CANCELED', updated_at = now()
+            WHERE trade_id IN (
+                SELECT trade_id FROM (
+                    SELECT trade_id, row_number() OVER (PARTITION BY {PAIR_KEY} ORDER BY created_at, trade_id) AS duplicate
+                    FROM trades WHERE status = 'PENDING'
+                ) AS ranked
+                WHERE duplicate > 1
+            )
+            RETURNING initiator_id, recipient_id
+        ), totals AS (
+            SELECT user_id, SUM(sent) AS sent, SUM(received) AS received
+            FROM (
+                SELECT initiator_id AS user_id, 1 AS sent, 0 AS received FROM canceled
+                UNION ALL
+                SELECT recipient_id, 0, 1 FROM canceled
+            ) AS changes
+            GROUP BY user_id
+        )
+        UPDATE trade_inbox_counters AS counters
+        SET pending_sent = GREATEST(counters.pending_sent - totals.sent, 0),
+            pending_received = GREATEST(counters.pending_received - totals.received, 0),
+            updated_at = now()
+        FROM totals
+        WHERE counters.user_id = totals.user_id
+    """)
+    op.execute(f"CREATE UNIQUE INDEX uq_trades_pending_pair ON trades ({PAIR_KEY}) WHERE status = 'PENDING'")
+
+
+def downgrade():
+    op.drop_index('uq_trades_pending_pair', table_name='trades')
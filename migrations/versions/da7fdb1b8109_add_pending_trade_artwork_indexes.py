@@ -0,0 +1,30 @@
+"""add pending trade artwork indexes
+
+Revision ID: da7fdb1b8109
+Revises: f63a10b9aac3
+Create Date: 2026-10-19 13:40:12.664530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'da7fdb1b8109'
+down_revision = 'f63a10b9aac3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('trades', schema=None) as batch_op:
+        batch_op.create_index('idx_trades_pending_offered_artwork', ['offered_artwork_id'], unique=False,
+                              postgresql_where=sa.text("status = 'PENDING'"))
+        batch_op.create_index('idx_trades_pending_requested_artwork', ['requested_artwork_id'], unique=False,
+                              postgresql_where=sa.text("status = 'PENDING'"))
+
+
+def downgrade():
+    with op.batch_alter_table('trades', schema=None) as batch_op:
+        batch_op.drop_index('idx_trades_pending_requested_artwork')
+        batch_op.drop_index('idx_trades_pending_offered_artwork')
@@ -0,0 +1,42 @@
+"""add thumbnail jobs
+
+Revision ID: e1995b4a1cbd
+Revises: d7b61f3e77a7
+Create Date: 2026-10-19 17:12:08.530611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1995b4a1cbd'
+down_revision = 'd7b61f3e77a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('thumbnail_jobs',
+    sa.Column('job_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('image_url', sa.String(length=500), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='QUEUED', nullable=False),
+    sa.Column('thumbnail_url', sa.String(length=500), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('artwork_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['artwork_id'], ['artworks.artwork_id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.create_index('idx_thumbnail_jobs_image_url', ['image_url'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.drop_index('idx_thumbnail_jobs_image_url')
+
+    op.drop_table('thumbnail_jobs')
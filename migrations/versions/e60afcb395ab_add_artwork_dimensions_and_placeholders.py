@@ -0,0 +1,40 @@
+"""add artwork dimensions and placeholders
+
+Revision ID: e60afcb395ab
+Revises: 7d2d32f5b150
+Create Date: 2026-10-19 21:04:52.381547
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e60afcb395ab'
+down_revision = '7d2d32f5b150'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('placeholder', sa.Text(), nullable=True))
+
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('placeholder', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('thumbnail_jobs', schema=None) as batch_op:
+        batch_op.drop_column('placeholder')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
+
+    with op.batch_alter_table('artworks', schema=None) as batch_op:
+        batch_op.drop_column('placeholder')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
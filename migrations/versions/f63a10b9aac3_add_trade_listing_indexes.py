@@ -0,0 +1,33 @@
+"""add trade listing indexes
+
+Revision ID: f63a10b9aac3
+Revises: 34d09fa64382
+Create Date: 2026-10-19 13:02:41.905117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f63a10b9aac3'
+down_revision = '34d09fa64382'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('trades', schema=None) as batch_op:
+        # The composite indexes lead with the user column, so the single-column ones are redundant
+        batch_op.drop_index('idx_trades_initiator_id')
+        batch_op.drop_index('idx_trades_recipient_id')
+        batch_op.create_index('idx_trades_initiator_status_created_at', ['initiator_id', 'status', 'created_at'], unique=False)
+        batch_op.create_index('idx_trades_recipient_status_created_at', ['recipient_id', 'status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('trades', schema=None) as batch_op:
+        batch_op.drop_index('idx_trades_recipient_status_created_at')
+        batch_op.drop_index('idx_trades_initiator_status_created_at')
+        batch_op.create_index('idx_trades_recipient_id', ['recipient_id'], unique=False)
+        batch_op.create_index('idx_trades_initiator_id', ['initiator_id'], unique=False)
@@ -0,0 +1,49 @@
+"""add trade inbox counters
+
+Revision ID: fb7edd32b46c
+Revises: da7fdb1b8109
+Create Date: 2026-10-19 14:11:27.083412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fb7edd32b46c'
+down_revision = 'da7fdb1b8109'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trade_inbox_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('pending_sent', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('pending_received', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('latest_sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('latest_received_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Seed the counters from the trades that are already pending
+    op.execute("""
+        INSERT INTO trade_inbox_counters (user_id, pending_sent, pending_received, latest_sent_at, latest_received_at)
+        SELECT user_id,
+               COALESCE(SUM(sent), 0), COALESCE(SUM(received), 0),
+               MAX(sent_at), MAX(received_at)
+        FROM (
+            SELECT initiator_id AS user_id, 1 AS sent, 0 AS received, created_at AS sent_at, NULL::timestamptz AS received_at
+            FROM trades WHERE status = 'PENDING'
+            UNION ALL
+            SELECT recipient_id, 0, 1, NULL, created_at
+            FROM trades WHERE status = 'PENDING'
+        ) AS pending
+        GROUP BY user_id
+    """)
+
+
+def downgrade():
+    op.drop_table('trade_inbox_counters')
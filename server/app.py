@@ -7,11 +7,14 @@ from flask_wtf.csrf import CSRFProtect, generate_csrf
 from flask_cors import CORS # Keep this
 from flask_apscheduler import APScheduler
 import logging
+import click
 
 # from flask_seeder import Seeder # Not currently used, can be commented out or removed if not needed
 
 # Import extensions and BLOCKLIST
 from .extensions import db, jwt, migrate, cors, BLOCKLIST
+from .services.image_variants import parse_variant_sizes
+from .services.content_hash import HashingRequest
 
 # --- IMPORT MODELS HERE ---
 from .models.user import User
@@ -21,6 +24,12 @@ from .models.user_follow import UserFollow # Assuming you have user_follow.py
 from .models.pack_type import PackType   # Import PackType model
 from .models.user_pack import UserPack   # Import UserPack model
 from .models.trade import Trade          # Import Trade model
+from .models.trade_inbox_counter import TradeInboxCounter # Pending trade counters
+from .models.trade_archive import TradeArchive # Finished trades moved off the hot table
+from .models.wishlist_item import WishlistItem # Wishlists for trade matching
+from .models.trade_cycle import TradeCycle, TradeCycleLeg # Multi-party trade proposals
+from .models.thumbnail_job import ThumbnailJob, ThumbnailJobArtwork # Background thumbnail status
+from .models.uploaded_blob import UploadedBlob # Content-addressed upload dedup
 
 
 # Create scheduler instance
@@ -30,6 +39,8 @@ load_dotenv()
 
 def create_app(config_object=None):
     app = Flask(__name__)
+    # Uploaded files are SHA-256 hashed while they are received (upload dedup)
+    app.request_class = HashingRequest
 
     # --- Determine if in production ---
     is_production = os.environ.get('FLASK_ENV') == 'production'
@@ -56,6 +67,54 @@ def create_app(config_object=None):
         JWT_BLOCKLIST_TOKEN_CHECKS=["access", "refresh"],
         GOOGLE_CLIENT_ID=os.environ.get('GOOGLE_CLIENT_ID'), # Add Google Client ID config
 
+        # In-memory autocomplete index (see services/autocomplete_service.py)
+        AUTOCOMPLETE_MAX_ENTRIES=int(os.environ.get('AUTOCOMPLETE_MAX_ENTRIES', 50000)), # Per kind
+        AUTOCOMPLETE_BUILD_ON_STARTUP=True,
+
+        # In-memory wishlist matching index (see services/trade_match_service.py)
+        TRADE_MATCH_BUILD_ON_STARTUP=True,
+
+        # In-memory perceptual hash index for near-duplicate images (see services/perceptual_hash.py)
+        NEAR_DUPLICATE_BUILD_ON_STARTUP=True,
+        NEAR_DUPLICATE_MAX_DISTANCE=int(os.environ.get('NEAR_DUPLICATE_MAX_DISTANCE', 8)), # Bits of 64
+
+        # In-memory colour similarity index over artwork palettes (see services/color_palette.py)
+        COLOR_INDEX_BUILD_ON_STARTUP=True,
+
+        # Trade lifecycle (see services/trade_expiry_service.py)
+        TRADE_PENDING_TTL_DAYS=int(os.environ.get('TRADE_PENDING_TTL_DAYS', 14)),
+        TRADE_ARCHIVE_AFTER_DAYS=int(os.environ.get('TRADE_ARCHIVE_AFTER_DAYS', 90)),
+        TRADE_SWEEP_BATCH_SIZE=int(os.environ.get('TRADE_SWEEP_BATCH_SIZE', 500)),
+
+        # Uploads: thumbnails are generated off the request thread (see services/background_jobs.py)
+        MAX_CONTENT_LENGTH=int(os.environ.get('MAX_UPLOAD_MB', 25)) * 1024 * 1024,
+        THUMBNAIL_WORKERS=int(os.environ.get('THUMBNAIL_WORKERS', 2)),
+        THUMBNAIL_QUEUE_DEPTH=int(os.environ.get('THUMBNAIL_QUEUE_DEPTH', 16)), # Uploads waiting for a worker
+        # "name:longest_edge,..." - unset uses image_variants.DEFAULT_VARIANT_SIZES
+        IMAGE_VARIANT_SIZES=parse_variant_sizes(os.environ.get('IMAGE_VARIANT_SIZES', '')) or None,
+
+        # Where uploads are stored (see services/storage.py): 's3', or 'local' for development/tests
+        STORAGE_BACKEND=os.environ.get('STORAGE_BACKEND', 's3'),
+        S3_BUCKET_NAME=os.environ.get('S3_BUCKET_NAME'),
+        AWS_REGION=os.environ.get('AWS_REGION'),
+        S3_MAX_POOL_CONNECTIONS=int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 32)),
+        S3_ENDPOINT_URL=os.environ.get('S3_ENDPOINT_URL'), # S3-compatible stores (MinIO etc.)
+        S3_MULTIPART_THRESHOLD_MB=int(os.environ.get('S3_MULTIPART_THRESHOLD_MB', 8)),
+        S3_MULTIPART_CHUNK_MB=int(os.environ.get('S3_MULTIPART_CHUNK_MB', 8)), # S3 minimum is 5
+        S3_UPLOAD_CONCURRENCY=int(os.environ.get('S3_UPLOAD_CONCURRENCY', 10)), # Parts/files in flight
+        LOCAL_STORAGE_ROOT=os.environ.get('LOCAL_STORAGE_ROOT'), # Defaults to <instance>/uploads
+        LOCAL_STORAGE_BASE_URL=os.environ.get('LOCAL_STORAGE_BASE_URL', 'http://localhost:5000/api/files'),
+
+        # Server-side border decal renders (see services/decal_renderer.py)
+        DECAL_DIR=os.environ.get('DECAL_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                           'client', 'public', 'svg', 'borders')),
+        DECAL_RENDER_CACHE_DIR=os.environ.get('DECAL_RENDER_CACHE_DIR'), # Defaults to <instance>/decal-renders
+        DECAL_RENDER_CACHE_MB=int(os.environ.get('DECAL_RENDER_CACHE_MB', 512)),
+
+        # On-demand resizes of stored images, /api/img/<key>?w=&h=&fmt= (see services/image_resizer.py)
+        IMAGE_CACHE_DIR=os.environ.get('IMAGE_CACHE_DIR'), # Defaults to <instance>/image-cache
+        IMAGE_CACHE_MB=int(os.environ.get('IMAGE_CACHE_MB', 1024)),
+
         # Scheduler configuration
         SCHEDULER_API_ENABLED=True,
         SCHEDULER_TIMEZONE="UTC",
@@ -133,6 +192,8 @@ def create_app(config_object=None):
     from server.routes.users import users_bp
     from server.routes.artworks import artworks_bp
     from server.routes.upload import uploads_bp
+    from server.routes.files import files_bp
+    from server.routes.images import images_bp
     # --- ADD Blueprint import for packs ---
     from server.routes.packs import packs_bp # Assuming you created pack_routes.py
     # --- ADD Blueprint import for trades ---
@@ -145,6 +206,8 @@ def create_app(config_object=None):
     app.register_blueprint(users_bp, url_prefix='/api/users')
     app.register_blueprint(artworks_bp, url_prefix='/api/artworks')
     app.register_blueprint(uploads_bp, url_prefix='/api/upload-image')
+    app.register_blueprint(files_bp, url_prefix='/api/files')
+    app.register_blueprint(images_bp, url_prefix='/api/img')
     app.register_blueprint(packs_bp, url_prefix='/api') # Using /api as base for packs routes
     app.register_blueprint(trades_bp, url_prefix='/api')
     app.register_blueprint(search_blueprint, url_prefix='/api/search')
@@ -184,6 +247,30 @@ def create_app(config_object=None):
         app.logger.error(f"Server Error: {error}", exc_info=True)
         return jsonify({"error": {"code": "INTERNAL_SERVER_ERROR", "message": "An internal server error occurred"}}), 500
 
+    # --- Upload storage backend ---
+    from server.services.storage import init_storage
+    init_storage(app)
+
+    # --- Disk-cached border decal renderer and on-demand image resizer ---
+    from server.services.decal_renderer import decal_renderer
+    decal_renderer.init_app(app)
+    from server.services.image_resizer import image_resizer
+    image_resizer.init_app(app)
+
+    # --- Background worker pool for upload post-processing ---
+    from server.services.background_jobs import thumbnail_pool
+    thumbnail_pool.init_app(app, workers=app.config['THUMBNAIL_WORKERS'], queue_depth=app.config['THUMBNAIL_QUEUE_DEPTH'])
+
+    # --- Build the in-memory autocomplete, trade match, near-duplicate and colour indexes ---
+    from server.services.autocomplete_service import autocomplete_index
+    autocomplete_index.init_app(app)
+    from server.services.trade_match_service import trade_match_index
+    trade_match_index.init_app(app)
+    from server.services.perceptual_hash import near_duplicate_index
+    near_duplicate_index.init_app(app)
+    from server.services.color_palette import color_index
+    color_index.init_app(app)
+
     # --- Initialize Flask-APScheduler ---
     scheduler.init_app(app)
     
@@ -214,6 +301,74 @@ def create_app(config_object=None):
                 except Exception as e:
                     app.logger.error(f"Error in scheduled missing pack check: {str(e)}")
         
+        # Job 3: Rebuild the autocomplete index every 6 hours
+        # Incremental updates keep names current; this refreshes collector-based popularity
+        @scheduler.task('cron', id='autocomplete_rebuild', hour='*/6', minute=15)
+        def scheduled_autocomplete_rebuild():
+            with app.app_context():
+                if autocomplete_index.build():
+                    app.logger.info("Autocomplete index rebuilt")
+
+        # Job 4: Repair pending-trade counters that drifted from the trades table
+        @scheduler.task('cron', id='trade_counter_reconcile', hour=3, minute=30)
+        def scheduled_trade_counter_reconcile():
+            with app.app_context():
+                from server.services.trade_counter_service import reconcile_trade_counters
+                repaired = reconcile_trade_counters()
+                app.logger.info(f"Trade counter reconciliation repaired {repaired} counters")
+
+        # Job 5: Cancel pending trades older than TRADE_PENDING_TTL_DAYS
+        @scheduler.task('cron', id='trade_expiry_sweep', minute=5)
+        def scheduled_trade_expiry_sweep():
+            with app.app_context():
+                from server.services.trade_expiry_service import expire_stale_trades
+                expired = expire_stale_trades(app.config['TRADE_PENDING_TTL_DAYS'],
+                                              batch_size=app.config['TRADE_SWEEP_BATCH_SIZE'])
+                if expired:
+                    from server.services.pending_artwork_service import clear_pending_artworks
+                    clear_pending_artworks()
+                app.logger.info(f"Trade expiry sweep canceled {expired} trades")
+
+        # Job 6: Move finished trades older than TRADE_ARCHIVE_AFTER_DAYS into trades_archive
+        @scheduler.task('cron', id='trade_archive', hour=4, minute=0)
+        def scheduled_trade_archive():
+            with app.app_context():
+                from server.services.trade_expiry_service import archive_finished_trades
+                archived = archive_finished_trades(app.config['TRADE_ARCHIVE_AFTER_DAYS'],
+                                                   batch_size=app.config['TRADE_SWEEP_BATCH_SIZE'])
+                app.logger.info(f"Trade archive job moved {archived} trades")
+
+        # Job 7: Rebuild the trade match index every 6 hours
+        # Incremental updates only reach the worker that handled the write; this picks up the rest
+        @scheduler.task('cron', id='trade_match_rebuild', hour='*/6', minute=45)
+        def scheduled_trade_match_rebuild():
+            with app.app_context():
+                if trade_match_index.build():
+                    app.logger.info("Trade match index rebuilt")
+
+        # Job 8: Propose multi-party trade cycles from wishlists
+        @scheduler.task('cron', id='trade_cycle_discovery', hour=2, minute=15)
+        def scheduled_trade_cycle_discovery():
+            with app.app_context():
+                from server.services.trade_cycle_service import propose_trade_cycles
+                proposed = propose_trade_cycles()
+                app.logger.info(f"Trade cycle discovery proposed {proposed} cycles")
+
+        # Job 9: Rebuild the near-duplicate index every 6 hours
+        # Hashes computed on other workers only reach this one's index through a rebuild
+        @scheduler.task('cron', id='near_duplicate_rebuild', hour='*/6', minute=50)
+        def scheduled_near_duplicate_rebuild():
+            with app.app_context():
+                if near_duplicate_index.build():
+                    app.logger.info("Near-duplicate index rebuilt")
+
+        # Job 10: Rebuild the colour index every 6 hours (same reason as job 9)
+        @scheduler.task('cron', id='color_index_rebuild', hour='*/6', minute=55)
+        def scheduled_color_index_rebuild():
+            with app.app_context():
+                if color_index.build():
+                    app.logger.info("Colour index rebuilt")
+
         # Start the scheduler
         scheduler.start()
         app.logger.info("Pack scheduler started successfully")
@@ -232,4 +387,76 @@ app = create_app()
 # You generally want the frontend to hit the endpoint though.
 @app.cli.command("generate-csrf")
 def generate_csrf_command():
-    print("CSRF Token:", generate_csrf())
\ No newline at end of file
+    print("CSRF Token:", generate_csrf())
+
+@app.cli.command("backfill-search-vectors")
+@click.option("--batch-size", default=500, show_default=True, help="Artworks updated per transaction.")
+@click.option("--rebuild", is_flag=True, help="Recompute vectors for every artwork, not just missing ones.")
+def backfill_search_vectors_command(batch_size, rebuild):
+    """Backfills the full-text search vector for existing artworks."""
+    from server.services.search_service import backfill_artwork_search_vectors, BackfillError
+    try:
+        updated = backfill_artwork_search_vectors(batch_size=batch_size, rebuild=rebuild)
+    except BackfillError as e:
+        # Exits non-zero; the committed batches stay done, so a rerun continues from here
+        raise click.ClickException(
+            f"Search vector backfill failed in the batch after artwork {e.last_id} "
+            f"({e.updated} artworks updated before it): {e}"
+        )
+    print(f"Updated search vectors for {updated} artworks")
+
+@app.cli.command("upload-dedup-stats")
+def upload_dedup_stats_command():
+    """Reports how many uploads were served from the content-addressed blob index."""
+    stats = UploadedBlob.dedup_stats()
+    print(f"Uploads: {stats['uploads']} ({stats['unique_files']} unique files)")
+    print(f"Dedup hits: {stats['hits']} ({stats['hit_rate']:.1%})")
+    print(f"Bytes stored: {stats['bytes_stored']}, bytes saved: {stats['bytes_saved']}")
+
+@app.cli.command("near-duplicate-report")
+@click.option("--max-distance", default=None, type=int, help="Bits of 64 (default NEAR_DUPLICATE_MAX_DISTANCE).")
+@click.option("--limit", default=None, type=int, help="Stop after this many pairs.")
+def near_duplicate_report_command(max_distance, limit):
+    """Lists pairs of artworks whose images are near-duplicates by perceptual hash."""
+    from server.services.perceptual_hash import near_duplicate_index
+    if not near_duplicate_index.build():
+        raise click.ClickException("Could not load perceptual hashes from the database")
+    if max_distance is None:
+        max_distance = app.config['NEAR_DUPLICATE_MAX_DISTANCE']
+    pairs = near_duplicate_index.duplicate_pairs(max_distance, limit=limit)
+    for artwork_id, other_id, distance in pairs:
+        print(f"{artwork_id}\t{other_id}\t{distance}")
+    print(f"{len(pairs)} near-duplicate pairs among {len(near_duplicate_index)} hashed artworks")
+
+@app.cli.command("backfill-palettes")
+@click.option("--batch-size", default=200, show_default=True, help="Artworks updated per transaction.")
+@click.option("--workers", default=None, type=int, help="Worker processes (default: one per CPU).")
+def backfill_palettes_command(batch_size, workers):
+    """Extracts dominant colour palettes for artworks uploaded before palettes existed."""
+    from server.services.image_backfill import backfill_artwork_images
+    from server.services.search_service import BackfillError
+    try:
+        updated, failed = backfill_artwork_images(('palette',), batch_size=batch_size, workers=workers)
+    except BackfillError as e:
+        raise click.ClickException(
+            f"Palette backfill failed in the batch after artwork {e.last_id} "
+            f"({e.updated} artworks updated before it): {e}"
+        )
+    print(f"Stored palettes for {updated} artworks ({failed} could not be read)")
+
+@app.cli.command("backfill-placeholders")
+@click.option("--batch-size", default=200, show_default=True, help="Artworks updated per transaction.")
+@click.option("--workers", default=None, type=int, help="Worker processes (default: one per CPU).")
+def backfill_placeholders_command(batch_size, workers):
+    """Computes dimensions and inline placeholders for artworks uploaded before they existed."""
+    from server.services.image_backfill import backfill_artwork_images
+    from server.services.search_service import BackfillError
+    try:
+        updated, failed = backfill_artwork_images(('width', 'height', 'placeholder'),
+                                                  batch_size=batch_size, workers=workers)
+    except BackfillError as e:
+        raise click.ClickException(
+            f"Placeholder backfill failed in the batch after artwork {e.last_id} "
+            f"({e.updated} artworks updated before it): {e}"
+        )
+    print(f"Stored dimensions and placeholders for {updated} artworks ({failed} could not be read)")
@@ -1,15 +1,19 @@
 from datetime import datetime
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.sql import func
-from sqlalchemy import ForeignKey, Integer, String, Text, Numeric, DateTime, Column, Index # Added Column
+from sqlalchemy import ForeignKey, Integer, BigInteger, String, Text, Numeric, DateTime, Column, Index # Added Column
 import re
-from sqlalchemy.dialects.postgresql import ENUM # Import ENUM type
+from sqlalchemy.dialects.postgresql import ENUM, TSVECTOR, JSONB # Import ENUM type
+from sqlalchemy.orm import deferred
 
 # Import db instance from the main app file
 from server.app import db
 
 rarity_enum = ENUM('common', 'uncommon', 'rare', 'epic', 'legendary', name='artwork_rarity_enum', create_type=False)
 
+# Text search configuration used for both the stored vectors and the queries
+SEARCH_CONFIG = 'english'
+
 class Artwork(db.Model, SerializerMixin):
     __tablename__ = 'artworks'
 
@@ -22,12 +26,26 @@ class Artwork(db.Model, SerializerMixin):
     series = Column(String(100), nullable=True)  # Added field for artwork series
     image_url = Column(String(500), nullable=False) # Increased length based on User model example
     thumbnail_url = Column(String(500), nullable=True) # Increased length
+    # Resized WebP/progressive JPEG renditions: {name: {width, height, webp, jpeg}} (see services/image_variants.py)
+    image_variants = Column(JSONB, nullable=True)
+    # 64-bit dHash of the image, stored signed (see services/perceptual_hash.py); NULL until the thumbnail is rendered
+    perceptual_hash = Column(BigInteger, nullable=True)
+    # Dominant colours, largest share first: [{color: "#rrggbb", weight: 0.42}, ...] (see services/color_palette.py)
+    palette = Column(JSONB, nullable=True)
+    # Original display size and a tiny inline data: URI preview, so clients can lay out
+    # and paint a card before any image request (see image_variants.placeholder_data_uri)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    placeholder = Column(Text, nullable=True)
     border_decal_id = Column(String(100), nullable=True)  # Added field for SVG border identifier
     year = Column(Integer, nullable=True)
     medium = Column(String(100), nullable=True)
     rarity = db.Column(rarity_enum, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Weighted full-text document, kept current by the create/update routes (see build_search_vector)
+    # Deferred so ordinary artwork queries never pull the vector over the wire
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     # --- Relationships ---
     # Relationship back to the User (Artist) who created this artwork
@@ -46,6 +64,8 @@ class Artwork(db.Model, SerializerMixin):
     '-artist.created_artworks',
     '-artist.collections',
     '-collections.artwork',  # Critical to break the circular reference
+    '-search_vector',  # Internal search column, never sent to clients
+    '-perceptual_hash',  # Internal near-duplicate key
 )
 
     def __repr__(self):
@@ -65,10 +85,44 @@ class Artwork(db.Model, SerializerMixin):
         if not (url.startswith('http://') or url.startswith('https://')): return False, f"{field_name} must be a valid URL (starting with http:// or https://)."
         return True, ""
 
+    # --- Full-Text Search ---
+    @staticmethod
+    def build_search_vector(title, series, artist_name, medium, description):
+        """
+        Builds the weighted tsvector expression for an artwork.
+        Accepts either plain values (create/update) or column expressions (backfill),
+        so both paths produce exactly the same document.
+        Weights: title A, series/artist_name B, medium C, description D.
+        """
+        def weighted(value, weight):
+            return func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(value, '')), weight)
+
+        return (
+            weighted(title, 'A')
+            .op('||')(weighted(series, 'B'))
+            .op('||')(weighted(artist_name, 'B'))
+            .op('||')(weighted(medium, 'C'))
+            .op('||')(weighted(description, 'D'))
+        )
+
+    def refresh_search_vector(self):
+        """Sets search_vector from the instance's current field values (written on flush)."""
+        self.search_vector = Artwork.build_search_vector(
+            self.title, self.series, self.artist_name, self.medium, self.description
+        )
+
     # --- Database Constraints/Indexes ---
     __table_args__ = (
         # Index on artist_id for faster lookup of artworks by artist
         Index('idx_artworks_artist_id', 'artist_id'),
-        # Index for sorting/filtering
-        Index('idx_artworks_created_at', 'created_at'),
+        # Index for sorting/filtering; artwork_id makes it serve keyset (cursor) pagination too
+        Index('idx_artworks_created_at_id', 'created_at', 'artwork_id'),
+        # Composite indexes for the filtered, newest-first listing (see facet_service)
+        Index('idx_artworks_rarity_created_at', 'rarity', 'created_at'),
+        Index('idx_artworks_medium_created_at', 'medium', 'created_at'),
+        Index('idx_artworks_series_created_at', 'series', 'created_at'),
+        Index('idx_artworks_artist_created_at_id', 'artist_id', 'created_at', 'artwork_id'),
+        Index('idx_artworks_year', 'year'),
+        # GIN index for full-text search over the stored vector
+        Index('idx_artworks_search_vector', 'search_vector', postgresql_using='gin'),
     )
\ No newline at end of file
@@ -47,4 +47,6 @@ class Collection(db.Model, SerializerMixin):
         Index('idx_collections_patron_id', 'patron_id'),
         Index('idx_collections_artwork_id', 'artwork_id'),
         Index('idx_collections_acquired_at', 'acquired_at'),
+        # Keyset pagination of a patron's collection, newest first
+        Index('idx_collections_patron_acquired_at', 'patron_id', 'acquired_at', 'artwork_id'),
     )
\ No newline at end of file
@@ -0,0 +1,94 @@
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy.sql import func
+from sqlalchemy import ForeignKey, Integer, BigInteger, String, Text, DateTime, Column, Index
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Import db from extensions instead of from app to avoid circular imports
+from server.extensions import db
+
+THUMBNAIL_JOB_STATUSES = ('QUEUED', 'DONE', 'FAILED')
+
+class ThumbnailJob(db.Model, SerializerMixin):
+    """
+    Background thumbnail generation for one uploaded image (see routes/upload.py).
+    The row is the job's status resource; ThumbnailJobArtwork links it to the
+    artworks created from the upload so whichever finishes second fills them in.
+    """
+    __tablename__ = 'thumbnail_jobs'
+
+    job_id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    image_url = Column(String(500), nullable=False)
+    status = Column(String(20), nullable=False, server_default='QUEUED')
+    thumbnail_url = Column(String(500), nullable=True)
+    # Same shape as Artwork.image_variants
+    variants = Column(JSONB, nullable=True)
+    # Same encoding as Artwork.perceptual_hash and Artwork.palette
+    perceptual_hash = Column(BigInteger, nullable=True)
+    palette = Column(JSONB, nullable=True)
+    # Same as the Artwork columns of the same names
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    placeholder = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f'<ThumbnailJob {self.job_id}: {self.status}>'
+
+    def status_dict(self):
+        return {
+            "jobId": self.job_id,
+            "status": self.status,
+            "imageUrl": self.image_url,
+            "thumbnailUrl": self.thumbnail_url,
+            "variants": self.variants,
+            "width": self.width,
+            "height": self.height,
+            "placeholder": self.placeholder,
+            "error": self.error,
+        }
+
+    @classmethod
+    def attach_artwork(cls, image_url, artwork_id):
+        """
+        Links a new artwork to the pending job for its image, under the job's row lock.
+        Call inside the artwork's transaction. Deduplicated uploads share the job, so
+        any number of artworks can be linked to it.
+        Returns the job if it is already done (so its thumbnail_url, variants and
+        image analysis can be copied onto the artwork), else None - the worker fills in the artwork
+        when it finishes.
+        """
+        job = cls.query.filter_by(image_url=image_url)\
+            .order_by(cls.created_at.desc())\
+            .with_for_update()\
+            .first()
+        if not job:
+            return None
+        if job.status == 'DONE':
+            return job
+        db.session.add(ThumbnailJobArtwork(job_id=job.job_id, artwork_id=artwork_id))
+        return None
+
+    # --- Database Constraints/Indexes ---
+    __table_args__ = (
+        Index('idx_thumbnail_jobs_image_url', 'image_url'),
+    )
+
+
+class ThumbnailJobArtwork(db.Model, SerializerMixin):
+    """An artwork created from a job's upload before its thumbnails were ready."""
+    __tablename__ = 'thumbnail_job_artworks'
+
+    job_id = Column(String(36), ForeignKey('thumbnail_jobs.job_id', ondelete='CASCADE'), primary_key=True)
+    artwork_id = Column(Integer, ForeignKey('artworks.artwork_id', ondelete='CASCADE'), primary_key=True)
+
+    def __repr__(self):
+        return f'<ThumbnailJobArtwork {self.job_id} -> {self.artwork_id}>'
+
+    # --- Database Constraints/Indexes ---
+    __table_args__ = (
+        Index('idx_thumbnail_job_artworks_artwork_id', 'artwork_id'),
+    )
@@ -1,8 +1,11 @@
+import random
+import time
 from datetime import datetime
 from flask import current_app
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.sql import func
-from sqlalchemy import ForeignKey, Integer, String, Text, DateTime, Column, Index, CheckConstraint, and_, or_, Enum
+from sqlalchemy import ForeignKey, Integer, String, Text, DateTime, Column, Index, CheckConstraint, and_, or_, Enum, text, tuple_, update, select, exists, case
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.dialects.postgresql import ENUM
 
 # Import db from extensions instead of from app to avoid circular imports
@@ -11,6 +14,37 @@ from server.extensions import db
 # Define the enum values based on your database schema - updated to use uppercase values
 TradeStatusEnum = ENUM('PENDING', 'ACCEPTED', 'REJECTED', 'CANCELED', name='tradestatus', create_type=False)
 
+# --- Trade execution retry policy ---
+TRADE_EXECUTION_ATTEMPTS = 3
+TRADE_RETRY_BACKOFF_SECONDS = 0.05
+RETRYABLE_PGCODES = ('40001', '40P01')  # serialization_failure, deadlock_detected
+
+
+def run_with_retries(attempt, label, error_message):
+    """
+    Runs attempt() - one transaction returning (success, message) - retrying a bounded
+    number of times on serialization failures and deadlocks.
+    Returns (success, message) tuple
+    """
+    for attempt_number in range(1, TRADE_EXECUTION_ATTEMPTS + 1):
+        try:
+            return attempt()
+        except DBAPIError as e:
+            db.session.rollback()
+            pgcode = getattr(e.orig, 'pgcode', None)
+            if pgcode in RETRYABLE_PGCODES and attempt_number < TRADE_EXECUTION_ATTEMPTS:
+                current_app.logger.warning(f"Retrying {label} after {pgcode} (attempt {attempt_number})")
+                time.sleep(TRADE_RETRY_BACKOFF_SECONDS * attempt_number * (1 + random.random()))
+                continue
+            current_app.logger.error(f"Error executing {label}: {str(e)}", exc_info=True)
+            return False, f"{error_message}: {str(e)}"
+        except Exception as e:
+            db.session.rollback()
+            # Log the specific error for debugging on the server
+            current_app.logger.error(f"Error executing {label}: {str(e)}", exc_info=True)
+            # Return False and a user-friendly error message
+            return False, f"{error_message}: {str(e)}"
+
 class Trade(db.Model, SerializerMixin):
     __tablename__ = 'trades'
 
@@ -81,81 +115,153 @@ class Trade(db.Model, SerializerMixin):
         # - Check that the recipient owns the requested artwork
             
         return True, ""
+
+    @staticmethod
+    def creation_blocker(initiator_id, recipient_id, offered_artwork_id, requested_artwork_id):
+        """
+        Checks the mutual follow and both ownerships in a single SELECT of EXISTS
+        subqueries (one round trip). Duplicate pending trades are left to the
+        uq_trades_pending_pair index at insert time.
+        Returns None if the trade may be created, else the first failing reason:
+        'NOT_MUTUAL_FOLLOW', 'OFFERED_NOT_OWNED' or 'REQUESTED_NOT_OWNED'
+        """
+        from server.models.collection import Collection
+        from server.models.user_follow import UserFollow
+
+        checks = db.session.execute(select(
+            exists().where(UserFollow.patron_id == initiator_id, UserFollow.artist_id == recipient_id)
+                .label('follows'),
+            exists().where(UserFollow.patron_id == recipient_id, UserFollow.artist_id == initiator_id)
+                .label('followed_back'),
+            exists().where(Collection.patron_id == initiator_id, Collection.artwork_id == offered_artwork_id)
+                .label('owns_offered'),
+            exists().where(Collection.patron_id == recipient_id, Collection.artwork_id == requested_artwork_id)
+                .label('owns_requested'),
+        )).one()
+
+        if not (checks.follows and checks.followed_back):
+            return 'NOT_MUTUAL_FOLLOW'
+        if not checks.owns_offered:
+            return 'OFFERED_NOT_OWNED'
+        if not checks.owns_requested:
+            return 'REQUESTED_NOT_OWNED'
+        return None
     
     @classmethod
     def execute_trade(cls, trade_id):
         """
         Execute a trade with proper transaction isolation
+        Retries a bounded number of times on serialization failures and deadlocks.
         Returns (success, message) tuple
         """
+        return run_with_retries(lambda: cls._execute_trade_once(trade_id), f"trade {trade_id}", "Error completing trade")
+
+    @classmethod
+    def pending_conflicts(cls, artwork_ids, exclude_trade_id=None):
+        """Filter for pending trades offering or requesting any of artwork_ids."""
+        condition = and_(
+            cls.status == 'PENDING',
+            or_(cls.offered_artwork_id.in_(artwork_ids), cls.requested_artwork_id.in_(artwork_ids))
+        )
+        if exclude_trade_id is not None:
+            condition = and_(condition, cls.trade_id != exclude_trade_id)
+        return condition
+
+    @classmethod
+    def _execute_trade_once(cls, trade_id):
+        """
+        One attempt at execute_trade. Locks are always taken in the same global order -
+        trades by trade_id, then collections by (patron_id, artwork_id) - so two
+        concurrent accepts (e.g. of opposite trades) queue behind each other instead
+        of deadlocking.
+        """
         from server.models.collection import Collection
-        
-        # Get the trade by ID and lock it for update
-        trade = cls.query.with_for_update().get(trade_id)
-        
+        from server.services.trade_counter_service import record_trades_closed
+
+        trade = db.session.get(cls, trade_id)
         if not trade:
             return False, "Trade not found"
-        
+
+        # The artworks of a trade never change, so the conflict set can be found before locking
+        artwork_ids = (trade.offered_artwork_id, trade.requested_artwork_id)
+        pending_conflicts = cls.pending_conflicts(artwork_ids, exclude_trade_id=trade_id)
+
+        # 1. Lock this trade and every pending trade it will cancel, in trade_id order
+        db.session.query(cls.trade_id)\
+            .filter(or_(cls.trade_id == trade_id, pending_conflicts))\
+            .order_by(cls.trade_id)\
+            .with_for_update()\
+            .all()
+        db.session.refresh(trade)  # The status may have changed while we waited for the lock
+
         if trade.status != 'PENDING':
+            db.session.rollback()
             return False, f"Cannot accept a trade with status: {trade.status}"
-        
-        # Verify the artworks are still owned by the respective users
-        initiator_ownership = Collection.query.with_for_update().filter_by(
-            patron_id=trade.initiator_id,
-            artwork_id=trade.offered_artwork_id
-        ).first()
-        
-        recipient_ownership = Collection.query.with_for_update().filter_by(
-            patron_id=trade.recipient_id,
-            artwork_id=trade.requested_artwork_id
-        ).first()
-        
+
+        # 2. Lock both ownership rows in (patron_id, artwork_id) order
+        initiator_key = (trade.initiator_id, trade.offered_artwork_id)
+        recipient_key = (trade.recipient_id, trade.requested_artwork_id)
+        ownership = {
+            (row.patron_id, row.artwork_id): row
+            for row in Collection.query
+                .filter(tuple_(Collection.patron_id, Collection.artwork_id).in_([initiator_key, recipient_key]))
+                .order_by(Collection.patron_id, Collection.artwork_id)
+                .with_for_update()
+                .all()
+        }
+        initiator_ownership = ownership.get(initiator_key)
+        recipient_ownership = ownership.get(recipient_key)
+
         if not initiator_ownership or not recipient_ownership:
             trade.status = 'REJECTED'  # Automatically reject if conditions changed
+            record_trades_closed([(trade.initiator_id, trade.recipient_id)])
             db.session.commit()
             return False, "Trade cannot be completed because one or both artworks are no longer available"
-        
-        try:
-            # 1. Update trade status to ACCEPTED
-            trade.status = 'ACCEPTED'
-            
-            # 2. Exchange artwork ownership
-            # Update ownership records
-            initiator_ownership.patron_id = trade.recipient_id
-            recipient_ownership.patron_id = trade.initiator_id
-            
-            # 3. Check for and cancel conflicting trades
-            # Find other pending trades involving either of these artworks
-            conflicting_trades = cls.query.filter(
-                and_(
-                    cls.status == 'PENDING',
-                    cls.trade_id != trade.trade_id,
-                    or_(
-                        cls.offered_artwork_id.in_([trade.offered_artwork_id, trade.requested_artwork_id]),
-                        cls.requested_artwork_id.in_([trade.offered_artwork_id, trade.requested_artwork_id])
-                    )
-                )
-            ).all()
-            
-            # Cancel all conflicting trades
-            for conflict in conflicting_trades:
-                conflict.status = 'CANCELED'
-            
-            db.session.commit()
-            return True, "Trade successfully completed"
-        except Exception as e:
-            db.session.rollback()
-            # Log the specific error for debugging on the server
-            current_app.logger.error(f"Error executing trade {trade_id}: {str(e)}", exc_info=True) 
-            # Return False and a user-friendly error message
-            return False, f"Error completing trade: {str(e)}"
-    
+
+        # 3. Update trade status to ACCEPTED and exchange artwork ownership
+        trade.status = 'ACCEPTED'
+        initiator_ownership.patron_id = trade.recipient_id
+        recipient_ownership.patron_id = trade.initiator_id
+
+        # 4. Cancel every other pending trade involving either artwork in one indexed UPDATE
+        #    (partial indexes on pending trades per artwork column, see __table_args__)
+        canceled = db.session.execute(
+            update(cls)
+            .where(pending_conflicts)
+            .values(status='CANCELED', updated_at=func.now())
+            .returning(cls.initiator_id, cls.recipient_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+
+        # 5. Keep the pending-trade counters in step, in the same transaction
+        record_trades_closed([(trade.initiator_id, trade.recipient_id), *canceled])
+
+        db.session.commit()
+        return True, "Trade successfully completed"
+
     # --- Database Constraints/Indexes ---
     __table_args__ = (
-        # Index for faster lookup of trades by user
-        Index('idx_trades_initiator_id', 'initiator_id'),
-        Index('idx_trades_recipient_id', 'recipient_id'),
+        # Sent/received listings: filter by user (+ status), newest first
+        Index('idx_trades_initiator_status_created_at', 'initiator_id', 'status', 'created_at'),
+        Index('idx_trades_recipient_status_created_at', 'recipient_id', 'status', 'created_at'),
         # Index for sorting/filtering by status and date
         Index('idx_trades_status', 'status'),
         Index('idx_trades_created_at', 'created_at'),
+        # Conflict lookups in execute_trade only ever look at pending trades
+        Index('idx_trades_pending_offered_artwork', 'offered_artwork_id', postgresql_where=text("status = 'PENDING'")),
+        Index('idx_trades_pending_requested_artwork', 'requested_artwork_id', postgresql_where=text("status = 'PENDING'")),
+        # At most one pending trade per swap, whichever side proposed it: the key is the
+        # (lower user, higher user, artwork from lower, artwork from higher) tuple
+        Index(
+            'uq_trades_pending_pair',
+            func.least(initiator_id, recipient_id),
+            func.greatest(initiator_id, recipient_id),
+            case((initiator_id < recipient_id, offered_artwork_id), else_=requested_artwork_id),
+            case((initiator_id < recipient_id, requested_artwork_id), else_=offered_artwork_id),
+            unique=True,
+            postgresql_where=text("status = 'PENDING'")
+        ),
+        # Expiry sweep walks pending trades oldest first; archiving walks finished ones by last change
+        Index('idx_trades_pending_created_at', 'created_at', postgresql_where=text("status = 'PENDING'")),
+        Index('idx_trades_finished_updated_at', 'updated_at', postgresql_where=text("status <> 'PENDING'")),
     )
\ No newline at end of file
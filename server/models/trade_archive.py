@@ -0,0 +1,35 @@
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy.sql import func
+from sqlalchemy import Integer, Text, DateTime, Column, Index
+
+# Import db from extensions instead of from app to avoid circular imports
+from server.extensions import db
+from server.models.trade import TradeStatusEnum
+
+class TradeArchive(db.Model, SerializerMixin):
+    """
+    Finished trades moved out of the hot `trades` table by the archive job
+    (see services/trade_expiry_service.py). Same columns as Trade plus archived_at.
+    No foreign keys: history is kept even after users or artworks are deleted.
+    """
+    __tablename__ = 'trades_archive'
+
+    trade_id = Column(Integer, primary_key=True, autoincrement=False)
+    initiator_id = Column(Integer, nullable=False)
+    recipient_id = Column(Integer, nullable=False)
+    offered_artwork_id = Column(Integer, nullable=False)
+    requested_artwork_id = Column(Integer, nullable=False)
+    message = Column(Text, nullable=True)
+    status = Column(TradeStatusEnum, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f'<TradeArchive {self.trade_id}: {self.initiator_id} -> {self.recipient_id}, Status: {self.status}>'
+
+    # --- Database Constraints/Indexes ---
+    __table_args__ = (
+        Index('idx_trades_archive_initiator_id', 'initiator_id'),
+        Index('idx_trades_archive_recipient_id', 'recipient_id'),
+    )
@@ -0,0 +1,159 @@
+from datetime import datetime
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy.sql import func
+from sqlalchemy import ForeignKey, Integer, String, DateTime, Column, Index, tuple_, update, delete
+
+# Import db from extensions instead of from app to avoid circular imports
+from server.extensions import db
+from server.models.trade import Trade, run_with_retries
+
+CYCLE_STATUSES = ('PROPOSED', 'EXECUTED', 'DECLINED', 'FAILED', 'EXPIRED')
+
+class TradeCycle(db.Model, SerializerMixin):
+    """
+    A proposed multi-party trade: each leg's giver hands one artwork to the
+    receiver, and the receivers close the loop (A -> B -> C -> A). Found by
+    services/trade_cycle_service.py; executes once every giver has accepted.
+    """
+    __tablename__ = 'trade_cycles'
+
+    cycle_id = Column(Integer, primary_key=True)
+    status = Column(String(20), nullable=False, server_default='PROPOSED')
+    # Number of legs proposed; a user delete cascading away a leg leaves the cycle unexecutable
+    size = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # --- Relationships ---
+    legs = db.relationship('TradeCycleLeg', back_populates='cycle', order_by='TradeCycleLeg.position',
+                           cascade='all, delete-orphan')
+
+    # --- Serialization ---
+    serialize_rules = ('-legs.cycle',)
+
+    def __repr__(self):
+        return f'<TradeCycle {self.cycle_id}: {self.size} legs, Status: {self.status}>'
+
+    @classmethod
+    def execute_cycle(cls, cycle_id):
+        """
+        Moves every leg's artwork in one transaction, with the same retry policy as
+        Trade.execute_trade.
+        Returns (success, message) tuple
+        """
+        return run_with_retries(lambda: cls._execute_cycle_once(cycle_id), f"trade cycle {cycle_id}",
+                                "Error completing trade cycle")
+
+    @classmethod
+    def _execute_cycle_once(cls, cycle_id):
+        """
+        One attempt at execute_cycle. After the cycle row, locks follow
+        Trade._execute_trade_once's global order - pending trades by trade_id, then
+        collections by (patron_id, artwork_id) - so cycles and two-party trades over
+        the same artworks queue behind each other instead of deadlocking.
+        """
+        from server.models.collection import Collection
+        from server.models.wishlist_item import WishlistItem
+        from server.services.trade_counter_service import record_trades_closed
+
+        cycle = db.session.get(cls, cycle_id, with_for_update=True, populate_existing=True)
+        if not cycle:
+            return False, "Trade cycle not found"
+        if cycle.status != 'PROPOSED':
+            db.session.rollback()
+            return False, f"Cannot execute a trade cycle with status: {cycle.status}"
+
+        legs = cycle.legs
+        if len(legs) != cycle.size:
+            cycle.status = 'FAILED'  # A participant's account was deleted
+            db.session.commit()
+            return False, "Trade cycle cannot be completed because a participant left"
+        if any(leg.accepted_at is None for leg in legs):
+            db.session.rollback()
+            return False, "Every participant must accept before the trade cycle can run"
+
+        # 1. Lock every pending trade the cycle will cancel, in trade_id order
+        artwork_ids = sorted({leg.artwork_id for leg in legs})
+        pending_conflicts = Trade.pending_conflicts(artwork_ids)
+        db.session.query(Trade.trade_id)\
+            .filter(pending_conflicts)\
+            .order_by(Trade.trade_id)\
+            .with_for_update()\
+            .all()
+
+        # 2. Lock the givers' rows and any receiver rows in (patron_id, artwork_id) order
+        giver_keys = [(leg.giver_id, leg.artwork_id) for leg in legs]
+        receiver_keys = [(leg.receiver_id, leg.artwork_id) for leg in legs]
+        ownership = {
+            (row.patron_id, row.artwork_id): row
+            for row in Collection.query
+                .filter(tuple_(Collection.patron_id, Collection.artwork_id).in_(giver_keys + receiver_keys))
+                .order_by(Collection.patron_id, Collection.artwork_id)
+                .with_for_update()
+                .all()
+        }
+        if any(key not in ownership for key in giver_keys) or any(key in ownership for key in receiver_keys):
+            cycle.status = 'FAILED'
+            db.session.commit()
+            return False, "Trade cycle cannot be completed because some artworks changed hands"
+
+        # 3. Hand every artwork to its receiver
+        for leg in legs:
+            ownership[(leg.giver_id, leg.artwork_id)].patron_id = leg.receiver_id
+        cycle.status = 'EXECUTED'
+
+        # 4. Cancel pending two-party trades over the moved artworks, keeping counters in step
+        canceled = db.session.execute(
+            update(Trade)
+            .where(pending_conflicts)
+            .values(status='CANCELED', updated_at=func.now())
+            .returning(Trade.initiator_id, Trade.recipient_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        record_trades_closed(canceled)
+
+        # 5. Receivers got what they wished for
+        db.session.execute(
+            delete(WishlistItem)
+            .where(tuple_(WishlistItem.user_id, WishlistItem.artwork_id).in_(receiver_keys)),
+            execution_options={'synchronize_session': False}
+        )
+
+        db.session.commit()
+        return True, "Trade cycle successfully completed"
+
+    # --- Database Constraints/Indexes ---
+    __table_args__ = (
+        Index('idx_trade_cycles_status_created_at', 'status', 'created_at'),
+    )
+
+
+class TradeCycleLeg(db.Model, SerializerMixin):
+    __tablename__ = 'trade_cycle_legs'
+
+    cycle_id = Column(Integer, ForeignKey('trade_cycles.cycle_id', ondelete='CASCADE'), primary_key=True)
+    position = Column(Integer, primary_key=True)
+
+    giver_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    receiver_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    artwork_id = Column(Integer, ForeignKey('artworks.artwork_id', ondelete='CASCADE'), nullable=False)
+
+    accepted_at = Column(DateTime, nullable=True)
+
+    # --- Relationships ---
+    cycle = db.relationship('TradeCycle', back_populates='legs')
+
+    def accept(self):
+        if self.accepted_at is None:
+            self.accepted_at = datetime.utcnow()
+
+    def __repr__(self):
+        return f'<TradeCycleLeg {self.cycle_id}.{self.position}: {self.giver_id} -> {self.receiver_id} ({self.artwork_id})>'
+
+    # --- Database Constraints/Indexes ---
+    __table_args__ = (
+        # "My cycles" lookups and excluding busy users from discovery
+        Index('idx_trade_cycle_legs_giver_id', 'giver_id'),
+        Index('idx_trade_cycle_legs_receiver_id', 'receiver_id'),
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy.sql import func
+from sqlalchemy import ForeignKey, Integer, DateTime, Column
+
+# Import db from extensions instead of from app to avoid circular imports
+from server.extensions import db
+
+class TradeInboxCounter(db.Model, SerializerMixin):
+    """
+    Per-user pending trade counts behind GET /api/trades/summary.
+    Maintained in the same transaction as every trade status change
+    (see services/trade_counter_service.py) and repaired by a reconcile job.
+    """
+    __tablename__ = 'trade_inbox_counters'
+
+    user_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+
+    pending_sent = Column(Integer, nullable=False, default=0, server_default='0')
+    pending_received = Column(Integer, nullable=False, default=0, server_default='0')
+    # Newest offer sent/received while the matching count is non-zero; NULL once it drops to zero
+    latest_sent_at = Column(DateTime(timezone=True), nullable=True)
+    latest_received_at = Column(DateTime(timezone=True), nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f'<TradeInboxCounter User {self.user_id}: {self.pending_sent} sent, {self.pending_received} received>'
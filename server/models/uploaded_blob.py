@@ -0,0 +1,54 @@
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy.sql import func
+from sqlalchemy import ForeignKey, Integer, BigInteger, String, DateTime, Column
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Import db from extensions instead of from app to avoid circular imports
+from server.extensions import db
+
+class UploadedBlob(db.Model, SerializerMixin):
+    """
+    Content-addressed index of uploaded images: one row per distinct file (SHA-256
+    of its bytes), pointing at where it was stored and its generated variants.
+    A re-upload of the same bytes reuses these instead of storing and thumbnailing
+    the file again (see routes/upload.py).
+    """
+    __tablename__ = 'uploaded_blobs'
+
+    sha256 = Column(String(64), primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=True)
+    image_url = Column(String(500), nullable=False)
+    thumbnail_url = Column(String(500), nullable=True)   # Null until the variant job is done
+    variants = Column(JSONB, nullable=True)              # Same shape as Artwork.image_variants
+    job_id = Column(String(36), ForeignKey('thumbnail_jobs.job_id', ondelete='SET NULL'), nullable=True)
+    first_uploaded_by = Column(Integer, ForeignKey('users.user_id', ondelete='SET NULL'), nullable=True)
+    upload_count = Column(Integer, nullable=False, server_default='1')
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f'<UploadedBlob {self.sha256[:12]}: {self.upload_count} uploads>'
+
+    @classmethod
+    def dedup_stats(cls):
+        """
+        Returns:
+            dict: uploads, unique_files, hits, hit_rate, bytes_stored, bytes_saved
+        """
+        unique_files, uploads, bytes_stored, bytes_saved = db.session.query(
+            func.count(),
+            func.coalesce(func.sum(cls.upload_count), 0),
+            func.coalesce(func.sum(cls.size_bytes), 0),
+            func.coalesce(func.sum((cls.upload_count - 1) * cls.size_bytes), 0),
+        ).one()
+        hits = uploads - unique_files
+        return {
+            "uploads": int(uploads),
+            "unique_files": unique_files,
+            "hits": int(hits),
+            "hit_rate": round(hits / uploads, 4) if uploads else 0.0,
+            "bytes_stored": int(bytes_stored),
+            "bytes_saved": int(bytes_saved),
+        }
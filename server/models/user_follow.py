@@ -42,6 +42,9 @@ class UserFollow(db.Model, SerializerMixin):
         # Indexes for faster lookups
         Index('idx_userfollows_patron_id', 'patron_id'),
         Index('idx_userfollows_artist_id', 'artist_id'),
+        # Keyset pagination of following/followers lists, newest first
+        Index('idx_userfollows_patron_created_at', 'patron_id', 'created_at', 'artist_id'),
+        Index('idx_userfollows_artist_created_at', 'artist_id', 'created_at', 'patron_id'),
         # Optional: DB Check constraint to prevent self-follow (syntax varies)
         # db.CheckConstraint('patron_id != artist_id', name='chk_no_self_follow'),
     )
\ No newline at end of file
@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy import ForeignKey, Integer, Column, TIMESTAMP, Index
+# Import db instance
+from server.app import db
+
+class WishlistItem(db.Model, SerializerMixin):
+    """An artwork a user would like to trade for (see services/trade_match_service.py)."""
+    __tablename__ = 'wishlist_items'
+
+    user_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True, nullable=False)
+    artwork_id = Column(Integer, ForeignKey('artworks.artwork_id', ondelete='CASCADE'), primary_key=True, nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<WishlistItem User {self.user_id} - Artwork {self.artwork_id}>'
+
+    # --- Database Constraints/Indexes ---
+    __table_args__ = (
+        # artwork -> wishers, for rebuilding the match index and artwork deletes
+        Index('idx_wishlist_items_artwork_id', 'artwork_id'),
+        # A user's wishlist, newest first
+        Index('idx_wishlist_items_user_created_at', 'user_id', 'created_at', 'artwork_id'),
+    )
@@ -1,10 +1,24 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, send_file, redirect, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from server.services.auth_helper import artist_required
+from server.services.auth_helper import artist_required, admin_required
+from server.services.autocomplete_service import autocomplete_index
+from server.services.trade_match_service import trade_match_index
+from server.services.perceptual_hash import near_duplicate_index, from_signed64, MAX_QUERY_DISTANCE
+from server.services.color_palette import color_index, parse_hex_color, to_hex, MAX_COLOR_DISTANCE
+from server.services.decal_renderer import (
+    decal_renderer, DecalError, DECAL_RENDER_SIZES, RENDER_CACHE_MAX_AGE, RENDER_REDIRECT_MAX_AGE
+)
+from server.services.storage import StorageError
+from server.services.facet_service import parse_artwork_filters, apply_artwork_filters, get_artwork_facets, invalidate_facet_cache
+from server.services.serializer import serialize, ARTWORK_DETAIL_FIELDS
+from server.services.read_models import artwork_cards
+from server.services.pagination import encode_cursor, read_cursor, keyset_page, read_with_total, fetch_page, estimate_table_rows
 from server.models.user import User
 from server.models.artwork import Artwork
+from server.models.thumbnail_job import ThumbnailJob
 from server.app import db
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 
 artworks_bp = Blueprint('artworks', __name__)
 
@@ -99,11 +113,32 @@ def create_artwork():
         medium=medium.strip(),           # Pass the extracted medium
         rarity=rarity                    # Pass the extracted rarity
     )
+    new_artwork.refresh_search_vector() # Keep the full-text document in sync with the new fields
 
     try:
         db.session.add(new_artwork)
+        db.session.flush()
+        # Link to the upload's background thumbnail job, or pick up its result if it already finished
+        finished_job = ThumbnailJob.attach_artwork(image_url, new_artwork.artwork_id)
+        if finished_job:
+            new_artwork.image_variants = finished_job.variants
+            new_artwork.perceptual_hash = finished_job.perceptual_hash
+            new_artwork.palette = finished_job.palette
+            new_artwork.width, new_artwork.height = finished_job.width, finished_job.height
+            new_artwork.placeholder = finished_job.placeholder
+            if thumbnail_url in (None, '', image_url):
+                new_artwork.thumbnail_url = finished_job.thumbnail_url
         db.session.commit()
         current_app.logger.info(f"Artwork ID {new_artwork.artwork_id} created successfully.")
+        autocomplete_index.artwork_saved(new_artwork.artwork_id, new_artwork.title, new_artwork.series, is_new=True)
+        invalidate_facet_cache()
+        near_duplicates = []
+        if new_artwork.perceptual_hash is not None:
+            # Still rendering otherwise; the worker indexes it and the admin report catches any match
+            image_hash = from_signed64(new_artwork.perceptual_hash)
+            near_duplicates = near_duplicate_index.find(image_hash, current_app.config['NEAR_DUPLICATE_MAX_DISTANCE'])
+            near_duplicate_index.add(new_artwork.artwork_id, image_hash)
+            color_index.artwork_saved(new_artwork.artwork_id, new_artwork.palette)
     except IntegrityError as e: # Catch specific IntegrityError
         db.session.rollback()
         current_app.logger.error(f"Database integrity error creating artwork: {e}", exc_info=True)
@@ -137,12 +172,24 @@ def create_artwork():
             "description": created_artwork.description,
             "image_url": created_artwork.image_url,
             "thumbnail_url": created_artwork.thumbnail_url,
+            "image_variants": created_artwork.image_variants,
+            "palette": created_artwork.palette,
+            "width": created_artwork.width,
+            "height": created_artwork.height,
+            "placeholder": created_artwork.placeholder,
             "year": created_artwork.year,           # Include year
             "medium": created_artwork.medium,       # Include medium
             "rarity": created_artwork.rarity,       # Include rarity
             "created_at": created_artwork.created_at.isoformat() if created_artwork.created_at else None, # Format datetime
             "updated_at": created_artwork.updated_at.isoformat() if created_artwork.updated_at else None, # Format datetime
         }
+        if near_duplicates:
+            # The artwork is created either way; the client can ask the artist to double-check
+            response_data["warnings"] = [{
+                "code": "NEAR_DUPLICATE",
+                "message": f"This image closely resembles {len(near_duplicates)} existing artwork(s).",
+                "artworks": [{"artwork_id": artwork_id, "distance": distance} for artwork_id, distance in near_duplicates]
+            }]
 
     except Exception as e:
         current_app.logger.exception("Serialization failed after creating artwork")
@@ -155,58 +202,76 @@ def create_artwork():
 # === GET /api/artworks ===
 @artworks_bp.route('', methods=['GET']) # Handles GET requests to the blueprint root
 def get_artworks():
-    """Gets a list of artworks, optionally paginated/limited."""
+    """
+    Gets a list of artworks, optionally paginated/limited.
+    Filters: rarity (comma separated), medium, series, artist_id, year_min, year_max.
+    Pass facets=true to also get counts per rarity, medium and decade for the filtered set.
+    Pass with_total=false to skip the exact total (the unfiltered list then reports an estimate).
+    """
+    # --- Filters ---
+    filters, errors = parse_artwork_filters(request.args)
+    if errors:
+        return jsonify({"error": {"code": "VALIDATION_001", "message": "Invalid filter parameters", "details": errors}}), 400
+    include_facets = request.args.get('facets', 'false').lower() == 'true'
+    try:
+        use_keyset, after = read_cursor(request.args, 2)
+    except ValueError:
+        return jsonify({"error": {"code": "VALIDATION_001", "message": "Invalid cursor"}}), 400
+
     try:
         # --- Parameters ---
         # Get pagination/limit parameters from request query string
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 12, type=int) # Default limit for homepage/general lists
-        limit = min(limit, 50) # Apply a reasonable max limit
+        limit = max(1, min(limit, 50)) # Apply a reasonable max limit
 
         # --- Query ---
-        # Query artworks, eager load the related artist, order by newest first
-        query = Artwork.query.options(
-                    db.joinedload(Artwork.artist) # Eager load artist data
-                ).order_by(Artwork.created_at.desc())
+        # Project just the card columns (+ artist id/username) into lightweight rows, newest first.
+        # artwork_id breaks ties so the order (and therefore the cursor) is stable.
+        sort_columns = (Artwork.created_at, Artwork.artwork_id)
+        query = apply_artwork_filters(artwork_cards(), filters)\
+            .order_by(Artwork.created_at.desc(), Artwork.artwork_id.desc())
 
         # --- Pagination ---
-        # Apply pagination to the query
-        pagination = query.paginate(page=page, per_page=limit, error_out=False)
-        artworks = pagination.items # Get the artworks for the current page
+        # ?cursor= seeks past the previous page's last row (no OFFSET, no COUNT);
+        # otherwise fall back to classic page numbers.
+        if use_keyset:
+            artworks, next_cursor = keyset_page(
+                query, sort_columns, after, limit,
+                lambda aw: (aw.created_at, aw.artwork_id)
+            )
+            pagination_info = {"limit": limit, "has_next": next_cursor is not None, "next_cursor": next_cursor}
+        else:
+            # The exact total comes from a window count in the page query itself. Without it,
+            # the unfiltered list can still show a cheap planner estimate.
+            estimate = None if filters else (lambda: estimate_table_rows(db.session, Artwork.__tablename__))
+            pagination = fetch_page(query, page, limit, with_total=read_with_total(request.args), estimate_total=estimate)
+            artworks = pagination.items # Get the artworks for the current page
+            next_cursor = None
+            if pagination.has_next and artworks:
+                next_cursor = encode_cursor(artworks[-1].created_at, artworks[-1].artwork_id)
+            pagination_info = {
+                "total_items": pagination.total,
+                "total_pages": pagination.pages,
+                "total_exact": pagination.total_exact,
+                "current_page": page,
+                "limit": limit,
+                "has_next": pagination.has_next,
+                "next_cursor": next_cursor
+            }
 
         # --- Serialization ---
-        # Define the fields needed by the ArtworkCard component on the frontend
-        # Use dot notation for nested artist fields
-        artwork_card_fields = (
-            "artwork_id",
-            "title",
-            "description",
-            "series",
-            "rarity",
-            "image_url",
-            "thumbnail_url",
-            "year",
-            "medium",
-            "artist_name",     # Include the artist_name field
-            "artist_id",       # Include artist ID from the artwork table itself
-            "artist.user_id",  # Include nested artist ID (can be redundant but explicit)
-            "artist.username"  # Include nested artist username
-            # Add any other necessary fields defined in your Artwork model
-        )
-        # Use the 'only' parameter with the defined fields
-        serialized_artworks = [aw.to_dict(only=artwork_card_fields) for aw in artworks]
+        # Same fields as to_dict(only=ARTWORK_CARD_FIELDS), incl. nested artist.user_id / artist.username
+        serialized_artworks = [card.to_dict() for card in artworks]
 
         # --- Prepare Response ---
         # Include both the artwork list and pagination info
         response = {
              "artworks": serialized_artworks,
-             "pagination": {
-                "total_items": pagination.total,
-                "total_pages": pagination.pages,
-                "current_page": page,
-                "limit": limit
-             }
+             "pagination": pagination_info
         }
+        if include_facets:
+            response["facets"] = get_artwork_facets(filters)
         return jsonify(response), 200
 
     except Exception as e:
@@ -216,6 +281,51 @@ def get_artworks():
 # === END OF ADDED ROUTE HANDLER ===
 
 
+# === GET /api/artworks/by-color ===
+@artworks_bp.route('/by-color', methods=['GET'])
+@jwt_required(optional=True)
+def get_artworks_by_color():
+    """
+    Artworks ranked by how close one of their dominant colours is to a query colour
+    (CIELAB delta E), closest first.
+    Query params: color (hex, e.g. %23ff5500; defaults to the signed-in user's
+    favorite_color), limit (default 24, max 50), max_distance (default 40).
+    """
+    color = request.args.get('color')
+    source = 'query'
+    if not color:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id) if current_user_id else None
+        color, source = (user.favorite_color if user else None), 'favorite_color'
+    if not color:
+        return jsonify({"error": {"code": "VALIDATION_001", "message": "A color is required (or set a favorite color)."}}), 400
+    try:
+        rgb = parse_hex_color(color)
+    except ValueError:
+        return jsonify({"error": {"code": "VALIDATION_001", "message": "Invalid color format. Expected hex color (e.g., #FF5500)."}}), 400
+    limit = max(1, min(request.args.get('limit', 24, type=int), 50))
+    max_distance = request.args.get('max_distance', 40.0, type=float)
+    if not 0 <= max_distance <= MAX_COLOR_DISTANCE:
+        return jsonify({"error": {"code": "VALIDATION_001", "message": f"max_distance must be between 0 and {MAX_COLOR_DISTANCE:g}"}}), 400
+
+    try:
+        matches = color_index.search(rgb, limit=limit, max_distance=max_distance)
+        cards = {card.artwork_id: card for card in
+                 artwork_cards().filter(Artwork.artwork_id.in_([artwork_id for artwork_id, _, _ in matches]))} if matches else {}
+        results = []
+        for artwork_id, distance, weight in matches:
+            card = cards.get(artwork_id)
+            if card is None:  # Deleted on another worker since the index was built
+                continue
+            data = card.to_dict()
+            data["color_match"] = {"distance": round(distance, 1), "weight": weight}
+            results.append(data)
+        return jsonify({"color": to_hex(rgb), "color_source": source, "artworks": results}), 200
+    except Exception as e:
+        current_app.logger.exception("Error searching artworks by color")
+        return jsonify({"error": {"message": "Failed to search artworks by color"}}), 500
+
+
 # === GET /api/artworks/:artwork_id ===
 @artworks_bp.route('/<int:artwork_id>', methods=['GET'])
 @jwt_required() # Require login to view artwork details (per spec)
@@ -239,27 +349,8 @@ def get_artwork_details(artwork_id):
 
 
     # --- Serialization ---
-    # Define fields to include, similar to get_artworks route
-    artwork_detail_fields = (
-        "artwork_id",
-        "title",
-        "description",
-        "series",
-        "rarity",
-        "image_url", 
-        "thumbnail_url",
-        "border_decal_id",  # Include border_decal_id
-        "year",
-        "medium",
-        "artist_name",
-        "artist_id",
-        "artist.user_id",
-        "artist.username",
-        "created_at",
-        "updated_at"
-    )
-    # Use to_dict with the only parameter for consistent serialization
-    response_data = artwork.to_dict(only=artwork_detail_fields)
+    # Same fields as to_dict(only=ARTWORK_DETAIL_FIELDS), via the compiled serializer
+    response_data = serialize(artwork, ARTWORK_DETAIL_FIELDS)
     # --- End Serialization ---
 
     return jsonify(response_data), 200
@@ -329,6 +420,9 @@ def update_artwork(artwork_id):
             }
         }), 400
     
+    previous_series = artwork.series # Needed to move the autocomplete series count
+    previous_decal = artwork.border_decal_id # Its cached renders are dropped if it changes
+
     try:
         # Update fields if they are provided
         if 'title' in data:
@@ -347,30 +441,19 @@ def update_artwork(artwork_id):
             artwork.rarity = data['rarity']
         if 'border_decal_id' in data:
             artwork.border_decal_id = data['border_decal_id']
+        # Rebuild the full-text document only when a searchable field was sent
+        if any(field in data for field in ('title', 'series', 'artist_name', 'medium', 'description')):
+            artwork.refresh_search_vector()
         
         # Save changes
         db.session.commit()
+        autocomplete_index.artwork_saved(artwork.artwork_id, artwork.title, artwork.series, previous_series=previous_series)
+        if artwork.border_decal_id != previous_decal:
+            decal_renderer.invalidate(artwork.image_url, previous_decal)
+        invalidate_facet_cache()
         
         # Return updated artwork
-        artwork_detail_fields = (
-            "artwork_id",
-            "title",
-            "description",
-            "series",
-            "rarity",
-            "image_url", 
-            "thumbnail_url",
-            "border_decal_id",  # Include border_decal_id
-            "year",
-            "medium",
-            "artist_name",
-            "artist_id",
-            "artist.user_id",
-            "artist.username",
-            "created_at",
-            "updated_at"
-        )
-        response_data = artwork.to_dict(only=artwork_detail_fields)
+        response_data = serialize(artwork, ARTWORK_DETAIL_FIELDS)
         return jsonify(response_data), 200
         
     except IntegrityError as e:
@@ -392,6 +475,72 @@ def update_artwork(artwork_id):
             }
         }), 500
 
+# === GET /api/artworks/:artwork_id/decal/:decal_id/:size ===
+@artworks_bp.route('/<int:artwork_id>/decal/<decal_id>/<size>', methods=['GET'])
+def get_decal_render(artwork_id, decal_id, size):
+    """
+    The artwork's image cropped to card shape with its border decal composited on
+    top, as WebP. size is one of DECAL_RENDER_SIZES. Public like the images
+    themselves, so it can be used directly as an <img> src.
+
+    The render itself is served at ?v=<decal version> (a hash of the decal's SVG).
+    That URL names the decal and its version, so a render never changes once
+    served and is cached for a year; changing the artwork's decal or editing the
+    decal file changes its URL. Without v, or with an outdated one, this
+    redirects to the current version's URL. A decal_id that is no longer the
+    artwork's decal is a 404.
+    """
+    if size not in DECAL_RENDER_SIZES:
+        return jsonify({"error": {"code": "VALIDATION_001",
+                                  "message": f"size must be one of: {', '.join(DECAL_RENDER_SIZES)}"}}), 400
+
+    artwork = db.session.query(Artwork).options(
+        load_only(Artwork.artwork_id, Artwork.image_url, Artwork.thumbnail_url,
+                  Artwork.image_variants, Artwork.border_decal_id)
+    ).filter(Artwork.artwork_id == artwork_id).first()
+    if artwork is None or artwork.border_decal_id != decal_id:
+        return jsonify({"error": {"code": "RENDER_404", "message": "No render for this artwork and decal"}}), 404
+
+    try:
+        version = decal_renderer.version(decal_id)
+        if request.args.get('v') != version:
+            response = redirect(url_for('artworks.get_decal_render', artwork_id=artwork_id, decal_id=decal_id,
+                                        size=size, v=version))
+            response.cache_control.public = True
+            response.cache_control.max_age = RENDER_REDIRECT_MAX_AGE
+            return response
+        # A second pass if another request evicted the render between the lookup and opening it
+        for attempt in range(2):
+            key, path, hit = decal_renderer.render(artwork, size)
+            try:
+                # conditional=True answers If-None-Match with 304
+                response = send_file(path, mimetype='image/webp', max_age=RENDER_CACHE_MAX_AGE, etag=key,
+                                     conditional=True)
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise
+    except DecalError as e:
+        current_app.logger.warning(f"Cannot render decal {decal_id} for artwork {artwork_id}: {e}")
+        return jsonify({"error": {"code": "DECAL_404", "message": "This decal cannot be rendered"}}), 404
+    except (StorageError, OSError) as e:
+        current_app.logger.error(f"Could not read artwork {artwork_id} image for a decal render: {e}")
+        return jsonify({"error": {"code": "IMAGE_UNAVAILABLE", "message": "Artwork image could not be read"}}), 502
+
+    response.cache_control.immutable = True
+    response.headers['X-Render-Cache'] = 'hit' if hit else 'miss'
+    return response
+
+
+# === GET /api/artworks/decal-renders/stats ===
+@artworks_bp.route('/decal-renders/stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def decal_render_stats():
+    """Render cache hit ratio, disk use and recent p50/p99 render time. Admins only."""
+    return jsonify(decal_renderer.stats()), 200
+
+
 # === DELETE /api/artworks/:artwork_id ===
 @artworks_bp.route('/<int:artwork_id>', methods=['DELETE'])
 @jwt_required()
@@ -411,10 +560,20 @@ def delete_artwork(artwork_id):
             }
         }), 403
     
+    series = artwork.series
+    palette = artwork.palette
+    image_url, decal_id = artwork.image_url, artwork.border_decal_id
+
     try:
         # Delete the artwork
         db.session.delete(artwork)
         db.session.commit()
+        autocomplete_index.artwork_deleted(artwork_id, series)
+        trade_match_index.artwork_deleted(artwork_id)
+        near_duplicate_index.artwork_deleted(artwork_id)
+        color_index.artwork_deleted(artwork_id, palette)
+        decal_renderer.invalidate(image_url, decal_id)
+        invalidate_facet_cache()
         
         return jsonify({
             "message": "Artwork deleted successfully",
@@ -429,4 +588,34 @@ def delete_artwork(artwork_id):
                 "code": "SERVER_ERROR", 
                 "message": "Failed to delete artwork"
             }
-        }), 500
\ No newline at end of file
+        }), 500
+# === GET /api/artworks/admin/near-duplicates ===
+@artworks_bp.route('/admin/near-duplicates', methods=['GET'])
+@jwt_required()
+def admin_near_duplicate_report():
+    """
+    Admin batch report: pairs of artworks whose images are within max_distance
+    bits of each other (perceptual hash), closest first.
+    Query params: max_distance (default NEAR_DUPLICATE_MAX_DISTANCE), limit (default 100, max 1000).
+    The same report is available offline as `flask near-duplicate-report`.
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    if not user or user.role != 'admin':
+        return jsonify({"error": {"code": "AUTH_004", "message": "Action requires admin role."}}), 403
+
+    max_distance = request.args.get('max_distance', current_app.config['NEAR_DUPLICATE_MAX_DISTANCE'], type=int)
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    if not 0 <= max_distance <= MAX_QUERY_DISTANCE or limit < 1:
+        return jsonify({"error": {"code": "VALIDATION_001",
+                                  "message": f"max_distance must be 0-{MAX_QUERY_DISTANCE} and limit positive"}}), 400
+
+    pairs = near_duplicate_index.duplicate_pairs(max_distance, limit=limit)
+    return jsonify({
+        "pairs": [
+            {"artwork_id": artwork_id, "other_artwork_id": other_id, "distance": distance}
+            for artwork_id, other_id, distance in pairs
+        ],
+        "max_distance": max_distance,
+        "indexed_artworks": len(near_duplicate_index)
+    }), 200
@@ -13,6 +13,9 @@ from flask_cors import cross_origin
 # Import necessary items from the models package and the main app file
 from ..models.user import User
 from ..extensions import db, jwt, BLOCKLIST # Import db AND the example BLOCKLIST
+from ..services.autocomplete_service import autocomplete_index
+from ..services.trade_match_service import trade_match_index
+from ..services.serializer import serialize
 
 # Create the blueprint
 auth_bp = Blueprint('auth', __name__)
@@ -128,6 +131,7 @@ def register_user():
     try:
         db.session.add(new_user)
         db.session.commit()
+        autocomplete_index.user_saved(new_user.user_id, new_user.username)
     except Exception as e:
         db.session.rollback()
         current_app.logger.exception(f"Database error during registration for email {email}")
@@ -138,7 +142,7 @@ def register_user():
          current_app.logger.error(f"Failed to fetch newly created user ID: {new_user.user_id}")
          return jsonify({"error": {"code": "INTERNAL_SERVER_ERROR", "message": "Failed to retrieve registered user details"}}), 500
 
-    user_data = created_user.to_dict(only=["user_id", "username", "email", "role", "created_at"])
+    user_data = serialize(created_user, ("user_id", "username", "email", "role", "created_at"))
     return jsonify(user_data), 201
 
 
@@ -178,7 +182,7 @@ def login_user():
             current_app.logger.warning(f"DB warning: Failed to update last_login for user {user.user_id} during login: {e}")
 
         # --- Prepare User Data for Response ---
-        login_user_response_data = user.to_dict(only=["user_id", "username", "role", "email", "profile_image_url", "favorite_color"])
+        login_user_response_data = serialize(user, ("user_id", "username", "role", "email", "profile_image_url", "favorite_color"))
 
         # --- Create JSON Response ---
         response_data = {
@@ -244,7 +248,7 @@ def refresh_access_token():
 def get_current_user_profile():
     # jwt_current_user uses the loader defined in app.py
     user = jwt_current_user
-    user_data = user.to_dict(only=["user_id", "username", "email", "role", "created_at", "last_login", "profile_image_url"])
+    user_data = serialize(user, ("user_id", "username", "email", "role", "created_at", "last_login", "profile_image_url"))
     return jsonify(user_data), 200
 
 
@@ -271,6 +275,9 @@ def delete_current_user_profile():
         unset_jwt_cookies(response)
         return response, 404
 
+    # Remember what the cascade removes so the autocomplete index can drop it too
+    deleted_artworks = [(aw.artwork_id, aw.series) for aw in user_to_delete.created_artworks]
+
     try:
         # --- Delete the User Record ---
         # If cascades are properly configured, deleting the User object
@@ -280,6 +287,8 @@ def delete_current_user_profile():
         # --- Commit Transaction ---
         db.session.commit()
         current_app.logger.info(f"Successfully deleted user ID: {current_user_id} and associated data via cascade.")
+        autocomplete_index.user_deleted(current_user_id, deleted_artworks)
+        trade_match_index.user_deleted(current_user_id, [artwork_id for artwork_id, _ in deleted_artworks])
 
         # --- Prepare Success Response ---
         # 204 No Content is standard. Unset JWT cookies.
@@ -359,6 +368,8 @@ def update_current_user_profile():
     # --- Attempt to commit changes ---
     try:
         db.session.commit()
+        if 'username' in updated_fields_response:
+            autocomplete_index.user_saved(user.user_id, user.username)
         # Add other relevant fields from 'user' object to the response if needed
         updated_fields_response['email'] = user.email # Example: always include email
         updated_fields_response['role'] = user.role   # Example: always include role
@@ -456,9 +467,7 @@ def google_auth():
 
         access_token = create_access_token(identity=user.user_id)
         refresh_token = create_refresh_token(identity=user.user_id)
-        login_user_response_data = user.to_dict(
-            only=('user_id', 'username', 'email', 'role', 'profile_image_url')
-        )
+        login_user_response_data = serialize(user, ('user_id', 'username', 'email', 'role', 'profile_image_url'))
         response = jsonify({
             "message": "Google authentication successful." + (" Welcome!" if is_new_user else ""),
             "user": login_user_response_data
@@ -468,6 +477,8 @@ def google_auth():
         try:
             user.last_login = db.func.current_timestamp()  # Using imported db
             db.session.commit()                            # Using imported db
+            if is_new_user:
+                autocomplete_index.user_saved(user.user_id, user.username)
         except Exception as e:
             db.session.rollback()                          # Using imported db
             current_app.logger.warning(f"DB warning: Failed to commit user or update last_login for user {user.user_id} during Google auth: {e}")
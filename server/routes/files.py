@@ -0,0 +1,20 @@
+from flask import Blueprint, jsonify, send_from_directory
+
+from server.services.storage import get_storage, LocalStorage
+
+# --- Constants ---
+# Stored keys embed a uuid and are never overwritten, so responses can be cached for good
+FILE_CACHE_MAX_AGE = 365 * 24 * 3600
+
+files_bp = Blueprint('files_bp', __name__)
+
+
+# === GET /api/files/:key ===
+@files_bp.route('/<path:key>', methods=['GET'])
+def get_file(key):
+    """Serves a file stored by the local storage backend (development and tests)."""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        return jsonify({"error": {"code": "FILE_404", "message": "File not found"}}), 404
+    # send_from_directory rejects keys that would escape the storage root
+    return send_from_directory(storage.root, key, max_age=FILE_CACHE_MAX_AGE)
@@ -0,0 +1,49 @@
+from flask import Blueprint, current_app, jsonify, request
+from PIL import Image, UnidentifiedImageError
+
+from server.services.image_resizer import (
+    image_resizer, send_mapped_file, MAX_RESIZE_EDGE, RESIZE_CACHE_MAX_AGE, RESIZE_FORMATS
+)
+from server.services.image_variants import CONTENT_TYPES
+from server.services.storage import StorageError
+
+images_bp = Blueprint('images_bp', __name__)
+
+
+# === GET /api/img/:key ===
+@images_bp.route('/<path:key>', methods=['GET'])
+def get_resized_image(key):
+    """
+    A stored image resized to fit within w x h, e.g. /api/img/artworks/<id>/original.jpg?w=300&fmt=webp.
+    Query params: w and/or h (1-MAX_RESIZE_EDGE, rounded up to a RESIZE_BUCKETS edge; never
+    upscaled), fmt ('webp' default, or 'jpeg').
+    Results come from a size-bounded disk cache, served memory-mapped with ETag and Range support.
+    """
+    width = request.args.get('w', type=int)
+    height = request.args.get('h', type=int)
+    format = request.args.get('fmt', 'webp')
+    if (width is None and height is None) or any(
+            value is not None and not 1 <= value <= MAX_RESIZE_EDGE for value in (width, height)):
+        return jsonify({"error": {"code": "VALIDATION_001",
+                                  "message": f"w and/or h must be between 1 and {MAX_RESIZE_EDGE}"}}), 400
+    if format not in RESIZE_FORMATS:
+        return jsonify({"error": {"code": "VALIDATION_001",
+                                  "message": f"fmt must be one of: {', '.join(RESIZE_FORMATS)}"}}), 400
+
+    # A second pass if another request evicted the cached file between the lookup and opening it
+    for attempt in range(2):
+        try:
+            etag, path, hit = image_resizer.get(key, width, height, format)
+        except StorageError:
+            return jsonify({"error": {"code": "FILE_404", "message": "File not found"}}), 404
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            current_app.logger.warning(f"Could not resize {key}: {e}")
+            return jsonify({"error": {"code": "IMAGE_UNREADABLE", "message": "The file is not a readable image"}}), 422
+        try:
+            response = send_mapped_file(path, CONTENT_TYPES[format], etag, RESIZE_CACHE_MAX_AGE)
+            break
+        except FileNotFoundError:
+            if attempt:
+                raise
+    response.headers['X-Image-Cache'] = 'hit' if hit else 'miss'
+    return response
@@ -12,6 +12,7 @@ from server.models.collection import Collection
 from server.models.pack_type import PackType # Still needed for FK constraint
 from server.models.user_pack import UserPack
 from server.services.scheduler_service import generate_daily_packs, get_next_daily_pack_time
+from server.services.trade_match_service import trade_match_index
 
 packs_bp = Blueprint('packs', __name__) # Define blueprint
 
@@ -527,6 +528,8 @@ def open_user_pack(user_pack_id):
 
         # Commit transaction if 'with' block succeeded
         db.session.commit()
+        for art in selected_artworks_for_pack:
+            trade_match_index.collection_added(current_user_id, art.artwork_id)
 
         # 7. Prepare response data
         artwork_details = [
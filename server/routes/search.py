@@ -1,9 +1,21 @@
-from flask import Blueprint, request, jsonify
-from server.models.artwork import Artwork  # Assuming Artwork is a model in your database
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import func, cast, tuple_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import joinedload, load_only
+from server.extensions import db
+from server.models.artwork import Artwork, SEARCH_CONFIG  # Assuming Artwork is a model in your database
 from server.models.user import User  # Assuming User is a model in your database
+from server.services.pagination import encode_cursor, decode_cursor
+from server.services.autocomplete_service import autocomplete_index, AutocompleteIndex
 
 search_blueprint = Blueprint('search', __name__)
 
+# --- Constants ---
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+DEFAULT_SUGGESTION_LIMIT = 8
+MAX_SUGGESTION_LIMIT = 20
+
 @search_blueprint.route('/', methods=['GET'])
 def search():
     query = request.args.get('q', '').strip()
@@ -21,4 +33,128 @@ def search():
     return jsonify({
         'artworks': artwork_results,
         'users': user_results
-    })
\ No newline at end of file
+    })
+
+
+# === GET /api/search/artworks ===
+@search_blueprint.route('/artworks', methods=['GET'])
+def search_artworks():
+    """
+    Full-text search over title, series, artist_name, medium and description.
+    Results are ordered by ts_rank and paginated with an opaque cursor
+    (?cursor=<next_cursor from the previous page>).
+    """
+    query_text = request.args.get('q', '').strip()
+    if not query_text:
+        return jsonify({'error': 'Query parameter is required'}), 400
+
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT)) # Clamp limit
+
+    cursor = request.args.get('cursor')
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, 2)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    try:
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query_text)
+        # Normalization 1 divides by 1 + log(document length), so long descriptions don't
+        # drown out title matches. Cast to double so the value round-trips exactly through the cursor.
+        rank = cast(func.ts_rank(Artwork.search_vector, ts_query, 1), DOUBLE_PRECISION)
+
+        search_query = db.session.query(Artwork, rank.label('rank'))\
+            .options(
+                # Only the card fields - never load description or the vector itself
+                load_only(
+                    Artwork.artwork_id, Artwork.title, Artwork.series, Artwork.artist_name,
+                    Artwork.medium, Artwork.rarity, Artwork.image_url, Artwork.thumbnail_url,
+                    Artwork.width, Artwork.height, Artwork.placeholder, Artwork.year, Artwork.artist_id
+                ),
+                joinedload(Artwork.artist).load_only(User.user_id, User.username)
+            )\
+            .filter(Artwork.search_vector.op('@@')(ts_query))
+
+        if after:
+            # Keyset: continue strictly after the last (rank, artwork_id) of the previous page
+            search_query = search_query.filter(tuple_(rank, Artwork.artwork_id) < tuple_(after[0], after[1]))
+
+        rows = search_query.order_by(rank.desc(), Artwork.artwork_id.desc()).limit(limit + 1).all()
+
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+        results = []
+        for artwork, artwork_rank in rows:
+            results.append({
+                'artwork_id': artwork.artwork_id,
+                'title': artwork.title,
+                'series': artwork.series,
+                'artist_name': artwork.artist_name,
+                'medium': artwork.medium,
+                'rarity': artwork.rarity,
+                'year': artwork.year,
+                'image_url': artwork.image_url,
+                'thumbnail_url': artwork.thumbnail_url,
+                'width': artwork.width,
+                'height': artwork.height,
+                'placeholder': artwork.placeholder,
+                'artist_id': artwork.artist_id,
+                'artist': {
+                    'user_id': artwork.artist.user_id,
+                    'username': artwork.artist.username
+                } if artwork.artist else {},
+                'rank': artwork_rank
+            })
+
+        next_cursor = None
+        if has_next and rows:
+            last_artwork, last_rank = rows[-1]
+            next_cursor = encode_cursor(last_rank, last_artwork.artwork_id)
+
+        return jsonify({
+            'artworks': results,
+            'pagination': {
+                'limit': limit,
+                'has_next': has_next,
+                'next_cursor': next_cursor
+            }
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error searching artworks for '{query_text}': {e}", exc_info=True)
+        return jsonify({'error': 'An internal server error occurred while searching artworks.'}), 500
+
+
+# === GET /api/search/autocomplete ===
+@search_blueprint.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    """
+    Prefix suggestions for usernames, artwork titles and series names, served from
+    the in-memory index (no database query per keystroke).
+    Optional: ?types=users,artworks,series and ?limit=N (per type).
+    """
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'Query parameter is required'}), 400
+
+    limit = request.args.get('limit', DEFAULT_SUGGESTION_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_SUGGESTION_LIMIT)) # Clamp limit
+
+    requested = request.args.get('types')
+    kinds = AutocompleteIndex.KINDS
+    if requested:
+        kinds = tuple(kind for kind in requested.split(',') if kind in AutocompleteIndex.KINDS)
+        if not kinds:
+            return jsonify({'error': f"types must be any of: {', '.join(AutocompleteIndex.KINDS)}"}), 400
+
+    return jsonify(autocomplete_index.suggest(text, kinds=kinds, limit=limit)), 200
+
+
+# === GET /api/search/autocomplete/stats ===
+@search_blueprint.route('/autocomplete/stats', methods=['GET'])
+def autocomplete_stats():
+    """Entry counts, approximate memory use and recent p50/p99 lookup latency of the index."""
+    return jsonify(autocomplete_index.stats()), 200
@@ -1,14 +1,29 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
 from server.models.trade import Trade
-from server.models.collection import Collection
-from server.models.user_follow import UserFollow
 from server.extensions import db  # Import from extensions instead of app
-from sqlalchemy import and_, or_
+from server.services.pagination import read_cursor, keyset_page
+from server.services.read_models import trade_list
+from server.services.trade_counter_service import record_trade_opened, record_trades_closed, get_trade_summary
+from server.services.trade_match_service import trade_match_index, DEFAULT_MATCH_LIMIT
+from server.services.pending_artwork_service import invalidate_pending_artworks, clear_pending_artworks
+from server.models.user import User
+from server.models.trade_cycle import TradeCycle, TradeCycleLeg, CYCLE_STATUSES
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
 
 # Create the blueprint for trade routes
 trades_bp = Blueprint('trades', __name__)
 
+# --- Trade creation constants ---
+# Trade.creation_blocker() reason -> (message, status code)
+TRADE_CREATION_ERRORS = {
+    'NOT_MUTUAL_FOLLOW': ('Users must follow each other to trade. Make sure you both follow each other first.', 403),
+    'OFFERED_NOT_OWNED': ('You do not own the artwork you are offering', 403),
+    'REQUESTED_NOT_OWNED': ('The recipient does not own the artwork you are requesting', 403),
+}
+
 @trades_bp.route('/trades', methods=['POST'])
 @jwt_required()
 def create_trade():
@@ -26,9 +41,12 @@ def create_trade():
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
         # Extract data from request
-        recipient_id = data['recipient_id']
-        offered_artwork_id = data['offered_artwork_id']
-        requested_artwork_id = data['requested_artwork_id']
+        try:
+            recipient_id = int(data['recipient_id'])
+            offered_artwork_id = int(data['offered_artwork_id'])
+            requested_artwork_id = int(data['requested_artwork_id'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'recipient_id, offered_artwork_id and requested_artwork_id must be integers'}), 400
         message = data.get('message', '')  # Optional message
         
         # Debug log
@@ -41,76 +59,11 @@ def create_trade():
         if initiator_id == recipient_id:
             return jsonify({'error': 'Cannot create a trade with yourself'}), 400
         
-        # Check if users follow each other (mutual follow required)
-        initiator_follows_recipient = UserFollow.query.filter_by(
-            patron_id=initiator_id, 
-            artist_id=recipient_id
-        ).first()
-        
-        recipient_follows_initiator = UserFollow.query.filter_by(
-            patron_id=recipient_id,
-            artist_id=initiator_id
-        ).first()
-        
-        # Debug log
-        current_app.logger.info(f"Follow checks: initiator follows recipient: {bool(initiator_follows_recipient)}, recipient follows initiator: {bool(recipient_follows_initiator)}")
-        
-        if not (initiator_follows_recipient and recipient_follows_initiator):
-            return jsonify({
-                'error': 'Users must follow each other to trade. Make sure you both follow each other first.'
-            }), 403
-        
-        # Check if initiator owns the offered artwork
-        initiator_owns_artwork = Collection.query.filter_by(
-            patron_id=initiator_id,
-            artwork_id=offered_artwork_id
-        ).first()
-        
-        # Debug log
-        current_app.logger.info(f"Initiator owns offered artwork: {bool(initiator_owns_artwork)}")
-        
-        if not initiator_owns_artwork:
-            return jsonify({'error': 'You do not own the artwork you are offering'}), 403
-        
-        # Check if recipient owns the requested artwork
-        recipient_owns_artwork = Collection.query.filter_by(
-            patron_id=recipient_id,
-            artwork_id=requested_artwork_id
-        ).first()
-        
-        # Debug log
-        current_app.logger.info(f"Recipient owns requested artwork: {bool(recipient_owns_artwork)}")
-        
-        if not recipient_owns_artwork:
-            return jsonify({'error': 'The recipient does not own the artwork you are requesting'}), 403
-        
-        # Check if there's already an active trade with the same artworks
-        # Updated to use 'PENDING' in uppercase to match the database enum
-        existing_trade = Trade.query.filter(
-            and_(
-                Trade.status == 'PENDING',
-                or_(
-                    and_(
-                        Trade.initiator_id == initiator_id,
-                        Trade.recipient_id == recipient_id,
-                        Trade.offered_artwork_id == offered_artwork_id,
-                        Trade.requested_artwork_id == requested_artwork_id
-                    ),
-                    and_(
-                        Trade.initiator_id == recipient_id,
-                        Trade.recipient_id == initiator_id,
-                        Trade.offered_artwork_id == requested_artwork_id,
-                        Trade.requested_artwork_id == offered_artwork_id
-                    )
-                )
-            )
-        ).first()
-        
-        # Debug log
-        current_app.logger.info(f"Existing similar trade found: {bool(existing_trade)}")
-        
-        if existing_trade:
-            return jsonify({'error': 'A similar trade already exists'}), 409
+        # Mutual follow and both ownerships, checked in one round trip
+        blocker = Trade.creation_blocker(initiator_id, recipient_id, offered_artwork_id, requested_artwork_id)
+        if blocker:
+            error_message, status_code = TRADE_CREATION_ERRORS[blocker]
+            return jsonify({'error': error_message, 'code': blocker}), status_code
         
         # Create new trade
         # Updated to use 'PENDING' in uppercase to match the database enum
@@ -125,7 +78,10 @@ def create_trade():
         
         try:
             db.session.add(new_trade)
+            db.session.flush()  # uq_trades_pending_pair rejects a duplicate here
+            record_trade_opened(initiator_id, recipient_id)
             db.session.commit()
+            invalidate_pending_artworks(initiator_id, recipient_id)
             # --- MODIFIED RESPONSE: Return only essential trade info --- 
             return jsonify({
                 'message': 'Trade offer created successfully',
@@ -139,6 +95,12 @@ def create_trade():
                 }
             }), 201
             # --- END MODIFICATION ---
+        except IntegrityError as e:
+            db.session.rollback()
+            if getattr(getattr(e.orig, 'diag', None), 'constraint_name', None) == 'uq_trades_pending_pair':
+                return jsonify({'error': 'A similar trade already exists', 'code': 'DUPLICATE_TRADE'}), 409
+            current_app.logger.error(f"Database error creating trade: {str(e)}")
+            return jsonify({'error': f'Database error: {str(e)}'}), 500
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Database error creating trade: {str(e)}")
@@ -166,6 +128,9 @@ def accept_trade(trade_id):
     success, message = Trade.execute_trade(trade_id)
     
     if success:
+        clear_pending_artworks()  # Conflicting trades of other users were canceled too
+        trade_match_index.trade_completed(trade.initiator_id, trade.recipient_id,
+                                          trade.offered_artwork_id, trade.requested_artwork_id)
         return jsonify({
             'message': message,
             'trade': trade.to_dict()
@@ -177,8 +142,8 @@ def accept_trade(trade_id):
 @jwt_required()
 def reject_trade(trade_id):
     """Reject a pending trade offer"""
-    # Get the trade by ID
-    trade = Trade.query.get(trade_id)
+    # Get the trade by ID, locked so the status check and the counter update can't race
+    trade = db.session.get(Trade, trade_id, with_for_update=True)
     
     if not trade:
         return jsonify({'error': 'Trade not found'}), 404
@@ -195,7 +160,9 @@ def reject_trade(trade_id):
     trade.status = 'REJECTED'
     
     try:
+        record_trades_closed([(trade.initiator_id, trade.recipient_id)])
         db.session.commit()
+        invalidate_pending_artworks(trade.initiator_id, trade.recipient_id)
         return jsonify({
             'message': 'Trade offer rejected',
             'trade': trade.to_dict()
@@ -209,8 +176,8 @@ def reject_trade(trade_id):
 @jwt_required()
 def cancel_trade(trade_id):
     """Cancel your own pending trade offer"""
-    # Get the trade by ID
-    trade = Trade.query.get(trade_id)
+    # Get the trade by ID, locked so the status check and the counter update can't race
+    trade = db.session.get(Trade, trade_id, with_for_update=True)
     
     if not trade:
         return jsonify({'error': 'Trade not found'}), 404
@@ -227,7 +194,9 @@ def cancel_trade(trade_id):
     trade.status = 'CANCELED'
     
     try:
+        record_trades_closed([(trade.initiator_id, trade.recipient_id)])
         db.session.commit()
+        invalidate_pending_artworks(trade.initiator_id, trade.recipient_id)
         return jsonify({
             'message': 'Trade offer canceled',
             'trade': trade.to_dict()
@@ -237,109 +206,181 @@ def cancel_trade(trade_id):
         current_app.logger.error(f"Error canceling trade: {str(e)}")
         return jsonify({'error': 'Failed to cancel trade offer'}), 500
 
-@trades_bp.route('/trades/sent', methods=['GET'])
-@jwt_required()
-def get_sent_trades():
-    """Get all trade offers sent by the current user"""
+# --- Trade list constants ---
+TRADE_STATUSES = ('PENDING', 'ACCEPTED', 'REJECTED', 'CANCELED')
+DEFAULT_TRADE_LIST_LIMIT = 50
+MAX_TRADE_LIST_LIMIT = 100
+
+
+def _list_trades(user_column, direction):
+    """
+    Shared body of the sent/received listings: one projected SELECT joining both users
+    and both artworks (constant query count), optional ?status= filter, and cursor
+    pagination over (created_at, trade_id) via ?cursor= / ?limit=.
+    """
+    status_filter = request.args.get('status', '').strip().upper()
+    if status_filter and status_filter not in TRADE_STATUSES:
+        return jsonify({'error': f"Invalid status. Must be one of: {', '.join(TRADE_STATUSES)}"}), 400
+
+    limit = request.args.get('limit', DEFAULT_TRADE_LIST_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_TRADE_LIST_LIMIT)) # Clamp limit
+
     try:
-        status_filter = request.args.get('status', None)
-        
-        query = Trade.query.filter(Trade.initiator_id == current_user.user_id)
-        
+        _, after = read_cursor(request.args, 2)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    try:
+        query = trade_list(user_column, current_user.user_id)
         if status_filter:
-            query = query.filter(Trade.status == status_filter.upper())
-        
-        trades = query.order_by(Trade.created_at.desc()).all()
-        
-        # --- MANUAL SERIALIZATION --- 
-        trades_data = []
-        for trade in trades:
-            initiator_info = { "user_id": trade.initiator.user_id, "username": trade.initiator.username } if trade.initiator else {}
-            recipient_info = { "user_id": trade.recipient.user_id, "username": trade.recipient.username } if trade.recipient else {}
-            offered_artwork_info = {
-                "artwork_id": trade.offered_artwork.artwork_id,
-                "title": trade.offered_artwork.title,
-                "thumbnail_url": trade.offered_artwork.thumbnail_url
-            } if trade.offered_artwork else {}
-            requested_artwork_info = {
-                "artwork_id": trade.requested_artwork.artwork_id,
-                "title": trade.requested_artwork.title,
-                "thumbnail_url": trade.requested_artwork.thumbnail_url
-            } if trade.requested_artwork else {}
-
-            trades_data.append({
-                "trade_id": trade.trade_id,
-                "initiator_id": trade.initiator_id,
-                "recipient_id": trade.recipient_id,
-                "offered_artwork_id": trade.offered_artwork_id,
-                "requested_artwork_id": trade.requested_artwork_id,
-                "message": trade.message,
-                "status": trade.status,
-                "created_at": trade.created_at.isoformat() if trade.created_at else None,
-                "updated_at": trade.updated_at.isoformat() if trade.updated_at else None,
-                "initiator": initiator_info,
-                "recipient": recipient_info,
-                "offered_artwork": offered_artwork_info,
-                "requested_artwork": requested_artwork_info
-            })
-        # --- END MANUAL SERIALIZATION ---
-
-        return jsonify({'trades': trades_data}), 200
+            query = query.filter(Trade.status == status_filter)
+        query = query.order_by(Trade.created_at.desc(), Trade.trade_id.desc())
+
+        trades, next_cursor = keyset_page(
+            query, (Trade.created_at, Trade.trade_id), after, limit,
+            lambda trade: (trade.created_at, trade.trade_id)
+        )
+
+        return jsonify({
+            'trades': [trade.to_dict() for trade in trades],
+            'pagination': {
+                'limit': limit,
+                'has_next': next_cursor is not None,
+                'next_cursor': next_cursor
+            }
+        }), 200
     except Exception as e:
-        current_app.logger.error(f"Error fetching sent trades: {str(e)}", exc_info=True)
-        return jsonify({'error': 'An internal server error occurred while fetching sent trades.'}), 500
+        current_app.logger.error(f"Error fetching {direction} trades: {str(e)}", exc_info=True)
+        return jsonify({'error': f'An internal server error occurred while fetching {direction} trades.'}), 500
+
+
+@trades_bp.route('/trades/sent', methods=['GET'])
+@jwt_required()
+def get_sent_trades():
+    """Get trade offers sent by the current user (newest first, cursor paginated)"""
+    return _list_trades(Trade.initiator_id, 'sent')
 
 @trades_bp.route('/trades/received', methods=['GET'])
 @jwt_required()
 def get_received_trades():
-    """Get all trade offers received by the current user"""
+    """Get trade offers received by the current user (newest first, cursor paginated)"""
+    return _list_trades(Trade.recipient_id, 'received')
+
+@trades_bp.route('/trades/summary', methods=['GET'])
+@jwt_required()
+def get_trade_summary_route():
+    """Pending sent/received counts and newest offer timestamps, for inbox badges"""
     try:
-        status_filter = request.args.get('status', None)
-        
-        query = Trade.query.filter(Trade.recipient_id == current_user.user_id)
-        
-        if status_filter:
-            query = query.filter(Trade.status == status_filter.upper())
-        
-        trades = query.order_by(Trade.created_at.desc()).all()
-        
-        # --- MANUAL SERIALIZATION --- 
-        trades_data = []
-        for trade in trades:
-            initiator_info = { "user_id": trade.initiator.user_id, "username": trade.initiator.username } if trade.initiator else {}
-            recipient_info = { "user_id": trade.recipient.user_id, "username": trade.recipient.username } if trade.recipient else {}
-            offered_artwork_info = {
-                "artwork_id": trade.offered_artwork.artwork_id,
-                "title": trade.offered_artwork.title,
-                "thumbnail_url": trade.offered_artwork.thumbnail_url
-            } if trade.offered_artwork else {}
-            requested_artwork_info = {
-                "artwork_id": trade.requested_artwork.artwork_id,
-                "title": trade.requested_artwork.title,
-                "thumbnail_url": trade.requested_artwork.thumbnail_url
-            } if trade.requested_artwork else {}
-
-            trades_data.append({
-                "trade_id": trade.trade_id,
-                "initiator_id": trade.initiator_id,
-                "recipient_id": trade.recipient_id,
-                "offered_artwork_id": trade.offered_artwork_id,
-                "requested_artwork_id": trade.requested_artwork_id,
-                "message": trade.message,
-                "status": trade.status,
-                "created_at": trade.created_at.isoformat() if trade.created_at else None,
-                "updated_at": trade.updated_at.isoformat() if trade.updated_at else None,
-                "initiator": initiator_info,
-                "recipient": recipient_info,
-                "offered_artwork": offered_artwork_info,
-                "requested_artwork": requested_artwork_info
-            })
-        # --- END MANUAL SERIALIZATION ---
-
-        return jsonify({'trades': trades_data}), 200
+        return jsonify(get_trade_summary(current_user.user_id)), 200
     except Exception as e:
-        current_app.logger.error(f"Error fetching received trades: {str(e)}", exc_info=True)
-        return jsonify({'error': 'An internal server error occurred while fetching received trades.'}), 500
+        current_app.logger.error(f"Error fetching trade summary: {str(e)}", exc_info=True)
+        return jsonify({'error': 'An internal server error occurred while fetching the trade summary.'}), 500
+
+# --- Trade match constants ---
+MAX_MATCH_LIMIT = 50
+
+@trades_bp.route('/trades/matches', methods=['GET'])
+@jwt_required()
+def get_trade_matches():
+    """Mutual follows who own something on the user's wishlist and want something the user owns"""
+    limit = max(1, min(request.args.get('limit', DEFAULT_MATCH_LIMIT, type=int), MAX_MATCH_LIMIT))
+    matches = trade_match_index.find_partners(current_user.user_id, limit=limit)
+
+    usernames = {}
+    if matches:
+        usernames = dict(
+            db.session.query(User.user_id, User.username)
+            .filter(User.user_id.in_([match['user_id'] for match in matches]))
+            .all()
+        )
+    for match in matches:
+        match['username'] = usernames.get(match['user_id'])
+    return jsonify({'matches': matches}), 200
+
+# --- Trade cycle constants ---
+MAX_LISTED_CYCLES = 50
+
+@trades_bp.route('/trades/cycles', methods=['GET'])
+@jwt_required()
+def get_trade_cycles():
+    """Multi-party trade cycles the current user gives an artwork in (default ?status=PROPOSED)"""
+    status = request.args.get('status', 'PROPOSED').upper()
+    if status not in CYCLE_STATUSES:
+        return jsonify({'error': f"Invalid status. Must be one of: {', '.join(CYCLE_STATUSES)}"}), 400
+
+    my_cycles = select(TradeCycleLeg.cycle_id).where(TradeCycleLeg.giver_id == current_user.user_id)
+    cycles = TradeCycle.query\
+        .options(selectinload(TradeCycle.legs))\
+        .filter(TradeCycle.cycle_id.in_(my_cycles), TradeCycle.status == status)\
+        .order_by(TradeCycle.created_at.desc())\
+        .limit(MAX_LISTED_CYCLES)\
+        .all()
+    return jsonify({'cycles': [cycle.to_dict() for cycle in cycles]}), 200
+
+def _my_cycle_leg(cycle_id):
+    """Locks the cycle row (serializing accept/decline) and returns (cycle, the current user's leg)."""
+    cycle = db.session.get(TradeCycle, cycle_id, with_for_update=True)
+    if not cycle:
+        return None, None
+    leg = next((leg for leg in cycle.legs if leg.giver_id == current_user.user_id), None)
+    return cycle, leg
+
+@trades_bp.route('/trades/cycles/<int:cycle_id>/accept', methods=['POST'])
+@jwt_required()
+def accept_trade_cycle(cycle_id):
+    """Accept your leg of a trade cycle; the last acceptance executes the whole cycle"""
+    cycle, leg = _my_cycle_leg(cycle_id)
+    if not cycle:
+        return jsonify({'error': 'Trade cycle not found'}), 404
+    if not leg:
+        return jsonify({'error': 'Only participants can accept this trade cycle'}), 403
+    if cycle.status != 'PROPOSED':
+        db.session.rollback()
+        return jsonify({'error': f'Cannot accept a trade cycle with status: {cycle.status}'}), 400
+
+    leg.accept()
+    ready = all(other.accepted_at is not None for other in cycle.legs)
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error accepting trade cycle: {str(e)}")
+        return jsonify({'error': 'Failed to accept trade cycle'}), 500
+
+    if not ready:
+        return jsonify({'message': 'Accepted. Waiting for the other participants', 'cycle': cycle.to_dict()}), 200
+
+    success, message = TradeCycle.execute_cycle(cycle_id)
+    if not success:
+        return jsonify({'error': message}), 400
+    clear_pending_artworks()
+    for completed in cycle.legs:
+        trade_match_index.collection_removed(completed.giver_id, completed.artwork_id)
+        trade_match_index.collection_added(completed.receiver_id, completed.artwork_id)
+        trade_match_index.wishlist_removed(completed.receiver_id, completed.artwork_id)
+    return jsonify({'message': message, 'cycle': cycle.to_dict()}), 200
+
+@trades_bp.route('/trades/cycles/<int:cycle_id>/decline', methods=['POST'])
+@jwt_required()
+def decline_trade_cycle(cycle_id):
+    """Decline a proposed trade cycle, which cancels it for every participant"""
+    cycle, leg = _my_cycle_leg(cycle_id)
+    if not cycle:
+        return jsonify({'error': 'Trade cycle not found'}), 404
+    if not leg:
+        return jsonify({'error': 'Only participants can decline this trade cycle'}), 403
+    if cycle.status != 'PROPOSED':
+        db.session.rollback()
+        return jsonify({'error': f'Cannot decline a trade cycle with status: {cycle.status}'}), 400
+
+    cycle.status = 'DECLINED'
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Trade cycle declined', 'cycle': cycle.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error declining trade cycle: {str(e)}")
+        return jsonify({'error': 'Failed to decline trade cycle'}), 500
 
 @trades_bp.route('/trades/<int:trade_id>', methods=['GET'])
 @jwt_required()
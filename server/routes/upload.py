@@ -1,17 +1,27 @@
-import os
 import uuid
+from datetime import datetime, timezone
 import io  # Required for in-memory file handling with Pillow
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
-from PIL import Image # For thumbnail generation
-import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
+from sqlalchemy import select, update, or_
+from sqlalchemy.exc import IntegrityError
 from server.services.auth_helper import artist_required
+from server.services.background_jobs import thumbnail_pool
+from server.services.image_variants import FILE_EXTENSIONS, placeholder_data_uri, render_variants, variants_manifest
+from server.services.perceptual_hash import dhash, near_duplicate_index, to_signed64
+from server.services.color_palette import color_index, extract_palette
+from server.services.storage import get_storage, StorageError
+from server.services.content_hash import upload_sha256
+from server.models.thumbnail_job import ThumbnailJob, ThumbnailJobArtwork
+from server.models.uploaded_blob import UploadedBlob
+from server.models.artwork import Artwork
+from server.extensions import db
 
 # --- Constants ---
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-THUMBNAIL_SIZE = (250, 250) # Define desired thumbnail dimensions (max width, max height)
+THUMBNAIL_VARIANT = ('thumbnail', 'webp') # The variant also stored as Artwork.thumbnail_url
+UPLOAD_RETRY_AFTER_SECONDS = 5
 
 uploads_bp = Blueprint('uploads_bp', __name__, url_prefix='/api/upload-image')
 
@@ -22,76 +32,230 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def get_s3_client():
-    """Creates and returns an S3 client using environment variables."""
+def store_file(file_obj, object_name, content_type):
+    """
+    Streams a file object (the request stream or a BytesIO buffer) to the configured
+    storage backend; large files go up as a parallel multipart upload.
+
+    Returns:
+        (url, error_message): exactly one of them is None
+    """
     try:
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION')
-        )
-        # Test credentials validity slightly
-        # s3_client.list_buckets() # Simple call to check auth
-        return s3_client
-    except NoCredentialsError:
-        current_app.logger.error("AWS credentials not found. Check .env or IAM role.")
-        return None
-    except ClientError as e:
-         current_app.logger.error(f"Failed to initialize S3 client or test credentials: {e}")
-         return None
+        url = get_storage().save(file_obj, object_name, content_type)
+    except StorageError as e:
+        current_app.logger.error(f"Storing {object_name} failed: {e}")
+        return None, str(e)
+    except Exception as e:
+        current_app.logger.error(f"An unexpected error occurred while storing {object_name}: {e}")
+        return None, "An internal server error occurred during upload."
+    current_app.logger.info(f"Stored {object_name}. URL: {url}")
+    return url, None
 
 
-def create_thumbnail(file_stream, size=THUMBNAIL_SIZE):
-    """Generates a thumbnail from a file stream."""
+def variant_key(unique_id, name, extension):
+    """Storage key of an upload's variant: a distinct path per variant, e.g. artworks/<id>/variants/card.webp."""
+    return f"artworks/{unique_id}/variants/{name}.{extension}"
+
+
+def delete_files(keys):
+    """Best-effort removal of stored files that nothing will reference."""
     try:
-        img = Image.open(file_stream)
-        img.thumbnail(size) # Resizes in place, preserving aspect ratio
-        thumb_io = io.BytesIO() # Create in-memory byte stream
-        # Determine format based on original, default to JPEG
-        img_format = img.format if img.format in ['JPEG', 'PNG', 'GIF', 'WEBP'] else 'JPEG'
-        img.save(thumb_io, format=img_format, quality=85) # Save resized image to buffer
-        thumb_io.seek(0) # Rewind buffer to the beginning for reading
-        return thumb_io, img_format.lower() # Return buffer and extension
+        get_storage().delete_many(keys)
     except Exception as e:
-        current_app.logger.error(f"Thumbnail generation failed: {e}")
-        return None, None
+        current_app.logger.error(f"Could not delete {len(keys)} orphaned files: {e}")
 
 
-def upload_to_s3(file_obj, bucket_name, object_name, content_type, is_public=True):
-    """Uploads a file object (like file stream or BytesIO buffer) to S3."""
-    s3_client = get_s3_client()
-    if not s3_client:
-        return None, "S3 client initialization failed."
+def store_files(files):
+    """
+    Stores (file_obj, object_name, content_type) items concurrently.
+
+    Returns:
+        (urls, error_message): urls in the same order, or None and the first error
+    """
+    try:
+        urls = get_storage().save_many(files)
+    except StorageError as e:
+        current_app.logger.error(f"Storing {len(files)} files failed: {e}")
+        return None, str(e)
+    except Exception as e:
+        current_app.logger.error(f"An unexpected error occurred while storing {len(files)} files: {e}")
+        return None, "An internal server error occurred during upload."
+    return urls, None
 
-    # Only set ContentType, remove ACL setting
-    extra_args = {'ContentType': content_type}
-    # --- REMOVED ACL setting for public-read ---
-    # if is_public:
-    #     extra_args['ACL'] = 'public-read' # Make object publicly readable via URL
-    # ----------------------------------------
 
+def generate_thumbnail_job(job_id, file_bytes, original_filename, unique_id, content_hash=None):
+    """
+    Background half of an upload: renders every image variant from one decode,
+    stores them, records the results and the image's analysis (dimensions,
+    placeholder, perceptual hash, palette) on the ThumbnailJob (and the file's
+    UploadedBlob, for later re-uploads), and fills in the artwork if one was
+    already created from this upload. Runs on thumbnail_pool.
+    """
+    thumbnail_url, manifest, error_msg, urls = None, None, None, None
     try:
-        current_app.logger.info(f"Uploading to S3 with ExtraArgs: {extra_args}")  # Log args being used
-        s3_client.upload_fileobj(
-            file_obj,
-            bucket_name,
-            object_name,
-            ExtraArgs=extra_args  # Now only contains ContentType
+        rendered = render_variants(file_bytes, current_app.config.get('IMAGE_VARIANT_SIZES'))
+        variants = rendered.variants
+        # All from the smallest render: no extra decode or resize of the original
+        image_hash, palette = dhash(rendered.smallest), extract_palette(rendered.smallest)
+        placeholder = placeholder_data_uri(rendered.smallest)
+    except Exception as e:
+        current_app.logger.error(f"Variant generation failed for {original_filename}: {e}")
+        variants, error_msg = [], f"Could not generate thumbnails for {original_filename}"
+
+    if variants:
+        keys = [variant_key(unique_id, variant.name, variant.extension) for variant in variants]
+        urls, error_msg = store_files([
+            (io.BytesIO(variant.data), key, variant.content_type) for variant, key in zip(variants, keys)
+        ])
+        if urls:
+            manifest = variants_manifest(variants, urls)
+            # Custom size sets may leave out 'thumbnail'; the smallest variant stands in
+            thumbnail_url = next(
+                (url for variant, url in zip(variants, urls) if (variant.name, variant.format) == THUMBNAIL_VARIANT),
+                urls[-1]
+            )
+
+    # Locked so a concurrent artwork create either sees DONE or links its artwork for us
+    job = db.session.get(ThumbnailJob, job_id, with_for_update=True)
+    if not job:
+        # Discarded because the original failed to store: nothing will reference the variants
+        db.session.rollback()
+        if urls:
+            delete_files(keys)
+        return
+    job.status = 'DONE' if manifest else 'FAILED'
+    job.thumbnail_url = thumbnail_url if manifest else None
+    job.variants = manifest
+    job.perceptual_hash = to_signed64(image_hash) if manifest else None
+    job.palette = palette if manifest else None
+    if manifest:
+        job.width, job.height, job.placeholder = rendered.width, rendered.height, placeholder
+    job.error = error_msg
+    blob = db.session.get(UploadedBlob, content_hash) if manifest and content_hash else None
+    if blob is not None and blob.job_id == job_id:
+        blob.thumbnail_url = thumbnail_url
+        blob.variants = manifest
+    artwork_ids = []
+    if manifest:
+        # Every artwork created from this upload (re-uploads of the same bytes share the job)
+        linked = select(ThumbnailJobArtwork.artwork_id).where(ThumbnailJobArtwork.job_id == job_id)
+        artwork_ids = db.session.execute(
+            update(Artwork)
+            .where(Artwork.artwork_id.in_(linked))
+            .values(image_variants=manifest, perceptual_hash=job.perceptual_hash, palette=palette,
+                    width=job.width, height=job.height, placeholder=placeholder)
+            .returning(Artwork.artwork_id)
+        ).scalars().all()
+        # Only replace the "original image as thumbnail" fallback, never a URL the artist chose
+        db.session.execute(
+            update(Artwork)
+            .where(
+                Artwork.artwork_id.in_(linked),
+                or_(Artwork.thumbnail_url.is_(None), Artwork.thumbnail_url == Artwork.image_url)
+            )
+            .values(thumbnail_url=thumbnail_url)
         )
-        # Construct the public URL (this assumes the object *will* be public via bucket policy)
-        region = os.getenv('AWS_REGION')
-        location = f"https://{bucket_name}.s3.{region}.amazonaws.com/{object_name}"
+    db.session.commit()
+    for artwork_id in artwork_ids:
+        near_duplicate_index.add(artwork_id, image_hash)
+        color_index.artwork_saved(artwork_id, palette)
+    if error_msg:
+        current_app.logger.error(f"Thumbnail job {job_id} failed: {error_msg}")
+
+
+def _reuse_upload(content_hash, current_user_id):
+    """
+    Looks up a previous upload of the same bytes. On a hit, counts it and returns
+    the response pointing at the stored original and its variants; returns None
+    when the file has to be stored (never seen, or its variant job failed).
+    """
+    blob = db.session.get(UploadedBlob, content_hash, with_for_update=True)
+    if blob is None:
+        return None
+    job = db.session.get(ThumbnailJob, blob.job_id) if blob.job_id and not blob.thumbnail_url else None
+    if not blob.thumbnail_url and (job is None or job.status != 'QUEUED'):
+        db.session.rollback()
+        return None
 
-        current_app.logger.info(f"Successfully uploaded {object_name} to {bucket_name}. URL: {location}")
-        return location, None  # Return URL and no error
+    blob.upload_count += 1
+    blob.last_seen_at = datetime.now(timezone.utc)
+    db.session.commit()
+    current_app.logger.info(f"Upload dedup hit {content_hash[:12]}: {blob.size_bytes} bytes not stored again")
+
+    response = {
+        "message": "File uploaded successfully",
+        "imageUrl": blob.image_url,
+        "thumbnailUrl": blob.thumbnail_url or blob.image_url,
+        "variants": blob.variants,
+        "deduplicated": True
+    }
+    if job is None or job.user_id != current_user_id:
+        # Ready, or still rendering for another user's upload (whose job status is theirs)
+        return jsonify(response), 200
+    status_url = url_for('uploads_bp.get_thumbnail_job', job_id=job.job_id)
+    response.update({"thumbnailJob": job.status_dict(), "statusUrl": status_url})
+    return jsonify(response), 202, {'Location': status_url}
 
-    except ClientError as e:
-        current_app.logger.error(f"S3 Upload Failed for {object_name}: {e}")
-        return None, f"S3 upload failed: {e.response.get('Error', {}).get('Message', 'Unknown S3 error')}"
+
+def _discard_job(job):
+    """
+    Drops the job of an upload whose original failed, and any variants it already
+    stored. Locked like generate_thumbnail_job, so either the worker finished first
+    (its variants are in the manifest and deleted here) or it finds no row and
+    deletes its own.
+    """
+    try:
+        job = db.session.get(ThumbnailJob, job.job_id, with_for_update=True, populate_existing=True)
+        if job is None:
+            db.session.rollback()
+            return
+        keys = [
+            variant_key(job.job_id, name, FILE_EXTENSIONS[format])
+            for name, variant in (job.variants or {}).items() for format in FILE_EXTENSIONS if format in variant
+        ]
+        db.session.delete(job)
+        db.session.commit()
     except Exception as e:
-        current_app.logger.error(f"An unexpected error occurred during S3 upload for {object_name}: {e}")
-        return None, "An internal server error occurred during upload."
+        db.session.rollback()
+        current_app.logger.error(f"Could not discard thumbnail job {job.job_id}: {e}")
+        return
+    if keys:
+        delete_files(keys)
+
+
+def _publish_blob(content_hash, job_id, blob_fields):
+    """
+    Makes a stored upload reusable by later uploads of the same bytes. Only called
+    once the original is stored, so a dedup hit never gets a URL that doesn't exist
+    (yet, or ever, if storing it fails).
+    The job row is locked first, as generate_thumbnail_job does: variants it already
+    finished are copied onto the blob here, and a later finish finds the blob.
+    """
+    try:
+        job = db.session.get(ThumbnailJob, job_id, with_for_update=True, populate_existing=True)
+        if job is None:
+            db.session.rollback()
+            return
+        blob = db.session.get(UploadedBlob, content_hash, with_for_update=True)
+        if blob is not None and blob.thumbnail_url:
+            # Another upload of the same bytes finished first; this copy just isn't shared
+            db.session.rollback()
+            return
+        if job.status == 'DONE':
+            blob_fields = dict(blob_fields, thumbnail_url=job.thumbnail_url, variants=job.variants)
+        if blob is None:
+            db.session.add(UploadedBlob(sha256=content_hash, upload_count=1, **blob_fields))
+        else:
+            # Seen before, but its variants failed (or are still rendering elsewhere): this copy replaces it
+            for field, value in blob_fields.items():
+                setattr(blob, field, value)
+        db.session.commit()
+    except IntegrityError:
+        # The same file was published concurrently and the other request won
+        db.session.rollback()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Could not record upload {content_hash[:12]} for reuse: {e}")
 
 
 # === POST /api/upload-image ===
@@ -100,8 +264,13 @@ def upload_to_s3(file_obj, bucket_name, object_name, content_type, is_public=Tru
 @artist_required # Ensures only artists can upload
 def upload_image_file():
     """
-    Handles image file upload, saves to S3, generates thumbnail, returns URLs.
+    Handles image file upload: saves the original to S3 and hands thumbnail
+    generation to the background pool.
     Expects 'image' file in multipart/form-data request.
+    Returns 202 with the image URL (also used as the thumbnail URL until the
+    real one is ready) and a thumbnail job status resource. A file whose bytes
+    were uploaded before is not stored again: the existing URLs come back with
+    "deduplicated": true (200 once its variants are ready).
     """
     current_user_id = get_jwt_identity() # For logging or potential use
     current_app.logger.info(f"Upload attempt by user: {current_user_id}")
@@ -118,71 +287,94 @@ def upload_image_file():
         return jsonify({"error": {"code": "UPLOAD_003", "message": "Invalid file type. Allowed types: png, jpg, jpeg, gif, webp"}}), 400
 
     # --- Prepare for Upload ---
-    bucket_name = os.getenv('S3_BUCKET_NAME')
-    if not bucket_name:
-         current_app.logger.error("S3_BUCKET_NAME environment variable not set.")
-         return jsonify({"error": {"code": "CONFIG_ERROR", "message": "Server configuration error [S3 Bucket]"}}), 500
+    if not get_storage().configured:
+         current_app.logger.error("Storage backend is not configured (S3_BUCKET_NAME not set?).")
+         return jsonify({"error": {"code": "CONFIG_ERROR", "message": "Server configuration error [Storage]"}}), 500
+
+    # --- Deduplicate ---
+    # Hashed while the request body was received (services/content_hash.py)
+    content_hash = upload_sha256(file)
+    reused = _reuse_upload(content_hash, current_user_id)
+    if reused is not None:
+        return reused
+
+    # Refuse before storing anything if the thumbnail queue is full
+    if not thumbnail_pool.has_capacity():
+        return jsonify({"error": {"code": "UPLOAD_BUSY", "message": "Too many uploads are being processed. Please try again shortly."}}), \
+            503, {'Retry-After': str(UPLOAD_RETRY_AFTER_SECONDS)}
 
     original_filename = secure_filename(file.filename)
-    # Create a unique filename to avoid S3 collisions
+    # Create a unique filename to avoid storage collisions
     unique_id = uuid.uuid4()
-    file_ext = original_filename.rsplit('.', 1)[1].lower()
-    s3_object_name = f"artworks/{unique_id}/{original_filename}" # Store in a subfolder
-
-    # --- Generate Thumbnail ---
-    file.seek(0) # Ensure stream is at the beginning before reading for thumbnail
-    thumbnail_buffer, thumb_ext = create_thumbnail(file.stream) # Pass the raw stream
-    file.seek(0) # IMPORTANT: Rewind stream again before uploading the original file!
+    object_name = f"artworks/{unique_id}/{original_filename}" # Store in a subfolder
 
-    s3_thumbnail_object_name = None
-    if thumbnail_buffer:
-         # Use a distinct name/path for thumbnails
-         thumb_filename = f"thumb_{original_filename.rsplit('.', 1)[0]}.{thumb_ext}"
-         s3_thumbnail_object_name = f"artworks/{unique_id}/thumbnails/{thumb_filename}"
-    else:
-        current_app.logger.warning(f"Could not generate thumbnail for {original_filename}")
+    # Read before anything is queued: the worker needs its own copy, as the request's
+    # buffer is gone by the time it runs (MAX_CONTENT_LENGTH and the pool's queue
+    # depth bound what this holds)
+    file_bytes = file.stream.read()
+    file.stream.seek(0)
+    image_url = get_storage().url_for(object_name)
 
+    # --- Queue the variants ---
+    # Queued first so they render and upload while the original is being stored.
+    # The UploadedBlob that lets re-uploads reuse them is only published once the original is stored.
+    job = ThumbnailJob(job_id=str(unique_id), user_id=current_user_id, image_url=image_url, status='QUEUED')
+    try:
+        db.session.add(job)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Could not record thumbnail job, using original image as thumbnail: {e}")
+        job = None
+    if job is not None:
+        job_args = (job.job_id, file_bytes, original_filename, unique_id, content_hash)
+        if not thumbnail_pool.try_submit(generate_thumbnail_job, *job_args):
+            # The pool filled up since the capacity check - finish here rather than drop the thumbnail
+            generate_thumbnail_job(*job_args)
 
     # --- Upload Original Image ---
-    current_app.logger.info(f"Uploading original to S3: {s3_object_name}")
-    image_url, error_msg = upload_to_s3(
-        file.stream, # Pass the stream directly
-        bucket_name,
-        s3_object_name,
+    # Streamed from Werkzeug's upload buffer (spooled to a temp file for large uploads)
+    current_app.logger.info(f"Storing original: {object_name}")
+    image_url, error_msg = store_file(
+        file.stream,
+        object_name,
         file.content_type # Get content type from the uploaded file
     )
     if error_msg:
+        if job is not None:
+            _discard_job(job)
         return jsonify({"error": {"code": "S3_UPLOAD_ERROR", "message": error_msg}}), 500
 
+    if job is None:
+        return jsonify({
+            "message": "File uploaded successfully",
+            "imageUrl": image_url,
+            "thumbnailUrl": image_url
+        }), 200
 
-    # --- Upload Thumbnail (if generated) ---
-    thumbnail_url = None
-    if thumbnail_buffer and s3_thumbnail_object_name:
-        current_app.logger.info(f"Uploading thumbnail to S3: {s3_thumbnail_object_name}")
-        # Determine thumbnail content type
-        thumb_content_type = f'image/{thumb_ext}'
-        thumbnail_url, thumb_error_msg = upload_to_s3(
-            thumbnail_buffer,
-            bucket_name,
-            s3_thumbnail_object_name,
-            thumb_content_type
-        )
-        if thumb_error_msg:
-            # Log the error but maybe don't fail the whole request?
-            # Decide if a missing thumbnail is critical.
-            # For now, we'll return success but log the warning.
-             current_app.logger.error(f"Thumbnail upload failed: {thumb_error_msg}")
-             thumbnail_url = None # Ensure it's None if upload failed
-        thumbnail_buffer.close() # Close the BytesIO buffer
-
-    # If no thumbnail was generated or uploaded, maybe default to original URL?
-    if not thumbnail_url:
-        thumbnail_url = image_url
-        current_app.logger.info("Using original image URL as thumbnail URL.")
-
-    # --- Success Response ---
+    _publish_blob(content_hash, job.job_id, dict(
+        size_bytes=len(file_bytes), content_type=file.content_type, image_url=image_url,
+        thumbnail_url=None, variants=None, job_id=job.job_id, first_uploaded_by=current_user_id
+    ))
+
+    status_url = url_for('uploads_bp.get_thumbnail_job', job_id=job.job_id)
     return jsonify({
         "message": "File uploaded successfully",
         "imageUrl": image_url,
-        "thumbnailUrl": thumbnail_url
-    }), 200 # 200 OK is appropriate here
\ No newline at end of file
+        # The original stands in until the thumbnail is ready; artworks created from
+        # this upload get the real thumbnail filled in when the job finishes
+        "thumbnailUrl": job.thumbnail_url or image_url,
+        "thumbnailJob": job.status_dict(),
+        "statusUrl": status_url
+    }), 202, {'Location': status_url}
+
+
+# === GET /api/upload-image/jobs/:job_id ===
+@uploads_bp.route('/jobs/<string:job_id>', methods=['GET'])
+@jwt_required()
+def get_thumbnail_job(job_id):
+    """Status of a background thumbnail job started by the current user's upload."""
+    job = db.session.get(ThumbnailJob, job_id)
+    if not job or job.user_id != get_jwt_identity():
+        return jsonify({"error": {"code": "UPLOAD_404", "message": "Thumbnail job not found"}}), 404
+    return jsonify(job.status_dict()), 200
@@ -3,7 +3,6 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, current_user as j
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload # For eager loading if needed
 import traceback
-import math # Added for pagination calculations
 
 # Import db from extensions instead of app
 from server.extensions import db
@@ -13,12 +12,20 @@ from server.models.user import User
 from server.models.artwork import Artwork
 from server.models.collection import Collection
 from server.models.user_follow import UserFollow
+from server.models.wishlist_item import WishlistItem
+from server.services.autocomplete_service import autocomplete_index
+from server.services.trade_match_service import trade_match_index
+from server.services.pending_artwork_service import pending_artwork_ids
+from server.services.serializer import serialize
+from server.services.read_models import artwork_cards, collected_artworks, follow_entries
+from server.services.pagination import encode_cursor, read_cursor, keyset_page, read_with_total, fetch_page
 
 users_bp = Blueprint('users', __name__)
 
 # --- Constants ---
 DEFAULT_PAGE_LIMIT = 20
 MAX_PAGE_LIMIT = 100
+MAX_WISHLIST_ITEMS = 5000
 
 # --- Helper for Pagination Args ---
 def get_pagination_args():
@@ -60,7 +67,7 @@ def get_user_profile(username):
     # --- Serialize Public Profile Data ---
     # Define fields safe for public view
     public_fields = ("user_id", "username", "role", "profile_image_url", "bio", "created_at")
-    profile_data = user.to_dict(only=public_fields)
+    profile_data = serialize(user, public_fields)
 
     # Add calculated counts and follow status - Use key names expected by frontend
     profile_data['followers_count'] = follower_count
@@ -99,6 +106,8 @@ def follow_user(target_user_id):
     try:
         db.session.add(new_follow)
         db.session.commit()
+        autocomplete_index.followers_changed(target_user_id, 1)
+        trade_match_index.follow_added(current_user_id, target_user_id)
         
         # After successfully creating the follow relationship, generate an artist pack
         # but only if the target user is an artist
@@ -149,6 +158,8 @@ def unfollow_user(target_user_id):
     try:
         db.session.delete(follow_rel)
         db.session.commit()
+        autocomplete_index.followers_changed(target_user_id, -1)
+        trade_match_index.follow_removed(current_user_id, target_user_id)
     except Exception as e:
         db.session.rollback()
         print(f"ERROR: Database error deleting follow - {e}")
@@ -175,37 +186,49 @@ def get_following_list(user_id):
 
     # --- Pagination ---
     page, limit = get_pagination_args()
+    try:
+        use_keyset, after = read_cursor(request.args, 2)
+    except ValueError:
+        return jsonify({"error": {"code": "VALIDATION_001", "message": "Invalid cursor"}}), 400
 
     # Query users followed by 'user_id'
     # We need UserFollow where patron_id = user_id, and we want the User details where User.user_id = UserFollow.artist_id
-    pagination = db.session.query(UserFollow, User)\
-                           .join(User, UserFollow.artist_id == User.user_id)\
-                           .filter(UserFollow.patron_id == user_id)\
-                           .order_by(UserFollow.created_at.desc())\
-                           .paginate(page=page, per_page=limit, error_out=False)
-
-    follow_items = pagination.items
-    total_items = pagination.total
-    total_pages = pagination.pages
+    # UserFollow.artist_id breaks created_at ties so the order (and the cursor) is stable
+    # Projected rows (id, username, avatar, role, followed_at) - no ORM entities
+    query, other_id = follow_entries(user_id, 'following')
+    sort_columns = (UserFollow.created_at, other_id)
+    query = query.order_by(UserFollow.created_at.desc(), other_id.desc())
+
+    if use_keyset:
+        follow_items, next_cursor = keyset_page(
+            query, sort_columns, after, limit,
+            lambda entry: (entry.followed_at, entry.user_id)
+        )
+        pagination_info = {"limit": limit, "has_next": next_cursor is not None, "next_cursor": next_cursor}
+    else:
+        pagination = fetch_page(query, page, limit, with_total=read_with_total(request.args))
+        follow_items = pagination.items
+        next_cursor = None
+        if pagination.has_next and follow_items:
+            next_cursor = encode_cursor(follow_items[-1].followed_at, follow_items[-1].user_id)
+        pagination_info = {
+            "total_items": pagination.total,
+            "total_pages": pagination.pages,
+            "total_exact": pagination.total_exact,
+            "current_page": page,
+            "limit": limit,
+            "has_next": pagination.has_next,
+            "next_cursor": next_cursor
+        }
 
     # --- Serialization ---
-    # We want details of the user being *followed* (the 'artist' in the join)
-    following_data = []
-    for follow_rel, followed_user in follow_items:
-        user_data = followed_user.to_dict(only=["user_id", "username", "profile_image_url", "role"]) # Add role maybe?
-        # Include when the follow happened
-        user_data["followed_at"] = follow_rel.created_at.isoformat() + 'Z' if follow_rel.created_at else None
-        following_data.append(user_data)
+    # We want details of the user being *followed* (the 'artist' in the join), plus followed_at
+    following_data = [entry.to_dict() for entry in follow_items]
 
     response = {
         # Changed key to 'users' for consistency, or keep 'following'? Let's keep 'following' for clarity
         "following": following_data,
-        "pagination": {
-            "total_items": total_items,
-            "total_pages": total_pages,
-            "current_page": page,
-            "limit": limit
-        }
+        "pagination": pagination_info
     }
     return jsonify(response), 200
 
@@ -227,37 +250,49 @@ def get_followers_list(user_id):
 
     # --- Pagination ---
     page, limit = get_pagination_args()
+    try:
+        use_keyset, after = read_cursor(request.args, 2)
+    except ValueError:
+        return jsonify({"error": {"code": "VALIDATION_001", "message": "Invalid cursor"}}), 400
 
     # Query users following 'user_id'
     # We need UserFollow where artist_id = user_id, and we want the User details where User.user_id = UserFollow.patron_id
-    pagination = db.session.query(UserFollow, User)\
-                           .join(User, UserFollow.patron_id == User.user_id)\
-                           .filter(UserFollow.artist_id == user_id)\
-                           .order_by(UserFollow.created_at.desc())\
-                           .paginate(page=page, per_page=limit, error_out=False)
-
-    follower_items = pagination.items
-    total_items = pagination.total
-    total_pages = pagination.pages
+    # UserFollow.patron_id breaks created_at ties so the order (and the cursor) is stable
+    # Projected rows (id, username, avatar, role, followed_at) - no ORM entities
+    query, other_id = follow_entries(user_id, 'followers')
+    sort_columns = (UserFollow.created_at, other_id)
+    query = query.order_by(UserFollow.created_at.desc(), other_id.desc())
+
+    if use_keyset:
+        follower_items, next_cursor = keyset_page(
+            query, sort_columns, after, limit,
+            lambda entry: (entry.followed_at, entry.user_id)
+        )
+        pagination_info = {"limit": limit, "has_next": next_cursor is not None, "next_cursor": next_cursor}
+    else:
+        pagination = fetch_page(query, page, limit, with_total=read_with_total(request.args))
+        follower_items = pagination.items
+        next_cursor = None
+        if pagination.has_next and follower_items:
+            next_cursor = encode_cursor(follower_items[-1].followed_at, follower_items[-1].user_id)
+        pagination_info = {
+            "total_items": pagination.total,
+            "total_pages": pagination.pages,
+            "total_exact": pagination.total_exact,
+            "current_page": page,
+            "limit": limit,
+            "has_next": pagination.has_next,
+            "next_cursor": next_cursor
+        }
 
     # --- Serialization ---
-    # We want details of the user who is *following* (the 'patron' in the join)
-    followers_data = []
-    for follow_rel, follower_user in follower_items:
-        user_data = follower_user.to_dict(only=["user_id", "username", "profile_image_url", "role"]) # Add role maybe?
-        # Include when the follow happened
-        user_data["followed_at"] = follow_rel.created_at.isoformat() + 'Z' if follow_rel.created_at else None
-        followers_data.append(user_data)
+    # We want details of the user who is *following* (the 'patron' in the join), plus followed_at
+    followers_data = [entry.to_dict() for entry in follower_items]
 
     response = {
         # Changed key to 'users' or keep 'followers'? Let's keep 'followers'
         "followers": followers_data,
-        "pagination": {
-            "total_items": total_items,
-            "total_pages": total_pages,
-            "current_page": page,
-            "limit": limit
-        }
+        "pagination": pagination_info
     }
     return jsonify(response), 200
 
@@ -287,6 +322,7 @@ def get_user_created_artworks(user_id):
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 12, type=int)
         per_page = max(1, min(per_page, 100)) # Clamp per_page
+        use_keyset, after = read_cursor(request.args, 2)
     except Exception as e:
         # Should ideally not happen with type=int, but good practice
         current_app.logger.error(f"Error parsing pagination params: {e}")
@@ -295,11 +331,34 @@ def get_user_created_artworks(user_id):
     # --- Query and Serialization ---
     # <<< Start TRY block HERE >>>
     try:
-        pagination = Artwork.query.filter_by(artist_id=user_id)\
-            .options(joinedload(Artwork.artist)).order_by(Artwork.created_at.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
-
-        artworks = pagination.items
+        # Projected card rows (no description, no ORM entities); same attribute names as Artwork
+        sort_columns = (Artwork.created_at, Artwork.artwork_id)
+        query = artwork_cards(include_description=False)\
+            .filter(Artwork.artist_id == user_id)\
+            .order_by(Artwork.created_at.desc(), Artwork.artwork_id.desc())
+
+        if use_keyset:
+            artworks, next_cursor = keyset_page(
+                query, sort_columns, after, per_page,
+                lambda aw: (aw.created_at, aw.artwork_id)
+            )
+            pagination_info = {"perPage": per_page, "hasNext": next_cursor is not None, "nextCursor": next_cursor}
+        else:
+            pagination = fetch_page(query, page, per_page, with_total=read_with_total(request.args))
+            artworks = pagination.items
+            next_cursor = None
+            if pagination.has_next and artworks:
+                next_cursor = encode_cursor(artworks[-1].created_at, artworks[-1].artwork_id)
+            pagination_info = {
+                "totalItems": pagination.total,
+                "totalPages": pagination.pages,
+                "totalExact": pagination.total_exact,
+                "currentPage": pagination.page,
+                "perPage": pagination.per_page,
+                "hasNext": pagination.has_next,
+                "hasPrev": pagination.has_prev,
+                "nextCursor": next_cursor,
+            }
 
         # Adjust serialization rules based on what ArtworkCard component needs
         # artworks_data = [aw.to_dict(rules=(
@@ -325,6 +384,9 @@ def get_user_created_artworks(user_id):
                 "title": aw.title,
                 "image_url": aw.image_url,
                 "thumbnail_url": aw.thumbnail_url,
+                "width": aw.width, # Layout + inline placeholder before the image loads
+                "height": aw.height,
+                "placeholder": aw.placeholder,
                 "rarity": aw.rarity,
                 "artist_name": aw.artist_name, # Include artist_name if available
                 "series": aw.series, # Include series if available
@@ -335,14 +397,7 @@ def get_user_created_artworks(user_id):
 
         response = {
             "artworks": artworks_data,
-            "pagination": {
-                "totalItems": pagination.total,
-                "totalPages": pagination.pages,
-                "currentPage": pagination.page,
-                "perPage": pagination.per_page,
-                "hasNext": pagination.has_next,
-                "hasPrev": pagination.has_prev,
-             }
+            "pagination": pagination_info
         }
         return jsonify(response), 200
 
@@ -396,44 +451,50 @@ def get_user_collected_artworks(user_id):
         per_page = request.args.get('per_page', 12, type=int)
         # Clamp per_page to reasonable limits
         per_page = max(1, min(per_page, 100))
+        use_keyset, after = read_cursor(request.args, 2)
         print(f"Pagination parameters: page={page}, per_page={per_page}") # DEBUG
     except Exception as e:
         print(f"Error parsing pagination parameters: {e}") # DEBUG
         return jsonify({"error": "Invalid pagination parameters"}), 400
 
     try:
-        # --- Query using the relationship with eager loading ---
-        # Make sure the 'collections' relationship on the User model is correctly defined
-        # and back_populates with 'patron' on the Collection model.
-        # Assuming 'user.collections' is configured (e.g., lazy='dynamic' or default lazy='select')
-        # If lazy='dynamic', you query from it. If lazy='select', it's a list you might paginate differently.
-        # Let's assume the dynamic approach which is common for pagination:
-        base_query = user.collections # This should be the Query object if lazy='dynamic'
-
-        # Check if base_query is indeed a query object (for debugging if relationship isn't dynamic)
-        print(f"Type of user.collections: {type(base_query)}") # DEBUG
-
-        pagination = base_query.options(
-                # Eager load Artwork data, and within that, the Artist data
-                joinedload(Collection.artwork).joinedload(Artwork.artist)
-            )\
-            .order_by(Collection.acquired_at.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False) # error_out=False is important
-
-        print(f"Pagination total items found in DB query: {pagination.total}") # DEBUG
-        print(f"Pagination items on this page (count from pagination object): {len(pagination.items)}") # DEBUG
+        # --- Projected query: Collection -> Artwork -> artist columns in one SELECT ---
+        # Rows are CollectedArtwork read models (item.artwork.title, item.artwork.artist.username, ...)
+        # rather than ORM entities, so nothing is added to the session identity map.
+        # patron_id is fixed, so artwork_id is enough to break acquired_at ties
+        sort_columns = (Collection.acquired_at, Collection.artwork_id)
+        query = collected_artworks(user_id)\
+            .order_by(Collection.acquired_at.desc(), Collection.artwork_id.desc())
+
+        if use_keyset:
+            collection_items, next_cursor = keyset_page(
+                query, sort_columns, after, per_page,
+                lambda item: (item.acquired_at, item.artwork_id)
+            )
+            pagination_info = {"perPage": per_page, "hasNext": next_cursor is not None, "nextCursor": next_cursor}
+        else:
+            pagination = fetch_page(query, page, per_page, with_total=read_with_total(request.args))
+            current_app.logger.debug(f"Collected artworks of user {user_id}: {pagination.total} in total")
+            collection_items = pagination.items # Get items for the current page
+            next_cursor = None
+            if pagination.has_next and collection_items:
+                next_cursor = encode_cursor(collection_items[-1].acquired_at, collection_items[-1].artwork_id)
+            pagination_info = {
+                "totalItems": pagination.total,
+                "totalPages": pagination.pages,
+                "totalExact": pagination.total_exact,
+                "currentPage": pagination.page, # Use page from pagination object
+                "perPage": pagination.per_page, # Use per_page from pagination object
+                "hasNext": pagination.has_next,
+                "hasPrev": pagination.has_prev,
+                "nextCursor": next_cursor,
+            }
 
         # --- Process Items for Response ---
-        collection_items = pagination.items # Get items for the current page
         final_collection_list = []
 
         print(f"Starting processing loop for {len(collection_items)} items...") # DEBUG
         for i, item in enumerate(collection_items):
-            # Basic check on the item type
-            if not isinstance(item, Collection):
-                 print(f"  Item {i} is not a Collection object, skipping. Type: {type(item)}") # DEBUG
-                 continue
-
             print(f"  Processing item {i}: patron_id={item.patron_id}, artwork_id={item.artwork_id}") # DEBUG
 
             # Check if the related artwork object was loaded
@@ -455,6 +516,9 @@ def get_user_collected_artworks(user_id):
                 "title": item.artwork.title,
                 "image_url": item.artwork.image_url,
                 "thumbnail_url": item.artwork.thumbnail_url,
+                "width": item.artwork.width,
+                "height": item.artwork.height,
+                "placeholder": item.artwork.placeholder,
                 "rarity": item.artwork.rarity
                 # Add other fields needed by the frontend if necessary
             }
@@ -485,14 +549,7 @@ def get_user_collected_artworks(user_id):
         # --- Prepare Final JSON Response ---
         response = {
             "collectedArtworks": final_collection_list,
-            "pagination": {
-                "totalItems": pagination.total,
-                "totalPages": pagination.pages,
-                "currentPage": pagination.page, # Use page from pagination object
-                "perPage": pagination.per_page, # Use per_page from pagination object
-                "hasNext": pagination.has_next,
-                "hasPrev": pagination.has_prev,
-            }
+            "pagination": pagination_info
         }
         return jsonify(response), 200
 
@@ -504,6 +561,55 @@ def get_user_collected_artworks(user_id):
         return jsonify({"error": "An internal server error occurred while processing the collection."}), 500
 
 
+# === GET /api/users/:user_id/tradeable-artworks ===
+# A user's collected artworks that are not already committed to a pending trade -
+# what a trade offer can include, for either side of the offer dialog
+@users_bp.route('/<int:user_id>/tradeable-artworks', methods=['GET'])
+@jwt_required()
+def get_tradeable_artworks(user_id):
+    """Gets a user's collection minus artworks in their pending trades, newest first, cursor paginated."""
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_LIMIT, type=int), MAX_PAGE_LIMIT))
+    try:
+        _, after = read_cursor(request.args, 2)
+    except ValueError:
+        return jsonify({"error": {"code": "INVALID_INPUT", "message": "Invalid cursor"}}), 400
+
+    try:
+        # Projected Collection -> Artwork -> artist rows, anti-joined against the cached pending set
+        query = collected_artworks(user_id)
+        committed = pending_artwork_ids(user_id)
+        if committed:
+            query = query.filter(Collection.artwork_id.not_in(committed))
+        query = query.order_by(Collection.acquired_at.desc(), Collection.artwork_id.desc())
+
+        items, next_cursor = keyset_page(
+            query, (Collection.acquired_at, Collection.artwork_id), after, limit,
+            lambda item: (item.acquired_at, item.artwork_id)
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error fetching tradeable artworks for user {user_id}: {e}", exc_info=True)
+        return jsonify({"error": {"code": "DB_ERROR", "message": "Could not load tradeable artworks."}}), 500
+
+    return jsonify({
+        "artworks": [
+            dict(item.artwork.to_dict(), acquired_at=item.acquired_at.isoformat() + 'Z' if item.acquired_at else None)
+            for item in items
+        ],
+        "pagination": {
+            "limit": limit,
+            "has_next": next_cursor is not None,
+            "next_cursor": next_cursor,
+        }
+    }), 200
+
+
+@users_bp.route('/me/tradeable-artworks', methods=['GET'])
+@jwt_required()
+def get_my_tradeable_artworks():
+    """Tradeable artworks of the currently authenticated user."""
+    return get_tradeable_artworks(get_jwt_identity())
+
+
 # === POST /api/users/:user_id/collected-artworks === (Patron Only - Add to Own)
 @users_bp.route('/<int:user_id>/collected-artworks', methods=['POST'])
 @jwt_required()
@@ -541,6 +647,7 @@ def add_artwork_to_collection(user_id):
     try:
         db.session.add(new_collection_item)
         db.session.commit()
+        trade_match_index.collection_added(current_user_id, artwork_id)
     except Exception as e:
         db.session.rollback()
         print(f"ERROR: Database error adding to collection - {e}")
@@ -576,6 +683,7 @@ def remove_artwork_from_collection(user_id, artwork_id):
     try:
         db.session.delete(collection_item)
         db.session.commit()
+        trade_match_index.collection_removed(current_user_id, artwork_id)
     except Exception as e:
         db.session.rollback()
         print(f"ERROR: Database error removing from collection - {e}")
@@ -584,6 +692,101 @@ def remove_artwork_from_collection(user_id, artwork_id):
     return '', 204
 
 
+# === GET /api/users/me/wishlist ===
+# Artworks the authenticated user wants to trade for, newest first
+@users_bp.route('/me/wishlist', methods=['GET'])
+@jwt_required()
+def get_my_wishlist():
+    """Gets the authenticated user's wishlist as artwork cards."""
+    current_user_id = get_jwt_identity()
+    page, limit = get_pagination_args()
+
+    try:
+        query = artwork_cards(include_description=False)\
+            .join(WishlistItem, WishlistItem.artwork_id == Artwork.artwork_id)\
+            .filter(WishlistItem.user_id == current_user_id)\
+            .order_by(WishlistItem.created_at.desc(), WishlistItem.artwork_id.desc())
+        paginated = fetch_page(query, page, limit)
+    except Exception as e:
+        current_app.logger.error(f"Error fetching wishlist for user {current_user_id}: {e}", exc_info=True)
+        return jsonify({"error": {"code": "DB_ERROR", "message": "Could not load wishlist."}}), 500
+
+    return jsonify({
+        "wishlist": [card.to_dict() for card in paginated.items],
+        "pagination": {
+            "total_items": paginated.total,
+            "total_pages": paginated.pages,
+            "current_page": page,
+            "limit": limit,
+            "has_next": paginated.has_next,
+        }
+    }), 200
+
+
+# === POST /api/users/me/wishlist ===
+@users_bp.route('/me/wishlist', methods=['POST'])
+@jwt_required()
+def add_to_wishlist():
+    """Adds an artwork to the authenticated user's wishlist."""
+    current_user_id = get_jwt_identity()
+
+    data = request.get_json()
+    if not data or 'artwork_id' not in data:
+        return jsonify({"error": {"code": "INVALID_INPUT", "message": "Missing 'artwork_id' in request body."}}), 400
+    try:
+        artwork_id = int(data['artwork_id'])
+    except (ValueError, TypeError):
+        return jsonify({"error": {"code": "INVALID_INPUT", "message": "'artwork_id' must be an integer."}}), 400
+
+    Artwork.query.get_or_404(artwork_id, description="Artwork to wishlist not found.")
+
+    if db.session.get(Collection, (current_user_id, artwork_id)):
+        return jsonify({"error": {"code": "WISHLIST_002", "message": "Artwork is already in your collection."}}), 409
+    if WishlistItem.query.filter_by(user_id=current_user_id).count() >= MAX_WISHLIST_ITEMS:
+        return jsonify({"error": {"code": "WISHLIST_004", "message": f"Wishlists are limited to {MAX_WISHLIST_ITEMS} artworks."}}), 400
+
+    item = WishlistItem(user_id=current_user_id, artwork_id=artwork_id)
+    try:
+        db.session.add(item)
+        db.session.commit()
+        trade_match_index.wishlist_added(current_user_id, artwork_id)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": {"code": "WISHLIST_001", "message": "Artwork is already on your wishlist."}}), 409
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR: Database error adding to wishlist - {e}")
+        return jsonify({"error": {"code": "DB_ERROR", "message": "Could not add artwork to wishlist."}}), 500
+
+    return jsonify({
+        "artwork_id": artwork_id,
+        "created_at": item.created_at.isoformat() + 'Z' if item.created_at else None
+    }), 201
+
+
+# === DELETE /api/users/me/wishlist/:artwork_id ===
+@users_bp.route('/me/wishlist/<int:artwork_id>', methods=['DELETE'])
+@jwt_required()
+def remove_from_wishlist(artwork_id):
+    """Removes an artwork from the authenticated user's wishlist."""
+    current_user_id = get_jwt_identity()
+
+    item = db.session.get(WishlistItem, (current_user_id, artwork_id))
+    if not item:
+        return jsonify({"error": {"code": "WISHLIST_003", "message": "Artwork not found on your wishlist."}}), 404
+
+    try:
+        db.session.delete(item)
+        db.session.commit()
+        trade_match_index.wishlist_removed(current_user_id, artwork_id)
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR: Database error removing from wishlist - {e}")
+        return jsonify({"error": {"code": "DB_ERROR", "message": "Could not remove artwork from wishlist."}}), 500
+
+    return '', 204
+
+
 # === PATCH /api/users/:user_id/preferences === (Update User Preferences)
 @users_bp.route('/<int:user_id>/preferences', methods=['PATCH'])
 @jwt_required()
@@ -639,30 +842,48 @@ def get_my_collected_artworks():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 12, type=int)
         per_page = max(1, min(per_page, 100)) # Clamp per_page
+        try:
+            use_keyset, after = read_cursor(request.args, 2)
+        except ValueError:
+            return jsonify({'error': "Invalid cursor"}), 400
         
         # Query collected artworks with pagination
-        query = Collection.query.filter_by(patron_id=current_user_id)
-        
-        # Get total count for pagination
-        total_items = query.count()
-        
-        # Apply pagination
-        collected_items = query.options(
-                # Eager load Artwork data, and within that, the Artist data
-                joinedload(Collection.artwork).joinedload(Artwork.artist)
-            )\
-            .order_by(Collection.acquired_at.desc()) \
-            .limit(per_page).offset((page - 1) * per_page).all()
-        
-        # Create pagination info
-        pagination = {
-            'totalItems': total_items,
-            'totalPages': math.ceil(total_items / per_page) if per_page > 0 else 0,
-            'currentPage': page,
-            'perPage': per_page,
-            'hasNext': page * per_page < total_items,
-            'hasPrev': page > 1
-        }
+        sort_columns = (Collection.acquired_at, Collection.artwork_id)
+        # Projected Collection -> Artwork -> artist rows, no ORM entities
+        ordered_query = collected_artworks(current_user_id)\
+            .order_by(Collection.acquired_at.desc(), Collection.artwork_id.desc())
+
+        if use_keyset:
+            # Seek past the previous page - no COUNT and no OFFSET
+            collected_items, next_cursor = keyset_page(
+                ordered_query, sort_columns, after, per_page,
+                lambda item: (item.acquired_at, item.artwork_id)
+            )
+            pagination = {
+                'perPage': per_page,
+                'hasNext': next_cursor is not None,
+                'nextCursor': next_cursor
+            }
+        else:
+            # Total rides along as a window count in the page query (or is skipped with ?with_total=false)
+            result = fetch_page(ordered_query, page, per_page, with_total=read_with_total(request.args))
+            collected_items = result.items
+
+            next_cursor = None
+            if result.has_next and collected_items:
+                next_cursor = encode_cursor(collected_items[-1].acquired_at, collected_items[-1].artwork_id)
+
+            # Create pagination info
+            pagination = {
+                'totalItems': result.total,
+                'totalPages': result.pages,
+                'totalExact': result.total_exact,
+                'currentPage': page,
+                'perPage': per_page,
+                'hasNext': result.has_next,
+                'hasPrev': result.has_prev,
+                'nextCursor': next_cursor
+            }
         
         # --- MANUAL SERIALIZATION --- 
         collected_with_details = []
@@ -682,6 +903,9 @@ def get_my_collected_artworks():
                 "title": item.artwork.title,
                 "image_url": item.artwork.image_url,
                 "thumbnail_url": item.artwork.thumbnail_url,
+                "width": item.artwork.width,
+                "height": item.artwork.height,
+                "placeholder": item.artwork.placeholder,
                 "rarity": item.artwork.rarity,
                 "artist_name": item.artwork.artist_name,
                 "series": item.artwork.series,
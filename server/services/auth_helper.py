@@ -55,4 +55,7 @@ def artist_required(f):
     return role_required(['artist'])(f)
 
 def patron_required(f):
-    return role_required(['patron'])(f)
\ No newline at end of file
+    return role_required(['patron'])(f)
+
+def admin_required(f):
+    return role_required(['admin'])(f)
@@ -0,0 +1,368 @@
+import bisect
+import heapq
+import logging
+import re
+import sys
+import threading
+import time
+import traceback
+import unicodedata
+from collections import deque
+
+from sqlalchemy import func
+
+from server.extensions import db
+from server.models.user import User
+from server.models.artwork import Artwork
+from server.models.collection import Collection
+from server.models.user_follow import UserFollow
+
+# --- Constants ---
+DEFAULT_MAX_ENTRIES = 50000      # Per kind (users, artworks, series)
+MAX_KEYS_PER_ENTRY = 4           # Full text plus up to 3 later word starts ("night" finds "Starry Night")
+SCAN_LIMIT = 2000                # Prefix ranges wider than this are answered from the top-k cache
+TOP_K_CACHE_SIZE = 50            # Results kept per cached prefix
+LATENCY_SAMPLES = 2000
+BUILD_RETRY_SECONDS = 30         # Minimum gap between build attempts while the index is empty
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(text):
+    """Lower-cases, strips accents and punctuation, and collapses whitespace."""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = _NON_WORD.sub(' ', stripped.casefold())
+    return _SPACES.sub(' ', cleaned).strip()
+
+
+def _index_keys(text):
+    """Keys under which an entry is findable: the whole string and each later word start."""
+    normalized = normalize(text)
+    if not normalized:
+        return []
+    keys = [normalized]
+    position = normalized.find(' ')
+    while position != -1 and len(keys) < MAX_KEYS_PER_ENTRY:
+        keys.append(normalized[position + 1:])
+        position = normalized.find(' ', position + 1)
+    return keys
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index for one kind of term.
+    `_keys` is a sorted list of normalized keys and `_refs` holds the entry id at the
+    same position, so a prefix lookup is two bisects plus a scan of the matching slice.
+    Wide slices (short prefixes) are served from a small top-k cache that is invalidated
+    per prefix whenever an entry under it changes.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._keys = []
+        self._refs = []
+        self._entries = {}      # entry id -> [display text, score, keys]
+        self._top_k = {}        # prefix -> [entry ids], only for wide prefixes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self, rows):
+        """Replaces the index contents with (entry_id, display, score) rows."""
+        rows = heapq.nlargest(self.max_entries, rows, key=lambda row: row[2])
+        pairs = []
+        entries = {}
+        for entry_id, display, score in rows:
+            keys = _index_keys(display)
+            if not keys:
+                continue
+            entries[entry_id] = [display, score, keys]
+            pairs.extend((key, entry_id) for key in keys)
+        pairs.sort(key=lambda pair: pair[0])
+        self._keys = [key for key, _ in pairs]
+        self._refs = [entry_id for _, entry_id in pairs]
+        self._entries = entries
+        self._top_k = {}
+
+    def upsert(self, entry_id, display, score=None):
+        """Adds or renames an entry. Keeps the existing score unless one is given."""
+        existing = self._entries.get(entry_id)
+        if existing is not None:
+            if score is None:
+                score = existing[1]
+            self.remove(entry_id)
+        elif score is None:
+            score = 0
+
+        keys = _index_keys(display)
+        if not keys:
+            return
+        if len(self._entries) >= self.max_entries and not self._evict_below(score):
+            return # Index is full of more popular entries
+
+        self._entries[entry_id] = [display, score, keys]
+        for key in keys:
+            position = bisect.bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._refs.insert(position, entry_id)
+            self._invalidate(key)
+
+    def remove(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in entry[2]:
+            position = bisect.bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._refs[position] == entry_id:
+                    del self._keys[position]
+                    del self._refs[position]
+                    break
+                position += 1
+            self._invalidate(key)
+
+    def adjust_score(self, entry_id, delta):
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            return None
+        entry[1] = max(0, entry[1] + delta)
+        for key in entry[2]:
+            self._invalidate(key)
+        return entry[1]
+
+    def score(self, entry_id):
+        entry = self._entries.get(entry_id)
+        return entry[1] if entry else None
+
+    def search(self, prefix, limit):
+        """Returns up to `limit` (entry_id, display, score) tuples, most popular first."""
+        if not prefix:
+            return []
+        low = bisect.bisect_left(self._keys, prefix)
+        high = bisect.bisect_left(self._keys, prefix + '\U0010ffff', low)
+
+        if high - low > SCAN_LIMIT:
+            ids = self._top_k.get(prefix)
+            if ids is None:
+                ids = self._best(self._refs[low:high], TOP_K_CACHE_SIZE)
+                self._top_k[prefix] = ids
+            if limit > TOP_K_CACHE_SIZE:
+                ids = self._best(self._refs[low:high], limit)
+        else:
+            ids = self._best(self._refs[low:high], limit)
+
+        results = []
+        for entry_id in ids[:limit]:
+            display, score, _ = self._entries[entry_id]
+            results.append((entry_id, display, score))
+        return results
+
+    def memory_usage(self):
+        """Approximate bytes held by the index structures (keys, refs, entries)."""
+        total = sys.getsizeof(self._keys) + sys.getsizeof(self._refs) + sys.getsizeof(self._entries)
+        total += sum(sys.getsizeof(key) for key in self._keys)
+        for entry_id, entry in self._entries.items():
+            total += sys.getsizeof(entry_id) + sys.getsizeof(entry) + sys.getsizeof(entry[0]) + sys.getsizeof(entry[2])
+        total += sys.getsizeof(self._top_k) + sum(sys.getsizeof(ids) for ids in self._top_k.values())
+        return total
+
+    def _best(self, refs, limit):
+        entries = self._entries
+        unique_ids = set(refs)
+        return heapq.nlargest(limit, unique_ids, key=lambda entry_id: (entries[entry_id][1], -_sort_key(entry_id)))
+
+    def _evict_below(self, score):
+        """Makes room by dropping the least popular entry if it scores below `score`."""
+        weakest_id, weakest = min(self._entries.items(), key=lambda item: item[1][1])
+        if weakest[1] >= score:
+            return False
+        self.remove(weakest_id)
+        return True
+
+    def _invalidate(self, key):
+        if not self._top_k:
+            return
+        for length in range(1, len(key) + 1):
+            self._top_k.pop(key[:length], None)
+
+
+def _sort_key(entry_id):
+    # Stable tie-break between equally popular entries (ids are ints or normalized strings)
+    return entry_id if isinstance(entry_id, int) else 0
+
+
+class AutocompleteIndex:
+    """
+    In-process autocomplete over usernames, artwork titles and series names.
+    Built once at startup, then kept current by the routes that write users and artworks.
+    Popularity: followers for users, collectors for artworks, artwork count for series.
+    """
+
+    KINDS = ('users', 'artworks', 'series')
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self._lock = threading.RLock()
+        self._indexes = {kind: PrefixIndex(max_entries) for kind in self.KINDS}
+        self._series_names = {}  # normalized series -> display name
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._last_build_attempt = 0
+        self.built_at = None
+
+    def init_app(self, app):
+        max_entries = app.config.get('AUTOCOMPLETE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        with self._lock:
+            for index in self._indexes.values():
+                index.max_entries = max_entries
+        if app.config.get('AUTOCOMPLETE_BUILD_ON_STARTUP', True):
+            with app.app_context():
+                self.build()
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def build(self):
+        """
+        Loads the top entries of each kind from the database.
+
+        Returns:
+            bool: True if the index was built
+        """
+        self._last_build_attempt = time.time()
+        try:
+            followers = func.count(UserFollow.patron_id)
+            user_rows = db.session.query(User.user_id, User.username, followers)\
+                .outerjoin(UserFollow, UserFollow.artist_id == User.user_id)\
+                .group_by(User.user_id, User.username)\
+                .all()
+
+            collectors = func.count(Collection.patron_id)
+            artwork_rows = db.session.query(Artwork.artwork_id, Artwork.title, collectors)\
+                .outerjoin(Collection, Collection.artwork_id == Artwork.artwork_id)\
+                .group_by(Artwork.artwork_id, Artwork.title)\
+                .all()
+
+            series_rows = db.session.query(Artwork.series, func.count(Artwork.artwork_id))\
+                .filter(Artwork.series.isnot(None))\
+                .group_by(Artwork.series)\
+                .all()
+        except Exception as e:
+            db.session.rollback()
+            logging.warning(f"Autocomplete index build failed, will retry on first request: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return False
+
+        # Series names differing only in case/accents collapse into one entry
+        series_counts = {}
+        series_names = {}
+        for name, count in series_rows:
+            key = normalize(name)
+            if not key:
+                continue
+            series_counts[key] = series_counts.get(key, 0) + count
+            series_names.setdefault(key, name)
+
+        with self._lock:
+            self._indexes['users'].load(user_rows)
+            self._indexes['artworks'].load(artwork_rows)
+            self._indexes['series'].load(
+                (key, series_names[key], count) for key, count in series_counts.items()
+            )
+            self._series_names = series_names
+            self.built_at = time.time()
+
+        logging.info(f"Autocomplete index built: {len(user_rows)} users, {len(artwork_rows)} artworks, "
+                     f"{len(series_counts)} series")
+        return True
+
+    # --- Queries ---
+    def suggest(self, text, kinds=KINDS, limit=8):
+        """Returns {kind: [{id, text, score}]} for entries starting with `text`."""
+        if not self.is_built and time.time() - self._last_build_attempt > BUILD_RETRY_SECONDS:
+            self.build()
+
+        prefix = normalize(text)
+        started = time.perf_counter()
+        with self._lock:
+            results = {
+                kind: [
+                    {"id": entry_id, "text": display, "score": score}
+                    for entry_id, display, score in self._indexes[kind].search(prefix, limit)
+                ]
+                for kind in kinds
+            }
+        self._latencies.append(time.perf_counter() - started)
+        return results
+
+    def stats(self):
+        """Entry counts, approximate memory and recent lookup latency."""
+        with self._lock:
+            kinds = {
+                kind: {"entries": len(index), "approx_bytes": index.memory_usage()}
+                for kind, index in self._indexes.items()
+            }
+        samples = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not samples:
+                return None
+            position = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+            return round(samples[position] * 1_000_000, 1)
+
+        return {
+            "built": self.is_built,
+            "built_at": self.built_at,
+            "kinds": kinds,
+            "approx_bytes_total": sum(kind["approx_bytes"] for kind in kinds.values()),
+            "latency_us": {"samples": len(samples), "p50": percentile(0.50), "p99": percentile(0.99)},
+        }
+
+    # --- Incremental updates (call after the corresponding commit) ---
+    def user_saved(self, user_id, username):
+        with self._lock:
+            self._indexes['users'].upsert(user_id, username)
+
+    def user_deleted(self, user_id, artworks=()):
+        """`artworks` are (artwork_id, series) pairs removed by the cascade."""
+        with self._lock:
+            self._indexes['users'].remove(user_id)
+        for artwork_id, series in artworks:
+            self.artwork_deleted(artwork_id, series)
+
+    def followers_changed(self, user_id, delta):
+        with self._lock:
+            self._indexes['users'].adjust_score(user_id, delta)
+
+    def artwork_saved(self, artwork_id, title, series=None, previous_series=None, is_new=False):
+        with self._lock:
+            self._indexes['artworks'].upsert(artwork_id, title)
+            if is_new or normalize(series) != normalize(previous_series):
+                if not is_new:
+                    self._change_series(previous_series, -1)
+                self._change_series(series, 1)
+
+    def artwork_deleted(self, artwork_id, series=None):
+        with self._lock:
+            self._indexes['artworks'].remove(artwork_id)
+            self._change_series(series, -1)
+
+    def _change_series(self, name, delta):
+        key = normalize(name)
+        if not key:
+            return
+        index = self._indexes['series']
+        score = index.adjust_score(key, delta)
+        if score is None and delta > 0:
+            self._series_names.setdefault(key, name)
+            index.upsert(key, self._series_names[key], score=delta)
+        elif score == 0:
+            index.remove(key)
+            self._series_names.pop(key, None)
+
+
+# Shared instance, initialised in create_app()
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,98 @@
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from server.extensions import db
+
+# --- Constants ---
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_DEPTH = 16
+
+
+class BoundedWorkerPool:
+    """
+    A ThreadPoolExecutor with a cap on running + queued tasks.
+
+    The executor's own queue is unbounded, so every task takes one of
+    `workers + queue_depth` slots and gives it back when it finishes; when all
+    slots are taken try_submit() refuses instead of letting work (and the request
+    payloads it holds) pile up in memory. Tasks run inside an app context and
+    get a fresh database session.
+    """
+
+    def __init__(self, name, workers=DEFAULT_WORKERS, queue_depth=DEFAULT_QUEUE_DEPTH):
+        self.name = name
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def init_app(self, app, workers=None, queue_depth=None):
+        self._app = app
+        if workers is not None:
+            self.workers = max(1, workers)
+        if queue_depth is not None:
+            self.queue_depth = max(0, queue_depth)
+
+    @property
+    def capacity(self):
+        return self.workers + self.queue_depth
+
+    def has_capacity(self):
+        with self._lock:
+            return self._in_flight < self.capacity
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "queue_depth": self.queue_depth, "in_flight": self._in_flight}
+
+    def try_submit(self, fn, *args, **kwargs):
+        """
+        Queues fn(*args, **kwargs) for a worker thread.
+
+        Returns:
+            bool: False if the pool is full and the task was not queued
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                return False
+            self._in_flight += 1
+            if self._executor is None:
+                # Started on first use so importing the app doesn't spawn threads
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        try:
+            self._executor.submit(self._run, fn, args, kwargs)
+        except Exception:
+            self._release()
+            raise
+        return True
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, fn, args, kwargs):
+        try:
+            with self._app.app_context():
+                try:
+                    fn(*args, **kwargs)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logging.error(f"{self.name} task failed: {str(e)}")
+            logging.error(traceback.format_exc())
+        finally:
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+
+# Shared pool for upload post-processing, initialised in create_app()
+thumbnail_pool = BoundedWorkerPool('thumbnail')
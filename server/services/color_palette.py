@@ -0,0 +1,256 @@
+import logging
+import math
+import threading
+import time
+import traceback
+from array import array
+
+from PIL import Image
+
+from server.extensions import db
+
+# --- Constants ---
+PALETTE_SIZE = 5                   # Dominant colours kept per artwork
+PALETTE_SAMPLE_EDGE = 64           # The palette is clustered on at most 64x64 pixels
+KMEANS_ITERATIONS = 8              # k-means passes refining the median-cut clusters
+MIN_PALETTE_WEIGHT = 0.02          # Colours covering less of the image are dropped
+MIN_INDEXED_WEIGHT = 0.10          # Only colours covering at least this much are searchable
+ALPHA_THRESHOLD = 128              # More transparent pixels don't count towards a colour
+LAB_CELL_SIZE = 8.0                # Grid cell edge in CIELAB units (delta E 1976)
+DEFAULT_MAX_COLOR_DISTANCE = 40.0  # Beyond this a colour is no longer "similar"
+MAX_COLOR_DISTANCE = 100.0
+DEFAULT_COLOR_RESULTS = 24
+PALETTE_FETCH_BATCH = 10000
+BUILD_RETRY_SECONDS = 30           # Minimum gap between build attempts while the index is empty
+
+# D65 reference white
+_WHITE_X, _WHITE_Y, _WHITE_Z = 0.95047, 1.0, 1.08883
+
+
+def parse_hex_color(value):
+    """
+    Reads '#rgb', '#rrggbb' or '#rrggbbaa' (alpha ignored), the formats
+    User.favorite_color accepts. Raises ValueError otherwise.
+
+    Returns:
+        tuple: (r, g, b), each 0-255
+    """
+    digits = value.strip().lstrip('#') if isinstance(value, str) and value.strip().startswith('#') else None
+    if digits is not None and len(digits) == 3:
+        digits = ''.join(c * 2 for c in digits)
+    if digits is None or len(digits) not in (6, 8):
+        raise ValueError(f"Invalid hex colour: {value!r}")
+    return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def to_hex(rgb):
+    return '#{:02x}{:02x}{:02x}'.format(*rgb)
+
+
+def _linear(channel):
+    channel /= 255
+    return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+
+def _lab_f(t):
+    return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+
+def rgb_to_lab(rgb):
+    """sRGB (0-255) -> CIELAB, where Euclidean distance approximates perceived difference."""
+    r, g, b = (_linear(channel) for channel in rgb)
+    fx = _lab_f((0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / _WHITE_X)
+    fy = _lab_f((0.2126729 * r + 0.7151522 * g + 0.0721750 * b) / _WHITE_Y)
+    fz = _lab_f((0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / _WHITE_Z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def extract_palette(img, colors=PALETTE_SIZE):
+    """
+    Dominant colours of an already-decoded image.
+
+    The image is shrunk to PALETTE_SAMPLE_EDGE and clustered with Pillow's
+    quantizer: median cut seeds the clusters and k-means refines them, all in C
+    over the whole pixel array. Transparent pixels are left out of the weights.
+
+    Returns:
+        list of {"color": "#rrggbb", "weight": share of the image}, largest first
+    """
+    sample = img.copy()
+    sample.thumbnail((PALETTE_SAMPLE_EDGE, PALETTE_SAMPLE_EDGE), Image.BOX)
+    mask = None
+    if sample.mode == 'RGBA':
+        mask = sample.getchannel('A').point(lambda alpha: 255 if alpha >= ALPHA_THRESHOLD else 0)
+    quantized = sample.convert('RGB').quantize(colors=colors, method=Image.Quantize.MEDIANCUT,
+                                               kmeans=KMEANS_ITERATIONS)
+
+    counts = quantized.histogram(mask)[:colors]
+    total = sum(counts)
+    if not total:
+        return []
+    palette = quantized.getpalette()[:3 * colors]
+    entries = [
+        {"color": to_hex(palette[3 * index:3 * index + 3]), "weight": round(count / total, 3)}
+        for index, count in enumerate(counts) if count / total >= MIN_PALETTE_WEIGHT
+    ]
+    return sorted(entries, key=lambda entry: entry["weight"], reverse=True)
+
+
+def _ring_offsets(ring):
+    """Grid offsets at Chebyshev distance exactly `ring` from the origin cell."""
+    span = range(-ring, ring + 1)
+    return [(dl, da, db) for dl in span for da in span for db in span if max(abs(dl), abs(da), abs(db)) == ring]
+
+
+_RINGS = [_ring_offsets(ring) for ring in range(math.ceil(MAX_COLOR_DISTANCE / LAB_CELL_SIZE) + 1)]
+
+
+def _cell_of(lab):
+    return tuple(math.floor(value / LAB_CELL_SIZE) for value in lab)
+
+
+class ColorIndex:
+    """
+    In-memory nearest-colour index over artwork palettes.
+
+    Every palette colour covering at least MIN_INDEXED_WEIGHT of its artwork is
+    converted to CIELAB once and bucketed into a grid of LAB_CELL_SIZE cubes. A
+    search visits the query colour's cell, then rings of cells around it, and
+    stops as soon as `limit` artworks closer than the rings covered so far are
+    known - it reads a few buckets near the query, not every palette.
+
+    Each cell holds parallel arrays (artwork ids, Lab triples, weights): about
+    24 bytes per indexed colour, so a million artworks take well under 100 MB.
+    Built once at startup, then kept current by the upload worker and the artwork
+    routes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self._last_build_attempt = 0
+        self.built_at = None
+
+    def _clear(self):
+        self._cells = {}  # (L, a, b) cell -> (array('q') ids, array('f') Lab triples, array('f') weights)
+
+    def init_app(self, app):
+        if app.config.get('COLOR_INDEX_BUILD_ON_STARTUP', True):
+            with app.app_context():
+                self.build()
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def build(self):
+        """
+        Loads every artwork palette from the database.
+
+        Returns:
+            bool: True if the index was built
+        """
+        from server.models.artwork import Artwork
+
+        self._last_build_attempt = time.time()
+        cells = {}
+        try:
+            rows = db.session.query(Artwork.artwork_id, Artwork.palette)\
+                .filter(Artwork.palette.isnot(None))\
+                .yield_per(PALETTE_FETCH_BATCH)
+            count = 0
+            for artwork_id, palette in rows:
+                self._insert(cells, artwork_id, palette)
+                count += 1
+        except Exception as e:
+            db.session.rollback()
+            logging.warning(f"Colour index build failed, will retry on first request: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return False
+
+        with self._lock:
+            self._cells = cells
+            self.built_at = time.time()
+        logging.info(f"Colour index built: {count} palettes in {len(cells)} cells")
+        return True
+
+    @staticmethod
+    def _indexed_colors(palette):
+        for entry in palette or ():
+            if entry.get("weight", 0) >= MIN_INDEXED_WEIGHT:
+                yield rgb_to_lab(parse_hex_color(entry["color"])), entry["weight"]
+
+    def _insert(self, cells, artwork_id, palette):
+        for lab, weight in self._indexed_colors(palette):
+            key = _cell_of(lab)
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = (array('q'), array('f'), array('f'))
+            ids, labs, weights = cell
+            ids.append(artwork_id)
+            labs.extend(lab)
+            weights.append(weight)
+
+    # --- Incremental updates (call after the DB commit) ---
+    def artwork_saved(self, artwork_id, palette):
+        """Indexes a newly analysed artwork's palette."""
+        with self._lock:
+            self._insert(self._cells, artwork_id, palette)
+
+    def artwork_deleted(self, artwork_id, palette):
+        with self._lock:
+            for cell_key in {_cell_of(lab) for lab, _ in self._indexed_colors(palette)}:
+                cell = self._cells.get(cell_key)
+                if cell is None:
+                    continue
+                ids, labs, weights = cell
+                for position in reversed([i for i, value in enumerate(ids) if value == artwork_id]):
+                    del ids[position]
+                    del labs[3 * position:3 * position + 3]
+                    del weights[position]
+                if not ids:
+                    del self._cells[cell_key]
+
+    # --- Queries ---
+    def search(self, rgb, limit=DEFAULT_COLOR_RESULTS, max_distance=DEFAULT_MAX_COLOR_DISTANCE):
+        """
+        Artworks with a dominant colour closest to rgb.
+
+        Returns:
+            list of (artwork_id, delta E, weight of the matching colour), closest first
+        """
+        if not 0 <= max_distance <= MAX_COLOR_DISTANCE:
+            raise ValueError(f"max_distance must be between 0 and {MAX_COLOR_DISTANCE:g}")
+        if not self.is_built and time.time() - self._last_build_attempt > BUILD_RETRY_SECONDS:
+            self.build()
+
+        query = rgb_to_lab(rgb)
+        ql, qa, qb = query
+        origin = _cell_of(query)
+        best = {}  # artwork_id -> (distance, -weight)
+        with self._lock:
+            for ring, offsets in enumerate(_RINGS[:math.ceil(max_distance / LAB_CELL_SIZE) + 1]):
+                for dl, da, db in offsets:
+                    cell = self._cells.get((origin[0] + dl, origin[1] + da, origin[2] + db))
+                    if cell is None:
+                        continue
+                    ids, labs, weights = cell
+                    for position, artwork_id in enumerate(ids):
+                        offset = 3 * position
+                        distance = math.sqrt((labs[offset] - ql) ** 2 + (labs[offset + 1] - qa) ** 2
+                                             + (labs[offset + 2] - qb) ** 2)
+                        if distance <= max_distance:
+                            candidate = (distance, -weights[position])
+                            if candidate < best.get(artwork_id, (math.inf,)):
+                                best[artwork_id] = candidate
+                # Every colour within ring * LAB_CELL_SIZE of the query has now been seen
+                covered = ring * LAB_CELL_SIZE
+                if sum(1 for distance, _ in best.values() if distance <= covered) >= limit:
+                    break
+
+        ranked = sorted(best.items(), key=lambda item: (item[1], item[0]))[:limit]
+        return [(artwork_id, distance, round(-negative_weight, 3)) for artwork_id, (distance, negative_weight) in ranked]
+
+
+# Shared index used by the upload worker and artwork routes
+color_index = ColorIndex()
@@ -0,0 +1,53 @@
+import hashlib
+from tempfile import SpooledTemporaryFile
+
+from flask import Request
+
+# --- Constants ---
+SPOOL_MAX_SIZE = 500 * 1024   # Same threshold as Werkzeug's default stream factory
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class HashingSpooledFile(SpooledTemporaryFile):
+    """
+    Werkzeug's upload buffer (memory, then a temp file past SPOOL_MAX_SIZE) that
+    feeds every chunk through SHA-256 as the multipart parser writes it, so the
+    digest is ready the moment the upload has been received - no second read.
+    """
+
+    def __init__(self, max_size=SPOOL_MAX_SIZE):
+        super().__init__(max_size=max_size, mode='rb+')
+        self._sha256 = hashlib.sha256()
+        self.bytes_received = 0
+
+    def write(self, data):
+        self._sha256.update(data)
+        self.bytes_received += len(data)
+        return super().write(data)
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+
+class HashingRequest(Request):
+    """Request class whose uploaded files are buffered in HashingSpooledFile."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingSpooledFile()
+
+
+def upload_sha256(file_storage):
+    """
+    SHA-256 hex digest of an uploaded file: taken from the hashing buffer when the
+    app uses HashingRequest, otherwise computed by reading the stream once.
+    """
+    stream = file_storage.stream
+    digest = getattr(stream, 'sha256', None)
+    if digest is not None:
+        return digest
+    sha256 = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        sha256.update(chunk)
+    stream.seek(0)
+    return sha256.hexdigest()
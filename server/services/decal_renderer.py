@@ -0,0 +1,371 @@
+import base64
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import closing
+
+from cachetools import LRUCache
+from PIL import Image, ImageOps
+
+from server.services.disk_cache import DiskLRUCache
+from server.services.image_variants import REDUCING_GAP, WEBP_METHOD, WEBP_QUALITY
+from server.services.storage import get_storage, key_for_url
+
+# --- Constants ---
+# Longest edge of each render; the shape is the decal's own (2:3 cards)
+DECAL_RENDER_SIZES = {
+    'thumbnail': 250,
+    'card': 480,
+    'detail': 1200,
+}
+DECAL_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,100}$')
+MAX_CACHED_DECALS = 16       # Parsed decal SVGs (their embedded PNGs decoded) kept in memory
+MAX_CACHED_OVERLAYS = 32     # Decals rasterized at one output size, kept in memory
+LATENCY_SAMPLES = 2000
+# Renders are keyed by image, decal, decal version and size, and served from URLs that change with them
+RENDER_CACHE_MAX_AGE = 365 * 24 * 3600
+# The unversioned render URL redirects to the current version's; how long that redirect may be cached
+RENDER_REDIRECT_MAX_AGE = 300
+
+SVG_NS = '{http://www.w3.org/2000/svg}'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+IGNORED_ELEMENTS = ('style', 'title', 'desc', 'metadata')
+_TRANSFORM = re.compile(r'([a-zA-Z]+)\s*\(([^)]*)\)')
+
+
+class DecalError(Exception):
+    """A decal is missing or uses SVG features the renderer doesn't draw."""
+
+
+def _numbers(text):
+    return [float(value) for value in re.split(r'[\s,]+', text.strip()) if value]
+
+
+def _parse_transform(text):
+    """
+    An axis-aligned SVG transform list as (sx, sy, tx, ty), mapping
+    (x, y) -> (sx * x + tx, sy * y + ty). Rotation and skew raise DecalError.
+    """
+    sx, sy, tx, ty = 1.0, 1.0, 0.0, 0.0
+    for name, args in _TRANSFORM.findall(text or ''):
+        values = _numbers(args)
+        if name == 'translate':
+            a, d, e, f = 1.0, 1.0, values[0], values[1] if len(values) > 1 else 0.0
+        elif name == 'scale':
+            a, d, e, f = values[0], values[1] if len(values) > 1 else values[0], 0.0, 0.0
+        elif name == 'matrix' and len(values) == 6 and not values[1] and not values[2]:
+            a, _, _, d, e, f = values
+        else:
+            raise DecalError(f"Unsupported decal transform: {name}")
+        # Each transform applies before the ones to its left
+        sx, sy, tx, ty = sx * a, sy * d, sx * e + tx, sy * f + ty
+    if sx <= 0 or sy <= 0:
+        raise DecalError("Mirrored decal layers are not supported")
+    return sx, sy, tx, ty
+
+
+def _href(element):
+    return element.get(XLINK_HREF) or element.get('href') or ''
+
+
+def _decode_data_uri(uri):
+    header, _, payload = uri.partition(',')
+    if not header.startswith('data:image/') or not header.endswith(';base64'):
+        raise DecalError("Decal images must be embedded base64 data: URIs")
+    return Image.open(io.BytesIO(base64.b64decode(payload))).convert('RGBA')
+
+
+class Decal:
+    """
+    A border decal SVG reduced to what it draws: embedded raster images placed
+    by translate/scale transforms (the shape our decal exports have), in
+    viewBox units. Anything else - paths, text, rotation - raises DecalError
+    rather than rendering differently from the browser.
+    """
+
+    def __init__(self, viewbox, layers):
+        self.viewbox = viewbox  # (min_x, min_y, width, height)
+        self.layers = layers    # [(RGBA image, left, top, right, bottom)], painted in order
+
+    @classmethod
+    def parse(cls, data):
+        try:
+            root = ET.fromstring(data)
+        except ET.ParseError as e:
+            raise DecalError(f"Invalid decal SVG: {e}") from e
+        viewbox = _numbers(root.get('viewBox', ''))
+        if len(viewbox) != 4 or viewbox[2] <= 0 or viewbox[3] <= 0:
+            raise DecalError("Decal SVG needs a viewBox")
+
+        defined = {}
+        for defs in root.iter(SVG_NS + 'defs'):
+            for element in defs:
+                if element.tag == SVG_NS + 'image' and element.get('id'):
+                    defined[element.get('id')] = element
+
+        layers = []
+        for element in root:
+            tag = element.tag.replace(SVG_NS, '')
+            if tag == 'defs' or tag in IGNORED_ELEMENTS:
+                continue
+            outer = (1.0, 1.0, 0.0, 0.0)
+            if tag == 'use':
+                outer = _parse_transform(element.get('transform'))
+                outer = (outer[0], outer[1],
+                         outer[2] + outer[0] * float(element.get('x', 0)),
+                         outer[3] + outer[1] * float(element.get('y', 0)))
+                element = defined.get(_href(element).lstrip('#'))
+                if element is None:
+                    raise DecalError("Decal <use> must reference an image in <defs>")
+            elif tag != 'image':
+                raise DecalError(f"Unsupported decal element <{tag}>")
+            layers.append(cls._layer(element, outer))
+        return cls(tuple(viewbox), layers)
+
+    @staticmethod
+    def _layer(element, outer):
+        sx, sy, tx, ty = _parse_transform(element.get('transform'))
+        # Apply the <use> transform after the image's own
+        osx, osy, otx, oty = outer
+        sx, sy, tx, ty = osx * sx, osy * sy, osx * tx + otx, osy * ty + oty
+        x, y = float(element.get('x', 0)), float(element.get('y', 0))
+        img = _decode_data_uri(_href(element))
+        width = float(element.get('width', img.width))
+        height = float(element.get('height', img.height))
+        left, top = sx * x + tx, sy * y + ty
+        return img, left, top, left + sx * width, top + sy * height
+
+    def output_size(self, max_edge):
+        """(width, height) of a render whose longest edge is max_edge."""
+        _, _, width, height = self.viewbox
+        scale = max_edge / max(width, height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def rasterize(self, size):
+        """
+        The decal as a transparent RGBA overlay of `size`, scaled uniformly and
+        centred like the browser's default preserveAspectRatio (xMidYMid meet).
+        """
+        min_x, min_y, width, height = self.viewbox
+        scale = min(size[0] / width, size[1] / height)
+        offset_x = (size[0] - width * scale) / 2 - min_x * scale
+        offset_y = (size[1] - height * scale) / 2 - min_y * scale
+
+        canvas = Image.new('RGBA', size, (0, 0, 0, 0))
+        for img, left, top, right, bottom in self.layers:
+            x0, y0 = round(left * scale + offset_x), round(top * scale + offset_y)
+            x1, y1 = round(right * scale + offset_x), round(bottom * scale + offset_y)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            layer = img.resize((x1 - x0, y1 - y0), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+            # alpha_composite() needs a non-negative destination, so clip to the canvas first
+            crop = (max(0, -x0), max(0, -y0), min(layer.width, size[0] - x0), min(layer.height, size[1] - y0))
+            if crop[2] <= crop[0] or crop[3] <= crop[1]:
+                continue
+            canvas.alpha_composite(layer.crop(crop), (max(0, x0), max(0, y0)))
+        return canvas
+
+
+def composite(artwork_img, overlay):
+    """
+    The artwork cropped to the overlay's shape (object-fit: cover, as cards show
+    it) with the decal painted on top.
+
+    Returns:
+        RGB PIL.Image
+    """
+    base = ImageOps.fit(artwork_img.convert('RGBA'), overlay.size, Image.LANCZOS)
+    base.alpha_composite(overlay)
+    return base.convert('RGB')
+
+
+def _source_url(artwork, size):
+    """
+    The smallest stored rendition that still covers a size-shaped crop, so each
+    render decodes as few pixels as possible; the largest variant otherwise.
+    """
+    variants = sorted(
+        (entry for entry in (artwork.image_variants or {}).values() if entry.get('width') and entry.get('height')),
+        key=lambda entry: entry['width'] * entry['height']
+    )
+    for entry in variants:
+        if entry['width'] >= size[0] and entry['height'] >= size[1]:
+            return entry.get('webp') or entry.get('jpeg')
+    if variants:
+        return variants[-1].get('webp') or variants[-1].get('jpeg')
+    return artwork.thumbnail_url or artwork.image_url
+
+
+class DecalRenderer:
+    """
+    Composites border decals onto artwork images server-side, so clients get one
+    ready-made image per card instead of fetching a multi-megabyte decal SVG and
+    layering it in the browser.
+
+    Renders are cached on disk in a DiskLRUCache keyed by (artwork image, decal
+    id, decal version, size); the image part is the artwork's original image URL,
+    which is content-addressed (uploads are deduplicated by SHA-256 and stored
+    under never-reused keys), so identical uploads share renders. A decal's
+    version is a hash of its SVG, so editing the file changes every render key
+    and URL that uses it. Parsed decals and their rasterized overlays are kept in
+    small in-memory LRUs; a decal is re-read when its file's mtime or size
+    changes. Hit/miss counts and render times are kept for stats().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._decals = LRUCache(maxsize=MAX_CACHED_DECALS)
+        self._overlays = LRUCache(maxsize=MAX_CACHED_OVERLAYS)
+        self._render_seconds = deque(maxlen=LATENCY_SAMPLES)
+        self.decal_dir = None
+        self.cache = None
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def init_app(self, app):
+        self.decal_dir = app.config['DECAL_DIR']
+        self.cache = DiskLRUCache(
+            app.config['DECAL_RENDER_CACHE_DIR'] or os.path.join(app.instance_path, 'decal-renders'),
+            app.config['DECAL_RENDER_CACHE_MB'] * 1024 * 1024,
+            suffix='.webp',
+        )
+
+    @staticmethod
+    def cache_key(image_url, decal_id, version, size_name):
+        return hashlib.sha256(f"{image_url}\0{decal_id}\0{version}\0{size_name}".encode('utf-8')).hexdigest()
+
+    def _load(self, decal_id):
+        """(version, parsed decal) by id, re-read if the SVG file changed since it was cached."""
+        if not DECAL_ID_PATTERN.match(decal_id or ''):
+            raise DecalError(f"Invalid decal id: {decal_id!r}")
+        path = os.path.join(self.decal_dir, f"{decal_id}.svg")
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise DecalError(f"Unknown decal: {decal_id}") from e
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._decals.get(decal_id)
+        if entry is None or entry[0] != signature:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                raise DecalError(f"Unknown decal: {decal_id}") from e
+            entry = (signature, hashlib.sha256(data).hexdigest()[:16], Decal.parse(data))
+            with self._lock:
+                self._decals[decal_id] = entry
+        return entry[1], entry[2]
+
+    def decal(self, decal_id):
+        """Parsed decal by id (the SVG file name without .svg); raises DecalError if there is none."""
+        return self._load(decal_id)[1]
+
+    def version(self, decal_id):
+        """Hash of the decal's current SVG, used in render keys and URLs; raises DecalError if there is none."""
+        return self._load(decal_id)[0]
+
+    def _overlay(self, decal_id, version, decal, size):
+        with self._lock:
+            overlay = self._overlays.get((decal_id, version, size))
+        if overlay is None:
+            overlay = decal.rasterize(size)
+            with self._lock:
+                self._overlays[(decal_id, version, size)] = overlay
+        return overlay
+
+    def render(self, artwork, size_name):
+        """
+        The artwork with the current version of its border decal at a
+        DECAL_RENDER_SIZES size, from the disk cache when possible.
+        Raises DecalError if the decal is unknown or can't be rendered, or the
+        artwork's image is not in the configured storage.
+
+        Returns:
+            tuple: (cache key, path of the WebP file, True if it was a cache hit)
+        """
+        decal_id = artwork.border_decal_id
+        version, decal = self._load(decal_id)
+        key = self.cache_key(artwork.image_url, decal_id, version, size_name)
+        path = self.cache.get(key)
+        if path is not None:
+            with self._lock:
+                self.hits += 1
+            return key, path, True
+
+        started = time.perf_counter()
+        try:
+            size = decal.output_size(DECAL_RENDER_SIZES[size_name])
+            storage = get_storage()
+            source_key = key_for_url(storage, _source_url(artwork, size))
+            if source_key is None:
+                # Only files in our own storage: a public request never fetches an arbitrary URL
+                raise DecalError(f"Artwork {artwork.artwork_id} has no stored image")
+            with closing(storage.open(source_key)) as f:
+                artwork_img = Image.open(io.BytesIO(f.read()))
+            artwork_img.draft('RGB', size)
+            artwork_img = ImageOps.exif_transpose(artwork_img)
+            buffer = io.BytesIO()
+            composite(artwork_img, self._overlay(decal_id, version, decal, size)).save(
+                buffer, format='WEBP', quality=WEBP_QUALITY, method=WEBP_METHOD)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        path = self.cache.put(key, buffer.getvalue())
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.misses += 1
+            self._render_seconds.append(elapsed)
+        logging.debug(f"Rendered decal {decal_id} on artwork {artwork.artwork_id} at {size_name} "
+                      f"in {elapsed * 1000:.1f} ms")
+        return key, path, False
+
+    def invalidate(self, image_url, decal_id):
+        """
+        Drops every cached size of an artwork image with a decal it no longer uses.
+        Renders of older decal versions are unreachable already and age out of the LRU.
+        """
+        if self.cache is None or not decal_id:
+            return 0
+        try:
+            version = self.version(decal_id)
+        except DecalError:
+            return 0
+        return sum(self.cache.delete(self.cache_key(image_url, decal_id, version, size_name))
+                   for size_name in DECAL_RENDER_SIZES)
+
+    def stats(self):
+        """Cache hit ratio, disk use and recent p50/p99 render time."""
+        with self._lock:
+            hits, misses, failures = self.hits, self.misses, self.failures
+            samples = sorted(self._render_seconds)
+
+        def percentile(fraction):
+            if not samples:
+                return None
+            position = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+            return round(samples[position] * 1000, 1)
+
+        return {
+            "hits": hits,
+            "misses": misses,
+            "failures": failures,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "cached_renders": len(self.cache) if self.cache else 0,
+            "cache_bytes": self.cache.total_bytes if self.cache else 0,
+            "cache_max_bytes": self.cache.max_bytes if self.cache else 0,
+            "evictions": self.cache.evictions if self.cache else 0,
+            "render_ms": {"samples": len(samples), "p50": percentile(0.50), "p99": percentile(0.99)},
+        }
+
+
+# Shared renderer used by the artwork routes
+decal_renderer = DecalRenderer()
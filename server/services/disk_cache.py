@@ -0,0 +1,131 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# --- Constants ---
+TEMP_PREFIX = '.tmp-'
+
+
+class DiskLRUCache:
+    """
+    A directory of files evicted least-recently-used first once their total size
+    passes max_bytes.
+
+    Entries are named by the SHA-256 of their key, so any string can be a key and
+    the directory stays flat. Recency lives in memory and is seeded from file
+    mtimes on startup (a hit touches the file), so the order survives restarts.
+    Each process keeps its own view: with several workers on one directory the
+    size bound is approximate, and an entry another process evicted is simply a
+    miss. Writes go to a temporary file renamed into place, so readers never see
+    a partial entry.
+    """
+
+    def __init__(self, directory, max_bytes, suffix=''):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # file name -> size, least recently used first
+        self.total_bytes = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if entry.name.startswith(TEMP_PREFIX):
+                # Left behind by a process that died mid-write
+                os.unlink(entry.path)
+                continue
+            stat = entry.stat()
+            found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self.total_bytes += size
+        with self._lock:
+            self._evict()
+
+    def _name(self, key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest() + self.suffix
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self._name(key) in self._entries
+
+    def get(self, key):
+        """
+        Path of the cached file for key, marked most recently used.
+
+        Returns:
+            str, or None on a miss
+        """
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if name not in self._entries:
+                return None
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted by another process sharing the directory
+                self.total_bytes -= self._entries.pop(name)
+                return None
+            self._entries.move_to_end(name)
+        return path
+
+    def put(self, key, data):
+        """
+        Stores data under key, then evicts old entries down to max_bytes.
+
+        Returns:
+            str: path of the cached file
+        """
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict(keep=name)
+        return path
+
+    def delete(self, key):
+        """Removes key's entry. Returns True if there was one."""
+        name = self._name(key)
+        with self._lock:
+            if name not in self._entries:
+                return False
+            self.total_bytes -= self._entries.pop(name)
+            self._unlink(name)
+        return True
+
+    def _evict(self, keep=None):
+        # Caller holds the lock; the newest entry stays even if it alone is too big
+        while self.total_bytes > self.max_bytes and self._entries:
+            name = next(iter(self._entries))
+            if name == keep:
+                break
+            self.total_bytes -= self._entries.pop(name)
+            self._unlink(name)
+            self.evictions += 1
+
+    def _unlink(self, name):
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
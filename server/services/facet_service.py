@@ -0,0 +1,128 @@
+import threading
+
+from cachetools import TTLCache
+from sqlalchemy import func
+
+from server.extensions import db
+from server.models.artwork import Artwork
+
+# --- Constants ---
+ALLOWED_RARITIES = ('common', 'uncommon', 'rare', 'epic', 'legendary')
+FACET_CACHE_TTL_SECONDS = 300
+FACET_CACHE_MAX_VIEWS = 256
+MAX_CACHED_FILTERS = 1  # Unfiltered and single-filter views are the popular ones worth caching
+
+_facet_cache = TTLCache(maxsize=FACET_CACHE_MAX_VIEWS, ttl=FACET_CACHE_TTL_SECONDS)
+_facet_cache_lock = threading.Lock()
+
+
+def parse_artwork_filters(args):
+    """
+    Reads artwork listing filters from request args.
+    Supported: rarity (comma separated), medium, series, artist_id, year_min, year_max.
+
+    Returns:
+        (filters, errors): filters dict with only the provided keys, errors dict for a 400 response
+    """
+    filters = {}
+    errors = {}
+
+    rarity = args.get('rarity')
+    if rarity:
+        values = tuple(sorted({value.strip().lower() for value in rarity.split(',') if value.strip()}))
+        invalid = [value for value in values if value not in ALLOWED_RARITIES]
+        if invalid:
+            errors['rarity'] = f"Invalid rarity value(s): {', '.join(invalid)}. Must be one of: {', '.join(ALLOWED_RARITIES)}"
+        elif values:
+            filters['rarity'] = values
+
+    for field in ('medium', 'series'):
+        value = args.get(field, '').strip()
+        if value:
+            filters[field] = value
+
+    for field in ('artist_id', 'year_min', 'year_max'):
+        raw = args.get(field)
+        if raw is None or not raw.strip():
+            continue
+        try:
+            filters[field] = int(raw)
+        except ValueError:
+            errors[field] = f"{field} must be a whole number."
+
+    if 'year_min' in filters and 'year_max' in filters and filters['year_min'] > filters['year_max']:
+        errors['year_min'] = "year_min cannot be greater than year_max."
+
+    return filters, errors
+
+
+def apply_artwork_filters(query, filters):
+    """Applies filters from parse_artwork_filters() to an Artwork query."""
+    if 'rarity' in filters:
+        query = query.filter(Artwork.rarity.in_(filters['rarity']))
+    if 'medium' in filters:
+        query = query.filter(Artwork.medium == filters['medium'])
+    if 'series' in filters:
+        query = query.filter(Artwork.series == filters['series'])
+    if 'artist_id' in filters:
+        query = query.filter(Artwork.artist_id == filters['artist_id'])
+    if 'year_min' in filters:
+        query = query.filter(Artwork.year >= filters['year_min'])
+    if 'year_max' in filters:
+        query = query.filter(Artwork.year <= filters['year_max'])
+    return query
+
+
+def get_artwork_facets(filters):
+    """
+    Counts matching artworks per rarity, medium and decade.
+    All three facets come from one GROUPING SETS query; views with at most
+    MAX_CACHED_FILTERS filters are cached until the next artwork write.
+
+    Returns:
+        dict: {"rarity": [{"value", "count"}], "medium": [...], "decade": [...]}
+    """
+    cache_key = tuple(sorted(filters.items()))
+    cacheable = len(filters) <= MAX_CACHED_FILTERS
+    if cacheable:
+        with _facet_cache_lock:
+            cached = _facet_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    decade = (Artwork.year // 10) * 10
+    query = db.session.query(
+        func.grouping(Artwork.rarity).label('by_rarity'),
+        func.grouping(Artwork.medium).label('by_medium'),
+        func.grouping(decade).label('by_decade'),
+        Artwork.rarity,
+        Artwork.medium,
+        decade.label('decade'),
+        func.count().label('total')
+    )
+    query = apply_artwork_filters(query, filters)\
+        .group_by(func.grouping_sets(Artwork.rarity, Artwork.medium, decade))
+
+    # grouping() is 0 for the column a row is grouped by, 1 for the rolled-up ones
+    facets = {"rarity": [], "medium": [], "decade": []}
+    for row in query.all():
+        if row.by_rarity == 0:
+            facets["rarity"].append({"value": row.rarity, "count": row.total})
+        elif row.by_medium == 0:
+            facets["medium"].append({"value": row.medium, "count": row.total})
+        elif row.by_decade == 0:
+            facets["decade"].append({"value": row.decade, "count": row.total})
+
+    for buckets in facets.values():
+        buckets.sort(key=lambda bucket: (-bucket["count"], str(bucket["value"])))
+
+    if cacheable:
+        with _facet_cache_lock:
+            _facet_cache[cache_key] = facets
+    return facets
+
+
+def invalidate_facet_cache():
+    """Drops all cached facet counts. Call after any artwork create/update/delete."""
+    with _facet_cache_lock:
+        _facet_cache.clear()
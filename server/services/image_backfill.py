@@ -0,0 +1,148 @@
+import logging
+import traceback
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from sqlalchemy import or_, select, update
+
+from server.extensions import db
+from server.services.color_palette import extract_palette
+from server.services.image_variants import decode_thumbnail, placeholder_data_uri
+from server.services.storage import get_storage, key_for_url
+
+# --- Constants ---
+FETCH_TIMEOUT_SECONDS = 30
+MAX_FETCH_BYTES = 50 * 1024 * 1024
+# Artwork columns the backfill can fill in (the upload worker sets all of them)
+BACKFILL_FIELDS = ('palette', 'width', 'height', 'placeholder')
+
+
+def _image_source(storage, image_url):
+    """
+    Where a worker process can read an artwork's original: a file path for the
+    local backend, else the public URL. Returns None for URLs it can't fetch.
+    """
+    key = key_for_url(storage, image_url)
+    if storage.name == 'local' and key is not None:
+        return ('path', storage.path_for(key))
+    if image_url.startswith(('https://', 'http://')):
+        return ('url', image_url)
+    return None
+
+
+def _read_source(source):
+    kind, location = source
+    if kind == 'path':
+        with open(location, 'rb') as f:
+            return f.read()
+    with urllib.request.urlopen(location, timeout=FETCH_TIMEOUT_SECONDS) as response:
+        data = response.read(MAX_FETCH_BYTES + 1)
+    if len(data) > MAX_FETCH_BYTES:
+        raise ValueError(f"Image larger than {MAX_FETCH_BYTES} bytes")
+    return data
+
+
+def analyze_artwork_image(task):
+    """
+    Worker-process half of the backfill: fetch, decode once at thumbnail size,
+    and compute every BACKFILL_FIELDS value from that render. Module-level and
+    free of app state so it can run in a spawned process.
+
+    Returns:
+        tuple: (artwork_id, {field: value} or None, error message or None)
+    """
+    artwork_id, source = task
+    try:
+        rendered = decode_thumbnail(_read_source(source))
+        return artwork_id, {
+            'palette': extract_palette(rendered.smallest),
+            'width': rendered.width,
+            'height': rendered.height,
+            'placeholder': placeholder_data_uri(rendered.smallest),
+        }, None
+    except Exception as e:
+        return artwork_id, None, str(e)
+
+
+def backfill_artwork_images(fields=BACKFILL_FIELDS, batch_size=200, workers=None):
+    """
+    Fills image-derived artwork columns for artworks stored before they were
+    computed at upload - any artwork with one of `fields` still NULL. Images are
+    fetched and analysed by a pool of worker processes (the work is
+    decode-bound, so threads would serialise on the GIL); this process only
+    walks the primary key and writes each batch in one transaction.
+
+    Args:
+        fields (tuple): Columns to fill, from BACKFILL_FIELDS
+        batch_size (int): Number of artworks updated per transaction
+        workers (int): Worker processes (default: one per CPU)
+
+    Returns:
+        tuple: (artworks updated, artworks whose image could not be read)
+
+    Raises:
+        BackfillError: if a batch fails; the batches before it are committed, so a
+                       rerun picks up where it stopped
+    """
+    from server.models.artwork import Artwork
+    from server.services.search_service import BackfillError
+
+    unknown = set(fields) - set(BACKFILL_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot backfill {', '.join(sorted(unknown))}")
+    storage = get_storage()
+    logging.info(f"Starting artwork image backfill of {', '.join(fields)} "
+                 f"(batch_size={batch_size}, workers={workers or 'auto'})")
+
+    updated = failed = 0
+    last_id = 0
+    # spawn, not fork: the parent holds DB connections, S3 clients and scheduler threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        while True:
+            rows = db.session.execute(
+                select(Artwork.artwork_id, Artwork.image_url)
+                .where(Artwork.artwork_id > last_id, or_(*[getattr(Artwork, field).is_(None) for field in fields]))
+                .order_by(Artwork.artwork_id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            tasks = []
+            for artwork_id, image_url in rows:
+                source = _image_source(storage, image_url)
+                if source is None:
+                    logging.warning(f"Image backfill: no readable source for artwork {artwork_id} ({image_url})")
+                    failed += 1
+                else:
+                    tasks.append((artwork_id, source))
+
+            batch_updated = 0
+            try:
+                for artwork_id, values, error in pool.map(analyze_artwork_image, tasks):
+                    if error:
+                        logging.warning(f"Image backfill: artwork {artwork_id} skipped: {error}")
+                        failed += 1
+                        continue
+                    db.session.execute(
+                        update(Artwork)
+                        .where(Artwork.artwork_id == artwork_id)
+                        # Keep updated_at as-is; a backfill is not a user edit
+                        .values(updated_at=Artwork.updated_at, **{field: values[field] for field in fields})
+                        .execution_options(synchronize_session=False)
+                    )
+                    batch_updated += 1
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Image backfill failed after artwork {last_id}: {str(e)}")
+                logging.error(traceback.format_exc())
+                raise BackfillError(str(e), updated, last_id) from e
+
+            updated += batch_updated
+            last_id = rows[-1].artwork_id
+            logging.info(f"Backfilled artwork images up to artwork {last_id} ({updated} so far)")
+
+    logging.info(f"Artwork image backfill complete: {updated} updated, {failed} unreadable")
+    return updated, failed
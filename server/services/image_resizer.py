@@ -0,0 +1,181 @@
+import bisect
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import closing
+
+from flask import current_app, request
+
+from server.services.disk_cache import DiskLRUCache
+from server.services.image_variants import resize_image
+from server.services.storage import get_storage
+
+# --- Constants ---
+MAX_RESIZE_EDGE = 2400             # Same as the largest upload variant ('retina')
+# Requested edges are rounded up to one of these, so one original has a bounded number of renders
+RESIZE_BUCKETS = (16, 32, 48, 64, 80, 100, 120, 160, 200, 240, 300, 360, 400, 480, 600,
+                  720, 800, 960, 1080, 1200, 1440, 1600, 1920, MAX_RESIZE_EDGE)
+RESIZE_FORMATS = ('webp', 'jpeg')
+# Stored keys embed a uuid and are never overwritten, so a resized key never changes either
+RESIZE_CACHE_MAX_AGE = 365 * 24 * 3600
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class MappedFile:
+    """
+    A read-only memory map of a file used as a WSGI response body. Chunks are
+    sliced straight out of the page cache instead of read() into fresh buffers,
+    and it is seekable, so Werkzeug serves Range requests by seeking rather than
+    iterating up to the start. The map stays valid if the cache evicts (unlinks)
+    the file mid-response.
+    """
+
+    def __init__(self, file, chunk_size=STREAM_CHUNK_SIZE):
+        self._file = file
+        self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._chunk_size = chunk_size
+        self._position = 0
+
+    def __len__(self):
+        return len(self._map)
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: len(self._map)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._position >= len(self._map):
+            raise StopIteration
+        chunk = self._map[self._position:self._position + self._chunk_size]
+        self._position += len(chunk)
+        return chunk
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def quantize_edge(value):
+    """The smallest RESIZE_BUCKETS edge that is at least value (None stays None)."""
+    if value is None:
+        return None
+    return RESIZE_BUCKETS[bisect.bisect_left(RESIZE_BUCKETS, min(value, MAX_RESIZE_EDGE))]
+
+
+def send_mapped_file(path, mimetype, etag, max_age):
+    """
+    Serves a cached file memory-mapped, answering If-None-Match with 304 and Range
+    with 206. The file must not be empty (mmap can't map zero bytes).
+    """
+    body = MappedFile(open(path, 'rb'))
+    response = current_app.response_class(body, mimetype=mimetype, direct_passthrough=True)
+    response.content_length = len(body)
+    response.set_etag(etag)
+    response.accept_ranges = 'bytes'  # Werkzeug only adds it to 206 responses
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    try:
+        response.make_conditional(request, accept_ranges=True, complete_length=len(body))
+    except Exception:
+        body.close()  # 416 Range Not Satisfiable
+        raise
+    return response
+
+
+class ImageResizer:
+    """
+    Resizes stored originals on demand and keeps the results in a DiskLRUCache.
+
+    Widths and heights are rounded up to RESIZE_BUCKETS first, so arbitrary sizes
+    can't make one original render (and fill the cache) thousands of times.
+    Each (storage key, width, height, format) is rendered at most once at a time:
+    the first request for a missing variant renders it, and concurrent requests
+    for the same variant wait on that render's Future instead of decoding the
+    same original again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}  # cache key -> Future of the cached path
+        self.cache = None
+        self.renders = 0
+        self.coalesced = 0
+
+    def init_app(self, app):
+        self.cache = DiskLRUCache(
+            app.config['IMAGE_CACHE_DIR'] or os.path.join(app.instance_path, 'image-cache'),
+            app.config['IMAGE_CACHE_MB'] * 1024 * 1024,
+        )
+
+    @staticmethod
+    def cache_key(key, width, height, format):
+        return f"{key}?w={width or ''}&h={height or ''}&fmt={format}"
+
+    def get(self, key, width=None, height=None, format='webp'):
+        """
+        Path of key resized to fit width x height (each rounded up to a
+        RESIZE_BUCKETS edge), rendering it if it isn't cached.
+        Raises StorageError if the original can't be read.
+
+        Returns:
+            tuple: (ETag, path of the cached file, True if it was already cached)
+        """
+        width, height = quantize_edge(width), quantize_edge(height)
+        cache_key = self.cache_key(key, width, height, format)
+        etag = hashlib.sha256(cache_key.encode('utf-8')).hexdigest()
+        path = self.cache.get(cache_key)
+        if path is not None:
+            return etag, path, True
+
+        with self._lock:
+            flight = self._in_flight.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[cache_key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return etag, flight.result(), False
+
+        try:
+            # A render that finished between the cache check and taking the lead
+            path = self.cache.get(cache_key) or self._render(cache_key, key, width, height, format)
+            flight.set_result(path)
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[cache_key]
+        return etag, path, False
+
+    def _render(self, cache_key, key, width, height, format):
+        started = time.perf_counter()
+        with closing(get_storage().open(key)) as original:
+            data = original.read()
+        variant = resize_image(data, width, height, format)
+        path = self.cache.put(cache_key, variant.data)
+        with self._lock:
+            self.renders += 1
+        logging.debug(f"Resized {key} to {variant.width}x{variant.height} {format} "
+                      f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return path
+
+
+# Shared resizer used by the image route
+image_resizer = ImageResizer()
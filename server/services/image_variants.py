@@ -0,0 +1,251 @@
+import base64
+import io
+import time
+
+from PIL import ExifTags, Image, ImageOps
+
+# --- Constants ---
+# Longest edge in pixels per named variant; the client picks one by display size
+DEFAULT_VARIANT_SIZES = {
+    'thumbnail': 250,
+    'card': 480,
+    'detail': 1200,
+    'retina': 2400,
+}
+# WebP first; progressive JPEG is the fallback for clients without WebP
+DEFAULT_VARIANT_FORMATS = ('webp', 'jpeg')
+WEBP_QUALITY = 80
+WEBP_METHOD = 4          # 0 (fast) - 6 (smallest); 4 is Pillow's usual size/speed balance
+JPEG_QUALITY = 82
+REDUCING_GAP = 2.0       # Integer reduce() until within 2x of the target, then LANCZOS
+JPEG_FALLBACK_BACKGROUND = (255, 255, 255)
+PLACEHOLDER_EDGE = 16    # Inline placeholder: a few hundred bytes, blurred by the client
+PLACEHOLDER_QUALITY = 40
+# EXIF orientations that swap width and height (rotated 90 or 270 degrees)
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+CONTENT_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+FILE_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+class ImageVariant:
+    """One encoded size/format of an image, plus how long the encode took."""
+
+    __slots__ = ('name', 'format', 'width', 'height', 'data', 'encode_seconds')
+
+    def __init__(self, name, format, width, height, data, encode_seconds):
+        self.name = name
+        self.format = format
+        self.width = width
+        self.height = height
+        self.data = data
+        self.encode_seconds = encode_seconds
+
+    @property
+    def content_type(self):
+        return CONTENT_TYPES[self.format]
+
+    @property
+    def extension(self):
+        return FILE_EXTENSIONS[self.format]
+
+
+class RenderedImage:
+    """
+    Everything render_variants() gets from one decode: the encoded variants, the
+    smallest render (for analysis that needs no more pixels than that) and the
+    upload's own display dimensions.
+    """
+
+    __slots__ = ('variants', 'smallest', 'width', 'height')
+
+    def __init__(self, variants, smallest, width, height):
+        self.variants = variants
+        self.smallest = smallest
+        self.width = width
+        self.height = height
+
+
+def parse_variant_sizes(value):
+    """
+    Reads a "name:edge,name:edge" setting (e.g. IMAGE_VARIANT_SIZES from the environment).
+    Raises ValueError for a malformed entry.
+    """
+    sizes = {}
+    for entry in value.split(','):
+        if not entry.strip():
+            continue
+        name, _, edge = entry.partition(':')
+        edge = int(edge)
+        if not name.strip() or edge <= 0:
+            raise ValueError(f"Invalid image variant size: {entry!r}")
+        sizes[name.strip()] = edge
+    return sizes
+
+
+def _fit(width, height, max_edge):
+    """Dimensions scaled to fit max_edge, never upscaled."""
+    scale = min(1.0, max_edge / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _fit_box(width, height, max_width, max_height):
+    """Dimensions scaled to fit max_width x max_height (either may be None), never upscaled."""
+    scale = min(1.0, max_width / width if max_width else 1.0, max_height / height if max_height else 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _downscale(img, size):
+    """
+    Integer-factor reduce() (cheap box averaging) down to within REDUCING_GAP of the
+    target, then one LANCZOS resize for the remainder.
+    """
+    if img.size == size:
+        return img
+    factor = int(min(img.width / size[0], img.height / size[1]) / REDUCING_GAP)
+    if factor > 1:
+        img = img.reduce(factor)
+    return img.resize(size, Image.LANCZOS)
+
+
+def _decode(data, max_edge, box=None):
+    img = Image.open(io.BytesIO(data))
+    # Full-resolution size as displayed, read from the header before any draft scaling
+    width, height = img.size
+    if img.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    if box is not None:
+        max_edge = max(_fit_box(width, height, *box))
+    if img.format == 'JPEG':
+        # draft() only ever picks a scale that keeps the image at least this big
+        img.draft('RGB', (max_edge, max_edge))
+    img = ImageOps.exif_transpose(img)
+    has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+    return img.convert('RGBA' if has_alpha else 'RGB'), (width, height)
+
+
+def decode_image(data, max_edge):
+    """
+    Decodes an uploaded image once, for variants up to max_edge.
+
+    For JPEGs, draft() lets libjpeg decode straight at 1/2, 1/4 or 1/8 scale when
+    the largest variant doesn't need the full resolution - the biggest saving on
+    camera-sized uploads. EXIF orientation is applied, animations use their first
+    frame, and the result is RGB or RGBA.
+
+    Returns:
+        PIL.Image
+    """
+    return _decode(data, max_edge)[0]
+
+
+def decode_thumbnail(data, max_edge=DEFAULT_VARIANT_SIZES['thumbnail']):
+    """
+    Decodes an image straight to a max_edge render - the same pixels the smallest
+    render of render_variants() has - for analysing images stored before an
+    analysis existed.
+
+    Returns:
+        RenderedImage with no variants
+    """
+    img, (width, height) = _decode(data, max_edge)
+    return RenderedImage([], _downscale(img, _fit(*img.size, max_edge)), width, height)
+
+
+def placeholder_data_uri(img):
+    """
+    A PLACEHOLDER_EDGE-pixel WebP of the image as a data: URI, small enough to
+    send inline with every card so the client can paint something (scaled up and
+    blurred) before any image request.
+
+    Returns:
+        str: "data:image/webp;base64,..."
+    """
+    small = img.copy()
+    small.thumbnail((PLACEHOLDER_EDGE, PLACEHOLDER_EDGE), Image.BOX)
+    buffer = io.BytesIO()
+    small.save(buffer, format='WEBP', quality=PLACEHOLDER_QUALITY, method=6)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def _encode(img, format):
+    buffer = io.BytesIO()
+    if format == 'webp':
+        img.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=WEBP_METHOD)
+    elif format == 'jpeg':
+        if img.mode == 'RGBA':
+            flattened = Image.new('RGB', img.size, JPEG_FALLBACK_BACKGROUND)
+            flattened.paste(img, mask=img.getchannel('A'))
+            img = flattened
+        img.save(buffer, format='JPEG', quality=JPEG_QUALITY, progressive=True, optimize=True)
+    else:
+        raise ValueError(f"Unsupported variant format: {format}")
+    return buffer.getvalue()
+
+
+def render_variants(data, sizes=None, formats=DEFAULT_VARIANT_FORMATS):
+    """
+    Produces every size x format variant of an image from a single decode.
+
+    Sizes are rendered largest first and each one is downscaled from the previous
+    (already smaller) render rather than from the full image, so the expensive
+    work is done once.
+
+    Returns:
+        RenderedImage, variants largest size first
+    """
+    sizes = sizes or DEFAULT_VARIANT_SIZES
+    ordered = sorted(sizes.items(), key=lambda item: item[1], reverse=True)
+    img, (width, height) = _decode(data, ordered[0][1])
+    original_size = img.size
+
+    variants = []
+    for name, max_edge in ordered:
+        img = _downscale(img, _fit(*original_size, max_edge))
+        for format in formats:
+            started = time.perf_counter()
+            encoded = _encode(img, format)
+            variants.append(ImageVariant(name, format, img.width, img.height, encoded,
+                                         time.perf_counter() - started))
+    return RenderedImage(variants, img, width, height)
+
+
+def resize_image(data, max_width=None, max_height=None, format='webp'):
+    """
+    One rendition fitting max_width x max_height (either may be None), for sizes
+    requested on demand rather than generated at upload. Same single decode,
+    draft scaling and encoders as render_variants(); never upscaled.
+
+    Returns:
+        ImageVariant named "<width>x<height>"
+    """
+    img, _ = _decode(data, None, box=(max_width, max_height))
+    # draft() leaves at least the target size, so fitting the decoded pixels gives the same result
+    img = _downscale(img, _fit_box(*img.size, max_width, max_height))
+    started = time.perf_counter()
+    encoded = _encode(img, format)
+    return ImageVariant(f"{img.width}x{img.height}", format, img.width, img.height, encoded,
+                        time.perf_counter() - started)
+
+
+def generate_variants(data, sizes=None, formats=DEFAULT_VARIANT_FORMATS):
+    """
+    Just the variants of render_variants().
+
+    Returns:
+        list of ImageVariant, largest size first
+    """
+    return render_variants(data, sizes, formats).variants
+
+
+def variants_manifest(variants, urls):
+    """
+    The JSON stored on Artwork.image_variants, e.g.
+    {"card": {"width": 480, "height": 320, "webp": url, "jpeg": url}, ...}.
+    urls holds one URL per variant, in the same order.
+    """
+    manifest = {}
+    for variant, url in zip(variants, urls):
+        entry = manifest.setdefault(variant.name, {"width": variant.width, "height": variant.height})
+        entry[variant.format] = url
+    return manifest
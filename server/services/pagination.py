@@ -0,0 +1,156 @@
+import base64
+import json
+import math
+from datetime import datetime
+
+from sqlalchemy import func, text, tuple_
+
+
+def encode_cursor(*values):
+    """
+    Encodes the sort-key values of the last row on a page into an opaque token.
+    Datetimes are stored as ISO strings and restored by decode_cursor().
+    """
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, expected_length):
+    """
+    Decodes a token produced by encode_cursor().
+    Raises ValueError if the token is malformed or has the wrong number of keys.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(payload, list) or len(payload) != expected_length:
+        raise ValueError("Invalid cursor")
+
+    values = []
+    for value in payload:
+        if isinstance(value, dict):
+            if set(value) != {"dt"}:
+                raise ValueError("Invalid cursor")
+            value = datetime.fromisoformat(value["dt"])
+        values.append(value)
+    return values
+
+
+def read_cursor(args, expected_length):
+    """
+    Reads the optional ?cursor= argument.
+
+    Returns:
+        (use_keyset, after): use_keyset is True when the client asked for cursor
+        pagination (an empty cursor means "first page"); after is the decoded
+        sort key of the previous page's last row, or None.
+    Raises ValueError for a malformed cursor.
+    """
+    if 'cursor' not in args:
+        return False, None
+    token = args.get('cursor', '').strip()
+    if not token:
+        return True, None
+    return True, decode_cursor(token, expected_length)
+
+
+def keyset_page(query, sort_columns, after, limit, cursor_values):
+    """
+    Fetches one page after the `after` key without OFFSET or COUNT.
+    The query must already be ordered by `sort_columns`, all descending;
+    `cursor_values(row)` returns the sort-key values of a result row.
+
+    Returns:
+        (rows, next_cursor): next_cursor is None on the last page
+    """
+    if after is not None:
+        query = query.filter(tuple_(*sort_columns) < tuple_(*after))
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*cursor_values(rows[-1]))
+
+
+def read_with_total(args):
+    """?with_total=false skips the exact total. Defaults to true for existing clients."""
+    return args.get('with_total', 'true').lower() != 'false'
+
+
+class Page:
+    """One page of results from fetch_page(), shaped like Flask-SQLAlchemy's Pagination."""
+
+    __slots__ = ('items', 'page', 'per_page', 'total', 'total_exact', 'has_next')
+
+    def __init__(self, items, page, per_page, total, total_exact, has_next):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.total_exact = total_exact
+        self.has_next = has_next
+
+    @property
+    def pages(self):
+        if self.total is None:
+            return None
+        return math.ceil(self.total / self.per_page) if self.per_page else 0
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+
+def fetch_page(query, page, per_page, with_total=True, estimate_total=None):
+    """
+    Page-number pagination without a separate COUNT(*) round trip.
+
+    With with_total, the exact total rides along as count(*) OVER () in the page
+    query itself; only a page past the end (no rows to carry it) falls back to
+    query.count(). Without it, one extra row is fetched to find has_next and the
+    total comes from estimate_total() if given (e.g. pg_class.reltuples), else None.
+
+    Returns:
+        Page
+    """
+    page = max(page, 1)
+    offset = (page - 1) * per_page
+    single_entity = len(query.column_descriptions) == 1
+
+    if not with_total:
+        rows = query.limit(per_page + 1).offset(offset).all()
+        has_next = len(rows) > per_page
+        total = estimate_total() if estimate_total else None
+        return Page(rows[:per_page], page, per_page, total, False, has_next)
+
+    rows = query.add_columns(func.count().over().label('_total')).limit(per_page).offset(offset).all()
+    if rows:
+        total = rows[0][-1]
+        items = [row[0] if single_entity else tuple(row[:-1]) for row in rows]
+    else:
+        total = query.order_by(None).count() if page > 1 else 0
+        items = []
+    return Page(items, page, per_page, total, True, offset + len(items) < total)
+
+
+def estimate_table_rows(session, table_name):
+    """
+    Planner estimate of a table's row count from pg_class.reltuples - no scan.
+
+    Returns:
+        int or None if the table has never been analyzed
+    """
+    estimate = session.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table_name}
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
@@ -0,0 +1,52 @@
+import threading
+
+from cachetools import TTLCache
+from sqlalchemy import select
+
+from server.extensions import db
+from server.models.trade import Trade
+
+# --- Constants ---
+PENDING_ARTWORKS_CACHE_TTL_SECONDS = 60   # Bounds staleness for writes handled by other workers
+PENDING_ARTWORKS_CACHE_MAX_USERS = 10000
+
+_pending_cache = TTLCache(maxsize=PENDING_ARTWORKS_CACHE_MAX_USERS, ttl=PENDING_ARTWORKS_CACHE_TTL_SECONDS)
+_pending_cache_lock = threading.Lock()
+
+
+def pending_artwork_ids(user_id):
+    """
+    Artworks of user_id's that are already committed to a pending trade: offered by
+    them as initiator, or requested from them as recipient. Read through the
+    (initiator|recipient, status) trade indexes and cached per user.
+
+    Returns:
+        frozenset of artwork ids
+    """
+    with _pending_cache_lock:
+        cached = _pending_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    offered = select(Trade.offered_artwork_id)\
+        .where(Trade.initiator_id == user_id, Trade.status == 'PENDING')
+    requested = select(Trade.requested_artwork_id)\
+        .where(Trade.recipient_id == user_id, Trade.status == 'PENDING')
+    artwork_ids = frozenset(db.session.execute(offered.union(requested)).scalars().all())
+
+    with _pending_cache_lock:
+        _pending_cache[user_id] = artwork_ids
+    return artwork_ids
+
+
+def invalidate_pending_artworks(*user_ids):
+    """Drops the cached sets of users whose pending trades changed. Call after the commit."""
+    with _pending_cache_lock:
+        for user_id in user_ids:
+            _pending_cache.pop(user_id, None)
+
+
+def clear_pending_artworks():
+    """Drops every cached set, for changes that cancel other users' trades (accepts, sweeps)."""
+    with _pending_cache_lock:
+        _pending_cache.clear()
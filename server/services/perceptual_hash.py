@@ -0,0 +1,256 @@
+import heapq
+import logging
+import threading
+import time
+import traceback
+from array import array
+from bisect import bisect_left
+from itertools import combinations
+
+from PIL import Image
+
+from server.extensions import db
+
+# --- Constants ---
+HASH_BITS = 64
+SUBSTRINGS = 4                      # Multi-index hashing: the hash is split into 4 x 16-bit keys
+SUBSTRING_BITS = HASH_BITS // SUBSTRINGS
+SUBSTRING_MASK = (1 << SUBSTRING_BITS) - 1
+DEFAULT_MAX_DISTANCE = 8            # Bits out of 64; crops/re-encodes of one image land well inside this
+MAX_QUERY_DISTANCE = 15             # Keeps the per-substring search radius at 3 or less
+DEFAULT_MATCH_LIMIT = 10
+COMPACT_THRESHOLD = 4096            # Recent adds/removes scanned linearly before the tables are rebuilt...
+COMPACT_FRACTION = 64               # ...or 1/64 of the index, whichever is larger
+HASH_FETCH_BATCH = 10000
+BUILD_RETRY_SECONDS = 30            # Minimum gap between build attempts while the index is empty
+
+# Every 16-bit mask with at most r bits set, for r = 0..3
+_FLIP_MASKS = []
+for _radius in range(MAX_QUERY_DISTANCE // SUBSTRINGS + 1):
+    _FLIP_MASKS.append([
+        sum(1 << bit for bit in bits)
+        for flipped in range(_radius + 1)
+        for bits in combinations(range(SUBSTRING_BITS), flipped)
+    ])
+
+
+def dhash(img):
+    """
+    64-bit difference hash: the image shrunk to 9x8 greyscale, one bit per
+    horizontally adjacent pixel pair (left brighter than right). Stable under
+    re-encoding, resizing and small crops; takes an already-decoded image.
+
+    Returns:
+        int in [0, 2**64)
+    """
+    pixels = img.convert('L').resize((9, 8), Image.BOX).tobytes()
+    value = 0
+    for row in range(0, 72, 9):
+        for col in range(row, row + 8):
+            value = (value << 1) | (pixels[col] > pixels[col + 1])
+    return value
+
+
+def to_signed64(value):
+    """Unsigned hash -> the signed value stored in a BIGINT column."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def from_signed64(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateIndex:
+    """
+    In-memory Hamming-distance index over artwork perceptual hashes.
+
+    Multi-index hashing: each 64-bit hash is cut into four 16-bit substrings, and
+    any hash within distance r of a query matches it within r // 4 bits on at least
+    one substring (pigeonhole). A query therefore looks up only the buckets within
+    that small radius in each of four tables and checks the full distance of those
+    candidates, instead of scanning every hash.
+
+    Tables are compact arrays - per substring, positions sorted by bucket plus the
+    bucket offsets - so a million hashes take about 35 MB. Adds and removes since
+    the last build go to a small overlay that is scanned linearly and folded into
+    the tables once it grows past a fraction of the index. Built once at startup,
+    then kept current by the upload worker and artwork routes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._load([])
+        self._last_build_attempt = 0
+        self.built_at = None
+
+    def init_app(self, app):
+        if app.config.get('NEAR_DUPLICATE_BUILD_ON_STARTUP', True):
+            with app.app_context():
+                self.build()
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids) - len(self._removed) + len(self._recent)
+
+    def build(self):
+        """
+        Loads every artwork's perceptual hash from the database.
+
+        Returns:
+            bool: True if the index was built
+        """
+        from server.models.artwork import Artwork
+
+        self._last_build_attempt = time.time()
+        try:
+            rows = db.session.query(Artwork.artwork_id, Artwork.perceptual_hash)\
+                .filter(Artwork.perceptual_hash.isnot(None))\
+                .yield_per(HASH_FETCH_BATCH)
+            entries = [(artwork_id, from_signed64(value)) for artwork_id, value in rows]
+        except Exception as e:
+            db.session.rollback()
+            logging.warning(f"Near-duplicate index build failed, will retry on first request: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return False
+
+        self.load(entries)
+        logging.info(f"Near-duplicate index built: {len(entries)} hashes")
+        return True
+
+    def load(self, entries):
+        """Replaces the index contents with (artwork_id, unsigned hash) pairs."""
+        with self._lock:
+            self._load(entries)
+            self.built_at = time.time()
+
+    def _load(self, entries):
+        # Sorted by id so single artworks can be found by bisection
+        ids = array('q')
+        hashes = array('Q')
+        for artwork_id, value in sorted(entries):
+            ids.append(artwork_id)
+            hashes.append(value)
+
+        tables = []
+        count = len(hashes)
+        for table in range(SUBSTRINGS):
+            shift = table * SUBSTRING_BITS
+            keys = [(value >> shift) & SUBSTRING_MASK for value in hashes]
+            # Counting sort of positions by substring value
+            starts = array('q', bytes(8 * (SUBSTRING_MASK + 2)))
+            for key in keys:
+                starts[key + 1] += 1
+            for key in range(SUBSTRING_MASK + 1):
+                starts[key + 1] += starts[key]
+            fill = array('q', starts)
+            order = array('I', bytes(4 * count))
+            for position, key in enumerate(keys):
+                order[fill[key]] = position
+                fill[key] += 1
+            tables.append((starts, order))
+
+        self._ids = ids
+        self._hashes = hashes
+        self._tables = tables
+        self._recent = {}       # artwork_id -> hash, added since the tables were built
+        self._removed = set()   # artwork_ids in the tables that were removed or re-hashed
+
+    def _maybe_compact(self):
+        if len(self._recent) + len(self._removed) < max(COMPACT_THRESHOLD, len(self._ids) // COMPACT_FRACTION):
+            return
+        live = [
+            (artwork_id, value) for artwork_id, value in zip(self._ids, self._hashes)
+            if artwork_id not in self._removed
+        ]
+        live.extend(self._recent.items())
+        self._load(live)
+
+    # --- Incremental updates (call after the DB commit) ---
+    def add(self, artwork_id, value):
+        """Adds or replaces an artwork's hash (unsigned)."""
+        with self._lock:
+            self._hide(artwork_id)
+            self._recent[artwork_id] = value
+            self._maybe_compact()
+
+    def artwork_deleted(self, artwork_id):
+        with self._lock:
+            self._recent.pop(artwork_id, None)
+            self._hide(artwork_id)
+            self._maybe_compact()
+
+    def _hide(self, artwork_id):
+        # Table entries can't be removed in place; they are masked until the next compaction
+        position = bisect_left(self._ids, artwork_id)
+        if position < len(self._ids) and self._ids[position] == artwork_id:
+            self._removed.add(artwork_id)
+
+    # --- Queries ---
+    def find(self, value, max_distance=DEFAULT_MAX_DISTANCE, limit=DEFAULT_MATCH_LIMIT, exclude_id=None):
+        """
+        Artworks whose hash is within max_distance bits of value (unsigned).
+
+        Returns:
+            list of (artwork_id, distance), closest first
+        """
+        if not 0 <= max_distance <= MAX_QUERY_DISTANCE:
+            raise ValueError(f"max_distance must be between 0 and {MAX_QUERY_DISTANCE}")
+        if not self.is_built and time.time() - self._last_build_attempt > BUILD_RETRY_SECONDS:
+            self.build()
+
+        masks = _FLIP_MASKS[max_distance // SUBSTRINGS]
+        matches = {}
+        with self._lock:
+            ids, hashes, removed = self._ids, self._hashes, self._removed
+            seen = set()
+            for table, (starts, order) in enumerate(self._tables):
+                key = (value >> (table * SUBSTRING_BITS)) & SUBSTRING_MASK
+                for mask in masks:
+                    bucket = key ^ mask
+                    for position in order[starts[bucket]:starts[bucket + 1]]:
+                        if position in seen:
+                            continue
+                        seen.add(position)
+                        distance = (hashes[position] ^ value).bit_count()
+                        if distance <= max_distance:
+                            artwork_id = ids[position]
+                            if artwork_id not in removed and artwork_id != exclude_id:
+                                matches[artwork_id] = distance
+            for artwork_id, other in self._recent.items():
+                distance = (other ^ value).bit_count()
+                if distance <= max_distance and artwork_id != exclude_id:
+                    matches[artwork_id] = distance
+
+        return sorted(matches.items(), key=lambda item: (item[1], item[0]))[:limit]
+
+    def duplicate_pairs(self, max_distance=DEFAULT_MAX_DISTANCE, limit=None):
+        """
+        Batch report: every pair of artworks within max_distance of each other.
+
+        Returns:
+            list of (artwork_id, other_artwork_id, distance) with artwork_id < other_artwork_id
+        """
+        with self._lock:
+            entries = [
+                (artwork_id, value) for artwork_id, value in zip(self._ids, self._hashes)
+                if artwork_id not in self._removed
+            ]
+            entries.extend(self._recent.items())
+
+        # Every pair is needed before truncating: the closest may involve the highest ids
+        pairs = (
+            (distance, artwork_id, other_id)
+            for artwork_id, value in entries
+            for other_id, distance in self.find(value, max_distance, limit=len(entries))
+            if other_id > artwork_id
+        )
+        ordered = heapq.nsmallest(limit, pairs) if limit is not None else sorted(pairs)
+        return [(artwork_id, other_id, distance) for distance, artwork_id, other_id in ordered]
+
+
+# Shared index used by the upload worker and artwork routes
+near_duplicate_index = NearDuplicateIndex()
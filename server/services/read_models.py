@@ -0,0 +1,255 @@
+from sqlalchemy import null
+from sqlalchemy.orm import Bundle, aliased
+
+from server.extensions import db
+from server.models.user import User
+from server.models.artwork import Artwork
+from server.models.collection import Collection
+from server.models.user_follow import UserFollow
+from server.models.trade import Trade
+from server.services.serializer import ARTWORK_CARD_FIELDS
+
+
+class RowBundle(Bundle):
+    """
+    A column Bundle that turns each result row straight into a read-model object.
+
+    Queries over bundles select only the listed columns and never create ORM
+    entities, so nothing enters the session identity map. single_entity lets the
+    bundle come back unwrapped, like a mapped entity, which keeps
+    pagination.fetch_page() and keyset_page() working unchanged.
+    """
+
+    def __init__(self, name, factory, *columns):
+        super().__init__(name, *columns, single_entity=True)
+        self.factory = factory
+
+    def create_row_processor(self, query, procs, labels):
+        factory = self.factory
+
+        def proc(row):
+            return factory(*[p(row) for p in procs])
+        return proc
+
+
+# --- Read models ---
+# Attribute names mirror the ORM models (card.artist.username, item.artwork.title, ...)
+# so existing serialization code reads them unchanged.
+
+class ArtistRef:
+    __slots__ = ('user_id', 'username')
+
+    def __init__(self, user_id, username):
+        self.user_id = user_id
+        self.username = username
+
+
+class ArtworkCard:
+    __slots__ = (
+        'artwork_id', 'title', 'description', 'series', 'rarity', 'image_url', 'thumbnail_url', 'image_variants',
+        'width', 'height', 'placeholder', 'year', 'medium', 'artist_name', 'artist_id', 'created_at', 'artist'
+    )
+
+    def __init__(self, artwork_id, title, description, series, rarity, image_url, thumbnail_url, image_variants,
+                 width, height, placeholder, year, medium, artist_name, artist_id, created_at, artist_user_id, artist_username):
+        self.artwork_id = artwork_id
+        self.title = title
+        self.description = description
+        self.series = series
+        self.rarity = rarity
+        self.image_url = image_url
+        self.thumbnail_url = thumbnail_url
+        self.image_variants = image_variants
+        self.width = width
+        self.height = height
+        self.placeholder = placeholder
+        self.year = year
+        self.medium = medium
+        self.artist_name = artist_name
+        self.artist_id = artist_id
+        self.created_at = created_at
+        self.artist = ArtistRef(artist_user_id, artist_username) if artist_user_id is not None else None
+
+    def to_dict(self):
+        """Same output as serialize(artwork, ARTWORK_CARD_FIELDS)."""
+        data = {field: getattr(self, field) for field in ARTWORK_CARD_FIELDS if '.' not in field}
+        data['artist'] = {'user_id': self.artist.user_id, 'username': self.artist.username} if self.artist else None
+        return data
+
+
+class CollectedArtwork:
+    __slots__ = ('patron_id', 'artwork_id', 'acquired_at', 'transaction_id', 'artwork')
+
+    def __init__(self, patron_id, artwork_id, acquired_at, transaction_id, *card_values):
+        self.patron_id = patron_id
+        self.artwork_id = artwork_id
+        self.acquired_at = acquired_at
+        self.transaction_id = transaction_id
+        self.artwork = ArtworkCard(*card_values)
+
+
+class FollowEntry:
+    """A user on a following/followers list, plus the follow's own sort key."""
+
+    __slots__ = ('user_id', 'username', 'profile_image_url', 'role', 'followed_at')
+
+    def __init__(self, user_id, username, profile_image_url, role, followed_at):
+        self.user_id = user_id
+        self.username = username
+        self.profile_image_url = profile_image_url
+        self.role = role
+        self.followed_at = followed_at
+
+    def to_dict(self):
+        """Same output as serialize(user, USER_SUMMARY_FIELDS) plus followed_at."""
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'profile_image_url': self.profile_image_url,
+            'role': self.role,
+            'followed_at': self.followed_at.isoformat() + 'Z' if self.followed_at else None,
+        }
+
+
+class TradeListEntry:
+    """A trade with both users' id/username and both artworks' id/title/thumbnail."""
+
+    __slots__ = (
+        'trade_id', 'initiator_id', 'recipient_id', 'offered_artwork_id', 'requested_artwork_id',
+        'message', 'status', 'created_at', 'updated_at',
+        'initiator_username', 'recipient_username',
+        'offered_title', 'offered_thumbnail_url', 'requested_title', 'requested_thumbnail_url'
+    )
+
+    def __init__(self, trade_id, initiator_id, recipient_id, offered_artwork_id, requested_artwork_id,
+                 message, status, created_at, updated_at, initiator_username, recipient_username,
+                 offered_title, offered_thumbnail_url, requested_title, requested_thumbnail_url):
+        self.trade_id = trade_id
+        self.initiator_id = initiator_id
+        self.recipient_id = recipient_id
+        self.offered_artwork_id = offered_artwork_id
+        self.requested_artwork_id = requested_artwork_id
+        self.message = message
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.initiator_username = initiator_username
+        self.recipient_username = recipient_username
+        self.offered_title = offered_title
+        self.offered_thumbnail_url = offered_thumbnail_url
+        self.requested_title = requested_title
+        self.requested_thumbnail_url = requested_thumbnail_url
+
+    def to_dict(self):
+        """Trade list item; a missing user/artwork (outer join miss) serializes as {}."""
+        return {
+            "trade_id": self.trade_id,
+            "initiator_id": self.initiator_id,
+            "recipient_id": self.recipient_id,
+            "offered_artwork_id": self.offered_artwork_id,
+            "requested_artwork_id": self.requested_artwork_id,
+            "message": self.message,
+            "status": self.status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "initiator": {"user_id": self.initiator_id, "username": self.initiator_username}
+                if self.initiator_username is not None else {},
+            "recipient": {"user_id": self.recipient_id, "username": self.recipient_username}
+                if self.recipient_username is not None else {},
+            "offered_artwork": {
+                "artwork_id": self.offered_artwork_id,
+                "title": self.offered_title,
+                "thumbnail_url": self.offered_thumbnail_url
+            } if self.offered_title is not None else {},
+            "requested_artwork": {
+                "artwork_id": self.requested_artwork_id,
+                "title": self.requested_title,
+                "thumbnail_url": self.requested_thumbnail_url
+            } if self.requested_title is not None else {},
+        }
+
+
+# --- Column sets ---
+
+def _artwork_card_columns(include_description):
+    return (
+        Artwork.artwork_id, Artwork.title,
+        # Cards that don't show the description skip the (potentially large) text column
+        Artwork.description if include_description else null(),
+        Artwork.series, Artwork.rarity, Artwork.image_url, Artwork.thumbnail_url, Artwork.image_variants,
+        Artwork.width, Artwork.height, Artwork.placeholder, Artwork.year, Artwork.medium, Artwork.artist_name, Artwork.artist_id, Artwork.created_at,
+        User.user_id, User.username,
+    )
+
+
+# --- Queries ---
+
+def artwork_cards(include_description=True):
+    """
+    Artwork cards with the artist's id/username, as ArtworkCard rows.
+    Accepts the same filters/ordering as an Artwork query (e.g. apply_artwork_filters).
+    """
+    bundle = RowBundle('card', ArtworkCard, *_artwork_card_columns(include_description))
+    return db.session.query(bundle).outerjoin(User, User.user_id == Artwork.artist_id)
+
+
+def collected_artworks(patron_id):
+    """A patron's collection entries (Collection → Artwork → artist), as CollectedArtwork rows."""
+    bundle = RowBundle(
+        'collected', CollectedArtwork,
+        Collection.patron_id, Collection.artwork_id, Collection.acquired_at, Collection.transaction_id,
+        *_artwork_card_columns(False)
+    )
+    return db.session.query(bundle)\
+        .select_from(Collection)\
+        .join(Artwork, Artwork.artwork_id == Collection.artwork_id)\
+        .outerjoin(User, User.user_id == Artwork.artist_id)\
+        .filter(Collection.patron_id == patron_id)
+
+
+def follow_entries(user_id, direction):
+    """
+    Users on user_id's 'following' or 'followers' list, as FollowEntry rows.
+
+    Returns:
+        (query, other_id_column): other_id_column is the follow column holding the
+        listed user's id, for use as the keyset tie-breaker
+    """
+    if direction == 'following':
+        owner_column, other_column = UserFollow.patron_id, UserFollow.artist_id
+    else:
+        owner_column, other_column = UserFollow.artist_id, UserFollow.patron_id
+    bundle = RowBundle(
+        'entry', FollowEntry,
+        User.user_id, User.username, User.profile_image_url, User.role, UserFollow.created_at
+    )
+    query = db.session.query(bundle)\
+        .select_from(UserFollow)\
+        .join(User, other_column == User.user_id)\
+        .filter(owner_column == user_id)
+    return query, other_column
+
+
+def trade_list(user_column, user_id):
+    """
+    Trades where user_column (Trade.initiator_id or Trade.recipient_id) is user_id,
+    with both users and both artworks joined in the same SELECT, as TradeListEntry rows.
+    """
+    initiator = aliased(User)
+    recipient = aliased(User)
+    offered = aliased(Artwork)
+    requested = aliased(Artwork)
+    bundle = RowBundle(
+        'trade', TradeListEntry,
+        Trade.trade_id, Trade.initiator_id, Trade.recipient_id, Trade.offered_artwork_id,
+        Trade.requested_artwork_id, Trade.message, Trade.status, Trade.created_at, Trade.updated_at,
+        initiator.username, recipient.username,
+        offered.title, offered.thumbnail_url, requested.title, requested.thumbnail_url
+    )
+    return db.session.query(bundle)\
+        .select_from(Trade)\
+        .outerjoin(initiator, initiator.user_id == Trade.initiator_id)\
+        .outerjoin(recipient, recipient.user_id == Trade.recipient_id)\
+        .outerjoin(offered, offered.artwork_id == Trade.offered_artwork_id)\
+        .outerjoin(requested, requested.artwork_id == Trade.requested_artwork_id)\
+        .filter(user_column == user_id)
@@ -0,0 +1,77 @@
+import logging
+import traceback
+
+from sqlalchemy import select, update
+
+from server.extensions import db
+from server.models.artwork import Artwork
+
+
+class BackfillError(Exception):
+    """A backfill batch failed; earlier batches stay committed."""
+
+    def __init__(self, message, updated, last_id):
+        super().__init__(message)
+        self.updated = updated    # Artworks updated by the committed batches
+        self.last_id = last_id    # Highest artwork id those batches covered
+
+
+def backfill_artwork_search_vectors(batch_size=500, rebuild=False):
+    """
+    Fills artworks.search_vector for rows that don't have one yet.
+    Each batch is a single UPDATE over a bounded set of ids followed by a commit,
+    so the job never holds long locks on the artworks table.
+
+    Args:
+        batch_size (int): Number of artworks updated per transaction
+        rebuild (bool): Recompute every row instead of only missing vectors
+
+    Returns:
+        int: Number of artworks updated
+
+    Raises:
+        BackfillError: if a batch fails; the batches before it are committed, so a
+                       rerun (without rebuild) picks up where it stopped
+    """
+    logging.info(f"Starting artwork search vector backfill (batch_size={batch_size}, rebuild={rebuild})")
+
+    vector_expr = Artwork.build_search_vector(
+        Artwork.title, Artwork.series, Artwork.artist_name, Artwork.medium, Artwork.description
+    )
+
+    total_updated = 0
+    last_id = 0
+    while True:
+        # Walk the primary key so a rebuild also terminates and each batch uses the pkey index
+        id_batch = select(Artwork.artwork_id)\
+            .where(Artwork.artwork_id > last_id)\
+            .order_by(Artwork.artwork_id)\
+            .limit(batch_size)
+        if not rebuild:
+            id_batch = id_batch.where(Artwork.search_vector.is_(None))
+
+        try:
+            ids = db.session.execute(id_batch).scalars().all()
+            if not ids:
+                break
+
+            result = db.session.execute(
+                update(Artwork)
+                .where(Artwork.artwork_id.in_(ids))
+                # Keep updated_at as-is; a backfill is not a user edit
+                .values(search_vector=vector_expr, updated_at=Artwork.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Search vector backfill failed after artwork {last_id}: {str(e)}")
+            logging.error(traceback.format_exc())
+            raise BackfillError(str(e), total_updated, last_id) from e
+
+        total_updated += result.rowcount
+        last_id = ids[-1]
+        logging.info(f"Backfilled search vectors up to artwork {last_id} ({total_updated} so far)")
+
+    logging.info(f"Search vector backfill complete: {total_updated} artworks updated")
+    return total_updated
@@ -0,0 +1,176 @@
+import threading
+import uuid
+from datetime import datetime, date, time
+from decimal import Decimal
+from enum import Enum
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy_serializer import SerializerMixin
+
+# --- Field sets shared by the hot read endpoints ---
+ARTWORK_CARD_FIELDS = (
+    "artwork_id",
+    "title",
+    "description",
+    "series",
+    "rarity",
+    "image_url",
+    "thumbnail_url",
+    "image_variants",
+    "width",
+    "height",
+    "placeholder",
+    "year",
+    "medium",
+    "artist_name",
+    "artist_id",
+    "artist.user_id",
+    "artist.username",
+)
+ARTWORK_DETAIL_FIELDS = (
+    "artwork_id",
+    "title",
+    "description",
+    "series",
+    "rarity",
+    "image_url",
+    "thumbnail_url",
+    "image_variants",
+    "width",
+    "height",
+    "placeholder",
+    "palette",
+    "border_decal_id",
+    "year",
+    "medium",
+    "artist_name",
+    "artist_id",
+    "artist.user_id",
+    "artist.username",
+    "created_at",
+    "updated_at",
+)
+USER_SUMMARY_FIELDS = ("user_id", "username", "profile_image_url", "role")
+
+# Values that need no conversion; checked by exact type first (the common case)
+_SIMPLE_TYPES = frozenset((int, str, float, bool, type(None)))
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+class FieldPlan:
+    """
+    The compiled form of a to_dict(only=fields) call for one model class.
+
+    Field names are resolved against the mapper once: plain column keys become
+    attribute reads, and 'relation.field' entries become a nested plan for a
+    to-one relationship. Values are converted the same way SerializerMixin
+    converts them (the model's datetime/date/time/decimal formats, Enum.value),
+    so the JSON produced from serialize() matches to_dict() exactly.
+    """
+
+    __slots__ = ('model', 'columns', 'nested', 'datetime_format', 'date_format', 'time_format', 'decimal_format')
+
+    def __init__(self, model, fields):
+        mapper = sa_inspect(model)
+        if model.get_tzinfo is not SerializerMixin.get_tzinfo:
+            raise ValueError(f"{model.__name__} converts timezones; use to_dict() instead")
+
+        columns = []
+        nested_fields = {}
+        for field in fields:
+            head, _, rest = field.partition('.')
+            if rest:
+                nested_fields.setdefault(head, []).append(rest)
+            elif head in mapper.column_attrs:
+                columns.append(head)
+            else:
+                raise ValueError(f"{model.__name__}.{head} is not a column; list nested fields explicitly")
+
+        nested = []
+        for key, sub_fields in nested_fields.items():
+            relationship = mapper.relationships.get(key)
+            if relationship is None or relationship.uselist:
+                raise ValueError(f"{model.__name__}.{key} is not a to-one relationship")
+            nested.append((key, get_plan(relationship.mapper.class_, tuple(sub_fields))))
+
+        self.model = model
+        self.columns = tuple(columns)
+        self.nested = tuple(nested)
+        self.datetime_format = model.datetime_format
+        self.date_format = model.date_format
+        self.time_format = model.time_format
+        self.decimal_format = model.decimal_format
+
+    def __call__(self, obj):
+        if obj is None:
+            return None
+        data = {}
+        for key in self.columns:
+            value = getattr(obj, key)
+            data[key] = value if type(value) in _SIMPLE_TYPES else self._convert(value)
+        for key, plan in self.nested:
+            data[key] = plan(getattr(obj, key))
+        return data
+
+    def _convert(self, value):
+        # Same precedence as sqlalchemy_serializer.Serializer (time before datetime before date)
+        if isinstance(value, (int, str, float, bool)):
+            return value
+        if isinstance(value, time):
+            return _format_dt(value, self.time_format)
+        if isinstance(value, datetime):
+            return _format_dt(value, self.datetime_format)
+        if isinstance(value, date):
+            return _format_dt(value, self.date_format)
+        if isinstance(value, Decimal):
+            return self.decimal_format.format(value)
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, (dict, list)):
+            # JSON columns already hold JSON-ready values
+            return value
+        if isinstance(value, bytes):
+            return value.decode()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        raise TypeError(f"Unserializable type:{type(value)} value:{value}")
+
+
+def _format_dt(value, str_format):
+    return value.strftime(str_format) if str_format else value.isoformat()
+
+
+def get_plan(model, fields):
+    """Returns the cached FieldPlan for (model, fields), compiling it on first use."""
+    key = (model, tuple(fields))
+    plan = _plans.get(key)
+    if plan is None:
+        plan = FieldPlan(model, key[1])
+        with _plans_lock:
+            plan = _plans.setdefault(key, plan)
+    return plan
+
+
+def serialize(obj, fields):
+    """
+    Fast equivalent of obj.to_dict(only=fields).
+
+    Returns:
+        dict, or None for None
+    """
+    return get_plan(type(obj), fields)(obj)
+
+
+def serialize_many(objs, fields):
+    """
+    Fast equivalent of [obj.to_dict(only=fields) for obj in objs]; the plan is looked up once.
+
+    Returns:
+        list of dicts
+    """
+    if not objs:
+        return []
+    plan = get_plan(type(objs[0]), fields)
+    return [plan(obj) for obj in objs]
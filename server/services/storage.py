@@ -0,0 +1,295 @@
+import os
+import shutil
+import tempfile
+import threading
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from s3transfer.manager import TransferConfig, TransferManager
+from flask import current_app
+
+# --- Constants ---
+COPY_CHUNK_SIZE = 1024 * 1024      # Bytes per read when streaming to disk
+S3_MAX_POOL_CONNECTIONS = 32       # botocore's default of 10 is below upload + worker concurrency
+S3_CONNECT_TIMEOUT = 5
+S3_READ_TIMEOUT = 60
+S3_MAX_ATTEMPTS = 5
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024   # Files at least this big go up as parallel multipart
+S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024   # Part size (S3's minimum is 5 MiB)
+S3_UPLOAD_CONCURRENCY = 10                 # Part/file requests in flight across all uploads
+
+
+class StorageError(Exception):
+    """A file could not be stored or read; the message is safe to show to clients."""
+
+
+def _check_key(key):
+    # Keys are built from secure_filename() + uuids, but a backend must never escape its root
+    if not key or key.startswith('/') or '\\' in key or any(part in ('', '.', '..') for part in key.split('/')):
+        raise StorageError(f"Invalid storage key: {key!r}")
+    return key
+
+
+class S3Storage:
+    """
+    Stores files in an S3 bucket through one long-lived client and transfer manager.
+
+    boto3 clients are thread-safe, so request threads and background workers share
+    the client and its connection pool instead of paying client construction and a
+    fresh TLS connection per upload. Uploads go through one s3transfer
+    TransferManager: files of multipart_threshold bytes or more are split into
+    multipart_chunksize parts sent in parallel, and every file and part shares the
+    same max_concurrency request slots. A failed multipart upload is aborted by the
+    manager, so no orphaned parts are left billing in the bucket. Both are created
+    on first use.
+    """
+
+    name = 's3'
+
+    def __init__(self, bucket, region=None, access_key_id=None, secret_access_key=None,
+                 max_pool_connections=S3_MAX_POOL_CONNECTIONS, endpoint_url=None,
+                 multipart_threshold=S3_MULTIPART_THRESHOLD, multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+                 max_concurrency=S3_UPLOAD_CONCURRENCY):
+        self.bucket = bucket
+        self.region = region
+        self.endpoint_url = endpoint_url  # For S3-compatible stores (MinIO, test stand-ins)
+        self._credentials = {'aws_access_key_id': access_key_id, 'aws_secret_access_key': secret_access_key}
+        self._transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_request_concurrency=max_concurrency,
+        )
+        self._config = Config(
+            region_name=region,
+            # Every in-flight part needs its own connection
+            max_pool_connections=max(max_pool_connections, max_concurrency),
+            connect_timeout=S3_CONNECT_TIMEOUT,
+            read_timeout=S3_READ_TIMEOUT,
+            retries={'max_attempts': S3_MAX_ATTEMPTS, 'mode': 'standard'},
+            tcp_keepalive=True,
+        )
+        if endpoint_url:
+            self._config = self._config.merge(Config(s3={'addressing_style': 'path'}))
+        self._client = None
+        self._transfer_manager = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.bucket)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # A private session: the default boto3 session is not thread-safe
+                    self._client = boto3.session.Session().client(
+                        's3', config=self._config, endpoint_url=self.endpoint_url, **self._credentials
+                    )
+        return self._client
+
+    @property
+    def transfer_manager(self):
+        if self._transfer_manager is None:
+            client = self.client
+            with self._lock:
+                if self._transfer_manager is None:
+                    self._transfer_manager = TransferManager(client, self._transfer_config)
+        return self._transfer_manager
+
+    def url_for(self, key):
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def _submit(self, file_obj, key, content_type):
+        return self.transfer_manager.upload(file_obj, self.bucket, _check_key(key), extra_args={'ContentType': content_type})
+
+    @staticmethod
+    def _result(future):
+        try:
+            future.result()
+        except ClientError as e:
+            raise StorageError(f"S3 upload failed: {e.response.get('Error', {}).get('Message', 'Unknown S3 error')}") from e
+        except BotoCoreError as e:
+            raise StorageError("S3 upload failed.") from e
+
+    def save(self, file_obj, key, content_type):
+        """
+        Streams file_obj to the bucket, as a parallel multipart upload if it is large
+        (parts are read as they are sent; the whole file is never held in memory).
+
+        Returns:
+            str: Public URL of the stored object
+        """
+        self._result(self._submit(file_obj, key, content_type))
+        return self.url_for(key)
+
+    def save_many(self, files):
+        """
+        Uploads (file_obj, key, content_type) items concurrently.
+        Raises StorageError if any upload fails (after all of them have finished).
+
+        Returns:
+            list of URLs, in the same order
+        """
+        futures = [(self._submit(file_obj, key, content_type), key) for file_obj, key, content_type in files]
+        errors = []
+        for future, key in futures:
+            try:
+                self._result(future)
+            except StorageError as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return [self.url_for(key) for _, key, _ in files]
+
+    def delete_many(self, keys):
+        """Deletes stored keys in one request; keys that don't exist are ignored."""
+        if not keys:
+            return
+        try:
+            response = self.client.delete_objects(Bucket=self.bucket, Delete={
+                'Objects': [{'Key': _check_key(key)} for key in keys], 'Quiet': True
+            })
+        except (ClientError, BotoCoreError) as e:
+            raise StorageError("S3 delete failed.") from e
+        if response.get('Errors'):
+            raise StorageError(f"S3 delete failed: {response['Errors'][0].get('Message', 'Unknown S3 error')}")
+
+    def shutdown(self):
+        with self._lock:
+            manager, self._transfer_manager = self._transfer_manager, None
+        if manager is not None:
+            manager.shutdown()
+
+    def open(self, key):
+        """Returns a readable, streaming file object for a stored key."""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=_check_key(key))['Body']
+        except (ClientError, BotoCoreError) as e:
+            raise StorageError(f"Could not read {key} from S3.") from e
+
+
+class LocalStorage:
+    """
+    Stores files under a local directory, served by routes/files.py.
+
+    For development and offline tests. Writes go to a temporary file in the target
+    directory and are renamed into place, so readers never see a partial file.
+    """
+
+    name = 'local'
+    configured = True
+
+    def __init__(self, root, base_url):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip('/')
+
+    def path_for(self, key):
+        return os.path.join(self.root, *_check_key(key).split('/'))
+
+    def url_for(self, key):
+        return f"{self.base_url}/{key}"
+
+    def save(self, file_obj, key, content_type):
+        """
+        Streams file_obj to disk in COPY_CHUNK_SIZE pieces. content_type is implied
+        by the key's extension when the file is served.
+
+        Returns:
+            str: URL of the stored file
+        """
+        path = self.path_for(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    shutil.copyfileobj(file_obj, out, COPY_CHUNK_SIZE)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError as e:
+            raise StorageError("Could not write the file to local storage.") from e
+        return self.url_for(key)
+
+    def save_many(self, files):
+        """
+        Writes (file_obj, key, content_type) items; local disk gains nothing from threads.
+
+        Returns:
+            list of URLs, in the same order
+        """
+        return [self.save(file_obj, key, content_type) for file_obj, key, content_type in files]
+
+    def delete_many(self, keys):
+        """Deletes stored files; keys that don't exist are ignored."""
+        for key in keys:
+            try:
+                os.unlink(self.path_for(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                raise StorageError(f"Could not delete {key} from local storage.") from e
+
+    def shutdown(self):
+        pass
+
+    def open(self, key):
+        """Returns a readable file object for a stored key."""
+        try:
+            return open(self.path_for(key), 'rb')
+        except OSError as e:
+            raise StorageError(f"Could not read {key} from local storage.") from e
+
+
+def init_storage(app):
+    """
+    Creates the backend named by STORAGE_BACKEND ('s3' or 'local') and registers it
+    as app.extensions['storage'].
+    """
+    backend = app.config['STORAGE_BACKEND']
+    if backend == 's3':
+        storage = S3Storage(
+            app.config['S3_BUCKET_NAME'],
+            region=app.config['AWS_REGION'],
+            access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+            secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+            max_pool_connections=app.config['S3_MAX_POOL_CONNECTIONS'],
+            endpoint_url=app.config['S3_ENDPOINT_URL'],
+            multipart_threshold=app.config['S3_MULTIPART_THRESHOLD_MB'] * 1024 * 1024,
+            multipart_chunksize=app.config['S3_MULTIPART_CHUNK_MB'] * 1024 * 1024,
+            max_concurrency=app.config['S3_UPLOAD_CONCURRENCY'],
+        )
+        if not storage.configured:
+            app.logger.warning("S3_BUCKET_NAME environment variable not set. Uploads will fail.")
+    elif backend == 'local':
+        storage = LocalStorage(
+            app.config['LOCAL_STORAGE_ROOT'] or os.path.join(app.instance_path, 'uploads'),
+            app.config['LOCAL_STORAGE_BASE_URL'],
+        )
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    app.extensions['storage'] = storage
+    return storage
+
+
+def get_storage():
+    """The configured storage backend for the current app."""
+    return current_app.extensions['storage']
+
+
+def key_for_url(storage, url):
+    """
+    The key of a file `storage` serves at `url` (the inverse of url_for), or None
+    for a URL outside the backend - which callers must not fetch on a user's behalf.
+    """
+    prefix = storage.url_for('')
+    if not url or not url.startswith(prefix) or len(url) == len(prefix):
+        return None
+    return url[len(prefix):]
@@ -0,0 +1,203 @@
+import logging
+import traceback
+from collections import defaultdict
+
+from sqlalchemy import func, case, null, select
+from sqlalchemy.dialects.postgresql import insert
+
+from server.extensions import db
+from server.models.trade import Trade
+from server.models.trade_inbox_counter import TradeInboxCounter
+
+
+def _latest_pending(user_column, user_id):
+    """Newest created_at of a user's PENDING trades (NULL if none), via the (user, status, created_at) index."""
+    return select(func.max(Trade.created_at))\
+        .where(user_column == user_id, Trade.status == 'PENDING')\
+        .scalar_subquery()
+
+
+def _apply_pending_changes(changes):
+    """
+    Adds deltas to the pending counters of every user involved, in one upsert.
+    Runs inside the caller's transaction, so counters commit (or roll back) with the trade change.
+
+    Opening a trade can only move a latest timestamp forward. Closing one may remove
+    the newest pending trade, so the timestamps of everyone involved are recomputed
+    from their remaining PENDING trades in the same statement.
+
+    Args:
+        changes: iterable of (initiator_id, recipient_id, delta); delta is +1 for a new
+                 pending trade and -1 for one leaving PENDING
+    """
+    sent = defaultdict(int)
+    received = defaultdict(int)
+    opened_sent = set()
+    opened_received = set()
+    closing = False
+    for initiator_id, recipient_id, delta in changes:
+        sent[initiator_id] += delta
+        received[recipient_id] += delta
+        if delta > 0:
+            opened_sent.add(initiator_id)
+            opened_received.add(recipient_id)
+        else:
+            closing = True
+
+    user_ids = sorted(set(sent) | set(received))
+    if not user_ids:
+        return
+
+    if closing:
+        # The recount below must see the caller's status changes
+        db.session.flush()
+
+    def latest(user_column, user_id, opened):
+        if closing:
+            return _latest_pending(user_column, user_id)
+        return func.now() if user_id in opened else null()
+
+    # Rows in user_id order so concurrent upserts lock counter rows in the same order
+    rows = [
+        {
+            'user_id': user_id,
+            'pending_sent': sent.get(user_id, 0),
+            'pending_received': received.get(user_id, 0),
+            'latest_sent_at': latest(Trade.initiator_id, user_id, opened_sent),
+            'latest_received_at': latest(Trade.recipient_id, user_id, opened_received),
+        }
+        for user_id in user_ids
+    ]
+    stmt = insert(TradeInboxCounter).values(rows)
+    new_sent = func.greatest(TradeInboxCounter.pending_sent + stmt.excluded.pending_sent, 0)
+    new_received = func.greatest(TradeInboxCounter.pending_received + stmt.excluded.pending_received, 0)
+    if closing:
+        # Recomputed from the remaining pending trades, so they replace the stored values
+        latest_sent = stmt.excluded.latest_sent_at
+        latest_received = stmt.excluded.latest_received_at
+    else:
+        # GREATEST ignores NULLs, so the side a user didn't open a trade on is left alone
+        latest_sent = func.greatest(TradeInboxCounter.latest_sent_at, stmt.excluded.latest_sent_at)
+        latest_received = func.greatest(TradeInboxCounter.latest_received_at, stmt.excluded.latest_received_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TradeInboxCounter.user_id],
+        set_={
+            'pending_sent': new_sent,
+            'pending_received': new_received,
+            'latest_sent_at': case((new_sent == 0, null()), else_=latest_sent),
+            'latest_received_at': case((new_received == 0, null()), else_=latest_received),
+            'updated_at': func.now(),
+        }
+    )
+    db.session.execute(stmt)
+
+
+def record_trade_opened(initiator_id, recipient_id):
+    """Counts a new PENDING trade. Call before committing the insert."""
+    _apply_pending_changes([(initiator_id, recipient_id, 1)])
+
+
+def record_trades_closed(pairs):
+    """
+    Uncounts trades that left PENDING (accepted, rejected, canceled or expired).
+    Call before committing the status change.
+
+    Args:
+        pairs: iterable of (initiator_id, recipient_id), one per closed trade
+    """
+    _apply_pending_changes((initiator_id, recipient_id, -1) for initiator_id, recipient_id in pairs)
+
+
+def get_trade_summary(user_id):
+    """
+    Returns:
+        dict: pending_sent, pending_received, latest_sent_at, latest_received_at
+    """
+    counter = db.session.get(TradeInboxCounter, user_id)
+    if counter is None:
+        return {'pending_sent': 0, 'pending_received': 0, 'latest_sent_at': None, 'latest_received_at': None}
+    return {
+        'pending_sent': max(counter.pending_sent, 0),
+        'pending_received': max(counter.pending_received, 0),
+        'latest_sent_at': counter.latest_sent_at.isoformat() if counter.latest_sent_at else None,
+        'latest_received_at': counter.latest_received_at.isoformat() if counter.latest_received_at else None,
+    }
+
+
+def _pending_aggregate(user_column):
+    rows = db.session.execute(
+        select(user_column, func.count(), func.max(Trade.created_at))
+        .where(Trade.status == 'PENDING')
+        .group_by(user_column)
+    ).all()
+    return {user_id: (count, latest) for user_id, count, latest in rows}
+
+
+def reconcile_trade_counters():
+    """
+    Repairs counters that drifted from the trades table.
+    A cheap global aggregate finds the drifted users; each one is then fixed under a
+    lock on its counter row, recounted from the (user, status, created_at) indexes,
+    so concurrent trade changes are neither lost nor double counted.
+
+    Returns:
+        int: Number of counters repaired
+    """
+    logging.info("Starting trade counter reconciliation")
+    try:
+        sent = _pending_aggregate(Trade.initiator_id)
+        received = _pending_aggregate(Trade.recipient_id)
+        counters = {
+            row.user_id: (row.pending_sent, row.latest_sent_at, row.pending_received, row.latest_received_at)
+            for row in db.session.execute(
+                select(TradeInboxCounter.user_id, TradeInboxCounter.pending_sent, TradeInboxCounter.latest_sent_at,
+                       TradeInboxCounter.pending_received, TradeInboxCounter.latest_received_at)
+            )
+        }
+        db.session.rollback()  # End the snapshot; each repair below runs in its own transaction
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Trade counter reconciliation failed: {str(e)}")
+        logging.error(traceback.format_exc())
+        return 0
+
+    # Counts and the newest timestamps must both match the trades table
+    drifted = sorted(
+        user_id for user_id in set(sent) | set(received) | set(counters)
+        if counters.get(user_id, (0, None, 0, None)) != (*sent.get(user_id, (0, None)), *received.get(user_id, (0, None)))
+    )
+
+    repaired = 0
+    for user_id in drifted:
+        try:
+            db.session.execute(
+                select(TradeInboxCounter.user_id).where(TradeInboxCounter.user_id == user_id).with_for_update()
+            )
+            sent_count, latest_sent = db.session.execute(
+                select(func.count(), func.max(Trade.created_at))
+                .where(Trade.initiator_id == user_id, Trade.status == 'PENDING')
+            ).one()
+            received_count, latest_received = db.session.execute(
+                select(func.count(), func.max(Trade.created_at))
+                .where(Trade.recipient_id == user_id, Trade.status == 'PENDING')
+            ).one()
+
+            values = {
+                'pending_sent': sent_count,
+                'pending_received': received_count,
+                'latest_sent_at': latest_sent,
+                'latest_received_at': latest_received,
+            }
+            stmt = insert(TradeInboxCounter).values(user_id=user_id, **values)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=[TradeInboxCounter.user_id],
+                set_=dict(values, updated_at=func.now())
+            ))
+            db.session.commit()
+            repaired += 1
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Failed to reconcile trade counters for user {user_id}: {str(e)}")
+
+    logging.info(f"Trade counter reconciliation complete: {repaired} of {len(drifted)} drifted counters repaired")
+    return repaired
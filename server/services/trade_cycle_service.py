@@ -0,0 +1,287 @@
+import logging
+import traceback
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, exists, select, update
+from sqlalchemy.orm import aliased
+
+from server.extensions import db
+from server.models.collection import Collection
+from server.models.user_follow import UserFollow
+from server.models.wishlist_item import WishlistItem
+from server.models.trade_cycle import TradeCycle, TradeCycleLeg
+
+# --- Constants ---
+MIN_CYCLE_LENGTH = 3             # Two-party swaps are already offered by /trades/matches
+MAX_CYCLE_LENGTH = 4
+MAX_CYCLES_PER_RUN = 500
+MAX_STEPS_PER_START = 10000      # Forward edge expansions allowed from one start node
+CYCLE_PROPOSAL_TTL_DAYS = 3
+EDGE_FETCH_BATCH = 10000
+
+
+class TradeGraph:
+    """
+    Directed "gives to" graph in compressed sparse row form.
+
+    Nodes are dense indexes into `user_ids`. The out-edges of node n are
+    targets[offsets[n]:offsets[n + 1]], and artworks holds the artwork handed over
+    on each edge. The reverse direction is kept the same way: in_edges[in_offsets[n]:
+    in_offsets[n + 1]] are the positions of the edges pointing at n. Everything
+    lives in `array` buffers (8 bytes per entry), so a few million edges take tens
+    of megabytes instead of a dict of tuples.
+    """
+
+    __slots__ = ('user_ids', 'offsets', 'targets', 'artworks', 'sources', 'in_offsets', 'in_edges')
+
+    def __init__(self, user_ids, offsets, targets, artworks):
+        self.user_ids = user_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.artworks = artworks
+        self._build_reverse()
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def _build_reverse(self):
+        # Counting sort of edge positions by target
+        node_count = len(self.user_ids)
+        sources = array('q', bytes(8 * len(self.targets)))
+        counts = array('q', bytes(8 * (node_count + 1)))
+        for node in range(node_count):
+            for position in range(self.offsets[node], self.offsets[node + 1]):
+                sources[position] = node
+                counts[self.targets[position] + 1] += 1
+        for node in range(node_count):
+            counts[node + 1] += counts[node]
+        in_offsets = array('q', counts)
+        in_edges = array('q', bytes(8 * len(self.targets)))
+        for position, target in enumerate(self.targets):
+            in_edges[counts[target]] = position
+            counts[target] += 1
+        self.sources = sources
+        self.in_offsets = in_offsets
+        self.in_edges = in_edges
+
+    @classmethod
+    def from_sorted_edges(cls, edges):
+        """
+        Builds the graph from (giver_id, receiver_id, artwork_id) rows sorted by
+        giver, receiver, artwork. Only the first artwork per (giver, receiver) is kept,
+        and edges to users who give nothing are dropped - they can't be on a cycle.
+        """
+        user_ids = array('q')
+        offsets = array('q', [0])
+        receivers = array('q')
+        artworks = array('q')
+
+        previous_giver = previous_receiver = None
+        for giver_id, receiver_id, artwork_id in edges:
+            if giver_id != previous_giver:
+                if previous_giver is not None:
+                    offsets.append(len(receivers))
+                user_ids.append(giver_id)
+                previous_giver, previous_receiver = giver_id, None
+            if receiver_id == previous_receiver:
+                continue
+            receivers.append(receiver_id)
+            artworks.append(artwork_id)
+            previous_receiver = receiver_id
+        if previous_giver is not None:
+            offsets.append(len(receivers))
+
+        # Second pass: user ids -> node indexes, compacting away edges to non-givers
+        index_of = {user_id: index for index, user_id in enumerate(user_ids)}
+        targets = array('q')
+        kept_artworks = array('q')
+        compact_offsets = array('q', [0])
+        for node in range(len(user_ids)):
+            for position in range(offsets[node], offsets[node + 1]):
+                target = index_of.get(receivers[position])
+                if target is not None:
+                    targets.append(target)
+                    kept_artworks.append(artworks[position])
+            compact_offsets.append(len(targets))
+        return cls(user_ids, compact_offsets, targets, kept_artworks)
+
+
+def find_cycles(graph, min_length=MIN_CYCLE_LENGTH, max_length=MAX_CYCLE_LENGTH,
+                max_cycles=MAX_CYCLES_PER_RUN, max_steps=MAX_STEPS_PER_START):
+    """
+    Bounded meet-in-the-middle search for disjoint cycles of 2 to 4 users.
+
+    From each start node s, the users one and two hops *back* from s are collected
+    from the reverse arrays, then at most two hops *forward* are walked until they
+    meet - about deg^2 work per start instead of the deg^(length-1) of a plain DFS.
+    A cycle is only searched from its lowest node index (every other node must be
+    higher), a user joins at most one cycle per run, and each start gets a fixed
+    budget of forward edge expansions.
+
+    Returns:
+        list of cycles, each a list of (giver_id, receiver_id, artwork_id) legs
+    """
+    if not 2 <= min_length <= max_length <= 4:
+        raise ValueError("find_cycles supports cycles of 2 to 4 users")
+
+    offsets, targets, sources = graph.offsets, graph.targets, graph.sources
+    in_offsets, in_edges = graph.in_offsets, graph.in_edges
+    used = bytearray(len(graph))
+    cycles = []
+
+    def usable(node, start):
+        return node > start and not used[node]
+
+    for start in range(len(graph)):
+        if len(cycles) >= max_cycles:
+            break
+        if used[start]:
+            continue
+
+        # back1: c -> edge (c -> start); back2: b -> [(edge b -> c, edge c -> start)], two
+        # routes at most - with two different c's, one always avoids the forward hop a
+        back1 = {}
+        for closing in in_edges[in_offsets[start]:in_offsets[start + 1]]:
+            node = sources[closing]
+            if usable(node, start):
+                back1[node] = closing
+        if not back1:
+            continue
+        back2 = {}
+        if max_length == 4:
+            for node, closing in back1.items():
+                for position in in_edges[in_offsets[node]:in_offsets[node + 1]]:
+                    before = sources[position]
+                    if before != node and usable(before, start):
+                        routes = back2.setdefault(before, [])
+                        if len(routes) < 2:
+                            routes.append((position, closing))
+
+        found = None
+        steps = 0
+        for first in range(offsets[start], offsets[start + 1]):
+            a = targets[first]
+            if not usable(a, start):
+                continue
+            if min_length == 2 and a in back1:
+                found = [first, back1[a]]
+                break
+            if max_length == 2:
+                continue
+            for second in range(offsets[a], offsets[a + 1]):
+                steps += 1
+                b = targets[second]
+                if b == a or not usable(b, start):
+                    continue
+                if min_length <= 3 and b in back1:
+                    found = [first, second, back1[b]]
+                    break
+                routes = back2.get(b)
+                if routes:
+                    route = next((route for route in routes if sources[route[1]] != a), None)
+                    if route is not None:
+                        found = [first, second, *route]
+                        break
+            if found is not None or steps >= max_steps:
+                break
+
+        if found is None:
+            continue
+        legs = []
+        for position in found:
+            giver = sources[position]
+            legs.append((graph.user_ids[giver], graph.user_ids[targets[position]], graph.artworks[position]))
+            used[giver] = 1
+        cycles.append(legs)
+    return cycles
+
+
+def _busy_user_ids():
+    """Users already on a proposed cycle, who are left out of new proposals."""
+    return select(TradeCycleLeg.giver_id)\
+        .join(TradeCycle, TradeCycle.cycle_id == TradeCycleLeg.cycle_id)\
+        .where(TradeCycle.status == 'PROPOSED')
+
+
+def load_trade_graph():
+    """
+    Streams every possible hand-over from the database: the giver owns the artwork,
+    the receiver wishlisted it and doesn't own it, and the two follow each other
+    (the same mutual-follow rule create_trade enforces).
+
+    Returns:
+        TradeGraph
+    """
+    follows = aliased(UserFollow)
+    followed_back = aliased(UserFollow)
+    receiver_owns = aliased(Collection)
+    busy = _busy_user_ids()
+
+    edges = db.session.query(Collection.patron_id, WishlistItem.user_id, Collection.artwork_id)\
+        .join(WishlistItem, WishlistItem.artwork_id == Collection.artwork_id)\
+        .join(follows, and_(follows.patron_id == Collection.patron_id, follows.artist_id == WishlistItem.user_id))\
+        .join(followed_back, and_(followed_back.patron_id == WishlistItem.user_id,
+                                  followed_back.artist_id == Collection.patron_id))\
+        .filter(Collection.patron_id != WishlistItem.user_id)\
+        .filter(~exists().where(and_(receiver_owns.patron_id == WishlistItem.user_id,
+                                     receiver_owns.artwork_id == Collection.artwork_id)))\
+        .filter(Collection.patron_id.not_in(busy), WishlistItem.user_id.not_in(busy))\
+        .order_by(Collection.patron_id, WishlistItem.user_id, Collection.artwork_id)\
+        .yield_per(EDGE_FETCH_BATCH)
+    return TradeGraph.from_sorted_edges(edges)
+
+
+def expire_cycle_proposals(ttl_days=CYCLE_PROPOSAL_TTL_DAYS):
+    """
+    Marks proposals nobody completed within ttl_days as EXPIRED, freeing their users.
+
+    Returns:
+        int: Number of cycles expired
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+    expired = db.session.execute(
+        update(TradeCycle)
+        .where(TradeCycle.status == 'PROPOSED', TradeCycle.created_at < cutoff)
+        .values(status='EXPIRED'),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    return expired
+
+
+def propose_trade_cycles():
+    """
+    Batch job: expires stale proposals, builds the trade graph, and stores every
+    cycle found as a PROPOSED TradeCycle with one leg per hand-over.
+
+    Returns:
+        int: Number of cycles proposed
+    """
+    try:
+        expired = expire_cycle_proposals()
+        graph = load_trade_graph()
+        logging.info(f"Trade graph built: {len(graph)} users, {graph.edge_count} edges "
+                     f"({expired} stale proposals expired)")
+
+        cycles = find_cycles(graph)
+        for legs in cycles:
+            cycle = TradeCycle(size=len(legs), status='PROPOSED')
+            cycle.legs = [
+                TradeCycleLeg(position=position, giver_id=giver_id, receiver_id=receiver_id, artwork_id=artwork_id)
+                for position, (giver_id, receiver_id, artwork_id) in enumerate(legs)
+            ]
+            db.session.add(cycle)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Trade cycle discovery failed: {str(e)}")
+        logging.error(traceback.format_exc())
+        return 0
+
+    logging.info(f"Trade cycle discovery proposed {len(cycles)} cycles")
+    return len(cycles)
@@ -0,0 +1,121 @@
+import logging
+import traceback
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, delete, insert, func, and_, or_
+
+from server.extensions import db
+from server.models.trade import Trade
+from server.models.trade_archive import TradeArchive
+from server.services.trade_counter_service import record_trades_closed
+
+# Columns copied from trades into trades_archive, in matching order
+_ARCHIVED_COLUMNS = (
+    'trade_id', 'initiator_id', 'recipient_id', 'offered_artwork_id', 'requested_artwork_id',
+    'message', 'status', 'created_at', 'updated_at',
+)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def expire_stale_trades(ttl_days, batch_size=500, max_batches=100):
+    """
+    Cancels PENDING trades older than ttl_days.
+    Each batch is one UPDATE over at most batch_size ids picked with
+    FOR UPDATE SKIP LOCKED (from the pending created_at partial index), committed
+    together with the matching counter changes. Trades that are being accepted
+    or rejected right now are skipped and picked up by a later run.
+
+    Args:
+        ttl_days (int): Age after which a pending trade expires
+        batch_size (int): Trades cancelled per transaction
+        max_batches (int): Upper bound on batches per run
+
+    Returns:
+        int: Number of trades expired
+    """
+    cutoff = _utcnow() - timedelta(days=ttl_days)
+    logging.info(f"Expiring pending trades created before {cutoff.isoformat()}")
+
+    total_expired = 0
+    for _ in range(max_batches):
+        stale_ids = select(Trade.trade_id)\
+            .where(Trade.status == 'PENDING', Trade.created_at < cutoff)\
+            .order_by(Trade.created_at)\
+            .limit(batch_size)\
+            .with_for_update(skip_locked=True)
+        try:
+            expired = db.session.execute(
+                update(Trade)
+                .where(Trade.trade_id.in_(stale_ids.scalar_subquery()))
+                .values(status='CANCELED', updated_at=func.now())
+                .returning(Trade.initiator_id, Trade.recipient_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            record_trades_closed(expired)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Trade expiry batch failed: {str(e)}")
+            logging.error(traceback.format_exc())
+            break
+
+        total_expired += len(expired)
+        if len(expired) < batch_size:
+            break
+
+    logging.info(f"Trade expiry complete: {total_expired} trades expired")
+    return total_expired
+
+
+def archive_finished_trades(archive_after_days, batch_size=500, max_batches=100):
+    """
+    Moves accepted/rejected/canceled trades whose last change is older than
+    archive_after_days into trades_archive. Each batch is a single
+    DELETE ... RETURNING feeding an INSERT (one statement, one transaction),
+    so a trade is never lost or duplicated between the two tables.
+
+    Returns:
+        int: Number of trades archived
+    """
+    cutoff = _utcnow() - timedelta(days=archive_after_days)
+    logging.info(f"Archiving finished trades last changed before {cutoff.isoformat()}")
+
+    finished = and_(
+        Trade.status != 'PENDING',
+        or_(Trade.updated_at < cutoff, and_(Trade.updated_at.is_(None), Trade.created_at < cutoff))
+    )
+    columns = [getattr(Trade, name) for name in _ARCHIVED_COLUMNS]
+
+    total_archived = 0
+    for _ in range(max_batches):
+        batch_ids = select(Trade.trade_id)\
+            .where(finished)\
+            .order_by(Trade.trade_id)\
+            .limit(batch_size)\
+            .with_for_update(skip_locked=True)
+        moved = delete(Trade)\
+            .where(Trade.trade_id.in_(batch_ids.scalar_subquery()))\
+            .returning(*columns)\
+            .cte('moved')
+        try:
+            result = db.session.execute(
+                insert(TradeArchive)
+                .from_select(list(_ARCHIVED_COLUMNS), select(*[moved.c[name] for name in _ARCHIVED_COLUMNS]))
+                .returning(TradeArchive.trade_id)
+            ).all()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Trade archive batch failed: {str(e)}")
+            logging.error(traceback.format_exc())
+            break
+
+        total_archived += len(result)
+        if len(result) < batch_size:
+            break
+
+    logging.info(f"Trade archiving complete: {total_archived} trades archived")
+    return total_archived
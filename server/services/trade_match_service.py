@@ -0,0 +1,231 @@
+import heapq
+import logging
+import threading
+import time
+import traceback
+
+from server.extensions import db
+from server.models.collection import Collection
+from server.models.user_follow import UserFollow
+from server.models.wishlist_item import WishlistItem
+
+# --- Constants ---
+DEFAULT_MATCH_LIMIT = 20
+MATCH_SAMPLE_SIZE = 5            # Artwork ids returned per side of a match
+BUILD_RETRY_SECONDS = 30         # Minimum gap between build attempts while the index is empty
+
+
+def _add(index, key, value):
+    members = index.get(key)
+    if members is None:
+        index[key] = members = set()
+    members.add(value)
+
+
+def _discard(index, key, value):
+    members = index.get(key)
+    if members is not None:
+        members.discard(value)
+        if not members:
+            del index[key]
+
+
+class TradeMatchIndex:
+    """
+    In-process wishlist matching over collections, wishlists and follows.
+
+    Kept as inverted indexes (artwork -> owners, artwork -> wishers) plus the
+    per-user forward sets, so finding partners for a user touches only the
+    owners/wishers of that user's own artworks, intersected with the user's
+    mutual follows. Built once at startup, then kept current by the routes that
+    change collections, wishlists and follows.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self._last_build_attempt = 0
+        self.built_at = None
+
+    def _clear(self):
+        self._owners = {}       # artwork_id -> {user_id}
+        self._wishers = {}      # artwork_id -> {user_id}
+        self._owned = {}        # user_id -> {artwork_id}
+        self._wished = {}       # user_id -> {artwork_id}
+        self._following = {}    # user_id -> {user_ids they follow}
+        self._followers = {}    # user_id -> {user_ids following them}
+
+    def init_app(self, app):
+        if app.config.get('TRADE_MATCH_BUILD_ON_STARTUP', True):
+            with app.app_context():
+                self.build()
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def build(self):
+        """
+        Loads every collection entry, wishlist entry and follow from the database.
+
+        Returns:
+            bool: True if the index was built
+        """
+        self._last_build_attempt = time.time()
+        try:
+            collection_rows = db.session.query(Collection.patron_id, Collection.artwork_id).all()
+            wishlist_rows = db.session.query(WishlistItem.user_id, WishlistItem.artwork_id).all()
+            follow_rows = db.session.query(UserFollow.patron_id, UserFollow.artist_id).all()
+        except Exception as e:
+            db.session.rollback()
+            logging.warning(f"Trade match index build failed, will retry on first request: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return False
+
+        with self._lock:
+            self._clear()
+            for user_id, artwork_id in collection_rows:
+                self._add_owned(user_id, artwork_id)
+            for user_id, artwork_id in wishlist_rows:
+                self._add_wished(user_id, artwork_id)
+            for follower_id, followed_id in follow_rows:
+                self._add_follow(follower_id, followed_id)
+            self.built_at = time.time()
+
+        logging.info(f"Trade match index built: {len(collection_rows)} collection entries, "
+                     f"{len(wishlist_rows)} wishlist entries, {len(follow_rows)} follows")
+        return True
+
+    # --- Queries ---
+    def find_partners(self, user_id, limit=DEFAULT_MATCH_LIMIT):
+        """
+        Mutual follows of user_id where each side owns something the other wishlisted.
+        Ranked by the number of artworks that could change hands in a balanced trade
+        (the smaller side), then by the total on both sides.
+
+        Returns:
+            list of {"user_id", "you_get", "you_give", "you_get_count", "you_give_count"};
+            you_get/you_give hold up to MATCH_SAMPLE_SIZE artwork ids
+        """
+        if not self.is_built and time.time() - self._last_build_attempt > BUILD_RETRY_SECONDS:
+            self.build()
+
+        with self._lock:
+            mutual = self._following.get(user_id, set()) & self._followers.get(user_id, set())
+            if not mutual:
+                return []
+            owned = self._owned.get(user_id, set())
+
+            # Partners owning something on the user's wishlist
+            you_get = {}
+            for artwork_id in self._wished.get(user_id, ()):
+                if artwork_id in owned:
+                    continue
+                owners = self._owners.get(artwork_id)
+                if owners:
+                    for partner_id in owners & mutual:
+                        _add(you_get, partner_id, artwork_id)
+            if not you_get:
+                return []
+
+            # ...who also wishlisted something the user owns
+            candidates = set(you_get)
+            you_give = {}
+            for artwork_id in owned:
+                wishers = self._wishers.get(artwork_id)
+                if not wishers:
+                    continue
+                for partner_id in wishers & candidates:
+                    if artwork_id not in self._owned.get(partner_id, ()):
+                        _add(you_give, partner_id, artwork_id)
+
+            ranked = heapq.nsmallest(
+                limit, you_give,
+                key=lambda partner_id: (
+                    -min(len(you_get[partner_id]), len(you_give[partner_id])),
+                    -(len(you_get[partner_id]) + len(you_give[partner_id])),
+                    partner_id,
+                )
+            )
+            return [
+                {
+                    "user_id": partner_id,
+                    "you_get": sorted(you_get[partner_id])[:MATCH_SAMPLE_SIZE],
+                    "you_give": sorted(you_give[partner_id])[:MATCH_SAMPLE_SIZE],
+                    "you_get_count": len(you_get[partner_id]),
+                    "you_give_count": len(you_give[partner_id]),
+                }
+                for partner_id in ranked
+            ]
+
+    # --- Incremental updates (call after the corresponding commit) ---
+    def collection_added(self, user_id, artwork_id):
+        with self._lock:
+            self._add_owned(user_id, artwork_id)
+
+    def collection_removed(self, user_id, artwork_id):
+        with self._lock:
+            _discard(self._owners, artwork_id, user_id)
+            _discard(self._owned, user_id, artwork_id)
+
+    def trade_completed(self, initiator_id, recipient_id, offered_artwork_id, requested_artwork_id):
+        with self._lock:
+            self.collection_removed(initiator_id, offered_artwork_id)
+            self.collection_removed(recipient_id, requested_artwork_id)
+            self._add_owned(recipient_id, offered_artwork_id)
+            self._add_owned(initiator_id, requested_artwork_id)
+
+    def wishlist_added(self, user_id, artwork_id):
+        with self._lock:
+            self._add_wished(user_id, artwork_id)
+
+    def wishlist_removed(self, user_id, artwork_id):
+        with self._lock:
+            _discard(self._wishers, artwork_id, user_id)
+            _discard(self._wished, user_id, artwork_id)
+
+    def follow_added(self, follower_id, followed_id):
+        with self._lock:
+            self._add_follow(follower_id, followed_id)
+
+    def follow_removed(self, follower_id, followed_id):
+        with self._lock:
+            _discard(self._following, follower_id, followed_id)
+            _discard(self._followers, followed_id, follower_id)
+
+    def artwork_deleted(self, artwork_id):
+        with self._lock:
+            for user_id in self._owners.pop(artwork_id, ()):
+                _discard(self._owned, user_id, artwork_id)
+            for user_id in self._wishers.pop(artwork_id, ()):
+                _discard(self._wished, user_id, artwork_id)
+
+    def user_deleted(self, user_id, artwork_ids=()):
+        """`artwork_ids` are the user's created artworks removed by the cascade."""
+        with self._lock:
+            for artwork_id in list(self._owned.get(user_id, ())):
+                self.collection_removed(user_id, artwork_id)
+            for artwork_id in list(self._wished.get(user_id, ())):
+                self.wishlist_removed(user_id, artwork_id)
+            for followed_id in list(self._following.get(user_id, ())):
+                self.follow_removed(user_id, followed_id)
+            for follower_id in list(self._followers.get(user_id, ())):
+                self.follow_removed(follower_id, user_id)
+            for artwork_id in artwork_ids:
+                self.artwork_deleted(artwork_id)
+
+    def _add_owned(self, user_id, artwork_id):
+        _add(self._owners, artwork_id, user_id)
+        _add(self._owned, user_id, artwork_id)
+
+    def _add_wished(self, user_id, artwork_id):
+        _add(self._wishers, artwork_id, user_id)
+        _add(self._wished, user_id, artwork_id)
+
+    def _add_follow(self, follower_id, followed_id):
+        _add(self._following, follower_id, followed_id)
+        _add(self._followers, followed_id, follower_id)
+
+
+# Shared instance, initialised in create_app()
+trade_match_index = TradeMatchIndex()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: autocomplete lookups in the in-memory prefix index.
+
+Loads N synthetic usernames, warms the top-k cache for the wide prefixes, then
+reports load time and p50/p99 lookup latency per prefix length. Exits non-zero
+if the overall p99 is above --max-p99-ms. No database needed.
+
+Usage:
+    python -m server.tests.benchmark_autocomplete [--entries 50000] [--rounds 200] [--max-p99-ms 1.0]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from server.app import db  # noqa: F401 - models import db from server.app
+from server.services.autocomplete_service import PrefixIndex
+
+PREFIXES = ("u", "us", "user0", "user01", "user0123")
+RESULT_LIMIT = 8
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark autocomplete prefix lookups")
+    parser.add_argument('--entries', type=int, default=50000, help="Names in the index")
+    parser.add_argument('--rounds', type=int, default=200, help="Lookups timed per prefix")
+    parser.add_argument('--max-p99-ms', type=float, default=1.0, help="Latency budget for the overall p99")
+    args = parser.parse_args()
+
+    index = PrefixIndex()
+    started = time.perf_counter()
+    index.load([(i, f"user{i:06d}", i % 1000) for i in range(args.entries)])
+    load_seconds = time.perf_counter() - started
+
+    for prefix in PREFIXES:
+        index.search(prefix, RESULT_LIMIT)  # Warm the top-k cache for wide prefixes
+
+    timings = {prefix: [] for prefix in PREFIXES}
+    for _ in range(args.rounds):
+        for prefix in PREFIXES:
+            started = time.perf_counter()
+            index.search(prefix, RESULT_LIMIT)
+            timings[prefix].append(time.perf_counter() - started)
+
+    print(f"{len(index)} entries loaded in {load_seconds:.2f} s")
+    for prefix, samples in timings.items():
+        samples.sort()
+        print(f"  {prefix!r:12} p50 {percentile(samples, 0.50) * 1000:.3f} ms  "
+              f"p99 {percentile(samples, 0.99) * 1000:.3f} ms")
+    overall = sorted(sample for samples in timings.values() for sample in samples)
+    p99_ms = percentile(overall, 0.99) * 1000
+    print(f"Overall p99: {p99_ms:.3f} ms (budget {args.max_p99_ms:.3f} ms)")
+    return 0 if p99_ms <= args.max_p99_ms else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
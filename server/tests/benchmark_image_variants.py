@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: image variant generation over a corpus of sample images.
+
+Reports per-variant encode time and bytes saved against the original upload,
+and compares the single-decode pipeline with decoding the upload again for
+every size. No database or S3 needed.
+
+Usage:
+    python -m server.tests.benchmark_image_variants [--corpus DIR] [--rounds 3]
+
+Without --corpus, a few synthetic photos (noisy gradients, JPEG and PNG with
+alpha) are generated in memory.
+"""
+
+import os
+import io
+import sys
+import time
+import argparse
+from collections import defaultdict
+
+from PIL import Image, ImageFilter
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from server.services.image_variants import DEFAULT_VARIANT_SIZES, generate_variants
+
+SAMPLE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+
+def synthetic_corpus():
+    samples = []
+    for size, format, mode in (((4032, 3024), 'JPEG', 'RGB'), ((2048, 1536), 'JPEG', 'RGB'),
+                               ((1600, 1600), 'PNG', 'RGBA')):
+        noise = Image.effect_noise(size, 64).filter(ImageFilter.GaussianBlur(2))
+        gradient = Image.linear_gradient('L').resize(size)
+        img = Image.merge('RGB', (noise, gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+        if mode == 'RGBA':
+            img.putalpha(gradient)
+        buffer = io.BytesIO()
+        img.save(buffer, format=format, quality=92)
+        samples.append((f"synthetic_{size[0]}x{size[1]}.{format.lower()}", buffer.getvalue()))
+    return samples
+
+
+def load_corpus(directory):
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(SAMPLE_EXTENSIONS):
+            with open(os.path.join(directory, name), 'rb') as f:
+                samples.append((name, f.read()))
+    return samples
+
+
+def per_size_decode(data):
+    """The old approach: a full decode for every variant size."""
+    for max_edge in DEFAULT_VARIANT_SIZES.values():
+        img = Image.open(io.BytesIO(data))
+        img.thumbnail((max_edge, max_edge))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image variant generation")
+    parser.add_argument('--corpus', help="Directory of sample images (default: synthetic samples)")
+    parser.add_argument('--rounds', type=int, default=3, help="Times to process the corpus")
+    args = parser.parse_args()
+
+    samples = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not samples:
+        print("No sample images found")
+        return 1
+
+    encode_seconds = defaultdict(float)
+    encoded_bytes = defaultdict(int)
+    original_bytes = 0
+    pipeline_seconds = 0.0
+    for _ in range(args.rounds):
+        for _, data in samples:
+            original_bytes += len(data)
+            started = time.perf_counter()
+            variants = generate_variants(data)
+            pipeline_seconds += time.perf_counter() - started
+            for variant in variants:
+                key = (variant.name, variant.format)
+                encode_seconds[key] += variant.encode_seconds
+                encoded_bytes[key] += len(variant.data)
+
+    runs = args.rounds * len(samples)
+    print(f"{len(samples)} images, {args.rounds} rounds, originals avg {original_bytes / runs / 1024:.0f} KiB")
+    print(f"{'variant':<18} {'encode ms':>10} {'avg KiB':>9} {'saved':>7}")
+    for key in sorted(encode_seconds, key=lambda key: (-DEFAULT_VARIANT_SIZES[key[0]], key[1])):
+        avg_bytes = encoded_bytes[key] / runs
+        saved = 1 - encoded_bytes[key] / original_bytes
+        print(f"{key[0] + '.' + key[1]:<18} {encode_seconds[key] / runs * 1000:10.1f} "
+              f"{avg_bytes / 1024:9.1f} {saved:7.1%}")
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for _, data in samples:
+            per_size_decode(data)
+    baseline_seconds = time.perf_counter() - started
+    resize_seconds = pipeline_seconds - sum(encode_seconds.values())
+    print(f"Full pipeline (decode + resize + encode):  {pipeline_seconds / runs * 1000:.1f} ms/image")
+    print(f"Decode + resize, single decode:            {resize_seconds / runs * 1000:.1f} ms/image")
+    print(f"Decode + resize, one decode per size:      {baseline_seconds / runs * 1000:.1f} ms/image")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
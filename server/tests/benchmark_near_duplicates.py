@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: near-duplicate lookups in the perceptual hash index.
+
+Loads N random 64-bit hashes (plus planted near-duplicates), then reports build
+time, index size, and query latency for the multi-index tables against a
+linear scan of every hash. No database needed.
+
+Usage:
+    python -m server.tests.benchmark_near_duplicates [--hashes 1000000] [--queries 200] [--max-distance 8]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from server.services.perceptual_hash import NearDuplicateIndex
+
+PLANTED_FRACTION = 0.01
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the near-duplicate hash index")
+    parser.add_argument('--hashes', type=int, default=1000000, help="Hashes in the index")
+    parser.add_argument('--queries', type=int, default=200, help="Lookups to time")
+    parser.add_argument('--max-distance', type=int, default=8, help="Hamming radius in bits")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    entries = [(artwork_id, rng.getrandbits(64)) for artwork_id in range(args.hashes)]
+    for artwork_id in range(args.hashes, args.hashes + int(args.hashes * PLANTED_FRACTION)):
+        value = entries[rng.randrange(args.hashes)][1]
+        for bit in rng.sample(range(64), rng.randrange(args.max_distance + 1)):
+            value ^= 1 << bit
+        entries.append((artwork_id, value))
+    queries = [value for _, value in rng.sample(entries, args.queries)]
+
+    index = NearDuplicateIndex()
+    started = time.perf_counter()
+    index.load(entries)
+    build_seconds = time.perf_counter() - started
+    index_bytes = (sum(table.itemsize * len(table) for pair in index._tables for table in pair)
+                   + index._ids.itemsize * len(index._ids) + index._hashes.itemsize * len(index._hashes))
+
+    started = time.perf_counter()
+    found = sum(len(index.find(query, args.max_distance, limit=len(entries))) for query in queries)
+    index_seconds = time.perf_counter() - started
+
+    scan_queries = queries[:max(1, args.queries // 20)]
+    started = time.perf_counter()
+    for query in scan_queries:
+        [artwork_id for artwork_id, value in entries if (value ^ query).bit_count() <= args.max_distance]
+    scan_seconds = time.perf_counter() - started
+
+    print(f"{len(entries)} hashes, radius {args.max_distance} bits")
+    print(f"Build:        {build_seconds:.2f} s, {index_bytes / 1024 / 1024:.1f} MiB of arrays")
+    print(f"Index query:  {index_seconds / len(queries) * 1000:.2f} ms ({found / len(queries):.1f} matches avg)")
+    print(f"Linear scan:  {scan_seconds / len(scan_queries) * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Measures allocations and peak memory of a 100-item artwork page loaded as ORM
+entities (the old path) vs projected read-model rows (services/read_models.py).
+Runs against the database configured in DATABASE_URI, so seed some artworks first.
+
+Usage:
+    python -m server.tests.benchmark_read_models [--limit 100] [--runs 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sqlalchemy.orm import joinedload
+
+from server.app import app, db
+from server.models.artwork import Artwork
+from server.services.serializer import serialize_many, ARTWORK_CARD_FIELDS
+from server.services.read_models import artwork_cards
+
+
+def entity_page(limit):
+    artworks = Artwork.query.options(joinedload(Artwork.artist))\
+        .order_by(Artwork.created_at.desc(), Artwork.artwork_id.desc()).limit(limit).all()
+    return serialize_many(artworks, ARTWORK_CARD_FIELDS)
+
+
+def projected_page(limit):
+    cards = artwork_cards()\
+        .order_by(Artwork.created_at.desc(), Artwork.artwork_id.desc()).limit(limit).all()
+    return [card.to_dict() for card in cards]
+
+
+def measure(label, func, limit, runs):
+    func(limit)  # Warm up connection and compiled statement caches
+    db.session.remove()
+
+    blocks, peaks, elapsed = [], [], 0.0
+    for _ in range(runs):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        payload = func(limit)
+        elapsed += time.perf_counter() - started
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Blocks still alive at the end of the "request" (entities in the identity map, rows, dicts)
+        blocks.append(sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0))
+        peaks.append(peak)
+        db.session.remove()  # End of request
+
+    print(f"{label:<12} items={len(payload):<4} live blocks={sum(blocks) // runs:<7} "
+          f"peak={max(peaks) / 1024:8.1f} KiB  time={elapsed / runs * 1000:7.2f} ms")
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare entity vs projected list queries")
+    parser.add_argument('--limit', type=int, default=100, help="Page size")
+    parser.add_argument('--runs', type=int, default=20, help="Measured runs per variant")
+    args = parser.parse_args()
+
+    with app.app_context():
+        entities = measure("entities", entity_page, args.limit, args.runs)
+        projected = measure("projected", projected_page, args.limit, args.runs)
+        print(f"Same payload: {entities == projected}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+Microbenchmark: SerializerMixin.to_dict(only=...) vs the compiled serializer
+on 50-item artwork card pages (the GET /api/artworks payload).
+Also checks that both produce byte-identical JSON. No database needed.
+
+Usage:
+    python -m server.tests.benchmark_serializer [--pages 200]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from server.app import db  # noqa: F401 - models import db from server.app
+from server.models.user import User
+from server.models.artwork import Artwork
+from server.services.serializer import serialize_many, ARTWORK_CARD_FIELDS
+
+PAGE_SIZE = 50
+
+
+def build_page():
+    artists = [
+        User(user_id=i, username=f"artist_{i}", email=f"a{i}@example.com", password_hash="x", role="artist")
+        for i in range(5)
+    ]
+    return [
+        Artwork(
+            artwork_id=i, artist_id=i % 5, title=f"Artwork {i}", artist_name=f"Artist {i % 5}",
+            description="A fairly ordinary description " * 4, series="Series" if i % 2 else None,
+            image_url=f"https://example.com/{i}.png", thumbnail_url=f"https://example.com/{i}_t.png",
+            year=1900 + i, medium="Oil", rarity="common",
+            created_at=datetime(2025, 1, 1, tzinfo=timezone.utc), artist=artists[i % 5]
+        )
+        for i in range(PAGE_SIZE)
+    ]
+
+
+def timed(label, func, pages):
+    func()  # Warm up (and compile the plan)
+    started = time.perf_counter()
+    for _ in range(pages):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {elapsed / pages * 1000:8.3f} ms/page")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark artwork page serialization")
+    parser.add_argument('--pages', type=int, default=200, help="Number of 50-item pages to serialize")
+    args = parser.parse_args()
+
+    artworks = build_page()
+    reflective = lambda: [aw.to_dict(only=ARTWORK_CARD_FIELDS) for aw in artworks]
+    compiled = lambda: serialize_many(artworks, ARTWORK_CARD_FIELDS)
+
+    same = json.dumps(reflective(), sort_keys=True) == json.dumps(compiled(), sort_keys=True)
+    print(f"Byte-identical JSON: {same}")
+
+    slow = timed("to_dict(only=...)", reflective, args.pages)
+    fast = timed("compiled serializer", compiled, args.pages)
+    print(f"Speedup: {slow / fast:.1f}x")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: upload throughput through S3Storage against a local S3 stand-in
+with artificial latency and per-connection bandwidth (see s3_standin.py).
+
+Compares a single PUT with parallel multipart at several concurrency levels for
+a large original, and serial vs concurrent uploads of a set of image variants.
+No AWS needed.
+
+Usage:
+    python -m server.tests.benchmark_uploads [--size-mb 64] [--latency-ms 30] [--mbps 20]
+"""
+
+import os
+import io
+import sys
+import time
+import argparse
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from server.services.storage import S3Storage
+from server.tests.s3_standin import S3StandIn
+
+MIB = 1024 * 1024
+VARIANT_SIZES_KIB = (230, 110, 85, 45, 12, 6, 3, 2)  # Typical retina..thumbnail x jpeg/webp
+
+
+def make_storage(s3, **kwargs):
+    storage = S3Storage('bench', region='us-east-1', access_key_id='test', secret_access_key='test',
+                        endpoint_url=s3.endpoint_url, **kwargs)
+    storage.client  # Build the client outside the timed part
+    return storage
+
+
+def timed_original(s3, data, label, **kwargs):
+    storage = make_storage(s3, **kwargs)
+    started = time.perf_counter()
+    storage.save(io.BytesIO(data), 'bench/original.jpg', 'image/jpeg')
+    elapsed = time.perf_counter() - started
+    storage.shutdown()
+    print(f"{label:<32} {elapsed:7.2f} s {len(data) / MIB / elapsed:8.1f} MiB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark S3 upload throughput against a local stand-in")
+    parser.add_argument('--size-mb', type=int, default=64, help="Size of the large original")
+    parser.add_argument('--part-mb', type=int, default=8, help="Multipart part size")
+    parser.add_argument('--latency-ms', type=float, default=30, help="Added latency per request")
+    parser.add_argument('--mbps', type=float, default=20, help="Per-connection bandwidth in MiB/s")
+    args = parser.parse_args()
+
+    data = os.urandom(args.size_mb * MIB)
+    part = args.part_mb * MIB
+    with S3StandIn(latency=args.latency_ms / 1000, bytes_per_second=args.mbps * MIB) as s3:
+        print(f"Original: {args.size_mb} MiB, {args.latency_ms:.0f} ms/request, {args.mbps:.0f} MiB/s per connection")
+        timed_original(s3, data, "single PUT", multipart_threshold=len(data) + 1)
+        for concurrency in (1, 4, 10):
+            timed_original(s3, data, f"multipart {args.part_mb} MiB x {concurrency}",
+                           multipart_threshold=part, multipart_chunksize=part, max_concurrency=concurrency)
+
+        variants = [(os.urandom(kib * 1024), f"bench/variants/{n}.webp") for n, kib in enumerate(VARIANT_SIZES_KIB)]
+        storage = make_storage(s3)
+        started = time.perf_counter()
+        for body, key in variants:
+            storage.save(io.BytesIO(body), key, 'image/webp')
+        serial = time.perf_counter() - started
+        started = time.perf_counter()
+        storage.save_many([(io.BytesIO(body), key, 'image/webp') for body, key in variants])
+        concurrent = time.perf_counter() - started
+        storage.shutdown()
+        print(f"{len(variants)} variants, one at a time:   {serial * 1000:7.0f} ms")
+        print(f"{len(variants)} variants, save_many():     {concurrent * 1000:7.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,6 +8,10 @@ import sys
 import pytest
 from datetime import datetime
 
+from flask_migrate import upgrade
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
 # Add the parent directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
@@ -17,6 +21,12 @@ from server.models.user import User
 from server.models.pack_type import PackType
 from server.models.user_pack import UserPack
 from server.services.scheduler_service import ensure_daily_pack_type_exists
+from server.models.artwork import Artwork
+from server.models.collection import Collection
+from server.models.trade import Trade
+from server.models.user_follow import UserFollow
+
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../migrations'))
 
 
 @pytest.fixture
@@ -74,4 +84,128 @@ def daily_pack_type(db_session):
     """Create a daily pack type for testing."""
     with create_app().app_context():
         daily_pack = ensure_daily_pack_type_exists()
-        return daily_pack
\ No newline at end of file
+        return daily_pack
+
+
+# --- Fake db.session.execute (statement shape) ---
+
+class FakeResult:
+    """Stands in for a Result: scalars() is itself; all() and one() return the canned rows, rowcount their count."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def one(self):
+        return self.rows
+
+    @property
+    def rowcount(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeExecute:
+    """
+    Replaces db.session.execute: records every statement (and its PostgreSQL SQL)
+    and answers with the queued results in order, repeating the last one. A queued
+    exception is raised instead.
+    """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+        self.sql = []
+
+    def __call__(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        self.sql.append(str(stmt.compile(dialect=postgresql.dialect())))
+        rows = self.results.pop(0) if len(self.results) > 1 else (self.results or [None])[0]
+        if isinstance(rows, Exception):
+            raise rows
+        return FakeResult(rows)
+
+
+@pytest.fixture
+def fake_execute(monkeypatch):
+    """A FakeExecute installed as db.session.execute; queue results with fake_execute.results.append()."""
+    fake = FakeExecute()
+    monkeypatch.setattr(db.session, 'execute', fake)
+    return fake
+
+
+# --- Real PostgreSQL (query behaviour) ---
+# These tests TRUNCATE every table, so they only run against the database named by
+# TEST_DATABASE_URI, never DATABASE_URI; without it they are skipped.
+
+@pytest.fixture(scope='session')
+def pg_app():
+    """An app on TEST_DATABASE_URI with the schema migrated to head."""
+    uri = os.environ.get('TEST_DATABASE_URI')
+    if not uri:
+        pytest.skip("TEST_DATABASE_URI is not set")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('DATABASE_URI', uri)
+        test_app = create_app()
+    with test_app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+    return test_app
+
+
+@pytest.fixture
+def pg_session(pg_app):
+    """A session on the migrated test database; every table is emptied afterwards."""
+    with pg_app.app_context():
+        yield db.session
+        db.session.rollback()
+        tables = ', '.join(f'"{table.name}"' for table in db.metadata.sorted_tables)
+        db.session.execute(text(f'TRUNCATE {tables} RESTART IDENTITY CASCADE'))
+        db.session.commit()
+
+
+class RowFactory:
+    """Minimal valid users, artworks, ownerships and trades for query tests."""
+
+    def __init__(self, session):
+        self.session = session
+        self._count = 0
+
+    def _add(self, row):
+        self.session.add(row)
+        self.session.flush()
+        return row
+
+    def user(self, role='patron'):
+        self._count += 1
+        user = User(username=f"user_{self._count}", email=f"user_{self._count}@example.com", role=role)
+        user.set_password('password123')
+        return self._add(user)
+
+    def artwork(self, artist, owner=None, **fields):
+        self._count += 1
+        artwork = self._add(Artwork(artist_id=artist.user_id, title=fields.pop('title', f"Artwork {self._count}"),
+                                    image_url=fields.pop('image_url', f"https://example.com/{self._count}.jpg"),
+                                    rarity=fields.pop('rarity', 'common'), **fields))
+        if owner is not None:
+            self._add(Collection(patron_id=owner.user_id, artwork_id=artwork.artwork_id))
+        return artwork
+
+    def follow(self, follower, followed):
+        return self._add(UserFollow(patron_id=follower.user_id, artist_id=followed.user_id))
+
+    def trade(self, initiator, recipient, offered, requested, status='PENDING', **fields):
+        return self._add(Trade(initiator_id=initiator.user_id, recipient_id=recipient.user_id,
+                               offered_artwork_id=offered.artwork_id, requested_artwork_id=requested.artwork_id,
+                               status=status, **fields))
+
+
+@pytest.fixture
+def rows(pg_session):
+    return RowFactory(pg_session)
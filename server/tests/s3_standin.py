@@ -0,0 +1,186 @@
+"""
+A minimal in-process S3-compatible server for offline storage tests and benchmarks.
+
+Implements just what uploads use - PutObject, GetObject, DeleteObjects and the
+multipart calls (Create/UploadPart/Complete/Abort) - with path-style addressing, plus an
+artificial per-request latency and per-connection bandwidth so concurrency
+effects show up locally.
+
+Usage:
+    with S3StandIn(latency=0.02) as s3:
+        storage = S3Storage('bucket', region='us-east-1', endpoint_url=s3.endpoint_url,
+                            access_key_id='test', secret_access_key='test')
+"""
+
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+
+class S3StandIn:
+    def __init__(self, latency=0.0, bytes_per_second=None, fail_part=None):
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.fail_part = fail_part       # UploadPart number that always fails (403, not retried)
+        self.objects = {}                # (bucket, key) -> bytes
+        self.uploads = {}                # upload_id -> {part_number: bytes}
+        self.aborted = []                # upload_ids aborted by the client
+        self.requests = []               # (method, kind) per request, for assertions
+        self.in_flight = 0               # Requests currently being handled
+        self.max_in_flight = 0           # Most requests handled at once, for concurrency assertions
+        self.lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def endpoint_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        standin = self
+
+        class Handler(_Handler):
+            state = standin
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _read_aws_chunked(rfile):
+    """Decodes an aws-chunked body (botocore's streaming checksum encoding)."""
+    data = bytearray()
+    while True:
+        size = int(rfile.readline().split(b';')[0].strip(), 16)
+        if size == 0:
+            break
+        data += rfile.read(size)
+        rfile.readline()
+    # Trailing checksum headers, then a blank line
+    while rfile.readline().strip():
+        pass
+    return bytes(data)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    state = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        if 'aws-chunked' in self.headers.get('Content-Encoding', ''):
+            return _read_aws_chunked(self.rfile)
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length)
+
+    def _target(self):
+        parts = urlsplit(self.path)
+        bucket, _, key = parts.path.lstrip('/').partition('/')
+        return bucket, unquote(key), parse_qs(parts.query, keep_blank_values=True)
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, code):
+        body = f"<Error><Code>{code}</Code><Message>{code}</Message></Error>".encode()
+        self._reply(status, body, {'Content-Type': 'application/xml'})
+
+    def _record(self, kind, size=0):
+        delay = self.state.latency
+        if self.state.bytes_per_second:
+            delay += size / self.state.bytes_per_second
+        with self.state.lock:
+            self.state.in_flight += 1
+            self.state.max_in_flight = max(self.state.max_in_flight, self.state.in_flight)
+        time.sleep(delay)
+        with self.state.lock:
+            self.state.in_flight -= 1
+            self.state.requests.append((self.command, kind))
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        if 'uploadId' in query:
+            self._record('UploadPart', len(body))
+            number = int(query['partNumber'][0])
+            if number == self.state.fail_part:
+                return self._error(403, 'AccessDenied')
+            with self.state.lock:
+                parts = self.state.uploads.get(query['uploadId'][0])
+                if parts is None:
+                    return self._error(404, 'NoSuchUpload')
+                parts[number] = body
+        else:
+            self._record('PutObject', len(body))
+            with self.state.lock:
+                self.state.objects[(bucket, key)] = body
+        self._reply(200, headers={'ETag': f'"{uuid.uuid4().hex}"'})
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        if 'delete' in query:
+            self._record('DeleteObjects')
+            keys = [element.text for element in ElementTree.fromstring(body).iter() if element.tag.endswith('Key')]
+            with self.state.lock:
+                for deleted in keys:
+                    self.state.objects.pop((bucket, deleted), None)
+            body = '<DeleteResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/"></DeleteResult>'
+            return self._reply(200, body.encode(), {'Content-Type': 'application/xml'})
+        if 'uploads' in query:
+            self._record('CreateMultipartUpload')
+            upload_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.uploads[upload_id] = {}
+            body = (f"<InitiateMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                    f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>")
+            return self._reply(200, body.encode(), {'Content-Type': 'application/xml'})
+        if 'uploadId' in query:
+            self._record('CompleteMultipartUpload')
+            with self.state.lock:
+                parts = self.state.uploads.pop(query['uploadId'][0], None)
+                if parts is None:
+                    return self._error(404, 'NoSuchUpload')
+                self.state.objects[(bucket, key)] = b''.join(parts[n] for n in sorted(parts))
+            body = (f"<CompleteMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                    f"<ETag>\"{uuid.uuid4().hex}\"</ETag></CompleteMultipartUploadResult>")
+            return self._reply(200, body.encode(), {'Content-Type': 'application/xml'})
+        self._error(400, 'InvalidRequest')
+
+    def do_DELETE(self):
+        _, _, query = self._target()
+        if 'uploadId' not in query:
+            return self._error(400, 'InvalidRequest')
+        self._record('AbortMultipartUpload')
+        upload_id = query['uploadId'][0]
+        with self.state.lock:
+            self.state.uploads.pop(upload_id, None)
+            self.state.aborted.append(upload_id)
+        self._reply(204)
+
+    def do_GET(self):
+        bucket, key, _ = self._target()
+        self._record('GetObject')
+        with self.state.lock:
+            body = self.state.objects.get((bucket, key))
+        if body is None:
+            return self._error(404, 'NoSuchKey')
+        self._reply(200, body, {'Content-Type': 'application/octet-stream', 'ETag': '"x"'})
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+"""
+Stress test for Trade.execute_trade under contention.
+Creates groups of three users who each own one artwork and opens two trades per
+group that compete for the middle artwork from opposite sides (A asks B for y while
+B offers y to C for z - a mirrored pair could not both be pending), then accepts them
+all from a thread pool at once. Reports accept throughput and checks that exactly
+one trade per group succeeded and every artwork still has one owner.
+Runs against the database configured in DATABASE_URI; test rows are removed afterwards.
+
+Usage:
+    python -m server.tests.stress_trade_execution [--groups 50] [--threads 16]
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from server.app import app, db
+from server.models.user import User
+from server.models.artwork import Artwork
+from server.models.collection import Collection
+from server.models.trade import Trade
+
+
+def seed(groups):
+    """Returns (user_ids, artwork_ids, trade_ids_by_group)."""
+    tag = uuid.uuid4().hex[:8]
+    users = []
+    for i in range(groups * 3):
+        user = User(username=f"stress_{tag}_{i}", email=f"stress_{tag}_{i}@example.com", role='patron')
+        user.set_password('password123')
+        users.append(user)
+    db.session.add_all(users)
+    db.session.flush()
+
+    artworks = [
+        Artwork(title=f"Stress {tag} {i}", image_url="https://example.com/s.png", rarity='common',
+                artist_id=user.user_id)
+        for i, user in enumerate(users)
+    ]
+    db.session.add_all(artworks)
+    db.session.flush()
+    db.session.add_all(Collection(patron_id=u.user_id, artwork_id=a.artwork_id) for u, a in zip(users, artworks))
+
+    trades_by_group = []
+    for i in range(groups):
+        a, b, c = users[3 * i:3 * i + 3]
+        x, y, z = artworks[3 * i:3 * i + 3]
+        group_trades = [
+            Trade(initiator_id=a.user_id, recipient_id=b.user_id, offered_artwork_id=x.artwork_id,
+                  requested_artwork_id=y.artwork_id, status='PENDING'),
+            Trade(initiator_id=b.user_id, recipient_id=c.user_id, offered_artwork_id=y.artwork_id,
+                  requested_artwork_id=z.artwork_id, status='PENDING'),
+        ]
+        db.session.add_all(group_trades)
+        trades_by_group.append(group_trades)
+    db.session.commit()
+
+    return ([u.user_id for u in users], [a.artwork_id for a in artworks],
+            [[t.trade_id for t in group] for group in trades_by_group])
+
+
+def accept(trade_id):
+    with app.app_context():
+        try:
+            return Trade.execute_trade(trade_id)
+        finally:
+            db.session.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent trade acceptance stress test")
+    parser.add_argument('--groups', type=int, default=50, help="Number of user groups with competing trades")
+    parser.add_argument('--threads', type=int, default=16, help="Concurrent acceptors")
+    args = parser.parse_args()
+
+    with app.app_context():
+        user_ids, artwork_ids, trades_by_group = seed(args.groups)
+
+    trade_ids = [trade_id for group in trades_by_group for trade_id in group]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = dict(zip(trade_ids, pool.map(accept, trade_ids)))
+    elapsed = time.perf_counter() - started
+
+    outcomes = Counter(message for _, message in results.values())
+    print(f"Accepted {len(trade_ids)} trades with {args.threads} threads in {elapsed:.2f}s "
+          f"({len(trade_ids) / elapsed:.1f} accepts/s)")
+    for message, count in outcomes.most_common():
+        print(f"  {count:5d}  {message}")
+
+    with app.app_context():
+        try:
+            bad_groups = [group for group in trades_by_group if sum(results[t][0] for t in group) != 1]
+            owners = Counter(row.artwork_id for row in Collection.query.filter(Collection.artwork_id.in_(artwork_ids)))
+            lost = [artwork_id for artwork_id in artwork_ids if owners[artwork_id] != 1]
+            print(f"Groups without exactly one accepted trade: {len(bad_groups)}")
+            print(f"Artworks without exactly one owner: {len(lost)}")
+        finally:
+            # Deleting the users cascades to their artworks, collections and trades
+            User.query.filter(User.user_id.in_(user_ids)).delete(synchronize_session=False)
+            db.session.commit()
+
+    return 0 if not bad_groups and not lost else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Tests for the in-memory autocomplete prefix index.
+"""
+
+import time
+
+from server.services.autocomplete_service import PrefixIndex, AutocompleteIndex, normalize, SCAN_LIMIT
+
+
+def test_normalize_strips_case_accents_and_punctuation():
+    assert normalize("  Café   Nights!! ") == "cafe nights"
+    assert normalize("Starry-Night") == "starry night"
+    assert normalize(None) == ""
+
+
+def test_prefix_search_ranks_by_popularity():
+    index = PrefixIndex()
+    index.load([(1, "Starry Night", 3), (2, "Starlight", 10), (3, "Sunflowers", 50)])
+
+    results = index.search("star", 5)
+    assert [entry_id for entry_id, _, _ in results] == [2, 1]
+
+    # Later words are indexed too
+    assert [entry_id for entry_id, _, _ in index.search("night", 5)] == [1]
+
+
+def test_incremental_updates():
+    index = PrefixIndex()
+    index.load([(1, "alice", 1), (2, "alfred", 2)])
+
+    index.upsert(3, "alina")
+    assert {entry_id for entry_id, _, _ in index.search("ali", 5)} == {1, 3}
+
+    # Renames keep the score and drop the old keys
+    index.upsert(1, "zelda")
+    assert [entry_id for entry_id, _, _ in index.search("ali", 5)] == [3]
+    assert index.search("zel", 5) == [(1, "zelda", 1)]
+
+    index.adjust_score(3, 5)
+    assert index.search("al", 5)[0][0] == 3
+
+    index.remove(3)
+    assert [entry_id for entry_id, _, _ in index.search("al", 5)] == [2]
+
+
+def test_memory_cap_keeps_most_popular():
+    index = PrefixIndex(max_entries=2)
+    index.load([(1, "one", 1), (2, "two", 2), (3, "three", 3)])
+    assert len(index) == 2
+    assert index.search("one", 5) == []
+
+    # A new entry only displaces a less popular one
+    index.upsert(4, "four", score=0)
+    assert index.search("four", 5) == []
+    index.upsert(5, "five", score=9)
+    assert index.search("five", 5) == [(5, "five", 9)]
+    assert len(index) == 2
+
+
+def test_wide_prefix_uses_cache_and_is_invalidated():
+    index = PrefixIndex()
+    index.load([(i, f"artwork {i}", i % 97) for i in range(SCAN_LIMIT * 3)])
+
+    first = index.search("a", 3)
+    assert index.search("a", 3) == first
+
+    index.upsert(10 ** 6, "aaa best", score=1000)
+    assert index.search("a", 1)[0][0] == 10 ** 6
+
+
+def test_series_counts_follow_artwork_writes():
+    autocomplete = AutocompleteIndex()
+    autocomplete.built_at = time.time()  # Skip the database build
+
+    autocomplete.artwork_saved(1, "Dawn", series="Seasons", is_new=True)
+    autocomplete.artwork_saved(2, "Dusk", series="seasons", is_new=True)
+    assert autocomplete.suggest("sea", kinds=("series",))["series"][0]["score"] == 2
+
+    autocomplete.artwork_saved(2, "Dusk", series="Tides", previous_series="seasons")
+    assert autocomplete.suggest("sea", kinds=("series",))["series"][0]["score"] == 1
+
+    autocomplete.artwork_deleted(1, "Seasons")
+    assert autocomplete.suggest("sea", kinds=("series",))["series"] == []
+    assert autocomplete.suggest("du", kinds=("artworks",))["artworks"][0]["id"] == 2
+
+
+def test_large_index_returns_the_most_popular_matches():
+    # Lookup latency at this size is measured by benchmark_autocomplete.py
+    index = PrefixIndex()
+    index.load([(i, f"user{i:06d}", i % 1000) for i in range(50000)])
+
+    assert [score for _, _, score in index.search("u", 8)] == [999] * 8
+    assert index.search("u", 8) == index.search("u", 8)  # From the top-k cache
+    assert [entry_id for entry_id, _, _ in index.search("user0123", 3)] == [12399, 12398, 12397]
@@ -0,0 +1,58 @@
+"""
+Tests for the bounded worker pool used for upload post-processing.
+"""
+
+import threading
+
+from flask import current_app
+
+from server.app import app
+from server.services.background_jobs import BoundedWorkerPool
+
+
+def _pool(workers=1, queue_depth=1):
+    pool = BoundedWorkerPool('test')
+    pool.init_app(app, workers=workers, queue_depth=queue_depth)
+    return pool
+
+
+def test_refuses_work_beyond_workers_plus_queue_depth():
+    pool = _pool(workers=1, queue_depth=1)
+    release = threading.Event()
+    try:
+        assert pool.try_submit(release.wait)
+        assert pool.try_submit(release.wait)
+        assert not pool.has_capacity()
+        assert not pool.try_submit(release.wait)
+        assert pool.stats()['in_flight'] == 2
+    finally:
+        release.set()
+        pool.shutdown()
+    assert pool.stats()['in_flight'] == 0
+    assert pool.has_capacity()
+
+
+def test_failed_task_releases_its_slot():
+    pool = _pool(workers=1, queue_depth=0)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    assert pool.try_submit(fail)
+    pool.shutdown()
+    assert pool.stats()['in_flight'] == 0
+    assert pool.try_submit(lambda: None)
+    pool.shutdown()
+
+
+def test_tasks_run_inside_an_app_context():
+    pool = _pool()
+    seen = []
+    assert pool.try_submit(lambda: seen.append(current_app.name))
+    pool.shutdown()
+    assert seen == [app.name]
+
+
+def test_configured_from_app_config():
+    assert app.config['THUMBNAIL_WORKERS'] >= 1
+    assert app.config['THUMBNAIL_QUEUE_DEPTH'] >= 0
@@ -0,0 +1,132 @@
+"""
+Tests for palette extraction, the colour similarity index and the palette backfill worker.
+"""
+
+import io
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pytest
+from PIL import Image, ImageDraw
+
+from server.services.color_palette import (
+    ColorIndex, extract_palette, parse_hex_color, rgb_to_lab, MIN_INDEXED_WEIGHT
+)
+from server.services.image_backfill import _image_source, analyze_artwork_image
+from server.services.storage import LocalStorage
+
+
+def _quarters():
+    # Half red, a quarter blue, a quarter near-white
+    img = Image.new('RGB', (800, 600), (250, 10, 10))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, 399, 299), fill=(10, 10, 250))
+    draw.rectangle((400, 300, 799, 599), fill=(240, 240, 240))
+    return img
+
+
+def test_palette_is_dominant_colours_by_share():
+    palette = extract_palette(_quarters())
+    assert [entry["weight"] for entry in palette] == pytest.approx([0.5, 0.25, 0.25], abs=0.02)
+    red, *others = (parse_hex_color(entry["color"]) for entry in palette)
+    assert math.dist(red, (250, 10, 10)) < 16
+    # Blue and white have equal shares, so either may come first
+    for color, expected in zip(sorted(others, key=sum), [(10, 10, 250), (240, 240, 240)]):
+        assert math.dist(color, expected) < 16
+
+
+def test_transparent_pixels_do_not_count():
+    img = _quarters().convert('RGBA')
+    img.putalpha(Image.new('L', img.size, 0))
+    ImageDraw.Draw(img).rectangle((0, 0, 399, 299), fill=(10, 10, 250, 255))
+    palette = extract_palette(img)
+    assert len(palette) == 1 and palette[0]["weight"] == 1.0
+    assert extract_palette(Image.new('RGBA', (50, 50), (0, 0, 0, 0))) == []
+
+
+def test_parse_hex_color_accepts_favorite_color_formats():
+    assert parse_hex_color('#F50801') == (245, 8, 1)
+    assert parse_hex_color('#f50') == (255, 85, 0)
+    assert parse_hex_color('#F50801FF') == (245, 8, 1)
+    for bad in ('F50801', '#F508', 'red', None, '#GG0000'):
+        with pytest.raises(ValueError):
+            parse_hex_color(bad)
+
+
+def test_lab_reference_values():
+    assert rgb_to_lab((255, 255, 255)) == pytest.approx((100, 0, 0), abs=0.01)
+    assert rgb_to_lab((255, 0, 0)) == pytest.approx((53.24, 80.09, 67.20), abs=0.01)
+
+
+def _random_palette(rng):
+    weights = sorted((rng.random() for _ in range(rng.randint(1, 5))), reverse=True)
+    total = sum(weights)
+    return [{"color": '#%06x' % rng.getrandbits(24), "weight": round(weight / total, 3)} for weight in weights]
+
+
+def _brute_force(palettes, rgb, limit, max_distance):
+    query = rgb_to_lab(rgb)
+    best = {}
+    for artwork_id, palette in palettes.items():
+        for entry in palette:
+            if entry["weight"] < MIN_INDEXED_WEIGHT:
+                continue
+            distance = math.dist(query, rgb_to_lab(parse_hex_color(entry["color"])))
+            if distance <= max_distance:
+                best[artwork_id] = min(best.get(artwork_id, math.inf), distance)
+    return sorted(best.items(), key=lambda item: (item[1], item[0]))[:limit]
+
+
+def _built_index(palettes):
+    index = ColorIndex()
+    for artwork_id, palette in palettes.items():
+        index.artwork_saved(artwork_id, palette)
+    index.built_at = 1  # Skip the database build
+    return index
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(3)
+    palettes = {artwork_id: _random_palette(rng) for artwork_id in range(1, 3001)}
+    index = _built_index(palettes)
+    for _ in range(40):
+        rgb = tuple(rng.randrange(256) for _ in range(3))
+        for limit, max_distance in ((5, 40), (50, 15), (24, 100)):
+            found = index.search(rgb, limit=limit, max_distance=max_distance)
+            expected = _brute_force(palettes, rgb, limit, max_distance)
+            # Lab values are stored as float32, so ids of exact ties may swap; compare distances
+            assert [d for _, d, _ in found] == pytest.approx([d for _, d in expected], abs=1e-3)
+
+
+def test_deleted_artworks_leave_the_index():
+    palettes = {1: [{"color": "#ff0000", "weight": 0.9}], 2: [{"color": "#fe0101", "weight": 0.6}]}
+    index = _built_index(palettes)
+    assert [artwork_id for artwork_id, _, _ in index.search((255, 0, 0))] == [1, 2]
+    index.artwork_deleted(1, palettes[1])
+    assert [(artwork_id, weight) for artwork_id, _, weight in index.search((255, 0, 0))] == [(2, 0.6)]
+    # Minor colours are never searchable
+    index.artwork_saved(3, [{"color": "#ff0000", "weight": 0.05}])
+    assert [artwork_id for artwork_id, _, _ in index.search((255, 0, 0))] == [2]
+
+
+def test_backfill_worker_reads_local_files_in_a_spawned_process(tmp_path):
+    storage = LocalStorage(str(tmp_path), '/api/files')
+    buffer = io.BytesIO()
+    _quarters().save(buffer, format='PNG')
+    storage.save(io.BytesIO(buffer.getvalue()), 'artworks/a/original.png', 'image/png')
+
+    source = _image_source(storage, '/api/files/artworks/a/original.png')
+    assert source == ('path', storage.path_for('artworks/a/original.png'))
+    assert _image_source(storage, 'https://bucket.s3.amazonaws.com/x.png') == ('url', 'https://bucket.s3.amazonaws.com/x.png')
+    assert _image_source(storage, 'data:image/png;base64,xx') is None
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        results = list(pool.map(analyze_artwork_image, [(7, source), (8, ('path', str(tmp_path / 'missing.png')))]))
+    (artwork_id, values, error), (missing_id, missing_values, missing_error) = results
+    assert artwork_id == 7 and error is None
+    assert values["palette"][0]["weight"] == pytest.approx(0.5, abs=0.02)
+    assert (values["width"], values["height"]) == (800, 600)
+    assert values["placeholder"].startswith("data:image/webp;base64,")
+    assert missing_id == 8 and missing_values is None and missing_error
@@ -0,0 +1,268 @@
+"""
+Tests for server-side decal compositing, its disk LRU cache and the render route.
+"""
+
+import base64
+import io
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+from flask_jwt_extended import create_access_token
+
+from server.app import app
+from server.extensions import db
+from server.services import auth_helper
+from server.services.decal_renderer import Decal, DecalError, DecalRenderer, DECAL_RENDER_SIZES
+from server.services.disk_cache import DiskLRUCache
+from server.services.storage import LocalStorage
+from server.services import decal_renderer as decal_module
+
+
+def _png_uri(size, color):
+    buffer = io.BytesIO()
+    Image.new('RGBA', size, color).save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+# 20x30 viewBox: a red square at (5, 5)-(10, 10), a blue bar reused from <defs> along the bottom edge
+DECAL_SVG = f"""<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" viewBox="0 0 20 30">
+  <defs><style></style><image id="bar" width="48" height="8" xlink:href="{_png_uri((48, 8), (0, 0, 255, 255))}"/></defs>
+  <image width="10" height="10" transform="translate(5 5) scale(.5)" xlink:href="{_png_uri((10, 10), (255, 0, 0, 255))}"/>
+  <use transform="translate(-2 26) scale(.5)" xlink:href="#bar"/>
+</svg>""".encode('utf-8')
+
+
+def test_disk_cache_evicts_least_recently_used_by_size(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=250, suffix='.webp')
+    for key in ('a', 'b'):
+        cache.put(key, b'x' * 100)
+    assert cache.get('a')  # 'b' is now the oldest
+    cache.put('c', b'x' * 100)
+
+    assert 'b' not in cache and cache.get('b') is None
+    assert cache.get('a') and cache.get('c')
+    assert cache.total_bytes == 200 and cache.evictions == 1
+    assert sorted(name.endswith('.webp') for name in os.listdir(tmp_path)) == [True, True]
+
+    assert cache.delete('a') and not cache.delete('a')
+    assert len(cache) == 1 and cache.total_bytes == 100
+
+
+def test_disk_cache_recovers_order_and_size_on_restart(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=1000)
+    cache.put('old', b'x' * 100)
+    cache.put('new', b'x' * 100)
+    past = time.time() - 60
+    os.utime(cache.get('old'), (past, past))
+    (tmp_path / '.tmp-crashed').write_bytes(b'partial')
+
+    reopened = DiskLRUCache(tmp_path, max_bytes=150)
+    assert reopened.get('old') is None and reopened.get('new')
+    assert reopened.total_bytes == 100
+    assert not (tmp_path / '.tmp-crashed').exists()
+
+
+def test_decal_layers_are_placed_like_the_browser():
+    decal = Decal.parse(DECAL_SVG)
+    assert decal.output_size(60) == (40, 60)
+    overlay = decal.rasterize((40, 60))  # 2 px per viewBox unit
+
+    assert overlay.getpixel((15, 15)) == (255, 0, 0, 255)
+    assert overlay.getpixel((9, 9))[3] == 0 and overlay.getpixel((21, 21))[3] == 0
+    # The bar starts off-canvas at x = -4 px and is clipped
+    assert overlay.getpixel((0, 55)) == (0, 0, 255, 255)
+    assert overlay.getpixel((43 - 4, 55)) == (0, 0, 255, 255)
+    assert overlay.getpixel((20, 50))[3] == 0
+
+
+def test_wider_viewports_centre_the_decal():
+    overlay = Decal.parse(DECAL_SVG).rasterize((80, 60))  # 2 px per unit, 20 px margins
+    assert overlay.getpixel((35, 15)) == (255, 0, 0, 255)
+    assert overlay.getpixel((15, 15))[3] == 0
+
+
+@pytest.mark.parametrize('body', [
+    '<path d="M0 0h10v10z"/>',
+    f'<image width="10" height="10" transform="rotate(45)" xlink:href="{_png_uri((10, 10), (0, 0, 0, 255))}"/>',
+    '<image width="10" height="10" xlink:href="decal.png"/>',
+    '<use xlink:href="#missing"/>',
+])
+def test_unsupported_svg_is_rejected(body):
+    svg = ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+           f'viewBox="0 0 20 30">{body}</svg>')
+    with pytest.raises(DecalError):
+        Decal.parse(svg)
+
+
+def test_shipped_decals_parse():
+    renderer = DecalRenderer()
+    renderer.decal_dir = app.config['DECAL_DIR']
+    names = [name[:-4] for name in os.listdir(renderer.decal_dir) if name.endswith('.svg')]
+    assert names
+    for name in names:
+        assert renderer.decal(name).layers
+    with pytest.raises(DecalError):
+        renderer.decal('../../secrets')
+
+
+@pytest.fixture
+def render_env(tmp_path, monkeypatch):
+    decals = tmp_path / 'decals'
+    decals.mkdir()
+    (decals / 'frame.svg').write_bytes(DECAL_SVG)
+    (decals / 'other.svg').write_bytes(DECAL_SVG)
+    storage = LocalStorage(tmp_path / 'files', 'http://testserver/api/files')
+    buffer = io.BytesIO()
+    Image.new('RGB', (480, 320), (0, 200, 0)).save(buffer, format='WEBP', lossless=True)
+    url = storage.save(io.BytesIO(buffer.getvalue()), 'artworks/a/card.webp', 'image/webp')
+
+    renderer = DecalRenderer()
+    monkeypatch.setitem(app.config, 'DECAL_DIR', str(decals))
+    monkeypatch.setitem(app.config, 'DECAL_RENDER_CACHE_DIR', str(tmp_path / 'renders'))
+    renderer.init_app(app)
+    monkeypatch.setattr(decal_module, 'decal_renderer', renderer)
+    monkeypatch.setitem(app.extensions, 'storage', storage)
+    artwork = SimpleNamespace(
+        artwork_id=7, image_url='http://testserver/api/files/artworks/a/original.png', thumbnail_url=None,
+        image_variants={'card': {'width': 480, 'height': 320, 'webp': url}}, border_decal_id='frame',
+    )
+    with app.app_context():
+        yield renderer, artwork
+
+
+def test_render_composites_caches_and_invalidates(render_env):
+    renderer, artwork = render_env
+    key, path, hit = renderer.render(artwork, 'card')
+    assert not hit
+    render = Image.open(path)
+    assert render.format == 'WEBP' and render.size == (320, 480)
+    red, green = render.getpixel((120, 120)), render.getpixel((160, 240))
+    assert red[0] > 200 and red[1] < 60
+    assert green[1] > 150 and green[0] < 60
+
+    assert renderer.render(artwork, 'card') == (key, path, True)
+    stats = renderer.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+    assert stats["render_ms"]["samples"] == 1 and stats["cache_bytes"] == os.path.getsize(path)
+
+    assert renderer.invalidate(artwork.image_url, 'frame') == 1
+    assert not os.path.exists(path)
+    assert renderer.render(artwork, 'card')[2] is False
+
+
+def test_editing_a_decal_changes_its_version_and_renders(render_env, tmp_path):
+    renderer, artwork = render_env
+    version = renderer.version('frame')
+    key, path, _ = renderer.render(artwork, 'card')
+    assert Image.open(path).getpixel((120, 120))[0] > 200  # Red square
+
+    svg = tmp_path / 'decals' / 'frame.svg'
+    svg.write_bytes(DECAL_SVG.replace(_png_uri((10, 10), (255, 0, 0, 255)).encode(),
+                                      _png_uri((10, 10), (0, 0, 255, 255)).encode()))
+    os.utime(svg, ns=(0, 0))  # A distinct mtime even on coarse-grained filesystems
+
+    assert renderer.version('frame') != version
+    new_key, new_path, hit = renderer.render(artwork, 'card')
+    assert new_key != key and not hit
+    blue = Image.open(new_path).getpixel((120, 120))
+    assert blue[2] > 200 and blue[0] < 60
+
+
+def test_images_outside_storage_are_never_fetched(render_env, monkeypatch):
+    renderer, artwork = render_env
+    remote = SimpleNamespace(artwork_id=8, image_url='http://169.254.169.254/latest/meta-data', thumbnail_url=None,
+                             image_variants=None, border_decal_id='frame')
+    monkeypatch.setattr('urllib.request.urlopen', lambda *args, **kwargs: pytest.fail("fetched a remote URL"))
+    with pytest.raises(DecalError):
+        renderer.render(remote, 'card')
+    assert renderer.stats()["failures"] == 1
+
+
+class _Query:
+    def __init__(self, artwork):
+        self.artwork = artwork
+
+    def options(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.artwork
+
+
+def test_route_serves_immutable_webp_for_the_current_decal(render_env, monkeypatch):
+    renderer, artwork = render_env
+    monkeypatch.setattr(db.session, 'query', lambda *args: _Query(artwork))
+    from server.routes import artworks
+    monkeypatch.setattr(artworks, 'decal_renderer', renderer)
+    client = app.test_client()
+
+    moved = client.get('/api/artworks/7/decal/frame/thumbnail')
+    assert moved.status_code == 302 and 'immutable' not in moved.headers['Cache-Control']
+    url = moved.headers['Location']
+    assert url.endswith(f"/api/artworks/7/decal/frame/thumbnail?v={renderer.version('frame')}")
+
+    response = client.get(url)
+    assert response.status_code == 200 and response.mimetype == 'image/webp'
+    assert response.headers['X-Render-Cache'] == 'miss'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert Image.open(io.BytesIO(response.data)).size == (167, 250)
+    etag = response.headers['ETag']
+
+    again = client.get(url, headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.headers['X-Render-Cache'] == 'hit'
+    assert client.get('/api/artworks/7/decal/frame/thumbnail?v=outdated').headers['Location'] == url
+
+    # Evicted by another request between the render lookup and opening the file
+    real_get = renderer.cache.get
+
+    def get_then_evict(key):
+        path = real_get(key)
+        if path is not None:
+            renderer.cache.delete(key)
+        return path
+
+    monkeypatch.setattr(renderer.cache, 'get', get_then_evict)
+    evicted = client.get(url)
+    assert evicted.status_code == 200 and evicted.headers['X-Render-Cache'] == 'miss'
+    assert evicted.data == response.data
+    monkeypatch.setattr(renderer.cache, 'get', real_get)
+
+    # A URL for a decal the artwork no longer uses, or an unknown size
+    assert client.get('/api/artworks/7/decal/other/thumbnail').status_code == 404
+    assert client.get('/api/artworks/7/decal/frame/huge').status_code == 400
+    assert set(DECAL_RENDER_SIZES) == {'thumbnail', 'card', 'detail'}
+
+
+class _FakeUserModel:
+    class query:
+        @staticmethod
+        def get(user_id):
+            return SimpleNamespace(user_id=int(user_id), role={1: 'admin', 2: 'artist'}.get(int(user_id)))
+
+
+def test_stats_route_is_admin_only(render_env, monkeypatch):
+    renderer, _ = render_env
+    from server.routes import artworks
+    monkeypatch.setattr(artworks, 'decal_renderer', renderer)
+    monkeypatch.setattr(auth_helper, 'User', _FakeUserModel)
+    # Both JWT user_lookup_loaders (app.py and routes/auth.py) load the user eagerly
+    monkeypatch.setattr(sys.modules['server.app'], 'User', _FakeUserModel)
+    monkeypatch.setattr(sys.modules['server.routes.auth'], 'User', _FakeUserModel)
+    client = app.test_client()
+
+    def get_stats(user_id=None):
+        headers = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'} if user_id else {}
+        return client.get('/api/artworks/decal-renders/stats', headers=headers)
+
+    assert get_stats().status_code == 401
+    assert get_stats(2).status_code == 403
+    response = get_stats(1)
+    assert response.status_code == 200 and response.get_json()["hits"] == 0
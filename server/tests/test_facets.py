@@ -0,0 +1,126 @@
+"""
+Tests for artwork listing filters and the single-query facet counts.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+from werkzeug.datastructures import MultiDict
+
+from server.app import app
+from server.extensions import db
+from server.models.artwork import Artwork
+from server.services.facet_service import (
+    apply_artwork_filters, get_artwork_facets, invalidate_facet_cache, parse_artwork_filters
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_facet_cache():
+    invalidate_facet_cache()
+    yield
+    invalidate_facet_cache()
+
+
+def test_filters_are_normalized():
+    filters, errors = parse_artwork_filters(MultiDict({
+        'rarity': ' Rare,common,,RARE ', 'medium': ' Oil ', 'series': '', 'artist_id': '7',
+        'year_min': '1990', 'year_max': ' ', 'unknown': 'x',
+    }))
+    assert errors == {}
+    assert filters == {'rarity': ('common', 'rare'), 'medium': 'Oil', 'artist_id': 7, 'year_min': 1990}
+
+
+def test_only_the_first_value_of_a_repeated_param_counts():
+    # Multiple rarities are comma separated, not repeated params
+    filters, _ = parse_artwork_filters(MultiDict([('rarity', 'epic'), ('rarity', 'rare'), ('medium', 'Ink')]))
+    assert filters == {'rarity': ('epic',), 'medium': 'Ink'}
+
+
+@pytest.mark.parametrize('args, field', [
+    ({'rarity': 'rare,shiny'}, 'rarity'),
+    ({'artist_id': 'seven'}, 'artist_id'),
+    ({'year_min': '19.5'}, 'year_min'),
+    ({'year_max': '2000s'}, 'year_max'),
+])
+def test_invalid_values_are_reported(args, field):
+    filters, errors = parse_artwork_filters(MultiDict(args))
+    assert list(errors) == [field] and field not in filters
+
+
+def test_inverted_year_range_is_reported():
+    _, errors = parse_artwork_filters(MultiDict({'year_min': '2001', 'year_max': '2000'}))
+    assert errors == {'year_min': "year_min cannot be greater than year_max."}
+
+
+def test_invalid_rarity_names_only_the_bad_values():
+    _, errors = parse_artwork_filters(MultiDict({'rarity': 'rare,shiny,glossy'}))
+    assert errors['rarity'].startswith('Invalid rarity value(s): glossy, shiny.')
+
+
+def test_year_range_is_inclusive_and_may_be_a_single_year():
+    filters, errors = parse_artwork_filters(MultiDict({'year_min': '2000', 'year_max': '2000'}))
+    assert errors == {}
+    with app.app_context():
+        sql = str(apply_artwork_filters(db.session.query(Artwork.artwork_id), filters).statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    assert 'artworks.year >= 2000' in sql and 'artworks.year <= 2000' in sql
+
+
+def test_facets_come_from_one_grouping_sets_query(monkeypatch):
+    statements = []
+    rows = [
+        SimpleNamespace(by_rarity=0, by_medium=1, by_decade=1, rarity='rare', medium=None, decade=None, total=2),
+        SimpleNamespace(by_rarity=0, by_medium=1, by_decade=1, rarity='common', medium=None, decade=None, total=5),
+        SimpleNamespace(by_rarity=1, by_medium=0, by_decade=1, rarity=None, medium='Oil', decade=None, total=7),
+        SimpleNamespace(by_rarity=1, by_medium=1, by_decade=0, rarity=None, medium=None, decade=1990, total=3),
+        SimpleNamespace(by_rarity=1, by_medium=1, by_decade=0, rarity=None, medium=None, decade=2000, total=3),
+    ]
+
+    def all(query):
+        statements.append(query.statement)
+        return rows
+
+    monkeypatch.setattr(Query, 'all', all)
+    with app.app_context():
+        facets = get_artwork_facets({'rarity': ('common', 'rare')})
+        assert get_artwork_facets({'rarity': ('common', 'rare')}) == facets  # Cached
+        get_artwork_facets({'rarity': ('rare',), 'year_min': 1990})
+        get_artwork_facets({'rarity': ('rare',), 'year_min': 1990})  # Two filters: not cached
+
+    assert facets == {
+        "rarity": [{"value": "common", "count": 5}, {"value": "rare", "count": 2}],
+        "medium": [{"value": "Oil", "count": 7}],
+        "decade": [{"value": 1990, "count": 3}, {"value": 2000, "count": 3}],
+    }
+    assert len(statements) == 3
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert 'GROUPING SETS(artworks.rarity, artworks.medium' in sql
+    assert 'artworks.rarity IN' in sql
+
+
+def test_facet_cache_is_dropped_on_invalidate(monkeypatch):
+    calls = []
+    monkeypatch.setattr(Query, 'all', lambda query: calls.append(query) or [])
+    with app.app_context():
+        get_artwork_facets({})
+        invalidate_facet_cache()
+        get_artwork_facets({})
+    assert len(calls) == 2
+
+
+def test_facet_counts_match_the_database(rows):
+    artist = rows.user('artist')
+    for rarity, medium, year in (('rare', 'Oil', 1994), ('rare', 'Ink', 2003), ('common', 'Oil', 1999),
+                                 ('epic', None, None)):
+        rows.artwork(artist, rarity=rarity, medium=medium, year=year)
+    db.session.commit()
+
+    facets = get_artwork_facets({'rarity': ('common', 'rare')})
+    assert facets == {
+        "rarity": [{"value": "rare", "count": 2}, {"value": "common", "count": 1}],
+        "medium": [{"value": "Oil", "count": 2}, {"value": "Ink", "count": 1}],
+        "decade": [{"value": 1990, "count": 2}, {"value": 2000, "count": 1}],
+    }
@@ -0,0 +1,146 @@
+"""
+Tests for the on-demand resize route: caching, memory-mapped ETag/Range responses
+and coalescing of concurrent renders.
+"""
+
+import io
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from server.app import app
+from server.routes import images
+from server.services import image_resizer as resizer_module
+from server.services.image_resizer import ImageResizer, quantize_edge, MAX_RESIZE_EDGE
+from server.services.storage import LocalStorage
+
+
+@pytest.fixture
+def resize_env(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path / 'files', 'http://testserver/api/files')
+    buffer = io.BytesIO()
+    Image.new('RGB', (1600, 1200), (20, 90, 160)).save(buffer, format='JPEG')
+    storage.save(io.BytesIO(buffer.getvalue()), 'artworks/a/original.jpg', 'image/jpeg')
+    (tmp_path / 'files' / 'notes.txt').write_bytes(b'not an image')
+
+    resizer = ImageResizer()
+    monkeypatch.setitem(app.config, 'IMAGE_CACHE_DIR', str(tmp_path / 'cache'))
+    resizer.init_app(app)
+    monkeypatch.setattr(images, 'image_resizer', resizer)
+    monkeypatch.setitem(app.extensions, 'storage', storage)
+    return resizer, app.test_client()
+
+
+def test_resizes_and_serves_from_cache(resize_env):
+    resizer, client = resize_env
+    response = client.get('/api/img/artworks/a/original.jpg?w=400')
+    assert response.status_code == 200 and response.mimetype == 'image/webp'
+    assert response.headers['X-Image-Cache'] == 'miss'
+    assert Image.open(io.BytesIO(response.data)).size == (400, 300)
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+    again = client.get('/api/img/artworks/a/original.jpg?w=400')
+    assert again.headers['X-Image-Cache'] == 'hit' and again.data == response.data
+    jpeg = client.get('/api/img/artworks/a/original.jpg?w=400&h=100&fmt=jpeg')
+    assert jpeg.mimetype == 'image/jpeg' and Image.open(io.BytesIO(jpeg.data)).size == (133, 100)
+    assert resizer.renders == 2 and len(resizer.cache) == 2
+
+
+def test_etag_and_range_requests(resize_env):
+    _, client = resize_env
+    full = client.get('/api/img/artworks/a/original.jpg?h=240')
+    etag = full.headers['ETag']
+
+    assert client.get('/api/img/artworks/a/original.jpg?h=240', headers={'If-None-Match': etag}).status_code == 304
+
+    partial = client.get('/api/img/artworks/a/original.jpg?h=240', headers={'Range': 'bytes=10-99'})
+    assert partial.status_code == 206 and partial.data == full.data[10:100]
+    assert partial.headers['Content-Range'] == f"bytes 10-99/{len(full.data)}"
+    tail = client.get('/api/img/artworks/a/original.jpg?h=240', headers={'Range': 'bytes=-50'})
+    assert tail.data == full.data[-50:]
+
+    beyond = client.get('/api/img/artworks/a/original.jpg?h=240', headers={'Range': f'bytes={len(full.data)}-'})
+    assert beyond.status_code == 416
+
+
+def test_concurrent_requests_render_once(resize_env, monkeypatch):
+    resizer, _ = resize_env
+    calls = []
+    real_resize = resizer_module.resize_image
+
+    def slow_resize(*args):
+        calls.append(args[1:])
+        time.sleep(0.2)
+        return real_resize(*args)
+
+    monkeypatch.setattr(resizer_module, 'resize_image', slow_resize)
+    results = []
+
+    def fetch():
+        with app.app_context():
+            results.append(resizer.get('artworks/a/original.jpg', 200, None, 'webp'))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [(200, None, 'webp')]
+    assert len({path for _, path, _ in results}) == 1
+    assert resizer.coalesced + sum(hit for _, _, hit in results) == 7
+
+
+def test_sizes_are_rounded_up_to_buckets(resize_env):
+    resizer, client = resize_env
+    assert (quantize_edge(None), quantize_edge(1), quantize_edge(333), quantize_edge(MAX_RESIZE_EDGE)) == \
+        (None, 16, 360, MAX_RESIZE_EDGE)
+    for width in (301, 333, 360):
+        response = client.get(f'/api/img/artworks/a/original.jpg?w={width}')
+        assert Image.open(io.BytesIO(response.data)).size == (360, 270)
+    assert resizer.renders == 1 and len(resizer.cache) == 1
+
+
+def test_file_evicted_after_lookup_is_rendered_again(resize_env, monkeypatch):
+    resizer, client = resize_env
+    assert client.get('/api/img/artworks/a/original.jpg?w=400').status_code == 200
+    real_get = resizer.cache.get
+    evicted = []
+
+    def get_then_evict(key):
+        path = real_get(key)
+        if path is not None and not evicted:
+            # Another request's put evicts it before this one opens it
+            evicted.append(resizer.cache.delete(key))
+        return path
+
+    monkeypatch.setattr(resizer.cache, 'get', get_then_evict)
+    response = client.get('/api/img/artworks/a/original.jpg?w=400')
+    assert evicted == [True]
+    assert response.status_code == 200 and response.headers['X-Image-Cache'] == 'miss'
+    assert resizer.renders == 2
+
+
+def test_cache_is_bounded(resize_env):
+    resizer, client = resize_env
+    resizer.cache.max_bytes = 1
+    for width in (100, 200, 300):
+        assert client.get(f'/api/img/artworks/a/original.jpg?w={width}').status_code == 200
+    assert len(resizer.cache) == 1 and resizer.cache.evictions == 2
+
+
+@pytest.mark.parametrize('url, status', [
+    ('/api/img/artworks/a/original.jpg', 400),
+    ('/api/img/artworks/a/original.jpg?w=0', 400),
+    ('/api/img/artworks/a/original.jpg?w=5000', 400),
+    ('/api/img/artworks/a/original.jpg?w=10&fmt=gif', 400),
+    ('/api/img/artworks/a/missing.jpg?w=10', 404),
+    ('/api/img/artworks/../../etc/passwd?w=10', 404),
+    ('/api/img/notes.txt?w=10', 422),
+])
+def test_bad_requests(resize_env, url, status):
+    _, client = resize_env
+    assert client.get(url).status_code == status
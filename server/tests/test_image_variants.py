@@ -0,0 +1,108 @@
+"""
+Tests for the single-decode image variant generator.
+"""
+
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from server.services.image_variants import (
+    decode_image, decode_thumbnail, generate_variants, parse_variant_sizes, placeholder_data_uri,
+    render_variants, resize_image, variants_manifest
+)
+
+
+def _image_bytes(size, format='JPEG', mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 80, 40, 128) if mode == 'RGBA' else (200, 80, 40)).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def test_every_size_and_format_from_one_call():
+    variants = generate_variants(_image_bytes((3000, 2000)), {'card': 480, 'detail': 1200})
+    assert [(v.name, v.format, v.width, v.height) for v in variants] == [
+        ('detail', 'webp', 1200, 800), ('detail', 'jpeg', 1200, 800),
+        ('card', 'webp', 480, 320), ('card', 'jpeg', 480, 320),
+    ]
+    for variant in variants:
+        decoded = Image.open(io.BytesIO(variant.data))
+        assert decoded.format == variant.format.upper()
+        assert decoded.size == (variant.width, variant.height)
+        assert variant.encode_seconds >= 0
+
+
+def test_jpeg_fallback_is_progressive():
+    variants = generate_variants(_image_bytes((800, 600)), {'card': 480}, formats=('jpeg',))
+    assert Image.open(io.BytesIO(variants[0].data)).info.get('progressive') == 1
+
+
+def test_jpeg_decode_uses_draft_scaling():
+    img = decode_image(_image_bytes((4000, 3000)), 480)
+    # libjpeg decodes at 1/4 scale (1000x750), still at least as large as the target
+    assert img.size == (1000, 750)
+
+
+def test_small_images_are_not_upscaled():
+    variants = generate_variants(_image_bytes((300, 200), 'PNG'), {'card': 480, 'thumbnail': 250})
+    assert [(v.name, v.width, v.height) for v in variants if v.format == 'webp'] == [
+        ('card', 300, 200), ('thumbnail', 250, 167)
+    ]
+
+
+def test_transparency_kept_in_webp_and_flattened_in_jpeg():
+    variants = generate_variants(_image_bytes((600, 600), 'PNG', 'RGBA'), {'card': 480})
+    webp, jpeg = (Image.open(io.BytesIO(v.data)) for v in variants)
+    assert webp.mode == 'RGBA'
+    assert jpeg.mode == 'RGB'
+
+
+def test_manifest_groups_formats_by_size():
+    variants = generate_variants(_image_bytes((1000, 500)), {'card': 480})
+    manifest = variants_manifest(variants, ['https://cdn/card.webp', 'https://cdn/card.jpg'])
+    assert manifest == {'card': {'width': 480, 'height': 240,
+                                 'webp': 'https://cdn/card.webp', 'jpeg': 'https://cdn/card.jpg'}}
+
+
+def test_parse_variant_sizes():
+    assert parse_variant_sizes('card:480, detail:1200') == {'card': 480, 'detail': 1200}
+    assert parse_variant_sizes('') == {}
+    with pytest.raises(ValueError):
+        parse_variant_sizes('card:0')
+    with pytest.raises(ValueError):
+        parse_variant_sizes('card')
+
+
+def test_rendered_image_reports_original_display_size():
+    # JPEG draft decoding shrinks the pixels, not the reported size
+    rendered = render_variants(_image_bytes((4000, 3000)), {'card': 480}, formats=('webp',))
+    assert (rendered.width, rendered.height) == (4000, 3000)
+    assert rendered.smallest.size == (480, 360)
+
+
+def test_exif_rotation_swaps_reported_size():
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotated 90 degrees clockwise
+    Image.new('RGB', (1200, 800), (200, 80, 40)).save(buffer, format='JPEG', exif=exif)
+    rendered = decode_thumbnail(buffer.getvalue())
+    assert (rendered.width, rendered.height) == (800, 1200)
+    assert rendered.smallest.size == (167, 250)
+
+
+def test_placeholder_is_a_tiny_inline_webp():
+    placeholder = placeholder_data_uri(decode_image(_image_bytes((3000, 2000)), 250))
+    assert placeholder.startswith('data:image/webp;base64,')
+    assert len(placeholder) < 600
+    decoded = Image.open(io.BytesIO(base64.b64decode(placeholder.split(',', 1)[1])))
+    assert decoded.size == (16, 11)
+
+
+def test_resize_fits_the_requested_box_without_upscaling():
+    data = _image_bytes((3000, 2000))
+    assert (resize_image(data, 300).width, resize_image(data, 300).height) == (300, 200)
+    variant = resize_image(data, 300, 100, format='jpeg')
+    assert (variant.name, variant.content_type) == ('150x100', 'image/jpeg')
+    assert Image.open(io.BytesIO(variant.data)).size == (150, 100)
+    assert resize_image(_image_bytes((200, 100), format='PNG'), max_height=400).name == '200x100'
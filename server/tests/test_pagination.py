@@ -0,0 +1,98 @@
+"""
+Tests for the cursor helpers used by keyset-paginated endpoints.
+"""
+
+import pytest
+from datetime import datetime, timezone
+
+from server.services.pagination import encode_cursor, decode_cursor, read_cursor, read_with_total, fetch_page
+
+
+def test_cursor_round_trip():
+    """Values, including timezone-aware datetimes and floats, survive encoding."""
+    created_at = datetime(2025, 4, 17, 12, 37, 57, 733219, tzinfo=timezone.utc)
+    token = encode_cursor(created_at, 42)
+    assert decode_cursor(token, 2) == [created_at, 42]
+
+    rank = 0.060792699456214905
+    assert decode_cursor(encode_cursor(rank, 7), 2) == [rank, 7]
+
+
+def test_cursor_is_url_safe():
+    """Tokens can be passed as query parameters without escaping."""
+    token = encode_cursor(datetime(2025, 1, 1), 123456789)
+    assert '=' not in token
+    assert '+' not in token and '/' not in token
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", "e30", encode_cursor(1, 2, 3)])
+def test_invalid_cursor_rejected(token):
+    """Malformed tokens or tokens with the wrong number of keys raise ValueError."""
+    with pytest.raises(ValueError):
+        decode_cursor(token, 2)
+
+
+def test_read_cursor_modes():
+    """No cursor means page numbers; an empty cursor starts keyset pagination."""
+    assert read_cursor({}, 2) == (False, None)
+    assert read_cursor({'cursor': ''}, 2) == (True, None)
+
+    acquired_at = datetime(2025, 3, 1, 9, 30)
+    assert read_cursor({'cursor': encode_cursor(acquired_at, 5)}, 2) == (True, [acquired_at, 5])
+
+    with pytest.raises(ValueError):
+        read_cursor({'cursor': 'garbage'}, 2)
+
+
+def _numbers_session(count):
+    """An in-memory SQLite session holding `count` rows, enough to exercise fetch_page()."""
+    from sqlalchemy import Column, Integer, create_engine
+    from sqlalchemy.orm import Session, declarative_base
+
+    Base = declarative_base()
+
+    class Number(Base):
+        __tablename__ = 'numbers'
+        id = Column(Integer, primary_key=True)
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add_all(Number(id=i) for i in range(1, count + 1))
+    session.commit()
+    return session, Number
+
+
+def test_fetch_page_exact_total_from_window_count():
+    session, Number = _numbers_session(25)
+    query = session.query(Number).order_by(Number.id)
+
+    result = fetch_page(query, 2, 10)
+    assert [n.id for n in result.items] == list(range(11, 21))
+    assert (result.total, result.pages, result.total_exact) == (25, 3, True)
+    assert result.has_next and result.has_prev
+
+    # Past the end there is no row to carry the window count
+    result = fetch_page(query, 9, 10)
+    assert result.items == [] and result.total == 25 and not result.has_next
+
+    # Multi-entity rows keep their tuple shape
+    pairs = session.query(Number, Number.id).order_by(Number.id)
+    assert fetch_page(pairs, 1, 2).items[0][1] == 1
+
+
+def test_fetch_page_without_total():
+    session, Number = _numbers_session(20)
+    query = session.query(Number).order_by(Number.id)
+
+    result = fetch_page(query, 2, 10, with_total=False)
+    assert len(result.items) == 10 and not result.has_next
+    assert (result.total, result.pages, result.total_exact) == (None, None, False)
+
+    result = fetch_page(query, 1, 10, with_total=False, estimate_total=lambda: 19)
+    assert result.has_next and result.total == 19 and not result.total_exact
+
+
+def test_read_with_total():
+    assert read_with_total({}) is True
+    assert read_with_total({'with_total': 'False'}) is False
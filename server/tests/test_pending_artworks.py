@@ -0,0 +1,44 @@
+"""
+Tests for the per-user cache of artworks committed to pending trades.
+"""
+
+from server.app import app
+from server.services import pending_artwork_service as service
+
+
+def test_set_is_cached_until_invalidated(fake_execute):
+    service.clear_pending_artworks()
+    fake_execute.results.append([3, 5, 3])
+    statements = fake_execute.sql
+    with app.app_context():
+        assert service.pending_artwork_ids(1) == frozenset({3, 5})
+        assert service.pending_artwork_ids(1) == frozenset({3, 5})
+        assert len(statements) == 1
+        # Both sides of the trade: offered by the user, or requested from them
+        assert 'trades.initiator_id' in statements[0] and 'trades.recipient_id' in statements[0]
+        assert 'UNION' in statements[0]
+
+        service.invalidate_pending_artworks(2)
+        service.pending_artwork_ids(1)
+        assert len(statements) == 1
+
+        service.invalidate_pending_artworks(1, 2)
+        service.pending_artwork_ids(1)
+        assert len(statements) == 2
+
+        service.clear_pending_artworks()
+        service.pending_artwork_ids(1)
+        assert len(statements) == 3
+
+
+def test_only_artworks_in_the_users_pending_trades(rows):
+    service.clear_pending_artworks()
+    artist, patron, other = rows.user('artist'), rows.user(), rows.user()
+    offered, requested, unrelated, closed = (rows.artwork(artist) for _ in range(4))
+    rows.trade(patron, artist, offered, rows.artwork(artist))         # patron offers `offered`
+    rows.trade(other, patron, rows.artwork(artist), requested)        # `requested` is asked of patron
+    rows.trade(artist, other, unrelated, rows.artwork(artist))        # Not patron's trade
+    rows.trade(patron, artist, closed, rows.artwork(artist), status='REJECTED')
+
+    assert service.pending_artwork_ids(patron.user_id) == frozenset({offered.artwork_id, requested.artwork_id})
+    service.clear_pending_artworks()
@@ -0,0 +1,125 @@
+"""
+Tests for perceptual hashing and the near-duplicate Hamming index.
+"""
+
+import io
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+from server.services.image_variants import render_variants
+from server.services import perceptual_hash
+from server.services.perceptual_hash import NearDuplicateIndex, dhash, from_signed64, to_signed64
+
+
+def _artwork(seed, size=(1200, 900)):
+    rng = random.Random(seed)
+    img = Image.new('RGB', size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.ellipse((x, y, x + rng.randrange(100, 500), y + rng.randrange(100, 400)),
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+    return img
+
+
+def _jpeg(img, quality=90):
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def _distance(a, b):
+    return (a ^ b).bit_count()
+
+
+def test_dhash_survives_reencoding_resizing_and_small_crops():
+    original = _artwork(1)
+    value = dhash(original)
+    assert _distance(value, dhash(Image.open(io.BytesIO(_jpeg(original, quality=40))))) <= 4
+    assert _distance(value, dhash(original.resize((400, 300)))) <= 4
+    assert _distance(value, dhash(original.crop((20, 15, 1180, 885)))) <= 8
+    # Unrelated images are far apart (about 32 bits on average)
+    assert _distance(value, dhash(_artwork(2))) > 16
+
+
+def test_hash_of_the_smallest_render_matches_the_original():
+    data = _jpeg(_artwork(3))
+    rendered = render_variants(data, {'card': 480, 'thumbnail': 250}, formats=('webp',))
+    assert [v.name for v in rendered.variants] == ['card', 'thumbnail']
+    assert rendered.smallest.size == (250, 188)
+    assert _distance(dhash(rendered.smallest), dhash(Image.open(io.BytesIO(data)))) <= 4
+
+
+def test_signed_round_trip_fits_bigint():
+    for value in (0, 1, 2 ** 63 - 1, 2 ** 63, 2 ** 64 - 1):
+        signed = to_signed64(value)
+        assert -2 ** 63 <= signed < 2 ** 63
+        assert from_signed64(signed) == value
+
+
+def _flip(rng, value, bits):
+    for bit in rng.sample(range(64), bits):
+        value ^= 1 << bit
+    return value
+
+
+def test_find_matches_brute_force():
+    rng = random.Random(7)
+    entries = [(artwork_id, rng.getrandbits(64)) for artwork_id in range(1, 5001)]
+    # Plant near-duplicates at every distance up to 12
+    for artwork_id in range(5001, 5101):
+        source = entries[rng.randrange(5000)][1]
+        entries.append((artwork_id, _flip(rng, source, artwork_id % 13)))
+    index = NearDuplicateIndex()
+    index.load(entries)
+
+    for max_distance in (0, 3, 8, 12):
+        for _, query in rng.sample(entries, 50):
+            expected = sorted(
+                ((artwork_id, _distance(value, query)) for artwork_id, value in entries
+                 if _distance(value, query) <= max_distance),
+                key=lambda item: (item[1], item[0])
+            )
+            assert index.find(query, max_distance, limit=len(entries)) == expected
+
+
+def test_adds_and_deletes_before_and_after_compaction(monkeypatch):
+    monkeypatch.setattr(perceptual_hash, 'COMPACT_THRESHOLD', 5)
+    index = NearDuplicateIndex()
+    index.load([(1, 0), (2, 0b111), (3, 2 ** 64 - 1)])
+
+    index.add(4, 0b1)
+    index.artwork_deleted(2)
+    index.add(1, 0xFFFF0000FFFF0000)  # Re-hashed: the old table entry must not match
+    assert index.find(0, 4) == [(4, 1)]
+    assert len(index) == 3
+
+    index.add(5, 0b11)  # Fifth pending change folds the overlay into the tables
+    assert index._recent == {} and index._removed == set()
+    assert index.find(0, 4) == [(4, 1), (5, 2)]
+    assert index.find(0, 4, exclude_id=4) == [(5, 2)]
+    assert len(index) == 4
+
+
+def test_duplicate_pairs_report():
+    index = NearDuplicateIndex()
+    index.load([(1, 0), (2, 0b11), (3, 2 ** 64 - 1), (4, 0b1)])
+    assert index.duplicate_pairs(2) == [(1, 4, 1), (2, 4, 1), (1, 2, 2)]
+    assert index.duplicate_pairs(2, limit=1) == [(1, 4, 1)]
+
+
+def test_duplicate_pairs_limit_keeps_the_closest():
+    index = NearDuplicateIndex()
+    # Low ids are 4 bits apart; the only 1-bit pair has the highest ids
+    index.load([(1, 0), (2, 0b1111), (10, 2 ** 64 - 1), (11, 2 ** 64 - 2)])
+    assert index.duplicate_pairs(4, limit=1) == [(10, 11, 1)]
+    assert index.duplicate_pairs(4) == [(10, 11, 1), (1, 2, 4)]
+
+
+def test_max_distance_is_bounded():
+    index = NearDuplicateIndex()
+    index.load([])
+    with pytest.raises(ValueError):
+        index.find(0, perceptual_hash.MAX_QUERY_DISTANCE + 1)
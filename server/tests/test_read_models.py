@@ -0,0 +1,108 @@
+"""
+Tests for the projection read models used by the list endpoints.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from server.app import db  # noqa: F401 - models import db from server.app
+from server.models.user import User
+from server.models.artwork import Artwork
+from server.services.pagination import fetch_page, keyset_page
+from server.services.read_models import RowBundle, ArtworkCard, FollowEntry, TradeListEntry, trade_list
+from server.services.serializer import serialize, ARTWORK_CARD_FIELDS, USER_SUMMARY_FIELDS
+
+CREATED_AT = datetime(2025, 4, 17, 12, 37, 57, tzinfo=timezone.utc)
+
+
+def _card_values(artist_user_id=7, artist_username="painter"):
+    return (1, "Dawn", "Oil on canvas", None, "rare", "https://example.com/a.png", None, None, 1200, 1800,
+            "data:image/webp;base64,UklGRg==", 1999, "Oil", "Painter", 7, CREATED_AT, artist_user_id, artist_username)
+
+
+def test_artwork_card_matches_entity_serialization():
+    artist = User(user_id=7, username="painter", email="p@example.com", password_hash="x", role="artist")
+    artwork = Artwork(
+        artwork_id=1, artist_id=7, title="Dawn", artist_name="Painter", description="Oil on canvas",
+        series=None, image_url="https://example.com/a.png", thumbnail_url=None, width=1200, height=1800,
+        placeholder="data:image/webp;base64,UklGRg==", year=1999,
+        medium="Oil", rarity="rare", created_at=CREATED_AT, artist=artist
+    )
+    assert ArtworkCard(*_card_values()).to_dict() == serialize(artwork, ARTWORK_CARD_FIELDS)
+
+    artwork.artist = None
+    assert ArtworkCard(*_card_values(None, None)).to_dict() == serialize(artwork, ARTWORK_CARD_FIELDS)
+
+
+def test_follow_entry_matches_previous_output():
+    followed_at = datetime(2025, 2, 3, 4, 5, 6)
+    user = User(user_id=3, username="fan", email="f@example.com", password_hash="x", role="patron")
+    expected = serialize(user, USER_SUMMARY_FIELDS)
+    expected["followed_at"] = followed_at.isoformat() + 'Z'
+    assert FollowEntry(3, "fan", None, "patron", followed_at).to_dict() == expected
+
+
+def test_row_bundle_yields_read_models_outside_the_identity_map():
+    Base = declarative_base()
+
+    class Item(Base):
+        __tablename__ = 'items'
+        id = Column(Integer, primary_key=True)
+        name = Column(String)
+
+    class ItemRow:
+        __slots__ = ('id', 'name')
+
+        def __init__(self, id, name):
+            self.id = id
+            self.name = name
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add_all(Item(id=i, name=f"item {i}") for i in range(1, 8))
+    session.commit()
+    session.expunge_all()
+
+    query = session.query(RowBundle('row', ItemRow, Item.id, Item.name)).order_by(Item.id.desc())
+
+    page = fetch_page(query, 1, 3)
+    assert [row.id for row in page.items] == [7, 6, 5] and page.total == 7
+    assert all(isinstance(row, ItemRow) for row in page.items)
+
+    rows, cursor = keyset_page(query, (Item.id,), [5], 3, lambda row: (row.id,))
+    assert [row.name for row in rows] == ["item 4", "item 3", "item 2"] and cursor is not None
+
+    assert len(session.identity_map) == 0
+
+
+def test_trade_list_entry_matches_previous_output():
+    created_at = datetime(2025, 5, 1, 8, 0, tzinfo=timezone.utc)
+    entry = TradeListEntry(
+        11, 1, 2, 30, 40, "Swap?", "PENDING", created_at, None,
+        "alice", "bob", "Dawn", "https://example.com/t.png", None, None
+    )
+    assert entry.to_dict() == {
+        "trade_id": 11, "initiator_id": 1, "recipient_id": 2,
+        "offered_artwork_id": 30, "requested_artwork_id": 40,
+        "message": "Swap?", "status": "PENDING",
+        "created_at": created_at.isoformat(), "updated_at": None,
+        "initiator": {"user_id": 1, "username": "alice"},
+        "recipient": {"user_id": 2, "username": "bob"},
+        "offered_artwork": {"artwork_id": 30, "title": "Dawn", "thumbnail_url": "https://example.com/t.png"},
+        # The requested artwork's row is missing (outer join), as the old lazy load returned None
+        "requested_artwork": {},
+    }
+
+
+def test_trade_list_is_a_single_select():
+    from sqlalchemy.dialects import postgresql
+    from server.app import app
+    from server.models.trade import Trade
+
+    with app.app_context():
+        sql = str(trade_list(Trade.initiator_id, 1).statement.compile(dialect=postgresql.dialect()))
+    assert sql.count('SELECT') == 1
+    assert sql.count('LEFT OUTER JOIN') == 4
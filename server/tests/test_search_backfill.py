@@ -0,0 +1,56 @@
+"""
+Tests for the batched artwork backfills and their CLI commands.
+"""
+
+from collections import namedtuple
+
+import pytest
+
+from server.app import app
+from server.extensions import db
+
+
+@pytest.fixture
+def cli(monkeypatch):
+    for name in ('commit', 'rollback'):
+        monkeypatch.setattr(db.session, name, lambda: None)
+    return app.test_cli_runner()
+
+
+def test_backfill_reports_success(cli, fake_execute):
+    # Per batch: the id select, then the UPDATE's row count
+    fake_execute.results.extend([[1, 2], [1, 2], [3], [3], []])
+    result = cli.invoke(args=['backfill-search-vectors', '--batch-size', '2'])
+    assert result.exit_code == 0
+    assert 'Updated search vectors for 3 artworks' in result.output
+    assert len(fake_execute.sql) == 5
+
+
+def test_failed_batch_exits_non_zero(cli, fake_execute):
+    fake_execute.results.extend([[1, 2], [1, 2], RuntimeError("connection lost")])
+    result = cli.invoke(args=['backfill-search-vectors', '--batch-size', '2'])
+    assert result.exit_code == 1
+    assert 'failed in the batch after artwork 2 (2 artworks updated before it): connection lost' in result.output
+    assert 'Updated search vectors' not in result.output
+
+
+ArtworkImage = namedtuple('ArtworkImage', 'artwork_id image_url')
+
+
+@pytest.mark.parametrize('command', ['backfill-palettes', 'backfill-placeholders'])
+def test_failed_image_batch_exits_non_zero(cli, fake_execute, monkeypatch, command):
+    # No readable source, so nothing reaches the worker processes; the second batch's commit fails
+    fake_execute.results.extend([[ArtworkImage(1, 'ftp://x/1.png'), ArtworkImage(2, 'ftp://x/2.png')],
+                                 [ArtworkImage(3, 'ftp://x/3.png')]])
+    commits = []
+
+    def commit():
+        commits.append(1)
+        if len(commits) > 1:
+            raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(db.session, 'commit', commit)
+    result = cli.invoke(args=[command, '--batch-size', '2', '--workers', '1'])
+    assert result.exit_code == 1
+    assert 'failed in the batch after artwork 2 (0 artworks updated before it): connection lost' in result.output
+    assert 'Stored' not in result.output
@@ -0,0 +1,72 @@
+"""
+Tests that the compiled serializer produces exactly what SerializerMixin.to_dict() does.
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from server.app import db  # noqa: F401 - models import db from server.app
+from server.models.user import User
+from server.models.artwork import Artwork
+from server.services.serializer import (
+    serialize, serialize_many, get_plan,
+    ARTWORK_CARD_FIELDS, ARTWORK_DETAIL_FIELDS, USER_SUMMARY_FIELDS
+)
+
+PROFILE_FIELDS = ("user_id", "username", "role", "profile_image_url", "bio", "created_at")
+
+
+def _artist():
+    return User(
+        user_id=7, username="painter", email="painter@example.com", password_hash="x",
+        role="artist", bio=None, created_at=datetime(2025, 1, 2, 3, 4, 5, 678901)
+    )
+
+
+def _artwork(artwork_id, artist=None):
+    return Artwork(
+        artwork_id=artwork_id, artist_id=7, title=f"Work {artwork_id}", artist_name="Painter",
+        description="Oil on canvas", series=None, image_url="https://example.com/a.png",
+        thumbnail_url=None, border_decal_id="gold",
+        image_variants={"card": {"width": 480, "height": 320, "webp": "https://example.com/card.webp"}},
+        width=1200, height=800, placeholder="data:image/webp;base64,UklGRg==", year=1999, medium="Oil", rarity="rare",
+        created_at=datetime(2025, 4, 17, 12, 37, 57, 733219, tzinfo=timezone.utc),
+        updated_at=None, artist=artist
+    )
+
+
+def _as_json(data):
+    # Same settings Flask's jsonify uses (sorted keys)
+    return json.dumps(data, sort_keys=True)
+
+
+@pytest.mark.parametrize("fields", [ARTWORK_CARD_FIELDS, ARTWORK_DETAIL_FIELDS])
+def test_artwork_matches_to_dict(fields):
+    artwork = _artwork(1, artist=_artist())
+    assert _as_json(serialize(artwork, fields)) == _as_json(artwork.to_dict(only=fields))
+
+    orphan = _artwork(2)
+    assert _as_json(serialize(orphan, fields)) == _as_json(orphan.to_dict(only=fields))
+
+
+@pytest.mark.parametrize("fields", [USER_SUMMARY_FIELDS, PROFILE_FIELDS])
+def test_user_matches_to_dict(fields):
+    user = _artist()
+    assert _as_json(serialize(user, fields)) == _as_json(user.to_dict(only=fields))
+
+
+def test_serialize_many_and_plan_cache():
+    artist = _artist()
+    artworks = [_artwork(i, artist=artist) for i in range(3)]
+    assert serialize_many(artworks, ARTWORK_CARD_FIELDS) == [aw.to_dict(only=ARTWORK_CARD_FIELDS) for aw in artworks]
+    assert serialize_many([], ARTWORK_CARD_FIELDS) == []
+    assert get_plan(Artwork, ARTWORK_CARD_FIELDS) is get_plan(Artwork, list(ARTWORK_CARD_FIELDS))
+
+
+def test_rejects_fields_it_cannot_compile():
+    with pytest.raises(ValueError):
+        get_plan(Artwork, ("collections",))
+    with pytest.raises(ValueError):
+        get_plan(User, ("created_artworks.title",))
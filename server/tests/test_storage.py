@@ -0,0 +1,153 @@
+"""
+Tests for the storage backends and the local file route. No AWS needed.
+"""
+
+import io
+
+import pytest
+
+from server.app import app
+from server.services.storage import LocalStorage, S3Storage, StorageError, key_for_url
+from server.tests.s3_standin import S3StandIn
+
+MIB = 1024 * 1024
+
+
+class _ChunkedReader(io.RawIOBase):
+    """A stream that only hands out small reads, like a request body."""
+
+    def __init__(self, data, chunk=7):
+        self.data, self.chunk, self.position = data, chunk, 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        piece = self.data[self.position:self.position + min(self.chunk, len(buffer))]
+        buffer[:len(piece)] = piece
+        self.position += len(piece)
+        return len(piece)
+
+
+def test_local_storage_streams_to_disk_and_reads_back(tmp_path):
+    storage = LocalStorage(tmp_path, 'http://testserver/api/files/')
+    data = bytes(range(256)) * 50
+    url = storage.save(_ChunkedReader(data), 'artworks/abc/image.png', 'image/png')
+
+    assert url == 'http://testserver/api/files/artworks/abc/image.png'
+    assert (tmp_path / 'artworks' / 'abc' / 'image.png').read_bytes() == data
+    with storage.open('artworks/abc/image.png') as f:
+        assert f.read() == data
+    # No temporary files left behind
+    assert [p.name for p in (tmp_path / 'artworks' / 'abc').iterdir()] == ['image.png']
+
+
+@pytest.mark.parametrize('key', ['../escape.png', '/etc/passwd', 'a//b.png', 'a/./b.png', '', 'a\\b.png'])
+def test_keys_cannot_escape_the_root(tmp_path, key):
+    storage = LocalStorage(tmp_path, 'http://testserver/api/files')
+    with pytest.raises(StorageError):
+        storage.save(io.BytesIO(b'x'), key, 'image/png')
+
+
+def test_missing_local_file_raises_storage_error(tmp_path):
+    with pytest.raises(StorageError):
+        LocalStorage(tmp_path, 'http://testserver').open('nope.png')
+
+
+def test_s3_client_is_created_once_and_shared():
+    storage = S3Storage('bucket', region='us-east-1', access_key_id='x', secret_access_key='y',
+                        max_pool_connections=48)
+    assert storage.client is storage.client
+    assert storage.client.meta.config.max_pool_connections == 48
+    assert storage.url_for('artworks/a.png') == 'https://bucket.s3.us-east-1.amazonaws.com/artworks/a.png'
+    assert not S3Storage(None).configured
+
+
+def test_key_for_url_only_maps_the_backends_own_urls(tmp_path):
+    local = LocalStorage(tmp_path, 'http://testserver/api/files')
+    assert key_for_url(local, local.url_for('artworks/a/original.png')) == 'artworks/a/original.png'
+    s3 = S3Storage('bucket', region='us-east-1')
+    assert key_for_url(s3, s3.url_for('artworks/a/original.png')) == 'artworks/a/original.png'
+    for url in ('https://example.com/api/files/a.png', 'http://testserver/api/files/', 'http://testserver/a.png', None):
+        assert key_for_url(local, url) is None
+
+
+def test_files_route_serves_local_files(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path, 'http://testserver/api/files')
+    storage.save(io.BytesIO(b'RIFF....WEBP'), 'artworks/abc/variants/card.webp', 'image/webp')
+    monkeypatch.setitem(app.extensions, 'storage', storage)
+
+    client = app.test_client()
+    response = client.get('/api/files/artworks/abc/variants/card.webp')
+    assert response.status_code == 200
+    assert response.data == b'RIFF....WEBP'
+    assert response.mimetype == 'image/webp'
+    assert 'max-age' in response.headers['Cache-Control']
+
+    assert client.get('/api/files/artworks/missing.png').status_code == 404
+    assert client.get('/api/files/../app.py').status_code == 404
+
+
+def test_files_route_is_off_for_s3(monkeypatch):
+    monkeypatch.setitem(app.extensions, 'storage', S3Storage('bucket'))
+    assert app.test_client().get('/api/files/artworks/a.png').status_code == 404
+
+
+def _s3_storage(s3, **kwargs):
+    return S3Storage('bucket', region='us-east-1', access_key_id='test', secret_access_key='test',
+                     endpoint_url=s3.endpoint_url, **kwargs)
+
+
+def test_large_files_go_up_as_parallel_multipart():
+    data = bytes(range(256)) * (24 * 1024)  # 6 MiB -> two 5 MiB parts
+    with S3StandIn() as s3:
+        storage = _s3_storage(s3, multipart_threshold=5 * MIB, multipart_chunksize=5 * MIB, max_concurrency=4)
+        url = storage.save(io.BytesIO(data), 'artworks/abc/big.png', 'image/png')
+        storage.shutdown()
+
+    assert url == f"{s3.endpoint_url}/bucket/artworks/abc/big.png"
+    assert s3.objects[('bucket', 'artworks/abc/big.png')] == data
+    kinds = [kind for _, kind in s3.requests]
+    assert kinds.count('UploadPart') == 2
+    assert 'CompleteMultipartUpload' in kinds
+
+
+def test_failed_multipart_upload_is_aborted():
+    data = b'x' * (11 * MIB)
+    with S3StandIn(fail_part=2) as s3:
+        storage = _s3_storage(s3, multipart_threshold=5 * MIB, multipart_chunksize=5 * MIB)
+        with pytest.raises(StorageError):
+            storage.save(io.BytesIO(data), 'artworks/abc/big.png', 'image/png')
+        storage.shutdown()
+
+    assert len(s3.aborted) == 1
+    assert not s3.uploads
+    assert ('bucket', 'artworks/abc/big.png') not in s3.objects
+
+
+def test_save_many_uploads_concurrently():
+    files = [(io.BytesIO(f'variant {n}'.encode()), f'artworks/abc/variants/{n}.webp', 'image/webp') for n in range(8)]
+    with S3StandIn(latency=0.1) as s3:
+        storage = _s3_storage(s3, max_concurrency=8)
+        urls = storage.save_many(files)
+        storage.shutdown()
+
+    assert urls == [f"{s3.endpoint_url}/bucket/artworks/abc/variants/{n}.webp" for n in range(8)]
+    assert s3.objects[('bucket', 'artworks/abc/variants/3.webp')] == b'variant 3'
+    # In series only one request would ever be in flight
+    assert s3.max_in_flight > 1
+
+
+def test_delete_many_removes_only_the_given_keys(tmp_path):
+    keys = [f'artworks/abc/variants/{n}.webp' for n in range(3)]
+    with S3StandIn() as s3:
+        storage = _s3_storage(s3)
+        storage.save_many([(io.BytesIO(b'x'), key, 'image/webp') for key in keys])
+        storage.delete_many(keys[:2] + ['artworks/abc/variants/missing.webp'])
+        storage.shutdown()
+    assert list(s3.objects) == [('bucket', keys[2])]
+
+    local = LocalStorage(tmp_path, 'http://testserver/api/files')
+    local.save_many([(io.BytesIO(b'x'), key, 'image/webp') for key in keys])
+    local.delete_many(keys[:2] + ['artworks/abc/variants/missing.webp'])
+    assert [path.name for path in (tmp_path / 'artworks' / 'abc' / 'variants').iterdir()] == ['2.webp']
@@ -0,0 +1,91 @@
+"""
+Tests for how trade status changes are folded into pending-counter upserts.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from server.app import app
+from server.extensions import db
+from server.models.trade_inbox_counter import TradeInboxCounter
+from server.services import trade_counter_service
+
+
+def _captured_rows(fake_execute, action):
+    with app.app_context():
+        action()
+    rows = []
+    for stmt in fake_execute.statements:
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        count = len([key for key in params if key.startswith('user_id_m')])
+        rows.extend(
+            (params[f'user_id_m{i}'], params[f'pending_sent_m{i}'], params[f'pending_received_m{i}'])
+            for i in range(count)
+        )
+    return len(fake_execute.statements), rows
+
+
+def test_closed_trades_aggregate_into_one_sorted_upsert(fake_execute):
+    # The accepted trade plus two cancelled conflicts touching user 1 twice
+    statements, rows = _captured_rows(
+        fake_execute, lambda: trade_counter_service.record_trades_closed([(3, 1), (1, 2), (1, 4)])
+    )
+    assert statements == 1
+    assert rows == [(1, -2, -1), (2, 0, -1), (3, -1, 0), (4, 0, -1)]
+
+
+def test_opened_trade_counts_both_sides(fake_execute):
+    statements, rows = _captured_rows(fake_execute, lambda: trade_counter_service.record_trade_opened(9, 2))
+    assert statements == 1
+    assert rows == [(2, 0, 1), (9, 1, 0)]
+
+
+def test_no_changes_issue_no_statement(fake_execute):
+    statements, rows = _captured_rows(fake_execute, lambda: trade_counter_service.record_trades_closed([]))
+    assert statements == 0 and rows == []
+
+
+def test_closing_recomputes_latest_timestamps_from_pending_trades(fake_execute):
+    with app.app_context():
+        trade_counter_service.record_trades_closed([(3, 1)])
+        trade_counter_service.record_trade_opened(3, 1)
+    closed, opened = fake_execute.sql
+
+    assert closed.count('max(trades.created_at)') == 4  # Both sides of both users
+    assert 'greatest(trade_inbox_counters.latest_sent_at' not in closed
+    assert 'max(trades.created_at)' not in opened
+    assert 'greatest(trade_inbox_counters.latest_sent_at' in opened
+
+
+def test_closing_the_newest_pending_trade_restores_the_previous_timestamp(rows):
+    artist, patron = rows.user('artist'), rows.user()
+    offered = [rows.artwork(artist, owner=artist) for _ in range(2)]
+    requested = [rows.artwork(artist, owner=patron) for _ in range(2)]
+    older = rows.trade(artist, patron, offered[0], requested[0], created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    newer = rows.trade(artist, patron, offered[1], requested[1], created_at=datetime(2024, 2, 1, tzinfo=timezone.utc))
+    db.session.commit()
+    assert trade_counter_service.reconcile_trade_counters() == 2
+    assert trade_counter_service.get_trade_summary(patron.user_id)['latest_received_at'] == newer.created_at.isoformat()
+
+    newer.status = 'REJECTED'
+    trade_counter_service.record_trades_closed([(artist.user_id, patron.user_id)])
+    db.session.commit()
+
+    for user_id, side in ((artist.user_id, 'sent'), (patron.user_id, 'received')):
+        summary = trade_counter_service.get_trade_summary(user_id)
+        assert summary[f'pending_{side}'] == 1
+        assert summary[f'latest_{side}_at'] == older.created_at.isoformat()
+    assert trade_counter_service.reconcile_trade_counters() == 0
+
+
+def test_reconcile_repairs_a_stale_timestamp(rows):
+    artist, patron = rows.user('artist'), rows.user()
+    trade = rows.trade(artist, patron, rows.artwork(artist, owner=artist), rows.artwork(artist, owner=patron),
+                       created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    db.session.add(TradeInboxCounter(user_id=patron.user_id, pending_sent=0, pending_received=1,
+                                     latest_received_at=datetime(2024, 3, 1, tzinfo=timezone.utc)))
+    db.session.commit()
+
+    assert trade_counter_service.reconcile_trade_counters() == 2  # The stale patron row and the missing artist row
+    assert trade_counter_service.get_trade_summary(patron.user_id)['latest_received_at'] == trade.created_at.isoformat()
@@ -0,0 +1,57 @@
+"""
+Tests for the single-query trade creation preconditions.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy.dialects import postgresql
+
+from server.app import app
+from server.models.trade import Trade
+
+Checks = namedtuple('Checks', 'follows followed_back owns_offered owns_requested')
+
+
+def _blocker(fake_execute, row):
+    fake_execute.results.append(row)
+    with app.app_context():
+        reason = Trade.creation_blocker(1, 2, 10, 20)
+    return reason, fake_execute.sql
+
+
+def test_all_checks_in_one_statement(fake_execute):
+    reason, statements = _blocker(fake_execute, Checks(True, True, True, True))
+    assert reason is None
+    assert len(statements) == 1
+    assert statements[0].count('EXISTS') == 4
+
+
+def test_reasons_in_priority_order(fake_execute):
+    fake_execute.results.extend([Checks(True, False, False, False), Checks(True, True, False, False),
+                                 Checks(True, True, True, False)])
+    with app.app_context():
+        assert [Trade.creation_blocker(1, 2, 10, 20) for _ in range(3)] == \
+            ['NOT_MUTUAL_FOLLOW', 'OFFERED_NOT_OWNED', 'REQUESTED_NOT_OWNED']
+
+
+def test_checks_against_real_follows_and_collections(rows):
+    initiator, recipient = rows.user(), rows.user('artist')
+    offered = rows.artwork(recipient, owner=initiator)
+    requested = rows.artwork(recipient, owner=recipient)
+
+    def blocker(offered_id=offered.artwork_id, requested_id=requested.artwork_id):
+        return Trade.creation_blocker(initiator.user_id, recipient.user_id, offered_id, requested_id)
+
+    rows.follow(initiator, recipient)
+    assert blocker() == 'NOT_MUTUAL_FOLLOW'
+    rows.follow(recipient, initiator)
+    assert blocker() is None
+    assert blocker(offered_id=requested.artwork_id) == 'OFFERED_NOT_OWNED'
+    assert blocker(requested_id=offered.artwork_id) == 'REQUESTED_NOT_OWNED'
+
+
+def test_pending_pair_index_is_direction_independent():
+    index = next(index for index in Trade.__table__.indexes if index.name == 'uq_trades_pending_pair')
+    assert index.unique
+    sql = str(index.expressions[0].compile(dialect=postgresql.dialect()))
+    assert sql == 'least(trades.initiator_id, trades.recipient_id)'
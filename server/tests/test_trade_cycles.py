@@ -0,0 +1,92 @@
+"""
+Tests for the trade graph (CSR arrays) and bounded cycle search.
+"""
+
+import random
+import time
+
+import pytest
+
+from server.services.trade_cycle_service import TradeGraph, find_cycles
+
+
+def _graph(edges):
+    return TradeGraph.from_sorted_edges(sorted(edges))
+
+
+def test_graph_keeps_one_edge_per_pair_and_drops_non_givers():
+    graph = _graph([(1, 2, 11), (1, 2, 10), (2, 1, 20), (2, 9, 21)])
+    assert list(graph.user_ids) == [1, 2]
+    # 1 -> 2 keeps the lowest artwork; 2 -> 9 is gone because 9 gives nothing
+    assert list(graph.offsets) == [0, 1, 2]
+    assert list(graph.targets) == [1, 0]
+    assert list(graph.artworks) == [10, 20]
+
+
+def test_finds_three_way_cycle_once():
+    graph = _graph([(1, 2, 100), (2, 3, 200), (3, 1, 300)])
+    assert find_cycles(graph) == [[(1, 2, 100), (2, 3, 200), (3, 1, 300)]]
+
+
+def test_respects_length_bounds():
+    # 2-cycle and 5-cycle only
+    edges = [(1, 2, 1), (2, 1, 2)]
+    edges += [(10 + i, 10 + (i + 1) % 5, 100 + i) for i in range(5)]
+    graph = _graph(edges)
+    assert find_cycles(graph) == []
+    assert len(find_cycles(graph, min_length=2)) == 1
+    with pytest.raises(ValueError):
+        find_cycles(graph, max_length=5)
+
+
+def test_cycles_are_disjoint():
+    # Two 3-cycles sharing user 1, plus an independent 4-cycle
+    edges = [(1, 2, 1), (2, 3, 2), (3, 1, 3), (1, 4, 4), (4, 5, 5), (5, 1, 6)]
+    edges += [(20, 21, 7), (21, 22, 8), (22, 23, 9), (23, 20, 10)]
+    cycles = find_cycles(_graph(edges))
+    assert len(cycles) == 2
+    givers = [giver for legs in cycles for giver, _, _ in legs]
+    assert len(givers) == len(set(givers))
+    assert sorted(len(legs) for legs in cycles) == [3, 4]
+
+
+def test_four_way_cycle_avoids_reusing_the_forward_hop():
+    # 1 -> 2 -> 3 -> 2 would reuse 2; the second route back through 4 closes the cycle
+    edges = [(1, 2, 1), (2, 3, 2), (3, 2, 3), (2, 1, 4), (3, 4, 5), (4, 1, 6)]
+    assert find_cycles(_graph(edges), min_length=4) == [[(1, 2, 1), (2, 3, 2), (3, 4, 5), (4, 1, 6)]]
+
+
+def test_step_budget_and_cycle_cap():
+    edges = [(i * 3 + k, i * 3 + (k + 1) % 3, i * 3 + k) for i in range(10) for k in range(3)]
+    assert len(find_cycles(_graph(edges), max_cycles=4)) == 4
+
+    # Only the last of user 0's 50 first hops leads back; the dead ends use up a small budget
+    edges = [(0, hop, hop) for hop in range(1, 51)]
+    edges += [(hop, 1000 + hop, 100 + hop) for hop in range(1, 50)] + [(1000 + hop, 2000, 0) for hop in range(1, 50)]
+    edges += [(50, 51, 150), (51, 0, 151)]
+    graph = _graph(edges)
+    assert find_cycles(graph, max_steps=10) == []
+    assert find_cycles(graph) == [[(0, 50, 50), (50, 51, 150), (51, 0, 151)]]
+
+
+def test_search_over_a_large_graph():
+    rng = random.Random(7)
+    users = 20000
+    edges = {(giver, rng.randrange(users), giver * 10 + k) for giver in range(users) for k in range(20)}
+    edges = [(giver, receiver, artwork) for giver, receiver, artwork in edges if giver != receiver]
+
+    graph = _graph(edges)
+    assert graph.edge_count > 350000
+
+    started = time.perf_counter()
+    cycles = find_cycles(graph, max_cycles=200)
+    elapsed = time.perf_counter() - started
+
+    assert len(cycles) == 200
+    index = {(giver, receiver): artwork for giver, receiver, artwork in edges}
+    for legs in cycles:
+        assert 3 <= len(legs) <= 4
+        assert legs[-1][1] == legs[0][0]
+        assert all(legs[i][1] == legs[i + 1][0] for i in range(len(legs) - 1))
+        assert all((giver, receiver) in index for giver, receiver, _ in legs)
+    assert elapsed < 2
@@ -0,0 +1,69 @@
+"""
+Tests for the batched trade expiry sweep and archive job.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from server.app import app
+from server.extensions import db
+from server.services import trade_expiry_service
+from server.services.trade_counter_service import get_trade_summary, reconcile_trade_counters
+
+
+def _run(monkeypatch, fake_execute, batches, action):
+    """Runs action with each execute() returning the next batch; returns (result, sql, closed pairs, commits)."""
+    closed, commits = [], []
+    fake_execute.results.extend(batches)
+    with app.app_context():
+        monkeypatch.setattr(db.session, 'commit', lambda: commits.append(True))
+        monkeypatch.setattr(trade_expiry_service, 'record_trades_closed', lambda pairs: closed.append(list(pairs)))
+        result = action()
+    return result, fake_execute.sql, closed, len(commits)
+
+
+def test_expiry_runs_until_a_short_batch(monkeypatch, fake_execute):
+    batches = [[(1, 2), (3, 4)], [(5, 6)]]
+    expired, statements, closed, commits = _run(
+        monkeypatch, fake_execute, batches, lambda: trade_expiry_service.expire_stale_trades(14, batch_size=2)
+    )
+    assert expired == 3
+    assert commits == 2
+    # Counters are adjusted in the same transaction as each batch
+    assert closed == batches
+    assert 'FOR UPDATE SKIP LOCKED' in statements[0]
+    assert statements[0].startswith('UPDATE trades SET status=')
+
+
+def test_expiry_respects_max_batches(monkeypatch, fake_execute):
+    expired, statements, _, _ = _run(
+        monkeypatch, fake_execute, [[(1, 2)]] * 3, lambda: trade_expiry_service.expire_stale_trades(14, batch_size=1, max_batches=2)
+    )
+    assert expired == 2 and len(statements) == 2
+
+
+def test_archive_moves_rows_in_one_statement(monkeypatch, fake_execute):
+    archived, statements, closed, commits = _run(
+        monkeypatch, fake_execute, [[(1,), (2,)], []], lambda: trade_expiry_service.archive_finished_trades(90, batch_size=2)
+    )
+    assert archived == 2 and commits == 2
+    assert closed == []
+    assert statements[0].startswith('WITH moved AS')
+    assert 'DELETE FROM trades' in statements[0] and 'INSERT INTO trades_archive' in statements[0]
+
+
+def test_only_stale_pending_trades_expire(rows):
+    initiator, recipient = rows.user(), rows.user('artist')
+    long_ago = datetime.now(timezone.utc) - timedelta(days=30)
+
+    def trade(**fields):
+        return rows.trade(initiator, recipient, rows.artwork(recipient), rows.artwork(recipient), **fields)
+
+    stale, fresh = trade(created_at=long_ago), trade()
+    finished = trade(status='ACCEPTED', created_at=long_ago)
+    db.session.commit()
+    reconcile_trade_counters()
+
+    assert trade_expiry_service.expire_stale_trades(14, batch_size=1) == 1
+    db.session.expire_all()
+    assert (stale.status, fresh.status, finished.status) == ('CANCELED', 'PENDING', 'ACCEPTED')
+    assert get_trade_summary(initiator.user_id)['pending_sent'] == 1
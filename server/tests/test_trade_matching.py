@@ -0,0 +1,120 @@
+"""
+Tests for the in-memory wishlist trade matching index.
+"""
+
+import time
+
+from server.services.trade_match_service import TradeMatchIndex
+
+
+def _index():
+    index = TradeMatchIndex()
+    index.built_at = time.time()  # Skip the database build
+    return index
+
+
+def _mutual(index, a, b):
+    index.follow_added(a, b)
+    index.follow_added(b, a)
+
+
+def test_matches_need_mutual_follow_and_both_sides():
+    index = _index()
+    index.collection_added(1, 100)
+    index.wishlist_added(1, 200)
+    index.collection_added(2, 200)
+    index.wishlist_added(2, 100)
+
+    # One-way follow is not enough
+    index.follow_added(1, 2)
+    assert index.find_partners(1) == []
+
+    index.follow_added(2, 1)
+    assert index.find_partners(1) == [
+        {"user_id": 2, "you_get": [200], "you_give": [100], "you_get_count": 1, "you_give_count": 1}
+    ]
+
+    # Partner no longer wants anything the user owns
+    index.wishlist_removed(2, 100)
+    assert index.find_partners(1) == []
+
+
+def test_ranking_prefers_balanced_trades():
+    index = _index()
+    for artwork_id in (10, 11, 12):
+        index.collection_added(1, artwork_id)
+    for artwork_id in (20, 21, 22):
+        index.wishlist_added(1, artwork_id)
+
+    # Partner 2: gets 3 of the user's wishes but only wants 1 artwork back
+    _mutual(index, 1, 2)
+    for artwork_id in (20, 21, 22):
+        index.collection_added(2, artwork_id)
+    index.wishlist_added(2, 10)
+
+    # Partner 3: 2 each way
+    _mutual(index, 1, 3)
+    for artwork_id in (20, 21):
+        index.collection_added(3, artwork_id)
+    for artwork_id in (11, 12):
+        index.wishlist_added(3, artwork_id)
+
+    assert [match["user_id"] for match in index.find_partners(1)] == [3, 2]
+    assert index.find_partners(1, limit=1)[0]["user_id"] == 3
+
+
+def test_completed_trade_moves_ownership():
+    index = _index()
+    _mutual(index, 1, 2)
+    index.collection_added(1, 100)
+    index.collection_added(2, 200)
+    index.wishlist_added(1, 200)
+    index.wishlist_added(2, 100)
+    assert len(index.find_partners(2)) == 1
+
+    index.trade_completed(1, 2, 100, 200)
+    # Each side now owns what it wished for, so there is nothing left to trade
+    assert index.find_partners(1) == [] and index.find_partners(2) == []
+
+
+def test_deletes_drop_every_reference():
+    index = _index()
+    _mutual(index, 1, 2)
+    index.collection_added(1, 100)
+    index.collection_added(2, 200)
+    index.wishlist_added(1, 200)
+    index.wishlist_added(2, 100)
+
+    index.artwork_deleted(200)
+    assert index.find_partners(1) == []
+
+    index.collection_added(2, 201)
+    index.wishlist_added(1, 201)
+    assert len(index.find_partners(1)) == 1
+    index.user_deleted(2)
+    assert index.find_partners(1) == []
+    assert 2 not in index._followers.get(1, set())
+
+
+def test_lookup_with_thousands_of_items_is_fast():
+    index = _index()
+    user_id = 0
+    for artwork_id in range(5000):
+        index.collection_added(user_id, artwork_id)
+        index.wishlist_added(user_id, 10000 + artwork_id)
+    for partner_id in range(1, 2001):
+        _mutual(index, user_id, partner_id)
+        for offset in range(10):
+            index.collection_added(partner_id, 10000 + (partner_id * 7 + offset) % 5000)
+            index.wishlist_added(partner_id, (partner_id * 13 + offset) % 5000)
+    # Popular artwork owned by many non-friends
+    for stranger_id in range(10000, 30000):
+        index.collection_added(stranger_id, 10000)
+
+    started = time.perf_counter()
+    matches = index.find_partners(user_id)
+    elapsed = time.perf_counter() - started
+
+    assert len(matches) == 20
+    assert all(match["you_get_count"] == 10 and match["you_give_count"] == 10 for match in matches)
+    assert elapsed < 0.05
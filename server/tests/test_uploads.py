@@ -0,0 +1,293 @@
+"""
+Upload flow tests against the local disk storage backend, fully offline:
+the database session and user lookup are replaced with in-memory fakes.
+Linking artworks to a pending job needs queries, so those run on PostgreSQL.
+"""
+
+import hashlib
+import io
+import sys
+
+import pytest
+from PIL import Image
+from flask_jwt_extended import create_access_token
+
+from server.app import app
+from server.extensions import db
+from server.routes import upload as upload_routes
+from server.services import auth_helper
+from server.services.background_jobs import thumbnail_pool
+from server.services.storage import LocalStorage
+from server.services.content_hash import HashingSpooledFile, upload_sha256
+from server.models.thumbnail_job import ThumbnailJob, ThumbnailJobArtwork
+from server.models.uploaded_blob import UploadedBlob
+
+ARTIST_ID = 5
+
+
+class _FakeUser:
+    user_id = ARTIST_ID
+    role = 'artist'
+
+
+class _FakeUserModel:
+    class query:
+        @staticmethod
+        def get(user_id):
+            return _FakeUser() if int(user_id) == ARTIST_ID else None
+
+
+@pytest.fixture
+def upload_env(tmp_path, monkeypatch, fake_execute):
+    storage = LocalStorage(tmp_path, 'http://testserver/api/files')
+    monkeypatch.setitem(app.extensions, 'storage', storage)
+    monkeypatch.setitem(app.config, 'IMAGE_VARIANT_SIZES', {'thumbnail': 100, 'card': 300})
+    monkeypatch.setattr(auth_helper, 'User', _FakeUserModel)
+    # Both JWT user_lookup_loaders (app.py and routes/auth.py) load the user eagerly
+    monkeypatch.setattr(sys.modules['server.app'], 'User', _FakeUserModel)
+    monkeypatch.setattr(sys.modules['server.routes.auth'], 'User', _FakeUserModel)
+
+    rows = {}
+
+    def primary_key(obj):
+        return obj.job_id if isinstance(obj, ThumbnailJob) else obj.sha256
+
+    monkeypatch.setattr(db.session, 'add', lambda obj: rows.__setitem__((type(obj), primary_key(obj)), obj))
+    monkeypatch.setattr(db.session, 'delete', lambda obj: rows.pop((type(obj), primary_key(obj))))
+    monkeypatch.setattr(db.session, 'get', lambda model, key, **kwargs: rows.get((model, key)))
+    for name in ('flush', 'commit', 'rollback'):
+        monkeypatch.setattr(db.session, name, lambda: None)
+    fake_execute.results.append([])  # No artworks linked to the job
+
+    with app.app_context():
+        token = create_access_token(identity=ARTIST_ID)
+    yield app.test_client(), {'Authorization': f'Bearer {token}'}, tmp_path, rows
+    thumbnail_pool.shutdown()
+
+
+def _png(size=(640, 480)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (10, 120, 200)).save(buffer, format='PNG')
+    buffer.seek(0)
+    return buffer
+
+
+def test_upload_stores_original_and_variants_on_disk(upload_env):
+    client, headers, root, rows = upload_env
+    response = client.post('/api/upload-image', headers=headers,
+                           data={'image': (_png(), 'sunset.png')}, content_type='multipart/form-data')
+
+    assert response.status_code == 202
+    body = response.get_json()
+    job_id = body['thumbnailJob']['jobId']
+    assert body['imageUrl'] == f'http://testserver/api/files/artworks/{job_id}/sunset.png'
+    assert response.headers['Location'].endswith(f'/api/upload-image/jobs/{job_id}')
+    assert (root / 'artworks' / job_id / 'sunset.png').exists()
+
+    thumbnail_pool.shutdown()  # Wait for the background job
+    job = rows[(ThumbnailJob, job_id)]
+    assert job.status == 'DONE'
+    assert job.thumbnail_url == f'http://testserver/api/files/artworks/{job_id}/variants/thumbnail.webp'
+    assert job.variants['card']['width'] == 300
+    for name in ('thumbnail.webp', 'thumbnail.jpg', 'card.webp', 'card.jpg'):
+        assert (root / 'artworks' / job_id / 'variants' / name).exists()
+
+    status = client.get(f'/api/upload-image/jobs/{job_id}', headers=headers)
+    assert status.status_code == 200
+    assert status.get_json()['status'] == 'DONE'
+
+    served = client.get(f'/api/files/artworks/{job_id}/variants/card.webp')
+    assert served.status_code == 200
+    assert Image.open(io.BytesIO(served.data)).size == (300, 225)
+
+
+def test_upload_rejects_disallowed_types(upload_env):
+    client, headers, root, _ = upload_env
+    response = client.post('/api/upload-image', headers=headers,
+                           data={'image': (io.BytesIO(b'#!/bin/sh'), 'run.sh')}, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert not any(root.iterdir())
+
+
+def test_undecodable_image_marks_the_job_failed(upload_env):
+    client, headers, _, rows = upload_env
+    response = client.post('/api/upload-image', headers=headers,
+                           data={'image': (io.BytesIO(b'not really a png'), 'broken.png')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202
+    thumbnail_pool.shutdown()
+    job = rows[(ThumbnailJob, response.get_json()['thumbnailJob']['jobId'])]
+    assert job.status == 'FAILED'
+    assert job.thumbnail_url is None
+
+
+def _upload(client, headers, data, name='sunset.png'):
+    return client.post('/api/upload-image', headers=headers,
+                       data={'image': (io.BytesIO(data), name)}, content_type='multipart/form-data')
+
+
+def test_reupload_of_the_same_bytes_is_deduplicated(upload_env):
+    client, headers, root, rows = upload_env
+    data = _png().getvalue()
+    first = _upload(client, headers, data)
+    thumbnail_pool.shutdown()
+    job_id = first.get_json()['thumbnailJob']['jobId']
+
+    blob = rows[(UploadedBlob, hashlib.sha256(data).hexdigest())]
+    assert blob.size_bytes == len(data)
+    assert blob.thumbnail_url == rows[(ThumbnailJob, job_id)].thumbnail_url
+    stored = sorted(str(path) for path in root.rglob('*'))
+
+    second = _upload(client, headers, data, name='sunset-copy.png')
+    assert second.status_code == 200
+    body = second.get_json()
+    assert body['deduplicated'] is True
+    assert body['imageUrl'] == first.get_json()['imageUrl']
+    assert body['thumbnailUrl'] == blob.thumbnail_url
+    assert body['variants'] == blob.variants
+    assert blob.upload_count == 2
+    # Nothing new stored or queued
+    assert sorted(str(path) for path in root.rglob('*')) == stored
+    assert sum(1 for model, _ in rows if model is ThumbnailJob) == 1
+
+
+def test_reupload_while_variants_render_returns_the_pending_job(upload_env):
+    client, headers, _, rows = upload_env
+    data = _png().getvalue()
+    blob = UploadedBlob(sha256=hashlib.sha256(data).hexdigest(), size_bytes=len(data), image_url='http://x/a.png',
+                        job_id='job-1', upload_count=1)
+    job = ThumbnailJob(job_id='job-1', user_id=ARTIST_ID, image_url='http://x/a.png', status='QUEUED')
+    rows[(UploadedBlob, blob.sha256)] = blob
+    rows[(ThumbnailJob, 'job-1')] = job
+
+    response = _upload(client, headers, data)
+    assert response.status_code == 202
+    assert response.get_json()['thumbnailJob']['jobId'] == 'job-1'
+    assert response.get_json()['thumbnailUrl'] == 'http://x/a.png'
+
+
+def test_worker_fills_in_every_linked_artwork(upload_env, fake_execute, monkeypatch):
+    _, _, _, rows = upload_env
+    rows[(ThumbnailJob, 'job-1')] = ThumbnailJob(job_id='job-1', user_id=ARTIST_ID, image_url='http://x/a.png',
+                                                 status='QUEUED')
+    fake_execute.results[:] = [[11, 12], []]
+    indexed = []
+    monkeypatch.setattr(upload_routes.near_duplicate_index, 'add', lambda artwork_id, value: indexed.append(artwork_id))
+    monkeypatch.setattr(upload_routes.color_index, 'artwork_saved', lambda artwork_id, palette: None)
+
+    with app.app_context():
+        upload_routes.generate_thumbnail_job('job-1', _png().getvalue(), 'a.png', 'job-1')
+
+    assert len(fake_execute.sql) == 2
+    assert all('thumbnail_job_artworks.job_id' in sql for sql in fake_execute.sql)
+    assert indexed == [11, 12]
+
+
+def test_every_artwork_from_a_rendering_upload_is_filled_in(rows, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.extensions, 'storage', LocalStorage(tmp_path, 'http://testserver/api/files'))
+    artist, patron = rows.user('artist'), rows.user('artist')
+    image_url = 'http://testserver/api/files/artworks/job-1/original.png'
+    db.session.add(ThumbnailJob(job_id='job-1', user_id=artist.user_id, image_url=image_url, status='QUEUED'))
+    db.session.flush()
+    # The second upload of the same bytes was deduplicated onto the first one's job
+    first, second = rows.artwork(artist, image_url=image_url), rows.artwork(patron, image_url=image_url)
+    assert ThumbnailJob.attach_artwork(image_url, first.artwork_id) is None
+    assert ThumbnailJob.attach_artwork(image_url, second.artwork_id) is None
+    db.session.commit()
+
+    upload_routes.generate_thumbnail_job('job-1', _png().getvalue(), 'a.png', 'job-1')
+
+    db.session.expire_all()
+    job = db.session.get(ThumbnailJob, 'job-1')
+    for artwork in (first, second):
+        assert artwork.image_variants == job.variants and artwork.image_variants
+        assert artwork.thumbnail_url == job.thumbnail_url
+        assert (artwork.width, artwork.height) == (640, 480)
+        assert artwork.perceptual_hash == job.perceptual_hash and artwork.palette == job.palette
+        assert artwork.placeholder == job.placeholder
+    assert db.session.query(ThumbnailJobArtwork).filter_by(job_id='job-1').count() == 2
+
+
+def test_failed_variants_are_not_reused(upload_env):
+    client, headers, _, rows = upload_env
+    data = _png().getvalue()
+    content_hash = hashlib.sha256(data).hexdigest()
+    rows[(UploadedBlob, content_hash)] = UploadedBlob(
+        sha256=content_hash, size_bytes=len(data), image_url='http://x/a.png', job_id='job-1', upload_count=1
+    )
+    rows[(ThumbnailJob, 'job-1')] = ThumbnailJob(job_id='job-1', user_id=ARTIST_ID, image_url='http://x/a.png',
+                                                 status='FAILED')
+
+    response = _upload(client, headers, data)
+    assert response.status_code == 202
+    thumbnail_pool.shutdown()
+    blob = rows[(UploadedBlob, content_hash)]
+    assert blob.job_id == response.get_json()['thumbnailJob']['jobId']
+    assert blob.image_url == response.get_json()['imageUrl']
+    assert blob.thumbnail_url is not None
+
+
+def test_blob_is_published_only_once_the_original_is_stored(upload_env, monkeypatch):
+    client, headers, _, rows = upload_env
+    storage = app.extensions['storage']
+    real_save = storage.save
+    published_while_storing = []
+
+    def save(file_obj, key, content_type):
+        if '/variants/' not in key:
+            published_while_storing.append(any(model is UploadedBlob for model, _ in rows))
+        return real_save(file_obj, key, content_type)
+
+    monkeypatch.setattr(storage, 'save', save)
+    data = _png().getvalue()
+    response = _upload(client, headers, data)
+    thumbnail_pool.shutdown()
+
+    assert response.status_code == 202 and published_while_storing == [False]
+    blob = rows[(UploadedBlob, hashlib.sha256(data).hexdigest())]
+    assert blob.image_url == response.get_json()['imageUrl'] and blob.thumbnail_url is not None
+
+
+def test_failed_original_is_never_offered_for_reuse(upload_env, monkeypatch):
+    client, headers, _, rows = upload_env
+    monkeypatch.setattr(upload_routes, 'store_file', lambda *args: (None, "S3 upload failed."))
+
+    assert _upload(client, headers, _png().getvalue()).status_code == 500
+    thumbnail_pool.shutdown()
+    assert not rows  # No blob for a re-upload to reuse, and the job is gone
+
+
+@pytest.mark.parametrize('worker_finishes_first', [True, False])
+def test_failed_original_leaves_no_variants_behind(upload_env, monkeypatch, worker_finishes_first):
+    client, headers, root, rows = upload_env
+    deferred = []
+    # False runs the job inline, before the original is stored; otherwise it runs after the discard
+    monkeypatch.setattr(thumbnail_pool, 'try_submit',
+                        lambda *job: not worker_finishes_first and not deferred.append(job))
+    monkeypatch.setattr(upload_routes, 'store_file', lambda *args: (None, "S3 upload failed."))
+
+    assert _upload(client, headers, _png().getvalue()).status_code == 500
+    with app.app_context():
+        for function, *args in deferred:
+            function(*args)
+
+    assert not rows
+    assert not [path for path in root.rglob('*') if path.is_file()]
+
+
+def test_upload_buffer_hashes_while_receiving():
+    data = b'abc' * 400000  # Past the in-memory threshold, so it rolls over to disk
+    buffer = HashingSpooledFile()
+    for start in range(0, len(data), 65536):
+        buffer.write(data[start:start + 65536])
+    buffer.seek(0)
+
+    assert buffer.sha256 == hashlib.sha256(data).hexdigest()
+    assert buffer.bytes_received == len(data)
+    assert buffer.read() == data
+
+    class _Upload:
+        stream = io.BytesIO(data)
+
+    assert upload_sha256(_Upload) == hashlib.sha256(data).hexdigest()
+    assert _Upload.stream.tell() == 0